@@ -0,0 +1,137 @@
+"""
+JSON解析微基准：分层 parse_json vs 旧流程（清理 → markdown AST → yaml）
+Micro-benchmark for parse_json over raw LLM responses from game_logs.json files
+
+语料取自日志目录下所有 game_logs.json 中记录的原始响应，并按所在字段对应到
+ACTION_PROMPTS_AND_SCHEMAS 中的响应schema。找不到日志时使用合成语料。
+
+用法 / Usage:
+    python benchmarks/bench_parse_json.py [LOG_DIR ...] [--repeat 5]
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.config.settings import settings  # noqa: E402
+from src.core.game.prompts import ACTION_PROMPTS_AND_SCHEMAS  # noqa: E402
+from src.utils.helpers import (  # noqa: E402
+    clean_mixed_language_response,
+    parse_json,
+    parse_json_markdown,
+    parse_json_str,
+    validate_json,
+)
+
+# RoundLog 字段 -> 行动
+LOG_FIELD_ACTIONS = {
+    "eliminate": "remove",
+    "investigate": "investigate",
+    "protect": "protect",
+    "bid": "bid",
+    "debate": "debate",
+    "votes": "vote",
+    "summaries": "summarize",
+}
+
+Sample = Tuple[str, str]  # (行动, 原始响应)
+
+
+def _lm_logs(field: str, value: Any) -> List[Dict[str, Any]]:
+    """取出 RoundLog 某个字段中的 LmLog 字典"""
+    if value is None:
+        return []
+    if field in ("eliminate", "investigate", "protect"):
+        return [value]
+    if field == "votes":
+        return [vote["log"] for votes in value for vote in votes if vote.get("log")]
+    # bid, debate, summaries: [(玩家, LmLog), ...]
+    return [entry[1] for entry in value if len(entry) == 2 and isinstance(entry[1], dict)]
+
+
+def load_corpus(directories: List[Path]) -> List[Sample]:
+    samples: List[Sample] = []
+    for directory in directories:
+        for path in sorted(directory.rglob("game_logs.json")):
+            try:
+                with open(path, "r", encoding="utf-8") as file:
+                    round_logs = json.load(file)
+            except (OSError, ValueError):
+                continue
+            for round_log in round_logs:
+                for field, action in LOG_FIELD_ACTIONS.items():
+                    for log in _lm_logs(field, round_log.get(field)):
+                        if isinstance(log.get("raw_resp"), str) and log["raw_resp"]:
+                            samples.append((action, log["raw_resp"]))
+    return samples
+
+
+def synthetic_corpus() -> List[Sample]:
+    """没有游戏日志时使用的合成语料（覆盖常见的响应形态）"""
+    reasoning = "根据昨晚的情况和大家的发言，我认为{Bob}的说法前后矛盾，需要重点关注。" * 3
+    body = json.dumps({"reasoning": reasoning, "vote": "Bob"}, ensure_ascii=False)
+    pretty = json.dumps({"reasoning": reasoning, "vote": "Bob"}, ensure_ascii=False, indent=2)
+    return [("vote", body)] * 80 + [
+        ("vote", pretty),
+        ("vote", f"```json\n{pretty}\n```"),
+        ("vote", f"好的，以下是我的回答：\n```json\n{body}\n```\n希望对你有帮助。"),
+        ("vote", f"我的决定如下 {body} 以上。"),
+        ("vote", "{reasoning: 怀疑Bob, vote: Bob}"),
+    ] * 4
+
+
+def legacy_parse_json(text: str) -> Optional[Any]:
+    """旧流程（不含调试输出）：先清理，再解析markdown，最后用yaml解析"""
+    cleaned = clean_mixed_language_response(text)
+    return parse_json_markdown(cleaned) or parse_json_str(cleaned)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("log_dirs", nargs="*", type=Path, help="包含 game_logs.json 的目录（递归查找）")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.log_dirs or [settings.paths.logs_dir])
+    source = f"{len(corpus)} 条游戏日志响应"
+    if not corpus:
+        corpus = synthetic_corpus()
+        source = f"未找到 game_logs.json，使用 {len(corpus)} 条合成响应"
+    schemas = {action: schema for action, (_, schema) in ACTION_PROMPTS_AND_SCHEMAS.items()}
+    print(f"语料: {source}，按行动: {dict(Counter(action for action, _ in corpus))}")
+
+    valid_old = valid_new = mismatched = 0
+    for action, raw in corpus:
+        old, new = legacy_parse_json(raw), parse_json(raw, schemas[action])
+        valid_old += validate_json(old, schemas[action]) is None
+        valid_new += validate_json(new, schemas[action]) is None
+        mismatched += old != new and validate_json(old, schemas[action]) is None
+    print(f"符合schema: 旧流程 {valid_old}/{len(corpus)} | 分层解析 {valid_new}/{len(corpus)}"
+          f" | 旧流程有效但结果不同 {mismatched}")
+
+    def run_old():
+        for _, raw in corpus:
+            legacy_parse_json(raw)
+
+    def run_new():
+        for action, raw in corpus:
+            parse_json(raw, schemas[action])
+
+    old = min(timeit.repeat(run_old, number=args.repeat, repeat=3)) / args.repeat
+    new = min(timeit.repeat(run_new, number=args.repeat, repeat=3)) / args.repeat
+    per = 1_000_000 / len(corpus)
+    print(
+        f"每条响应  旧流程 {old * per:9.1f} us | 分层解析 {new * per:9.1f} us | "
+        f"加速 {old / new:5.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
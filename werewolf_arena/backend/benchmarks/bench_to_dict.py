@@ -0,0 +1,102 @@
+"""
+序列化微基准：to_dict 直接构建 vs JSON 编码/解码往返
+Micro-benchmark for to_dict on a synthetic 10-round game
+
+用法 / Usage:
+    python benchmarks/bench_to_dict.py [--rounds 10] [--repeat 50]
+"""
+
+import argparse
+import json
+import random
+import sys
+import timeit
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.core.models.game_state import JsonEncoder, Round, State, to_dict  # noqa: E402
+from src.core.models.logs import LmLog, RoundLog, VoteLog  # noqa: E402
+from src.core.models.player import Doctor, Seer, Villager, Werewolf  # noqa: E402
+
+NAMES = ["Alice", "Bob", "Cara", "Dan", "Eve", "Finn"]
+PROMPT = "你正在玩一个社交推理游戏狼人杀。" * 200  # 约 3KB 的提示词
+SPEECH = "我觉得昨晚的情况很可疑，需要大家仔细分析每个人的发言。" * 4
+
+
+def _log(key: str, value: str) -> LmLog:
+    return LmLog(
+        prompt=PROMPT,
+        raw_resp=json.dumps({"reasoning": SPEECH, key: value}, ensure_ascii=False),
+        result={"reasoning": SPEECH, key: value},
+    )
+
+
+def build_game(num_rounds: int) -> tuple:
+    """构造一个 num_rounds 轮的完整游戏状态与日志"""
+    random.seed(0)
+    seer = Seer(NAMES[0], model="model-a")
+    doctor = Doctor(NAMES[1], model="model-b")
+    wolf = Werewolf(NAMES[2], model="model-c")
+    villagers = [Villager(name, model="model-d") for name in NAMES[3:]]
+    players = [seer, doctor, wolf] + villagers
+    for player in players:
+        player.initialize_game_view(0, list(NAMES), None)
+
+    state = State("session_bench", seer, doctor, villagers, [wolf])
+    logs = []
+    for r in range(num_rounds):
+        round_ = Round()
+        round_.players = list(NAMES)
+        round_.eliminated, round_.protected, round_.unmasked = NAMES[3], NAMES[4], NAMES[2]
+        round_log = RoundLog()
+        round_log.eliminate = _log("remove", NAMES[3])
+        round_log.protect = _log("protect", NAMES[4])
+        round_log.investigate = _log("investigate", NAMES[2])
+        for name in NAMES:
+            round_.debate.append([name, SPEECH])
+            round_log.debate.append((name, _log("say", SPEECH)))
+            round_log.summaries.append((name, _log("summary", SPEECH)))
+        round_.votes.append({name: random.choice(NAMES) for name in NAMES})
+        round_log.votes.append(
+            [VoteLog(name, vote, _log("vote", vote)) for name, vote in round_.votes[-1].items()]
+        )
+        state.rounds.append(round_)
+        logs.append(round_log)
+        for player in players:
+            player.gamestate.round_number = r
+            for i in range(5):
+                player._add_observation(f"观察{i}：{SPEECH}")
+            player.gamestate.attach_debate(round_.debate)
+        seer.previously_unmasked[NAMES[2]] = "Werewolf"
+    return state, logs
+
+
+def json_round_trip(o):
+    return json.loads(JsonEncoder().encode(o))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    state, logs = build_game(args.rounds)
+
+    # 输出必须完全一致
+    assert to_dict(state) == json_round_trip(state)
+    assert to_dict(logs) == json_round_trip(logs)
+
+    for label, target in (("State", state), ("List[RoundLog]", logs)):
+        old = min(timeit.repeat(lambda: json_round_trip(target), number=args.repeat, repeat=3))
+        new = min(timeit.repeat(lambda: to_dict(target), number=args.repeat, repeat=3))
+        print(
+            f"{label:16s} json往返 {old / args.repeat * 1000:8.3f} ms | "
+            f"直接构建 {new / args.repeat * 1000:8.3f} ms | 加速 {old / new:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
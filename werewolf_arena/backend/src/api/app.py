@@ -3,6 +3,8 @@ FastAPI主应用
 FastAPI Main Application
 """
 
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
@@ -10,6 +12,10 @@ from contextlib import asynccontextmanager
 from src.config import settings
 from src.services.llm.client import LLMClient
 from src.services.llm.generator import set_global_llm_client
+from src.services.game_manager.notification_bus import notification_bus
+from src.services.game_manager.session_manager import game_manager
+from src.services.game_manager.shared_backend import shared_backend
+from src.services.llm.http_pool import http_pool
 
 
 @asynccontextmanager
@@ -34,12 +40,24 @@ async def lifespan(app: FastAPI):
         print(f"❌ Failed to initialize LLM client: {e}")
         print("⚠️  Game functionality will be limited")
 
+    # WebSocket 通知总线在服务器事件循环上分发
+    notification_bus.bind()
+
+    # 多 worker 部署时与其他 worker 共享会话和事件
+    await shared_backend.start()
+    print(f"🔗 Shared backend: {shared_backend.kind}")
+
     print("🎮 Ready to start games!")
 
     yield
 
     # 关闭时
     print("🛑 Shutting down Werewolf Arena API...")
+    if game_manager.processes is not None:
+        await asyncio.to_thread(game_manager.processes.shutdown)
+    await notification_bus.close()
+    await shared_backend.close()
+    await http_pool.aclose()
 
 
 # 创建FastAPI应用
@@ -18,7 +18,10 @@ from src.api.v1.schemas.game import (
     PlayerInfo,
     RoundSummary,
 )
+from src.core.models.game_state import to_dict
+from src.services.game_manager.scheduler import SchedulerFull
 from src.services.game_manager.session_manager import game_manager
+from src.services.logger.game_logger import load_game
 
 router = APIRouter()
 
@@ -30,23 +33,43 @@ async def start_game(config: GameConfigRequest):
     Start a new game with specified configuration
     """
     try:
+        # 排队已满时在创建会话前拒绝
+        game_manager.scheduler.check()
+
         # 创建游戏会话
         session = game_manager.create_game(
             villager_model=config.villager_model,
             werewolf_model=config.werewolf_model,
             num_players=config.num_players or 6,
             max_debate_turns=config.max_debate_turns or 2,
+            game_mode=config.game_mode,
+            priority=config.priority,
         )
 
-        # 启动游戏（后台运行）
-        success = game_manager.start_game(session.session_id)
+        # 启动游戏（后台运行，达到运行上限时排队）
+        try:
+            scheduled = game_manager.start_game(session.session_id)
+        except SchedulerFull:
+            game_manager.remove_session(session.session_id)
+            raise
 
-        if not success:
+        if not scheduled:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to start game"
             )
 
+        if scheduled == "queued":
+            return GameStartResponse(
+                session_id=session.session_id,
+                status="queued",
+                message=(
+                    f"Game queued at position {game_manager.scheduler.position(session.session_id)} "
+                    f"with session ID: {session.session_id}"
+                ),
+                log_directory=session.log_dir
+            )
+
         return GameStartResponse(
             session_id=session.session_id,
             status="started",
@@ -54,6 +77,14 @@ async def start_game(config: GameConfigRequest):
             log_directory=session.log_dir
         )
 
+    except SchedulerFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(int(e.retry_after))},
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -107,6 +138,8 @@ async def get_game_status(session_id: str):
         game_status = "completed"
     elif state.error_message:
         game_status = "error"
+    elif session.queued:
+        game_status = "queued"
     elif not session.is_running:
         game_status = "stopped"
 
@@ -117,7 +150,8 @@ async def get_game_status(session_id: str):
         winner=state.winner,
         players=players,
         rounds=rounds,
-        error_message=state.error_message
+        error_message=state.error_message,
+        queue_position=game_manager.scheduler.position(session_id),
     )
 
 
@@ -135,7 +169,7 @@ async def stop_game(session_id: str):
             detail=f"Game session {session_id} not found"
         )
 
-    if not session.is_running:
+    if not session.is_running and not session.queued:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Game is not running"
@@ -163,21 +197,20 @@ async def list_games():
     列出所有游戏会话
     List all game sessions
     """
-    sessions = game_manager.get_all_sessions()
+    # 使用摘要，已换出的会话不会被重新加载
+    sessions = game_manager.get_session_summaries()
 
     games = []
-    for session_id, session in sessions.items():
-        game_status = "running" if session.is_running else (
-            "completed" if session.state.winner else "stopped"
-        )
-
+    for session_id, summary in sessions.items():
         games.append({
             "session_id": session_id,
-            "status": game_status,
-            "started_at": session.started_at.isoformat(),
-            "current_round": len(session.state.rounds),
-            "winner": session.state.winner,
-            "log_directory": session.log_dir
+            "status": summary.status,
+            "started_at": summary.started_at.isoformat(),
+            "current_round": summary.current_round,
+            "winner": summary.winner,
+            "log_directory": summary.log_dir,
+            "resident": not summary.evicted,
+            "resident_bytes": summary.resident_bytes,
         })
 
     return GameListResponse(
@@ -192,23 +225,22 @@ async def delete_game_session(session_id: str):
     删除游戏会话（仅删除内存中的会话，不删除日志）
     Delete game session from memory (logs are preserved)
     """
-    session = game_manager.get_session(session_id)
+    summary = game_manager.get_session_summaries().get(session_id)
 
-    if not session:
+    if not summary:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Game session {session_id} not found"
         )
 
-    if session.is_running:
+    if summary.status in ("running", "queued"):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot delete a running game. Stop it first."
         )
 
     # 从管理器中移除会话
-    with game_manager._lock:
-        del game_manager._sessions[session_id]
+    game_manager.remove_session(session_id)
 
     return {
         "message": f"Session {session_id} deleted successfully",
@@ -230,20 +262,15 @@ async def get_game_logs(session_id: str):
             detail=f"Game session {session_id} not found"
         )
 
-    try:
-        # 读取日志文件
-        logs_file = Path(session.log_dir) / "game_logs.json"
-
-        if not logs_file.exists():
-            return []  # 如果日志文件不存在，返回空数组
-
-        with open(logs_file, 'r', encoding='utf-8') as f:
-            content = f.read().strip()
-            if not content:
-                return []  # 如果文件为空，返回空数组
+    # 日志按增量写入磁盘，本进程中运行的会话直接返回内存中的日志
+    # （工作进程中运行的游戏只有磁盘上的日志）
+    if session.in_process:
+        return to_dict(session.gamemaster.logs)
 
-            logs = json.loads(content)
-            return logs if isinstance(logs, list) else []
+    try:
+        # 从快照和增量日志（或旧版日志文件）加载
+        _, logs = load_game(session.log_dir)
+        return to_dict(logs)
 
     except Exception as e:
         # 如果读取失败，返回空数组而不是抛出错误
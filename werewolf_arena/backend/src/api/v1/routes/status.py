@@ -11,6 +11,14 @@ from datetime import datetime
 
 from src.config.settings import settings
 from src.services.game_manager.session_manager import game_manager
+from src.services.game_manager.notification_bus import notification_bus
+from src.services.game_manager.shared_backend import shared_backend
+from src.services.llm.template_cache import template_cache
+from src.services.logger import structured
+from src.services.llm.http_pool import http_pool
+from src.services.llm.admission import admission_controller
+from src.services.llm.resilience import resilience
+from src.services.llm.response_cache import response_cache
 
 router = APIRouter()
 
@@ -40,9 +48,10 @@ async def server_info() -> Dict[str, Any]:
     disk = psutil.disk_usage('/')
 
     # 获取游戏会话统计
-    sessions = game_manager.get_all_sessions()
+    sessions = game_manager.get_session_summaries()
     running_games = sum(1 for s in sessions.values() if s.is_running)
-    completed_games = sum(1 for s in sessions.values() if s.state.winner)
+    queued_games = sum(1 for s in sessions.values() if s.status == "queued")
+    completed_games = sum(1 for s in sessions.values() if s.winner)
 
     return {
         "service": {
@@ -73,9 +82,15 @@ async def server_info() -> Dict[str, Any]:
         "games": {
             "total_sessions": len(sessions),
             "running": running_games,
+            "queued": queued_games,
             "completed": completed_games,
-            "stopped": len(sessions) - running_games - completed_games
+            "stopped": len(sessions) - running_games - queued_games - completed_games
         },
+        "sessions": game_manager.stats(),
+        "scheduler": game_manager.scheduler.stats(),
+        "shared": shared_backend.stats(),
+        "notifications": notification_bus.stats(),
+        "logging": structured.stats(),
         "config": {
             "max_debate_turns": settings.game.max_debate_turns,
             "default_threads": settings.game.default_threads,
@@ -90,7 +105,7 @@ async def game_stats() -> Dict[str, Any]:
     游戏统计信息
     Get game statistics
     """
-    sessions = game_manager.get_all_sessions()
+    sessions = game_manager.get_session_summaries()
 
     if not sessions:
         return {
@@ -104,17 +119,16 @@ async def game_stats() -> Dict[str, Any]:
     total_rounds = 0
     model_usage = {}
 
-    for session in sessions.values():
-        if session.state.winner == "Villagers":
+    for summary in sessions.values():
+        if summary.winner == "Villagers":
             villagers_wins += 1
-        elif session.state.winner == "Werewolves":
+        elif summary.winner == "Werewolves":
             werewolves_wins += 1
 
-        total_rounds += len(session.state.rounds)
+        total_rounds += summary.current_round
 
         # 统计模型使用
-        for player in session.state.players.values():
-            model = player.model
+        for model in summary.models:
             model_usage[model] = model_usage.get(model, 0) + 1
 
     avg_rounds = total_rounds / len(sessions) if sessions else 0
@@ -136,3 +150,19 @@ async def game_stats() -> Dict[str, Any]:
         },
         "model_usage": model_usage
     }
+
+
+@router.get("/llm")
+async def llm_stats() -> Dict[str, Any]:
+    """
+    LLM调用相关统计
+    Get LLM pipeline statistics (prompt template cache, HTTP connection pool,
+    admission control, response cache, hedging and failover)
+    """
+    return {
+        "template_cache": template_cache.stats(),
+        "http_pool": http_pool.stats(),
+        "admission": admission_controller.stats(),
+        "response_cache": response_cache.stats(),
+        "resilience": resilience.stats(),
+    }
@@ -1,24 +1,95 @@
 """
 WebSocket API路由
 WebSocket API Routes for real-time game updates
+
+多 worker 部署时，广播同时经共享后端转发给其他 worker，由它们发送给各自的连接；
+游戏状态更新转发的是游戏数据，增量由接收端按自己客户端确认的版本计算。
+
+带序列号的游戏事件（动作、发言、投票、阶段变化等）在每个会话的环形缓冲区中
+保留最近的一段（转发来的事件同样记录）。断线重连的客户端用
+/ws/{session_id}?since_seq=N&since_version=V 只补发缺失的事件和状态增量；
+缺失的事件已被挤出缓冲区时退回发送完整快照和日志历史。状态历史在连接断开后仍保留，
+没有连接时的状态更新同样记录，单个观众断线重连也能收到增量。
 """
 
-from typing import Dict, List, Optional, Any
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Any, Tuple
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from src.services.game_manager.notification_bus import current_playback_at
 from src.services.game_manager.session_manager import game_manager
+from src.services.game_manager.shared_backend import shared_backend
 from src.services.logger.realtime_logger import realtime_logger
+from src.services.logger.structured import get_logger
 from src.services.game_manager.sequence_manager import sequence_manager, ActionType
+from src.utils.json_patch import make_patch
 import json
 import asyncio
 from datetime import datetime
 
 router = APIRouter()
+logger = get_logger(__name__)
+
+# 每个会话保留的历史版本数，客户端确认的版本超出该范围时发送完整快照；
+# 以及保留历史版本的会话数（按最近写入淘汰，连接断开后仍保留以便重连时发送增量）
+STATE_HISTORY_SIZE = 16
+STATE_HISTORY_SESSIONS = 64
+# 每个会话保留的带序列号事件数，以及保留事件的会话数（按最近写入淘汰）
+EVENT_LOG_SIZE = 1000
+EVENT_LOG_SESSIONS = 256
+
+def _encode(message: dict) -> str:
+    """编码广播消息；headless 模式的游戏事件带上回放时间线位置 playback_at（秒）"""
+    playback_at = current_playback_at.get()
+    if playback_at is not None:
+        message["playback_at"] = playback_at
+    return json.dumps(message)
+
+
+class EventLog:
+    """单个会话最近的带序列号事件（编码后的消息）"""
+
+    def __init__(self, size: int = EVENT_LOG_SIZE):
+        self.size = size
+        self.events: Deque[Tuple[int, str]] = deque()
+        # 已被挤出缓冲区的最大序列号，客户端的 since_seq 小于它时无法补齐
+        self.floor = 0
+
+    @property
+    def last_seq(self) -> int:
+        return self.events[-1][0] if self.events else self.floor
+
+    def append(self, sequence_number: int, text: str) -> None:
+        if sequence_number <= self.floor:
+            return  # 已经淘汰范围内的旧事件（转发延迟）
+        self.events.append((sequence_number, text))
+        while len(self.events) > self.size:
+            self.floor = max(self.floor, self.events.popleft()[0])
+
+    def since(self, since_seq: int) -> Optional[List[str]]:
+        """序列号大于 since_seq 的事件（按序列号排序），有缺失时返回 None"""
+        if since_seq < self.floor or since_seq > self.last_seq:
+            return None
+        return [text for _, text in sorted(
+            (event for event in self.events if event[0] > since_seq), key=lambda event: event[0]
+        )]
+
 
 # WebSocket connection manager
 class ConnectionManager:
-    def __init__(self):
+    def __init__(self, history_size: int = STATE_HISTORY_SIZE, history_sessions: int = STATE_HISTORY_SESSIONS,
+                 event_log_size: int = EVENT_LOG_SIZE, event_log_sessions: int = EVENT_LOG_SESSIONS):
         # Store active connections: {session_id: [websocket1, websocket2, ...]}
         self.active_connections: Dict[str, List[WebSocket]] = {}
+        # 每个客户端最后确认（ack）的状态版本
+        self.acked_versions: Dict[WebSocket, int] = {}
+        # 每个会话最近发送过的游戏数据：{session_id: {version: game_data}}
+        self.state_history: "OrderedDict[str, OrderedDict[int, dict]]" = OrderedDict()
+        self.history_size = history_size
+        self.history_sessions = history_sessions
+        # 每个会话的事件环形缓冲区（断线重连时补发）
+        self.event_logs: "OrderedDict[str, EventLog]" = OrderedDict()
+        self.event_log_size = event_log_size
+        self.event_log_sessions = event_log_sessions
 
     async def connect(self, websocket: WebSocket, session_id: str):
         """Accept and store WebSocket connection"""
@@ -40,6 +111,51 @@ class ConnectionManager:
                 # Clean up empty session entries
                 if len(self.active_connections[session_id]) == 0:
                     del self.active_connections[session_id]
+        self.acked_versions.pop(websocket, None)
+
+    def acknowledge(self, websocket: WebSocket, version: int):
+        """记录客户端已应用的状态版本，之后的更新以该版本为基准发送增量"""
+        self.acked_versions[websocket] = version
+
+    def reset_acknowledgement(self, websocket: WebSocket):
+        """客户端要求重新同步时清除确认版本，下次发送完整快照"""
+        self.acked_versions.pop(websocket, None)
+
+    def _remember_state(self, session_id: str, game_data: dict):
+        version = game_data.get("version")
+        if version is None:
+            return
+        history = self.state_history.get(session_id)
+        if history is None:
+            history = self.state_history[session_id] = OrderedDict()
+            while len(self.state_history) > self.history_sessions:
+                self.state_history.popitem(last=False)
+        self.state_history.move_to_end(session_id)
+        history[version] = game_data
+        history.move_to_end(version)
+        while len(history) > self.history_size:
+            history.popitem(last=False)
+
+    def record_event(self, session_id: str, sequence_number: int, text: str):
+        """把带序列号的事件记入会话的环形缓冲区"""
+        log = self.event_logs.get(session_id)
+        if log is None:
+            log = self.event_logs[session_id] = EventLog(self.event_log_size)
+            while len(self.event_logs) > self.event_log_sessions:
+                self.event_logs.popitem(last=False)
+        self.event_logs.move_to_end(session_id)
+        log.append(sequence_number, text)
+
+    def events_since(self, session_id: str, since_seq: int) -> Optional[List[str]]:
+        """客户端缺失的事件，无法补齐（缓冲区已淘汰或没有记录）时返回 None"""
+        log = self.event_logs.get(session_id)
+        if log is None:
+            return [] if since_seq == 0 else None
+        return log.since(since_seq)
+
+    def last_sequence(self, session_id: str) -> int:
+        log = self.event_logs.get(session_id)
+        return log.last_seq if log is not None else 0
 
     async def send_personal_message(self, message: str, websocket: WebSocket):
         """Send message to specific WebSocket"""
@@ -48,8 +164,10 @@ class ConnectionManager:
         except Exception as e:
             print(f"Error sending personal message: {e}")
 
-    async def broadcast_to_session(self, message: str, session_id: str):
-        """Broadcast message to all connections in a session"""
+    async def broadcast_to_session(self, message: str, session_id: str, relay: bool = True):
+        """Broadcast message to all connections in a session (and to other workers unless relay is False)"""
+        if relay and shared_backend.has_peers():
+            shared_backend.publish("broadcast", {"session_id": session_id, "message": message})
         if session_id in self.active_connections:
             # Create a copy of the list to avoid modification during iteration
             connections = self.active_connections[session_id].copy()
@@ -59,21 +177,104 @@ class ConnectionManager:
                 try:
                     await connection.send_text(message)
                 except Exception as e:
-                    print(f"Error broadcasting to connection in session {session_id}: {e}")
+                    logger.warning("ws.broadcast_failed", session_id=session_id, error=f"{type(e).__name__}: {e}")
                     disconnected_connections.append(connection)
 
             # Remove disconnected connections
             for connection in disconnected_connections:
                 self.disconnect(connection, session_id)
 
-    async def broadcast_game_update(self, session_id: str, game_data: dict):
-        """Broadcast game state update to all connections in a session"""
-        message = {
+    async def broadcast_event(self, session_id: str, message: dict, sequence_number: Optional[int], relay: bool = True):
+        """Broadcast a sequenced game event and keep it in the session's replay buffer"""
+        text = _encode(message)
+        if sequence_number is None:
+            await self.broadcast_to_session(text, session_id, relay=relay)
+            return
+        self.record_event(session_id, sequence_number, text)
+        if relay and shared_backend.has_peers():
+            shared_backend.publish("broadcast", {
+                "session_id": session_id,
+                "message": text,
+                "sequence_number": sequence_number,
+            })
+        await self.broadcast_to_session(text, session_id, relay=False)
+
+    async def broadcast_game_update(self, session_id: str, game_data: dict, relay: bool = True):
+        """Broadcast game state update to all connections in a session
+
+        Clients that acknowledged a version still in the session history get a
+        compact ``game_delta`` (JSON patch against that version); everyone else
+        gets the full ``game_update`` snapshot.
+        """
+        if relay and shared_backend.has_peers():
+            shared_backend.publish("broadcast", {
+                "session_id": session_id,
+                "game_data": game_data,
+                "playback_at": current_playback_at.get(),
+            })
+        version = game_data.get("version")
+        connections = self.active_connections.get(session_id, [])
+        if version is None or not connections:
+            message = {
+                "type": "game_update",
+                "data": game_data,
+                "timestamp": datetime.now().isoformat()
+            }
+            await self.broadcast_to_session(_encode(message), session_id, relay=False)
+            # 没有连接时也记录，断线的客户端重连时可以从确认的版本发送增量
+            self._remember_state(session_id, game_data)
+            return
+
+        history = self.state_history.get(session_id, {})
+        timestamp = datetime.now().isoformat()
+        full_message = None
+        deltas: Dict[int, str] = {}
+        disconnected_connections = []
+
+        for connection in connections.copy():
+            base = self.acked_versions.get(connection)
+            if base == version:
+                continue  # 客户端已经是最新版本
+            if base is not None and base in history:
+                if base not in deltas:
+                    deltas[base] = _encode({
+                        "type": "game_delta",
+                        "data": {
+                            "base_version": base,
+                            "version": version,
+                            "patch": make_patch(history[base], game_data),
+                        },
+                        "timestamp": timestamp
+                    })
+                text = deltas[base]
+            else:
+                if full_message is None:
+                    full_message = _encode({
+                        "type": "game_update",
+                        "data": game_data,
+                        "timestamp": timestamp
+                    })
+                text = full_message
+
+            try:
+                await connection.send_text(text)
+            except Exception as e:
+                logger.warning("ws.broadcast_failed", session_id=session_id, error=f"{type(e).__name__}: {e}")
+                disconnected_connections.append(connection)
+
+        for connection in disconnected_connections:
+            self.disconnect(connection, session_id)
+
+        self._remember_state(session_id, game_data)
+
+    async def send_game_snapshot(self, websocket: WebSocket, session_id: str, game_data: dict):
+        """向单个客户端发送完整快照（连接建立或重新同步时）"""
+        self._remember_state(session_id, game_data)
+        await self.send_personal_message(json.dumps({
             "type": "game_update",
             "data": game_data,
             "timestamp": datetime.now().isoformat()
-        }
-        await self.broadcast_to_session(json.dumps(message), session_id)
+        }), websocket)
 
     async def broadcast_round_complete(self, session_id: str, round_data: dict, next_phase: dict = None):
         """Broadcast round completion to all connections in a session"""
@@ -85,7 +286,7 @@ class ConnectionManager:
             },
             "timestamp": datetime.now().isoformat()
         }
-        await self.broadcast_to_session(json.dumps(message), session_id)
+        await self.broadcast_to_session(_encode(message), session_id)
 
     async def broadcast_game_complete(self, session_id: str, winner: str, final_round: dict, game_state: dict):
         """Broadcast game completion to all connections in a session"""
@@ -98,7 +299,7 @@ class ConnectionManager:
             },
             "timestamp": datetime.now().isoformat()
         }
-        await self.broadcast_to_session(json.dumps(message), session_id)
+        await self.broadcast_to_session(_encode(message), session_id)
 
     async def broadcast_game_complete_v2(self, session_id: str, winner: str, winner_name: str, players_info: dict, round_number: int):
         """Broadcast game completion with player roles to all connections in a session"""
@@ -112,7 +313,7 @@ class ConnectionManager:
             },
             "timestamp": datetime.now().isoformat()
         }
-        await self.broadcast_to_session(json.dumps(message), session_id)
+        await self.broadcast_to_session(_encode(message), session_id)
 
     
     async def broadcast_player_action(self, session_id: str, action_event):
@@ -122,7 +323,7 @@ class ConnectionManager:
             "data": action_event.to_dict(),
             "timestamp": datetime.now().isoformat()
         }
-        await self.broadcast_to_session(json.dumps(message), session_id)
+        await self.broadcast_event(session_id, message, action_event.sequence_number)
 
     async def broadcast_debate_turn(self, session_id: str, player_name: str, dialogue: str, sequence_number: int):
         """Broadcast debate turn with sequence"""
@@ -136,7 +337,7 @@ class ConnectionManager:
             },
             "timestamp": datetime.now().isoformat()
         }
-        await self.broadcast_to_session(json.dumps(message), session_id)
+        await self.broadcast_event(session_id, message, sequence_number)
 
     async def broadcast_vote_cast(self, session_id: str, voter: str, target: str, sequence_number: int):
         """Broadcast individual vote with sequence"""
@@ -150,7 +351,7 @@ class ConnectionManager:
             },
             "timestamp": datetime.now().isoformat()
         }
-        await self.broadcast_to_session(json.dumps(message), session_id)
+        await self.broadcast_event(session_id, message, sequence_number)
 
     async def broadcast_night_action(self, session_id: str, action_type: str, player_name: str, target_name: Optional[str] = None, details: Optional[Dict[str, Any]] = None, sequence_number: Optional[int] = None):
         """Broadcast night action with sequence"""
@@ -167,7 +368,7 @@ class ConnectionManager:
             },
             "timestamp": datetime.now().isoformat()
         }
-        await self.broadcast_to_session(json.dumps(message), session_id)
+        await self.broadcast_event(session_id, message, sequence_number)
 
     async def broadcast_phase_change(self, session_id: str, phase: str, round_number: int, sequence_number: Optional[int] = None):
         """Broadcast phase change with sequence"""
@@ -181,7 +382,7 @@ class ConnectionManager:
             },
             "timestamp": datetime.now().isoformat()
         }
-        await self.broadcast_to_session(json.dumps(message), session_id)
+        await self.broadcast_event(session_id, message, sequence_number)
 
     async def broadcast_player_exile(self, session_id: str, exiled_player: str, round_number: int, sequence_number: Optional[int] = None):
         """Broadcast player exile"""
@@ -195,7 +396,7 @@ class ConnectionManager:
             },
             "timestamp": datetime.now().isoformat()
         }
-        await self.broadcast_to_session(json.dumps(message), session_id)
+        await self.broadcast_event(session_id, message, sequence_number)
 
     async def broadcast_player_summary(self, session_id: str, player_name: str, summary: str, round_number: int, sequence_number: Optional[int] = None):
         """Broadcast player summary"""
@@ -210,7 +411,7 @@ class ConnectionManager:
             },
             "timestamp": datetime.now().isoformat()
         }
-        await self.broadcast_to_session(json.dumps(message), session_id)
+        await self.broadcast_event(session_id, message, sequence_number)
 
     def get_connection_count(self, session_id: str) -> int:
         """Get number of active connections for a session"""
@@ -219,9 +420,93 @@ class ConnectionManager:
 # Global connection manager instance
 manager = ConnectionManager()
 
+
+async def _relay_broadcast(payload: dict):
+    """其他 worker 转发来的广播，发送给本 worker 上该会话的连接"""
+    session_id = payload["session_id"]
+    if payload.get("sequence_number") is not None:
+        # 没有连接时也记录，客户端可能重连到本 worker
+        manager.record_event(session_id, payload["sequence_number"], payload["message"])
+    if not manager.active_connections.get(session_id):
+        if "game_data" in payload:
+            manager._remember_state(session_id, payload["game_data"])
+        return
+    if "game_data" in payload:
+        token = current_playback_at.set(payload.get("playback_at"))
+        try:
+            await manager.broadcast_game_update(session_id, payload["game_data"], relay=False)
+        finally:
+            current_playback_at.reset(token)
+    else:
+        await manager.broadcast_to_session(payload["message"], session_id, relay=False)
+
+
+shared_backend.subscribe("broadcast", _relay_broadcast)
+
+def _snapshot_data(game_session) -> dict:
+    """构建会话当前的完整游戏数据"""
+    return {
+        "game_state": game_session.state.to_dict(),
+        "status": "running" if game_session.is_running else "stopped",
+        "version": game_session.state.version,
+    }
+
+
+async def _send_game_state(websocket: WebSocket, session_id: str, game_session, since_version: Optional[int]):
+    """发送客户端缺失的游戏状态：已是最新时不发送，历史中有该版本时发送增量，否则发送完整快照"""
+    game_data = _snapshot_data(game_session)
+    version = game_data["version"]
+    history = manager.state_history.get(session_id, {})
+    if since_version is not None and since_version == version:
+        manager.acknowledge(websocket, version)
+    elif since_version is not None and since_version in history:
+        manager.acknowledge(websocket, version)
+        manager._remember_state(session_id, game_data)
+        await manager.send_personal_message(json.dumps({
+            "type": "game_delta",
+            "data": {
+                "base_version": since_version,
+                "version": version,
+                "patch": make_patch(history[since_version], game_data),
+            },
+            "timestamp": datetime.now().isoformat()
+        }), websocket)
+    else:
+        await manager.send_game_snapshot(websocket, session_id, game_data)
+
+
+async def _replay_events(websocket: WebSocket, session_id: str, since_seq: int) -> bool:
+    """补发序列号大于 since_seq 的事件，缺失的事件已不在缓冲区时返回 False"""
+    events = manager.events_since(session_id, since_seq)
+    if events is not None:
+        for text in events:
+            await manager.send_personal_message(text, websocket)
+    await manager.send_personal_message(json.dumps({
+        "type": "event_replay",
+        "data": {
+            "since_seq": since_seq,
+            "last_seq": manager.last_sequence(session_id),
+            "replayed": len(events) if events is not None else 0,
+            "complete": events is not None,
+        },
+        "timestamp": datetime.now().isoformat()
+    }), websocket)
+    return events is not None
+
+
 @router.websocket("/ws/{session_id}")
-async def websocket_endpoint(websocket: WebSocket, session_id: str):
-    """WebSocket endpoint for real-time game updates"""
+async def websocket_endpoint(
+    websocket: WebSocket,
+    session_id: str,
+    since_seq: Optional[int] = None,
+    since_version: Optional[int] = None,
+):
+    """WebSocket endpoint for real-time game updates
+
+    Reconnecting clients pass the last event sequence number (``since_seq``)
+    and state version (``since_version``) they applied to receive only what
+    they missed instead of a full snapshot and log history.
+    """
     await manager.connect(websocket, session_id)
 
     try:
@@ -235,20 +520,16 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
             "timestamp": datetime.now().isoformat()
         }), websocket)
 
+        # 重连时先补发缺失的事件，无法补齐时按首次连接处理
+        replayed = since_seq is not None and await _replay_events(websocket, session_id, since_seq)
+
         # Send current game state if game exists
         game_session = game_manager.get_session(session_id)
         if game_session and game_session.state:
-            await manager.send_personal_message(json.dumps({
-                "type": "game_update",
-                "data": {
-                    "game_state": game_session.state.to_dict(),
-                    "status": "running" if game_session.is_running else "stopped"
-                },
-                "timestamp": datetime.now().isoformat()
-            }), websocket)
+            await _send_game_state(websocket, session_id, game_session, since_version if replayed else None)
 
         # Send recent logs
-        recent_logs = realtime_logger.get_logs(session_id, limit=50)
+        recent_logs = None if replayed else realtime_logger.get_logs(session_id, limit=50)
         if recent_logs:
             await manager.send_personal_message(json.dumps({
                 "type": "log_history",
@@ -278,6 +559,19 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
                         # Just acknowledge it silently, no need to respond
                         pass
 
+                    elif message.get("type") == "ack":
+                        # 客户端确认已应用某个状态版本，之后发送增量
+                        version = message.get("version", (message.get("data") or {}).get("version"))
+                        if isinstance(version, int):
+                            manager.acknowledge(websocket, version)
+
+                    elif message.get("type") == "resync":
+                        # 客户端无法应用增量，重新发送完整快照
+                        manager.reset_acknowledgement(websocket)
+                        game_session = game_manager.get_session(session_id)
+                        if game_session and game_session.state:
+                            await manager.send_game_snapshot(websocket, session_id, _snapshot_data(game_session))
+
                     elif message.get("type") == "get_status":
                         # Send current game status
                         game_session = game_manager.get_session(session_id)
@@ -4,7 +4,7 @@ Game-related Pydantic Schemas for API request/response validation
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
 from datetime import datetime
 
 
@@ -14,6 +14,14 @@ class GameConfigRequest(BaseModel):
     werewolf_model: str = Field(..., description="狼人使用的模型ID")
     num_players: Optional[int] = Field(6, description="玩家数量", ge=5, le=17)
     max_debate_turns: Optional[int] = Field(2, description="最大辩论轮数", ge=1, le=10)
+    game_mode: Literal["normal", "fast", "slow", "demo", "headless"] = Field(
+        "normal",
+        description="游戏模式；headless 模式下服务器不等待，客户端按消息中的 playback_at 回放",
+    )
+    priority: Literal["interactive", "background"] = Field(
+        "interactive",
+        description="调度优先级；interactive（观战/交互）先于 background（评测）启动，并按更高权重分享LLM并发",
+    )
 
     class Config:
         json_schema_extra = {
@@ -21,7 +29,8 @@ class GameConfigRequest(BaseModel):
                 "villager_model": "glm/GLM-Z1-Flash",
                 "werewolf_model": "glm/GLM-Z1-Flash",
                 "num_players": 6,
-                "max_debate_turns": 2
+                "max_debate_turns": 2,
+                "game_mode": "normal"
             }
         }
 
@@ -71,6 +80,7 @@ class GameStatusResponse(BaseModel):
     players: List[PlayerInfo] = Field(..., description="玩家列表")
     rounds: List[RoundSummary] = Field(..., description="回合历史")
     error_message: Optional[str] = Field(None, description="错误信息")
+    queue_position: Optional[int] = Field(None, description="排队位置（status 为 queued 时）")
 
     class Config:
         json_schema_extra = {
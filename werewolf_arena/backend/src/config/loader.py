@@ -5,7 +5,7 @@ Model Configuration Loader
 
 import yaml
 from pathlib import Path
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
 
 
@@ -33,6 +33,7 @@ class ModelRegistry:
         self.config_path = config_path
         self.models: Dict[str, ModelConfig] = {}
         self.aliases: Dict[str, str] = {}
+        self.failover: Dict[str, List[str]] = {}
         self._load_config()
 
     def _load_config(self):
@@ -57,6 +58,12 @@ class ModelRegistry:
         # 加载别名
         self.aliases = config.get("aliases", {})
 
+        # 加载故障转移列表（统一为完整模型ID）
+        self.failover = {
+            self.get_full_model_id(model_id): [self.get_full_model_id(backup) for backup in backups]
+            for model_id, backups in (config.get("failover") or {}).items()
+        }
+
     def get_model(self, model_id: str) -> Optional[ModelConfig]:
         """获取模型配置"""
         # 先检查别名
@@ -65,6 +72,10 @@ class ModelRegistry:
 
         return self.models.get(model_id)
 
+    def get_failover(self, model_id: str) -> List[str]:
+        """获取模型的备用模型列表（完整模型ID）"""
+        return self.failover.get(self.get_full_model_id(model_id), [])
+
     def get_enabled_models(self) -> Dict[str, ModelConfig]:
         """获取所有启用的模型"""
         return {k: v for k, v in self.models.items() if v.enabled}
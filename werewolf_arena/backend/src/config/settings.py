@@ -4,7 +4,7 @@ Unified Configuration System using Pydantic Settings
 """
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional, List
+from typing import Dict, Optional, List
 from pathlib import Path
 import random
 from .timing_loader import get_timing_config, TimingConfig
@@ -16,6 +16,9 @@ class GameSettings(BaseSettings):
     max_debate_turns: int = 1  # 增加辩论轮数到5轮
     default_threads: int = 4
     debate_concurrent: int = 3  # 发言阶段并发数
+    debate_prefetch: int = 2  # 发言展示期间提前生成的发言数
+    debate_regenerate_stale: bool = False  # 预取后辩论内容已变化时重新生成发言
+    night_phase_mode: str = "concurrent"  # concurrent, sequential
     retries: int = 2
     run_synthetic_votes: bool = True
 
@@ -76,6 +79,45 @@ class LLMSettings(BaseSettings):
     # 默认使用的模型 - 改为硅基流动的模型
     default_model: str = "siliconflow/deepseek-ai/DeepSeek-V3"
 
+    # 异步调用的共享连接池（每个 base URL 一个）
+    http_max_connections: int = 200
+    http_max_keepalive_connections: int = 50
+    http_keepalive_expiry: float = 30.0
+    http2: bool = True  # 需要 httpx[http2]，服务端不支持时回退到 HTTP/1.1
+    http_timeout: float = 120.0
+    http_connect_timeout: float = 10.0
+
+    # 每个 (提供商, 模型) 的自适应并发窗口
+    admission_enabled: bool = True
+    admission_initial_limit: int = 4
+    admission_limits: Dict[str, int] = {}  # 按提供商覆盖初始并发，如 {"siliconflow": 8}
+    admission_min_limit: int = 1
+    admission_max_limit: int = 64
+    admission_backoff: float = 0.5  # 429/5xx 时窗口乘以该系数
+    admission_latency_tolerance: float = 3.0  # 延迟超过平均值该倍数时不再增长
+
+    # LLM 响应录制/回放缓存：off, record, replay, read_through
+    response_cache_mode: str = "off"
+    response_cache_dir: Optional[str] = None  # 默认 shared/llm_cache
+    response_cache_max_mb: int = 1024
+    response_cache_segment_mb: int = 64
+
+    # 短决策行动（bid, vote, remove, investigate, protect）使用流式响应，
+    # 结果字段完整且合法后立即返回；其余内容在后台补全日志（background）或直接取消（cancel）
+    stream_actions: bool = False
+    stream_remainder: str = "background"
+
+    # 异步请求对冲：超过该模型延迟分位数仍未返回时发送相同请求，取先完成者
+    hedge_enabled: bool = False
+    hedge_percentile: float = 0.95
+    hedge_min_samples: int = 20  # 样本不足时不对冲
+    hedge_min_delay: float = 1.0  # 对冲前至少等待的秒数
+    hedge_budget: float = 0.1  # 对冲请求最多占该模型请求数的比例
+
+    # 提供商熔断：连续失败达到阈值后在冷却期内改用 models.yaml 中的备用模型
+    circuit_failure_threshold: int = 5
+    circuit_cooldown: float = 30.0
+
 
 class ServerSettings(BaseSettings):
     """服务器配置"""
@@ -84,6 +126,30 @@ class ServerSettings(BaseSettings):
     reload: bool = False
     log_level: str = "info"
     workers: int = 1
+    notify_queue_size: int = 1000  # WebSocket 通知队列上限
+    notify_batch_window_ms: float = 5.0  # 合并为一批的通知到达间隔
+    notify_batch_max: int = 64  # 每批最多通知数
+    notify_send_timeout: float = 1.0  # 单条通知发送超时（秒）
+    notify_late_ms: float = 500.0  # 入队到发送超过该时间计为延迟
+    session_ttl: float = 900.0  # 结束的会话在内存中保留的时间（秒）
+    session_memory_budget_mb: float = 512.0  # 常驻会话总大小上限，超出时换出最久未访问的会话
+    session_sweep_interval: float = 10.0  # 两次换出检查之间的最短间隔（秒）
+    max_running_games: int = 4  # 同时运行的游戏数上限，超出的游戏排队
+    max_queued_games: int = 32  # 排队游戏数上限，超出时拒绝启动
+    game_priority_weights: Dict[str, float] = {"interactive": 4.0, "background": 1.0}  # 优先级分享LLM并发的权重
+    game_processes: int = 0  # 游戏工作进程数，0 表示游戏在 API 事件循环上运行
+    shared_backend: str = "memory"  # 多 worker 共享后端：memory（单进程）或 sqlite（SQLite + Unix 套接字）
+    shared_dir: Optional[Path] = None  # sqlite 后端的共享目录，默认为日志目录下的 .shared
+
+
+class LogSettings(BaseSettings):
+    """结构化日志配置"""
+    level: str = "INFO"
+    format: str = "json"  # json（每行一条，生产环境）或 console（开发时阅读）
+    module_levels: Dict[str, str] = {}  # 按模块覆盖级别，如 {"src.services.llm": "DEBUG"}
+    max_field_chars: int = 2000  # 单个字段超过该长度时截断
+    sample_every: Dict[str, int] = {"llm.raw_response": 10}  # 高频事件每 N 条记录一条
+    queue_size: int = 10000  # 后台写出队列上限，满时丢弃
 
 
 class CORSSettings(BaseSettings):
@@ -129,6 +195,7 @@ class Settings(BaseSettings):
     game: GameSettings = GameSettings()
     llm: LLMSettings = LLMSettings()
     server: ServerSettings = ServerSettings()
+    log: LogSettings = LogSettings()
     cors: CORSSettings = CORSSettings()
     paths: PathSettings = PathSettings()
 
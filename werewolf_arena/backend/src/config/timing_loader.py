@@ -11,6 +11,10 @@ from typing import Dict, Any
 from dataclasses import dataclass
 import os
 
+# 游戏模式；headless 模式下引擎不等待，节奏只体现在通知的 playback_at 时间戳中
+HEADLESS = "headless"
+GAME_MODES = ("normal", "fast", "slow", "demo", HEADLESS)
+
 
 @dataclass
 class TimingConfig:
@@ -126,10 +130,12 @@ class TimingConfigLoader:
         应用游戏模式延迟倍数
 
         Args:
-            game_mode: 游戏模式 (normal, fast, slow, demo)
+            game_mode: 游戏模式 (normal, fast, slow, demo, headless)
         """
         multipliers = {
             "normal": 1.0,
+            # 按正常速度计算回放时间线，但引擎不等待
+            HEADLESS: 1.0,
             "fast": self._config.fast_game_multiplier,
             "slow": self._config.slow_game_multiplier,
             "demo": self._config.demo_mode_multiplier
@@ -0,0 +1,115 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Pipelined debate scheduler.
+
+Speeches are generated ahead of delivery inside a bounded prefetch window, so
+LLM latency overlaps with the display pause of the speech currently on screen.
+Delivery order is unchanged: callers still take speeches strictly in speaker
+order through next().
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.services.logger.structured import get_logger
+
+logger = get_logger(__name__)
+
+Speech = Tuple[str, Any]
+
+
+class DebatePipeline:
+  """Generates speeches ahead of delivery with bounded prefetch and concurrency.
+
+  Args:
+    speakers: 发言顺序
+    generate: 生成单个玩家发言的协程函数，返回 (dialogue, log)
+    context_version: 返回当前已公布的发言数，用于判断预取的发言是否过期
+    concurrency: 同时进行的发言生成数上限
+    prefetch: 当前展示发言之外最多提前生成的发言数
+    regenerate_stale: 预取时辩论上下文已变化的发言是否重新生成
+  """
+
+  def __init__(
+      self,
+      speakers: List[str],
+      generate: Callable[[str], Awaitable[Speech]],
+      context_version: Callable[[], int],
+      concurrency: int = 3,
+      prefetch: int = 2,
+      regenerate_stale: bool = False,
+  ) -> None:
+    self.speakers = list(speakers)
+    self._generate = generate
+    self._context_version = context_version
+    self._slots = asyncio.Semaphore(max(1, concurrency))
+    self.prefetch = max(0, prefetch)
+    self.regenerate_stale = regenerate_stale
+    self._tasks: Dict[int, asyncio.Task] = {}
+    self._scheduled = 0  # 已安排生成的发言数
+    self.stats = {"generated": 0, "stale": 0, "regenerated": 0}
+
+  async def _run(self, idx: int) -> Tuple[Speech, int]:
+    """生成第 idx 个发言，并返回生成时可见的发言数"""
+    async with self._slots:
+      version = self._context_version()
+      speech = await self._generate(self.speakers[idx])
+      self.stats["generated"] += 1
+      return speech, version
+
+  def _schedule_through(self, idx: int) -> None:
+    """安排生成直到第 idx 个发言（含）"""
+    while self._scheduled <= idx and self._scheduled < len(self.speakers):
+      self._tasks[self._scheduled] = asyncio.ensure_future(
+          self._run(self._scheduled)
+      )
+      self._scheduled += 1
+
+  def start(self) -> None:
+    """开始生成第一个发言及其后 prefetch 个发言"""
+    self._schedule_through(self.prefetch)
+
+  async def next(self, idx: int) -> Speech:
+    """Waits for speech idx and schedules the next one into the window.
+
+    Must be called in order, after every speech before idx was delivered.
+    """
+    self._schedule_through(idx)
+    speech, version = await self._tasks.pop(idx)
+    # 发言 idx 展示期间，其后 prefetch 个发言在后台生成
+    self._schedule_through(idx + self.prefetch)
+
+    if version < idx:
+      self.stats["stale"] += 1
+      if self.regenerate_stale:
+        logger.info(
+            "game.debate_regenerate", player=self.speakers[idx], generated_after=version, turn=idx
+        )
+        self.stats["regenerated"] += 1
+        speech, _ = await self._run(idx)
+    return speech
+
+  def cancel(self) -> None:
+    """取消尚未交付的发言生成"""
+    for task in self._tasks.values():
+      task.cancel()
+    self._tasks.clear()
+
+  async def __aenter__(self) -> "DebatePipeline":
+    self.start()
+    return self
+
+  async def __aexit__(self, *exc_info: Optional[BaseException]) -> None:
+    self.cancel()
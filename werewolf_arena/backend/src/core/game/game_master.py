@@ -14,20 +14,26 @@
 
 """Werewolf game."""
 
+import asyncio
 from collections import Counter
-from concurrent.futures import ThreadPoolExecutor
+import functools
 import random
-from typing import List, Optional, Callable, Dict, Any
+from typing import Awaitable, List, Optional, Callable, Dict, Any
 from datetime import datetime
 
-import tqdm
 import time
 
 from src.core.models.game_state import Round, State
 from src.core.models.logs import RoundLog, VoteLog
 from src.config.settings import MAX_DEBATE_TURNS, RUN_SYNTHETIC_VOTES
 from src.config.settings import settings
-from src.config.timing_loader import apply_game_mode, get_delay
+from src.config.timing_loader import HEADLESS, apply_game_mode, get_delay
+from src.core.game.debate_pipeline import DebatePipeline
+from src.services.game_manager.notification_bus import NotificationEvent, notification_bus
+from src.services.llm.generator import llm_slots
+from src.services.logger.structured import get_logger
+
+logger = get_logger(__name__)
 
 def get_max_bids(d):
   """Gets all the keys with the highest value in the dictionary."""
@@ -49,10 +55,7 @@ class Timer:
   def log(self, message: str = ""):
     """记录当前耗时"""
     elapsed = self.elapsed()
-    if message:
-      tqdm.tqdm.write(f"⏱️ [{self.name}] {message}: {elapsed:.2f}秒")
-    else:
-      tqdm.tqdm.write(f"⏱️ [{self.name}] 耗时: {elapsed:.2f}秒")
+    logger.debug("timer", timer=self.name, message=message or None, seconds=round(elapsed, 3))
     return elapsed
 
 
@@ -63,7 +66,7 @@ class GameMaster:
       state: State,
       num_threads: int = 1,
       on_progress: Optional[Callable[[State, List[RoundLog]], None]] = None,
-      game_mode: str = "normal",  # normal, fast, slow, demo
+      game_mode: str = "normal",  # normal, fast, slow, demo, headless
   ) -> None:
     """Initialize the Werewolf game.
 
@@ -71,7 +74,8 @@ class GameMaster:
       state: 游戏状态
       num_threads: 线程数
       on_progress: 进度回调函数
-      game_mode: 游戏模式，影响延迟速度
+      game_mode: 游戏模式，影响延迟速度；headless 模式下引擎从不等待，
+        展示节奏记录在通知的 playback_at 时间戳中，由客户端回放
     """
     self.state = state
     self.current_round_num = len(self.state.rounds) if self.state.rounds else 0
@@ -79,6 +83,8 @@ class GameMaster:
     self.logs: List[RoundLog] = []
     self.on_progress = on_progress
     self.should_stop = False  # 添加停止标志
+    # 限制并发LLM调用数的信号量，在 arun_game() 所在的事件循环中创建
+    self._llm_slots: Optional[asyncio.Semaphore] = None
     
     # 时间统计
     self.timing_stats = {
@@ -90,9 +96,16 @@ class GameMaster:
     # 应用游戏模式延迟倍数
     self.delay_multiplier = apply_game_mode(game_mode)
     self.game_mode = game_mode
-    print(f"🎮 游戏模式: {game_mode} (延迟倍数: {self.delay_multiplier}x)")
+    self.headless = game_mode == HEADLESS
+    # 虚拟时间线（秒）：headless 模式下累计本应等待的时间
+    self.playback_clock = 0.0
+    # 夜间行动模式：concurrent（三个角色同时决策）或 sequential（依次决策）
+    self.night_phase_mode = settings.game.night_phase_mode
+    logger.info("game.mode", mode=game_mode, delay_multiplier=self.delay_multiplier)
+
 
   def _progress(self) -> None:
+    self.state.bump_version()
     if self.on_progress:
       self.on_progress(self.state, self.logs)
 
@@ -104,16 +117,46 @@ class GameMaster:
   def this_round_log(self) -> RoundLog:
     return self.logs[self.current_round_num]
 
-  def eliminate(self):
-    """Werewolves choose a player to eliminate."""
-    action_timer = Timer("狼人击杀")
-    
+  async def _pause(self, seconds: float) -> None:
+    """让出事件循环一段时间（替代 time.sleep）
+
+    headless 模式下只推进虚拟时间线，不实际等待。
+    """
+    if seconds <= 0:
+      return
+    if self.headless:
+      self.playback_clock += seconds
+      await asyncio.sleep(0)
+    else:
+      await asyncio.sleep(seconds)
+
+  def playback_at(self) -> Optional[float]:
+    """当前事件在回放时间线上的位置（秒），非 headless 模式返回 None"""
+    return round(self.playback_clock, 3) if self.headless else None
+
+  async def _limited(self, coro: Awaitable[Any]) -> Any:
+    """按 num_threads 限制同时进行的LLM调用数
+
+    信号量只包住LLM请求本身，提示词在调用时立即渲染，
+    因此随机选项顺序不依赖其他请求的完成先后（回放缓存需要）。
+    """
+    if self._llm_slots is None:
+      self._llm_slots = asyncio.Semaphore(max(1, self.num_threads))
+    token = llm_slots.set(self._llm_slots)
+    try:
+      return await coro
+    finally:
+      llm_slots.reset(token)
+
+  async def _night_delay(self) -> None:
     # 添加夜间行动延迟（使用配置文件）
     delay = get_delay("night_action", self.delay_multiplier)
     if delay > 0:
-      tqdm.tqdm.write(f"⏱️ [夜间延迟] 暂停{delay:.2f}秒")
-    time.sleep(delay)
+      logger.debug("game.pause", reason="night_action", seconds=delay)
+    await self._pause(delay)
 
+  async def _decide_eliminate(self):
+    """狼人做出击杀决定（仅LLM调用，不修改回合状态）"""
     werewolves_alive = [
         w for w in self.state.werewolves if w.name in self.this_round.players
     ]
@@ -121,11 +164,16 @@ class GameMaster:
     if not werewolves_alive:
       raise ValueError("No werewolves alive to eliminate players.")
 
+    action_timer = Timer("狼人击杀")
     wolf = random.choice(werewolves_alive)
-    eliminated, log = wolf.eliminate()
-    self.this_round_log.eliminate = log
-    
+    eliminated, log = await wolf.aeliminate()
     action_timer.log(f"狼人 {wolf.name} 行动完成")
+    return werewolves_alive, wolf, eliminated, log
+
+  async def _apply_eliminate(self, decision):
+    """应用狼人击杀决定并发送通知"""
+    werewolves_alive, wolf, eliminated, log = decision
+    self.this_round_log.eliminate = log
 
     # 如果返回None，选择一个默认目标
     if eliminated is None:
@@ -135,24 +183,24 @@ class GameMaster:
       ]
       if available_targets:
         eliminated = random.choice(available_targets)
-        print(f"Warning: {wolf.name} failed to choose target, randomly selected {eliminated}")
+        logger.warning("game.random_target", player=wolf.name, action="remove", target=eliminated)
         # 更新日志以反映随机选择
         log.result = {"remove": eliminated, "reasoning": "Random fallback selection"}
       else:
         # 如果没有有效目标，跳过淘汰
-        print(f"Warning: No valid targets for {wolf.name} to eliminate")
+        logger.warning("game.no_targets", player=wolf.name, action="remove")
         eliminated = None
 
     if eliminated is not None:
       self.this_round.eliminated = eliminated
-      tqdm.tqdm.write(f"{wolf.name} eliminated {eliminated}")
+      logger.info("game.eliminate", player=wolf.name, target=eliminated)
       for wolf in werewolves_alive:
         wolf._add_observation(
             f"在夜晚阶段，{'我们' if len(werewolves_alive) > 1 else '我'}决定淘汰{eliminated}。"
         )
 
       # 发送 WebSocket 通知 - 狼人击杀行动
-      self._notify_night_action(
+      await self._notify_night_action(
         action_type="night_eliminate",
         player_name=wolf.name,
         player_role="Werewolf",
@@ -163,10 +211,10 @@ class GameMaster:
         }
       )
     else:
-      print(f"No player was eliminated this round")
+      logger.info("game.eliminate", target=None)
 
       # 发送 WebSocket 通知 - 狼人行动失败
-      self._notify_night_action(
+      await self._notify_night_action(
         action_type="error",
         player_name=wolf.name,
         player_role="Werewolf",
@@ -178,42 +226,46 @@ class GameMaster:
 
     self._progress()
 
-  def protect(self):
-    """Doctor chooses a player to protect."""
+  async def eliminate(self):
+    """Werewolves choose a player to eliminate."""
+    await self._night_delay()
+    await self._apply_eliminate(await self._decide_eliminate())
+
+  async def _decide_protect(self):
+    """医生做出保护决定"""
     if self.state.doctor.name not in self.this_round.players:
-      return  # Doctor no longer in the game
+      return None  # Doctor no longer in the game
 
     action_timer = Timer("医生保护")
-    
-    # 添加夜间行动延迟（使用配置文件）
-    delay = get_delay("night_action", self.delay_multiplier)
-    if delay > 0:
-      tqdm.tqdm.write(f"⏱️ [夜间延迟] 暂停{delay:.2f}秒")
-    time.sleep(delay)
+    protect, log = await self.state.doctor.asave()
+    action_timer.log(f"医生 {self.state.doctor.name} 行动完成")
+    return protect, log
 
-    protect, log = self.state.doctor.save()
+  async def _apply_protect(self, decision):
+    """应用医生保护决定并发送通知"""
+    if decision is None:
+      return
+    protect, log = decision
     self.this_round_log.protect = log
-    
-    action_timer.log(f"医生 {self.state.doctor.name} 行动完成")
 
     if protect is None:
       # 如果没有返回保护目标，随机选择一个
       available_targets = list(self.this_round.players)
       if available_targets:
         protect = random.choice(available_targets)
-        print(f"Warning: {self.state.doctor.name} failed to choose protection target, randomly selected {protect}")
+        logger.warning("game.random_target", player=self.state.doctor.name, action="protect", target=protect)
         # 更新日志
         log.result = {"protect": protect, "reasoning": "Random fallback selection"}
       else:
-        print(f"Warning: No players available for {self.state.doctor.name} to protect")
+        logger.warning("game.no_targets", player=self.state.doctor.name, action="protect")
         protect = None
 
     if protect is not None:
       self.this_round.protected = protect
-      tqdm.tqdm.write(f"{self.state.doctor.name} protected {protect}")
+      logger.info("game.protect", player=self.state.doctor.name, target=protect)
 
       # 发送 WebSocket 通知 - 医生保护行动
-      self._notify_night_action(
+      await self._notify_night_action(
         action_type="night_protect",
         player_name=self.state.doctor.name,
         player_role="Doctor",
@@ -224,10 +276,10 @@ class GameMaster:
         }
       )
     else:
-      print(f"No player was protected this round")
+      logger.info("game.protect", target=None)
 
       # 发送 WebSocket 通知 - 医生行动失败
-      self._notify_night_action(
+      await self._notify_night_action(
         action_type="error",
         player_name=self.state.doctor.name,
         player_role="Doctor",
@@ -239,23 +291,30 @@ class GameMaster:
 
     self._progress()
 
-  def unmask(self):
-    """Seer chooses a player to unmask."""
+  async def protect(self):
+    """Doctor chooses a player to protect."""
+    if self.state.doctor.name not in self.this_round.players:
+      return  # Doctor no longer in the game
+
+    await self._night_delay()
+    await self._apply_protect(await self._decide_protect())
+
+  async def _decide_unmask(self):
+    """预言家做出查验决定"""
     if self.state.seer.name not in self.this_round.players:
-      return  # Seer no longer in the game
+      return None  # Seer no longer in the game
 
     action_timer = Timer("预言家查验")
-    
-    # 添加夜间行动延迟（使用配置文件）
-    delay = get_delay("night_action", self.delay_multiplier)
-    if delay > 0:
-      tqdm.tqdm.write(f"⏱️ [夜间延迟] 暂停{delay:.2f}秒")
-    time.sleep(delay)
+    unmask, log = await self.state.seer.aunmask()
+    action_timer.log(f"预言家 {self.state.seer.name} 行动完成")
+    return unmask, log
 
-    unmask, log = self.state.seer.unmask()
+  async def _apply_unmask(self, decision):
+    """应用预言家查验决定并发送通知"""
+    if decision is None:
+      return
+    unmask, log = decision
     self.this_round_log.investigate = log
-    
-    action_timer.log(f"预言家 {self.state.seer.name} 行动完成")
 
     if unmask is None:
       # 如果没有返回调查目标，随机选择一个未调查过的玩家
@@ -265,11 +324,11 @@ class GameMaster:
       ]
       if available_targets:
         unmask = random.choice(available_targets)
-        print(f"Warning: {self.state.seer.name} failed to choose investigation target, randomly selected {unmask}")
+        logger.warning("game.random_target", player=self.state.seer.name, action="investigate", target=unmask)
         # 更新日志
         log.result = {"investigate": unmask, "reasoning": "Random fallback selection"}
       else:
-        print(f"Warning: No available targets for {self.state.seer.name} to investigate")
+        logger.warning("game.no_targets", player=self.state.seer.name, action="investigate")
         unmask = None
 
     if unmask is not None:
@@ -278,7 +337,7 @@ class GameMaster:
       self.state.seer.reveal_and_update(unmask, target_role)
 
       # 发送 WebSocket 通知 - 预言家查验行动
-      self._notify_night_action(
+      await self._notify_night_action(
         action_type="night_investigate",
         player_name=self.state.seer.name,
         player_role="Seer",
@@ -291,10 +350,10 @@ class GameMaster:
         }
       )
     else:
-      print(f"No player was investigated this round")
+      logger.info("game.investigate", target=None)
 
       # 发送 WebSocket 通知 - 预言家行动失败
-      self._notify_night_action(
+      await self._notify_night_action(
         action_type="error",
         player_name=self.state.seer.name,
         player_role="Seer",
@@ -306,14 +365,40 @@ class GameMaster:
 
     self._progress()
 
-  def _get_bid(self, player_name):
+  async def unmask(self):
+    """Seer chooses a player to unmask."""
+    if self.state.seer.name not in self.this_round.players:
+      return  # Seer no longer in the game
+
+    await self._night_delay()
+    await self._apply_unmask(await self._decide_unmask())
+
+  async def run_night_actions(self):
+    """Werewolves, doctor and seer decide concurrently.
+
+    The three decisions never read each other's results, so the LLM calls are
+    issued together after a single night delay. State changes and
+    notifications are then applied in the fixed order eliminate, protect,
+    investigate, matching the sequential mode.
+    """
+    await self._night_delay()
+    eliminate, protect, unmask = await asyncio.gather(
+        self._decide_eliminate(),
+        self._decide_protect(),
+        self._decide_unmask(),
+    )
+    await self._apply_eliminate(eliminate)
+    await self._apply_protect(protect)
+    await self._apply_unmask(unmask)
+
+  async def _get_bid(self, player_name):
     """Gets the bid for a specific player."""
     player = self.state.players[player_name]
     try:
-      bid, log = player.bid()
+      bid, log = await self._limited(player.abid())
       if bid is None:
         # 如果出价为空，使用默认出价并记录警告
-        print(f"Warning: {player_name} did not return a valid bid, using default")
+        logger.warning("game.default_bid", player=player_name, reason="empty response")
         bid = 1
         log = f"Default bid used due to empty response"
       # 确保 bid 是数字类型
@@ -321,53 +406,46 @@ class GameMaster:
         try:
           bid = int(bid)
         except (ValueError, TypeError):
-          print(f"Warning: {player_name} returned string bid '{bid}', using default 0")
+          logger.warning("game.default_bid", player=player_name, reason=f"invalid bid {bid!r}")
           bid = 0
           log = f"Error: Invalid bid value '{bid}'"
       elif not isinstance(bid, int):
         try:
           bid = int(bid)
         except (ValueError, TypeError):
-          print(f"Warning: {player_name} returned invalid bid type {type(bid)}, using default 0")
+          logger.warning("game.default_bid", player=player_name, reason=f"invalid bid type {type(bid).__name__}")
           bid = 0
           log = f"Error: Invalid bid type"
     except Exception as e:
       # 如果出价过程出错，使用默认出价并记录错误
-      import traceback
-      print(f"[竞价错误] 玩家 {player_name} 竞价失败: {e}")
-      print(f"[竞价错误] 错误类型: {type(e).__name__}")
-      print(f"[竞价错误] 详细调用栈:")
-      traceback.print_exc()
+      logger.exception("game.bid_failed", player=player_name)
       bid = 1
       log = f"Error: {str(e)}"
 
     if bid > 1:
-      tqdm.tqdm.write(f"{player_name} bid: {bid}")
+      logger.info("game.bid", player=player_name, bid=bid)
     return bid, log
 
-  def get_next_speaker(self):
+  async def get_next_speaker(self):
     """Determine the next speaker based on bids."""
     previous_speaker, previous_dialogue = (
         self.this_round.debate[-1] if self.this_round.debate else (None, None)
     )
 
-    with ThreadPoolExecutor(max_workers=self.num_threads) as executor:
-      player_bids = {
-          player_name: executor.submit(self._get_bid, player_name)
-          for player_name in self.this_round.players
-          if player_name != previous_speaker
-      }
+    bidders = [
+        player_name
+        for player_name in self.this_round.players
+        if player_name != previous_speaker
+    ]
+    results = await asyncio.gather(
+        *(self._get_bid(player_name) for player_name in bidders)
+    )
 
-      bid_log = []
-      bids = {}
-      try:
-        for player_name, bid_task in player_bids.items():
-          bid, log = bid_task.result()
-          bids[player_name] = bid
-          bid_log.append((player_name, log))
-      except TypeError as e:
-        print(e)
-        raise e
+    bid_log = []
+    bids = {}
+    for player_name, (bid, log) in zip(bidders, results):
+      bids[player_name] = bid
+      bid_log.append((player_name, log))
 
     self.this_round.bids.append(bids)
     self.this_round_log.bid.append(bid_log)
@@ -382,283 +460,252 @@ class GameMaster:
     random.shuffle(potential_speakers)
     return random.choice(potential_speakers)
 
-  def run_summaries(self):
+  async def run_summaries(self):
     """Collect summaries from players after the debate."""
-    
+
     summary_timer = Timer("玩家总结")
-    tqdm.tqdm.write("⏱️ [玩家总结] 开始收集玩家总结...")
 
-    with ThreadPoolExecutor(max_workers=self.num_threads) as executor:
-      player_summaries = {
-          name: executor.submit(self.state.players[name].summarize)
-          for name in self.this_round.players
-      }
+    names = list(self.this_round.players)
+    results = await asyncio.gather(
+        *(self._limited(self.state.players[name].asummarize()) for name in names),
+        return_exceptions=True,
+    )
 
-      for player_name, summary_task in player_summaries.items():
-        try:
-            summary, log = summary_task.result()
-            if summary is None:
-                # 如果总结为空，使用默认总结并记录警告
-                print(f"Warning: {player_name} did not return a valid summary, using default")
-                summary = "我需要仔细思考今天发生的情况，并仔细分析局势。"
-                log = f"Default summary used due to empty response"
-            tqdm.tqdm.write(f"{player_name} summary: {summary}")
-            self.this_round_log.summaries.append((player_name, log))
-            
-            # 发送总结通知
-            self._notify_player_summary(player_name, summary, self.current_round_num)
-        except Exception as e:
-            # 如果总结过程出错，使用默认总结并记录错误
-            print(f"Error during summary for {player_name}: {e}")
-            summary = "我需要仔细思考今天发生的情况，并仔细分析局势。"
-            log = f"Error: {str(e)}"
-            tqdm.tqdm.write(f"{player_name} summary: {summary}")
-            self.this_round_log.summaries.append((player_name, log))
-            
-            # 发送总结通知
-            self._notify_player_summary(player_name, summary, self.current_round_num)
-
-            # 添加总结延迟（使用配置文件）
-            delay = get_delay("summary", self.delay_multiplier)
-            if delay > 0:
-              tqdm.tqdm.write(f"⏱️ [总结延迟] 暂停{delay:.2f}秒")
-            time.sleep(delay)
+    for player_name, outcome in zip(names, results):
+      if not isinstance(outcome, BaseException):
+        summary, log = outcome
+        if summary is None:
+          # 如果总结为空，使用默认总结并记录警告
+          logger.warning("game.default_summary", player=player_name, reason="empty response")
+          summary = "我需要仔细思考今天发生的情况，并仔细分析局势。"
+          log = f"Default summary used due to empty response"
+        logger.info("game.summary", player=player_name, summary=summary)
+        self.this_round_log.summaries.append((player_name, log))
+
+        # 发送总结通知
+        await self._notify_player_summary(player_name, summary, self.current_round_num)
+      else:
+        # 如果总结过程出错，使用默认总结并记录错误
+        logger.error("game.summary_failed", player=player_name, error=f"{type(outcome).__name__}: {outcome}")
+        summary = "我需要仔细思考今天发生的情况，并仔细分析局势。"
+        log = f"Error: {str(outcome)}"
+        logger.info("game.summary", player=player_name, summary=summary)
+        self.this_round_log.summaries.append((player_name, log))
+
+        # 发送总结通知
+        await self._notify_player_summary(player_name, summary, self.current_round_num)
+
+        # 添加总结延迟（使用配置文件）
+        delay = get_delay("summary", self.delay_multiplier)
+        if delay > 0:
+          logger.debug("game.pause", reason="summary", seconds=delay)
+        await self._pause(delay)
+
+      self._progress()
 
-        self._progress()
-    
     summary_timer.log("玩家总结完成")
 
-  def _generate_speech(self, speaker_name: str):
+  async def _generate_speech(self, speaker_name: str):
     """生成单个玩家的发言内容"""
     player = self.state.players[speaker_name]
     try:
-      dialogue, log = player.debate()
+      dialogue, log = await player.adebate()
       if dialogue is None:
         # 如果发言为空，使用默认发言并记录警告
-        print(f"Warning: {speaker_name} did not return a valid dialogue, using default")
+        logger.warning("game.default_dialogue", player=speaker_name, reason="empty response")
         dialogue = f"我需要仔细观察并寻找线索。"
         log = f"Default dialogue used due to empty response"
     except Exception as e:
       # 如果发言过程出错，使用默认发言并记录错误
-      import traceback
-      print(f"[辩论错误] 玩家 {speaker_name} 发言失败: {e}")
-      print(f"[辩论错误] 错误类型: {type(e).__name__}")
-      print(f"[辩论错误] 详细调用栈:")
-      traceback.print_exc()
+      logger.exception("game.debate_failed", player=speaker_name)
       dialogue = f"我需要仔细观察并寻找线索。"
       log = f"Error: {str(e)}"
-    
+
     return dialogue, log
 
-  def run_day_phase(self):
+  async def run_day_phase(self):
     """Run the day phase with concurrent speech generation but sequential delivery."""
-    
+
     phase_timer = Timer("发言阶段")
 
     # 状态切换前暂停1秒
-    tqdm.tqdm.write("⏱️ [阶段切换] 暂停1秒...")
+    logger.debug("game.pause", reason="debate_phase", seconds=1)
     pause_timer = Timer("切换暂停")
-    time.sleep(1)
+    await self._pause(1)
     pause_timer.log("切换暂停完成")
-    
+
     # 发送白天/发言阶段通知
     notify_timer = Timer("阶段通知")
-    self._notify_phase_change(phase="debate", round_number=self.current_round_num)
+    await self._notify_phase_change(phase="debate", round_number=self.current_round_num)
     notify_timer.log("阶段通知发送")
 
     # 改为每个存活玩家都发言一次（打乱顺序以增加随机性）
     speakers = self.this_round.players.copy()
     random.shuffle(speakers)  # 打乱发言顺序
-    
-    tqdm.tqdm.write(f"本轮发言顺序: {', '.join(speakers)}")
-    tqdm.tqdm.write(f"[并发生成] 使用3线程并发生成发言内容...")
 
-    # 并发生成所有发言内容（分批处理，每批最多3个）
-    speeches = {}
-    speech_logs = {}
-    
-    generation_timer = Timer("发言生成")
-    batch_size = 3  # 每批3个玩家并发
-    for batch_start in range(0, len(speakers), batch_size):
-      batch_speakers = speakers[batch_start:batch_start+batch_size]
-      batch_num = batch_start // batch_size + 1
-      total_batches = (len(speakers) + batch_size - 1) // batch_size
-      
-      batch_timer = Timer(f"批次{batch_num}")
-      tqdm.tqdm.write(f"[批次 {batch_num}/{total_batches}] 并发生成: {', '.join(batch_speakers)}")
-      
-      with ThreadPoolExecutor(max_workers=3) as executor:
-        # 提交任务
-        futures = {
-          speaker: executor.submit(self._generate_speech, speaker)
-          for speaker in batch_speakers
-        }
-        
-        # 等待这一批全部完成
-        for speaker in batch_speakers:
-          dialogue, log = futures[speaker].result()
-          speeches[speaker] = dialogue
-          speech_logs[speaker] = log
-          tqdm.tqdm.write(f"  ✓ {speaker} 发言生成完成 ({len(dialogue)}字)")
-      
-      batch_timer.log(f"批次{batch_num}完成")
-    
-    generation_timer.log("所有发言生成完成")
-    tqdm.tqdm.write(f"[生成完成] 所有发言已生成，开始按顺序发送和展示...")
+    logger.info("game.speaking_order", speakers=speakers)
 
-    # 按顺序发送和处理（保证顺序）
+    game_settings = settings.game
+    pipeline = DebatePipeline(
+        speakers,
+        self._generate_speech,
+        context_version=lambda: len(self.this_round.debate),
+        concurrency=game_settings.debate_concurrent,
+        prefetch=game_settings.debate_prefetch,
+        regenerate_stale=game_settings.debate_regenerate_stale,
+    )
+    logger.debug(
+        "game.debate_pipeline",
+        concurrency=game_settings.debate_concurrent,
+        prefetch=game_settings.debate_prefetch,
+    )
+
+    # 按顺序发送和处理（保证顺序），后续发言在展示暂停期间生成
     delivery_timer = Timer("发言发送")
     total_pause_time = 0
-    
-    for idx, speaker in enumerate(speakers):
-      dialogue = speeches[speaker]
-      log = speech_logs[speaker]
-      
-      send_timer = Timer(f"发送-{speaker}")
-      
-      # 保存到游戏状态
-      self.this_round_log.debate.append((speaker, log))
-      self.this_round.debate.append([speaker, dialogue])
-      tqdm.tqdm.write(f"[{idx + 1}/{len(speakers)}] {speaker} ({self.state.players[speaker].role}): {dialogue}")
-      
-      # 发送 WebSocket 通知
-      self._notify_debate_turn(
-        player_name=speaker,
-        dialogue=dialogue,
-        player_role=self.state.players[speaker].role,
-        turn_number=idx + 1
-      )
-      
-      # 更新其他玩家的游戏状态
-      for name in self.this_round.players:
-        player = self.state.players[name]
-        if player.gamestate:
-          player.gamestate.update_debate(speaker, dialogue)
-        else:
-          raise ValueError(f"{name}.gamestate needs to be initialized.")
-      
-      self._progress()
-      
-      send_elapsed = send_timer.log(f"{speaker}发送完成")
-      
-      # 计算暂停时间：每15个字1秒，最少0.5秒
-      char_count = len(dialogue)
-      pause_seconds = max(0.5, char_count / 15.0)
-      tqdm.tqdm.write(f"⏱️ [展示暂停] {char_count}字 → 暂停 {pause_seconds:.1f}秒")
-      time.sleep(pause_seconds)
-      total_pause_time += pause_seconds
-    
+
+    async with pipeline:
+      for idx, speaker in enumerate(speakers):
+        wait_timer = Timer(f"等待-{speaker}")
+        dialogue, log = await pipeline.next(idx)
+        wait_timer.log(f"{speaker} 发言就绪 ({len(dialogue)}字)")
+
+        send_timer = Timer(f"发送-{speaker}")
+
+        # 保存到游戏状态（玩家的GameView引用同一份辩论记录）
+        self.this_round_log.debate.append((speaker, log))
+        self.this_round.debate.append([speaker, dialogue])
+        logger.info(
+            "game.debate",
+            turn=idx + 1,
+            turns=len(speakers),
+            player=speaker,
+            role=self.state.players[speaker].role,
+            dialogue=dialogue,
+        )
+
+        # 发送 WebSocket 通知
+        await self._notify_debate_turn(
+          player_name=speaker,
+          dialogue=dialogue,
+          player_role=self.state.players[speaker].role,
+          turn_number=idx + 1
+        )
+
+        self._progress()
+
+        send_elapsed = send_timer.log(f"{speaker}发送完成")
+
+        # 计算暂停时间：每15个字1秒，最少0.5秒
+        char_count = len(dialogue)
+        pause_seconds = max(0.5, char_count / 15.0)
+        logger.debug("game.pause", reason="display", chars=char_count, seconds=pause_seconds)
+        await self._pause(pause_seconds)
+        total_pause_time += pause_seconds
+
+    logger.info("game.debate_pipeline_stats", **pipeline.stats)
     delivery_timer.log("所有发言发送完成")
-    tqdm.tqdm.write(f"⏱️ [发言暂停汇总] 总暂停时间: {total_pause_time:.1f}秒")
-    
+    logger.debug("game.pause_total", phase="debate", seconds=total_pause_time)
+
     phase_timer.log("发言阶段总耗时")
 
     # 所有人发言完毕后，进入投票阶段
     if True or RUN_SYNTHETIC_VOTES:
         # 进入投票阶段
         # 状态切换前暂停1秒
-        tqdm.tqdm.write("⏱️ [投票阶段] 切换暂停1秒...")
+        logger.debug("game.pause", reason="voting_phase", seconds=1)
         pause_timer = Timer("投票切换")
-        time.sleep(1)
+        await self._pause(1)
         pause_timer.log("投票切换完成")
-        
+
         # 发送投票阶段通知
         notify_timer = Timer("投票通知")
-        self._notify_phase_change(phase="voting", round_number=self.current_round_num)
+        await self._notify_phase_change(phase="voting", round_number=self.current_round_num)
         notify_timer.log("投票通知发送")
-        
+
         voting_timer = Timer("投票阶段")
-        votes, vote_logs = self.run_voting()
+        votes, vote_logs = await self.run_voting()
         voting_timer.log("投票阶段完成")
-        
+
         self.this_round.votes.append(votes)
         self.this_round_log.votes.append(vote_logs)
         self._progress()
 
     for player, vote in self.this_round.votes[-1].items():
-      tqdm.tqdm.write(f"{player} 投票淘汰 {vote}")
+      logger.info("game.vote", player=player, vote=vote)
 
-  def run_voting(self):
-    """Conduct a vote among players to exile someone."""
+  async def run_voting(self):
+    """Conduct a vote among players to exile someone.
+
+    All votes are requested at once under a shared 15 second deadline and then
+    revealed one by one in player order, with the vote delay only pacing the
+    reveals.
+    """
     vote_log = []
     votes = {}
 
-    tqdm.tqdm.write("⏱️ [投票] 开始顺序处理投票（15秒超时）...")
-    # 改为顺序处理投票，以便发送实时通知，添加15秒超时机制
-    for player_name in self.this_round.players:
-      player_timer = Timer(f"投票-{player_name}")
+    logger.debug("game.collecting_votes", timeout=15.0)
+    voting_timer = Timer("投票收集")
+    voters = list(self.this_round.players)
+    tasks = {
+        player_name: asyncio.ensure_future(self.state.players[player_name].avote())
+        for player_name in voters
+    }
+    _, pending = await asyncio.wait(tasks.values(), timeout=15.0)  # 15秒超时
+    for task in pending:
+      task.cancel()
+    voting_timer.log(f"投票收集完成（{len(pending)}人超时）")
+
+    # 按玩家顺序依次公布投票
+    for idx, player_name in enumerate(voters):
       player = self.state.players[player_name]
+      task = tasks[player_name]
+      default_target = next((p for p in self.this_round.players if p and p != player_name), player_name)
+
+      if task in pending:
+        # 投票超时，使用默认投票
+        logger.warning("game.default_vote", player=player_name, reason="timeout")
+        vote = default_target
+        log = f"Timeout: Default vote used after 15s timeout"
+      elif task.exception() is not None:
+        # 如果投票过程出错，使用默认投票并记录错误
+        logger.error("game.vote_failed", player=player_name, error=f"{type(task.exception()).__name__}: {task.exception()}")
+        vote = default_target
+        log = f"Error: {str(task.exception())}"
+      else:
+        vote, log = task.result()
+
+        if vote is None:
+          # 如果没有返回投票，使用默认投票
+          logger.warning("game.default_vote", player=player_name, reason="empty response")
+          vote = default_target
+          log = f"Default vote used due to empty response"
+
+        # 验证投票是否是有效的玩家名
+        if vote not in self.this_round.players:
+          logger.warning("game.default_vote", player=player_name, reason=f"invalid target {vote!r}")
+          vote = default_target
+          log = f"Invalid vote corrected to: {vote}"
+
+      votes[player_name] = vote
+      vote_log.append(VoteLog(player_name, vote, log))
+
+      # 发送 WebSocket 通知 - 投票
+      await self._notify_vote_cast(
+        voter=player_name,
+        target=vote,
+        voter_role=player.role
+      )
 
-      # 使用线程池实现15秒超时机制
-      with ThreadPoolExecutor(max_workers=1) as executor:
-        try:
-          future = executor.submit(player.vote)
-          vote, log = future.result(timeout=15.0)  # 15秒超时
-
-          if vote is None:
-            # 如果没有返回投票，使用默认投票
-            tqdm.tqdm.write(f"⚠️ [{player_name}] 未返回有效投票，使用默认投票")
-            vote = next((p for p in self.this_round.players if p and p != player_name), player_name)
-            log = f"Default vote used due to empty response"
-
-          # 验证投票是否是有效的玩家名
-          if vote not in self.this_round.players:
-            tqdm.tqdm.write(f"⚠️ [{player_name}] 投票目标无效 '{vote}'，使用默认投票")
-            vote = next((p for p in self.this_round.players if p and p != player_name), player_name)
-            log = f"Invalid vote corrected to: {vote}"
-
-          votes[player_name] = vote
-          vote_log.append(VoteLog(player_name, vote, log))
-
-          # 发送 WebSocket 通知 - 投票
-          self._notify_vote_cast(
-            voter=player_name,
-            target=vote,
-            voter_role=player.role
-          )
-          
-          player_timer.log(f"{player_name}投票完成")
-
-          # 添加投票延迟（使用配置文件）
-          delay = get_delay("vote", self.delay_multiplier)
-          time.sleep(delay)
-
-        except TimeoutError:
-          # 投票超时，使用默认投票
-          tqdm.tqdm.write(f"⚠️ [{player_name}] 投票超时(>15秒)，使用默认投票")
-          vote = next((p for p in self.this_round.players if p and p != player_name), player_name)
-          log = f"Timeout: Default vote used after 15s timeout"
-          votes[player_name] = vote
-          vote_log.append(VoteLog(player_name, vote, log))
-          
-          # 发送 WebSocket 通知 - 投票
-          self._notify_vote_cast(
-            voter=player_name,
-            target=vote,
-            voter_role=player.role
-          )
-          
-          player_timer.log(f"{player_name}投票超时，使用默认")
-          
-        except Exception as e:
-          # 如果投票过程出错，使用默认投票并记录错误
-          tqdm.tqdm.write(f"❌ [{player_name}] 投票异常: {e}")
-          default_target = next((p for p in self.this_round.players if p and p != player_name), player_name)
-          votes[player_name] = default_target
-          vote_log.append(VoteLog(player_name, default_target, f"Error: {str(e)}"))
-
-          # 发送 WebSocket 通知 - 投票错误
-          self._notify_vote_cast(
-            voter=player_name,
-            target=default_target,
-            voter_role=player.role
-          )
+      # 添加投票延迟（使用配置文件），只用于控制公布节奏
+      if idx < len(voters) - 1:
+        await self._pause(get_delay("vote", self.delay_multiplier))
 
     return votes, vote_log
 
-  def exile(self):
+  async def exile(self):
     """Exile the player who received the most votes."""
-    
+
     exile_timer = Timer("放逐处理")
 
     most_voted, vote_count = Counter(
@@ -677,10 +724,10 @@ class GameMaster:
             f"大多数人投票淘汰了{exiled_player}。"
         )
 
-        tqdm.tqdm.write(f"⏱️ [放逐] {exiled_player} 被投票放逐")
-        
+        logger.info("game.exile", target=exiled_player)
+
         # 发送放逐通知
-        self._notify_player_exile(exiled_player, self.current_round_num)
+        await self._notify_player_exile(exiled_player, self.current_round_num)
 
         # 更新所有剩余玩家的游戏状态
         for name in self.this_round.players:
@@ -690,7 +737,7 @@ class GameMaster:
               player.gamestate.remove_player(exiled_player)
             player.add_announcement(announcement)
       else:
-        print(f"Warning: Exiled player {exiled_player} not found in players list")
+        logger.warning("game.unknown_player", player=exiled_player, action="exile")
         announcement = f"No valid player was exiled (target: {exiled_player})."
         # 仍然通知所有玩家
         for name in self.this_round.players:
@@ -701,18 +748,18 @@ class GameMaster:
       announcement = (
           "没有达到多数票，因此没有人被淘汰。"
       )
-      tqdm.tqdm.write("⏱️ [放逐] 无人被放逐（未达到多数票）")
+      logger.info("game.exile", target=None)
       # 通知所有玩家
       for name in self.this_round.players:
         player = self.state.players.get(name)
         if player:
           player.add_announcement(announcement)
 
-    tqdm.tqdm.write(announcement)
+    logger.info("game.announcement", message=announcement)
     exile_timer.log("放逐处理完成")
     self._progress()
 
-  def resolve_night_phase(self):
+  async def resolve_night_phase(self):
     """Resolve elimination and protection during the night phase."""
     if self.this_round.eliminated != self.this_round.protected:
       eliminated_player = self.this_round.eliminated
@@ -732,7 +779,7 @@ class GameMaster:
               player.gamestate.remove_player(eliminated_player)
             player.add_announcement(announcement)
       else:
-        print(f"Warning: Eliminated player {eliminated_player} not found in players list")
+        logger.warning("game.unknown_player", player=eliminated_player, action="eliminate")
         announcement = f"No valid player was removed during the night (target: {eliminated_player})."
         # 仍然通知所有玩家
         for name in self.this_round.players:
@@ -748,24 +795,22 @@ class GameMaster:
         if player:
           player.add_announcement(announcement)
 
-    tqdm.tqdm.write(announcement)
+    logger.info("game.announcement", message=announcement)
 
     # 状态切换前暂停1秒
-    tqdm.tqdm.write("⏱️ [天亮阶段] 切换暂停1秒...")
-    time.sleep(1)
+    logger.debug("game.pause", reason="day_phase", seconds=1)
+    await self._pause(1)
 
     # 发送天亮阶段通知
-    self._notify_phase_change(phase="day", round_number=self.current_round_num)
-    
+    await self._notify_phase_change(phase="day", round_number=self.current_round_num)
+
     self._progress()
 
-  def run_round(self):
+  async def run_round(self):
     """Run a single round of the game."""
     round_timer = Timer(f"第{self.current_round_num}轮")
-    tqdm.tqdm.write(f"\n{'='*80}")
-    tqdm.tqdm.write(f"⏱️ 【第 {self.current_round_num} 轮开始】")
-    tqdm.tqdm.write(f"{'='*80}\n")
-    
+    logger.info("game.round_started", round=self.current_round_num)
+
     self.state.rounds.append(Round())
     self.logs.append(RoundLog())
 
@@ -774,26 +819,40 @@ class GameMaster:
         if self.current_round_num == 0
         else self.state.rounds[self.current_round_num - 1].players.copy()
     )
+    # 所有玩家的视图共享本回合的辩论记录
+    for name in self.this_round.players:
+      gamestate = self.state.players[name].gamestate
+      if not gamestate:
+        raise ValueError(f"{name}.gamestate needs to be initialized.")
+      gamestate.attach_debate(self.this_round.debate)
 
     # 状态切换前暂停1秒
-    tqdm.tqdm.write("⏱️ [夜晚开始] 切换暂停1秒...")
+    logger.debug("game.pause", reason="night_phase", seconds=1)
     pause_timer = Timer("夜晚切换")
-    time.sleep(1)
+    await self._pause(1)
     pause_timer.log("夜晚切换完成")
-    
+
     # 发送夜晚阶段通知
     notify_timer = Timer("夜晚通知")
-    self._notify_phase_change(phase="night", round_number=self.current_round_num)
+    await self._notify_phase_change(phase="night", round_number=self.current_round_num)
     notify_timer.log("夜晚通知发送")
 
+    if self.night_phase_mode == "sequential":
+      night_actions = [
+          (
+              self.eliminate,
+              "狼人正在选择淘汰目标。",
+          ),
+          (self.protect, "医生正在选择保护目标。"),
+          (self.unmask, "预言家正在查验身份。"),
+      ]
+    else:
+      night_actions = [
+          (self.run_night_actions, "狼人、医生和预言家同时行动。"),
+      ]
+
     action_timers = {}
-    for action, message in [
-        (
-            self.eliminate,
-            "狼人正在选择淘汰目标。",
-        ),
-        (self.protect, "医生正在选择保护目标。"),
-        (self.unmask, "预言家正在查验身份。"),
+    for action, message in night_actions + [
         (self.resolve_night_phase, "夜晚阶段解决"),
         (self.check_for_winner, "夜晚阶段后检查胜负。"),
         (self.run_day_phase, "玩家开始辩论和投票。"),
@@ -802,45 +861,40 @@ class GameMaster:
         (self.run_summaries, "玩家开始总结辩论。"),
     ]:
       if message:
-        tqdm.tqdm.write(f"\n⏱️ 【{message}】")
+        logger.debug("game.step", step=message)
         action_timer = Timer(message)
-      
-      action()
-      
+
+      await action()
+
       if message:
         action_timers[message] = action_timer.elapsed()
         action_timer.log(f"{message}完成")
-      
+
       # Save progress after each major action in the round
       self._progress()
 
       if self.state.winner:
-        tqdm.tqdm.write(f"\n⏱️ 第{self.current_round_num}轮结束（游戏结束）")
+        logger.info("game.round_finished", round=self.current_round_num, game_over=True)
         self.this_round.success = True
         round_timer.log(f"第{self.current_round_num}轮总耗时")
         self._print_round_summary(action_timers, round_timer.elapsed())
         return
 
-    tqdm.tqdm.write(f"\n⏱️ 第{self.current_round_num}轮结束")
+    logger.info("game.round_finished", round=self.current_round_num, game_over=False)
     self.this_round.success = True
     self._progress()
-    
+
     total_time = round_timer.log(f"第{self.current_round_num}轮总耗时")
     self._print_round_summary(action_timers, total_time)
-  
+
   def _print_round_summary(self, action_timers: dict, total_time: float):
-    """打印本轮时间统计摘要"""
-    tqdm.tqdm.write(f"\n{'='*80}")
-    tqdm.tqdm.write(f"📊 【第 {self.current_round_num} 轮时间统计】")
-    tqdm.tqdm.write(f"{'='*80}")
-    
-    for action, elapsed in action_timers.items():
-      percentage = (elapsed / total_time * 100) if total_time > 0 else 0
-      tqdm.tqdm.write(f"  {action:30s}: {elapsed:6.2f}秒 ({percentage:5.1f}%)")
-    
-    tqdm.tqdm.write(f"{'─'*80}")
-    tqdm.tqdm.write(f"  {'总耗时':30s}: {total_time:6.2f}秒 (100.0%)")
-    tqdm.tqdm.write(f"{'='*80}\n")
+    """记录本轮时间统计摘要"""
+    logger.info(
+        "game.round_timing",
+        round=self.current_round_num,
+        total_seconds=round(total_time, 2),
+        steps={action: round(elapsed, 2) for action, elapsed in action_timers.items()},
+    )
 
   def get_winner(self) -> str:
     """Determine the winner of the game."""
@@ -852,322 +906,162 @@ class GameMaster:
       return "Werewolves"
     return "Villagers" if not active_wolves else ""
 
-  def check_for_winner(self):
+  async def check_for_winner(self):
     """Check if there is a winner and update the state accordingly."""
     self.state.winner = self.get_winner()
     if self.state.winner:
       # 转换胜利者名称为中文
       winner_name = "狼人" if self.state.winner == "Werewolves" else "好人"
-      tqdm.tqdm.write(f"获胜者是：{winner_name}！")
-      
+      logger.info("game.winner", winner=self.state.winner, winner_name=winner_name)
+
       # 发送游戏结束通知
-      self._notify_game_complete(winner=self.state.winner, winner_name=winner_name)
-      
+      await self._notify_game_complete(winner=self.state.winner, winner_name=winner_name)
+
       self._progress()
 
   def stop(self):
     """设置停止标志，让游戏优雅终止"""
     self.should_stop = True
-    tqdm.tqdm.write("收到停止请求，将在完成当前轮后优雅退出。")
+    logger.info("game.stop_requested")
 
-  def _notify_night_action(self, action_type: str, player_name: str, player_role: str, target_name: Optional[str] = None, details: Optional[Dict[str, Any]] = None):
-    """发送夜间行动 WebSocket 通知"""
-    try:
-      # 延迟导入避免循环依赖
-      from src.services.game_manager.session_manager import _notify_night_action
-      import asyncio
+  async def _notify(self, kind: str, send: Callable[[], Awaitable[Any]], coalesce: bool = False) -> None:
+    """Hands a WebSocket notification to the notification bus.
 
-      def run_async():
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-          # 从 ActionType 导入
-          from src.services.game_manager.sequence_manager import ActionType
-          action_type_enum = ActionType(action_type)
-
-          loop.run_until_complete(
-            _notify_night_action(
-              session_id=self.state.session_id,
-              action_type=action_type_enum,
-              player_name=player_name,
-              player_role=player_role,
-              target_name=target_name,
-              details=details
-            )
-          )
-          print(f"[WebSocket] 夜间行动通知已发送: {action_type} by {player_name}")
-        except Exception as e:
-          print(f"[WebSocket错误] 夜间行动通知发送失败: {e}")
-        finally:
-          loop.close()
-
-      # 在线程池中运行异步函数，并等待完成
-      import concurrent.futures
-      executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
-      future = executor.submit(run_async)
-      # 等待最多1秒，确保消息发送完成
-      try:
-        future.result(timeout=1.0)
-      except concurrent.futures.TimeoutError:
-        print(f"[WebSocket警告] 夜间行动通知发送超时")
-      except Exception as e:
-        print(f"[WebSocket错误] 夜间行动通知异常: {e}")
-      finally:
-        executor.shutdown(wait=True)  # 等待任务完成后再关闭
+    The bus delivers notifications in order on the server event loop, so the
+    game only waits here when the queue is full.
+    """
+    await notification_bus.apublish(
+      NotificationEvent(
+          self.state.session_id, kind, send,
+          coalesce=coalesce, playback_at=self.playback_at(),
+      )
+    )
 
-    except Exception as e:
-      print(f"[WebSocket错误] 夜间行动通知失败: {e}")
+  async def _notify_night_action(self, action_type: str, player_name: str, player_role: str, target_name: Optional[str] = None, details: Optional[Dict[str, Any]] = None):
+    """发送夜间行动 WebSocket 通知"""
+    # 延迟导入避免循环依赖
+    from src.services.game_manager.session_manager import _notify_night_action
+    from src.services.game_manager.sequence_manager import ActionType
+
+    await self._notify(
+      "night_action",
+      functools.partial(
+        _notify_night_action,
+        session_id=self.state.session_id,
+        action_type=ActionType(action_type),
+        player_name=player_name,
+        player_role=player_role,
+        target_name=target_name,
+        details=details
+      )
+    )
 
-  def _notify_debate_turn(self, player_name: str, dialogue: str, player_role: str, turn_number: int):
+  async def _notify_debate_turn(self, player_name: str, dialogue: str, player_role: str, turn_number: int):
     """发送辩论发言 WebSocket 通知"""
-    try:
-      from src.services.game_manager.session_manager import _notify_debate_turn
-      import asyncio
-
-      def run_async():
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-          loop.run_until_complete(
-            _notify_debate_turn(
-              session_id=self.state.session_id,
-              player_name=player_name,
-              dialogue=dialogue,
-              player_role=player_role
-            )
-          )
-          print(f"[WebSocket] 辩论发言通知已发送: {player_name}")
-        except Exception as e:
-          print(f"[WebSocket错误] 辩论发言通知发送失败: {e}")
-        finally:
-          loop.close()
-
-      import concurrent.futures
-      executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
-      future = executor.submit(run_async)
-      try:
-        future.result(timeout=1.0)
-      except concurrent.futures.TimeoutError:
-        print(f"[WebSocket警告] 辩论发言通知发送超时")
-      except Exception as e:
-        print(f"[WebSocket错误] 辩论发言通知异常: {e}")
-      finally:
-        executor.shutdown(wait=True)  # 等待任务完成后再关闭
-
-    except Exception as e:
-      print(f"[WebSocket错误] 辩论发言通知失败: {e}")
+    from src.services.game_manager.session_manager import _notify_debate_turn
+
+    await self._notify(
+      "debate_turn",
+      functools.partial(
+        _notify_debate_turn,
+        session_id=self.state.session_id,
+        player_name=player_name,
+        dialogue=dialogue,
+        player_role=player_role
+      )
+    )
 
-  def _notify_vote_cast(self, voter: str, target: str, voter_role: str):
+  async def _notify_vote_cast(self, voter: str, target: str, voter_role: str):
     """发送投票 WebSocket 通知"""
-    try:
-      from src.services.game_manager.session_manager import _notify_vote_cast
-      import asyncio
-
-      def run_async():
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-          loop.run_until_complete(
-            _notify_vote_cast(
-              session_id=self.state.session_id,
-              voter=voter,
-              target=target,
-              voter_role=voter_role
-            )
-          )
-          print(f"[WebSocket] 投票通知已发送: {voter} -> {target}")
-        except Exception as e:
-          print(f"[WebSocket错误] 投票通知发送失败: {e}")
-        finally:
-          loop.close()
-
-      import concurrent.futures
-      executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
-      future = executor.submit(run_async)
-      try:
-        future.result(timeout=1.0)
-      except concurrent.futures.TimeoutError:
-        print(f"[WebSocket警告] 投票通知发送超时")
-      except Exception as e:
-        print(f"[WebSocket错误] 投票通知异常: {e}")
-      finally:
-        executor.shutdown(wait=True)  # 等待任务完成后再关闭
-
-    except Exception as e:
-      print(f"[WebSocket错误] 投票通知失败: {e}")
+    from src.services.game_manager.session_manager import _notify_vote_cast
+
+    await self._notify(
+      "vote_cast",
+      functools.partial(
+        _notify_vote_cast,
+        session_id=self.state.session_id,
+        voter=voter,
+        target=target,
+        voter_role=voter_role
+      )
+    )
 
-  def _notify_phase_change(self, phase: str, round_number: int):
+  async def _notify_phase_change(self, phase: str, round_number: int):
     """发送阶段变更 WebSocket 通知"""
-    try:
-      from src.services.game_manager.session_manager import _notify_phase_change
-      import asyncio
-
-      def run_async():
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-          loop.run_until_complete(
-            _notify_phase_change(
-              session_id=self.state.session_id,
-              phase=phase,
-              round_number=round_number
-            )
-          )
-          print(f"[WebSocket] 阶段变更通知已发送: {phase} (第{round_number}轮)")
-        except Exception as e:
-          print(f"[WebSocket错误] 阶段变更通知发送失败: {e}")
-        finally:
-          loop.close()
-
-      import concurrent.futures
-      executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
-      future = executor.submit(run_async)
-      try:
-        future.result(timeout=1.0)
-      except concurrent.futures.TimeoutError:
-        print(f"[WebSocket警告] 阶段变更通知发送超时: {phase}")
-      except Exception as e:
-        print(f"[WebSocket错误] 阶段变更通知异常: {e}")
-      finally:
-        executor.shutdown(wait=True)  # 等待任务完成后再关闭
-
-    except Exception as e:
-      print(f"[WebSocket错误] 阶段变更通知失败: {e}")
+    from src.services.game_manager.session_manager import _notify_phase_change
+
+    await self._notify(
+      "phase_change",
+      functools.partial(
+        _notify_phase_change,
+        session_id=self.state.session_id,
+        phase=phase,
+        round_number=round_number
+      )
+    )
 
-  def _notify_player_exile(self, exiled_player: str, round_number: int):
+  async def _notify_player_exile(self, exiled_player: str, round_number: int):
     """发送玩家放逐 WebSocket 通知"""
-    try:
-      from src.services.game_manager.session_manager import _notify_player_exile
-      import asyncio
-
-      def run_async():
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-          loop.run_until_complete(
-            _notify_player_exile(
-              session_id=self.state.session_id,
-              exiled_player=exiled_player,
-              round_number=round_number
-            )
-          )
-          print(f"[WebSocket] 玩家放逐通知已发送: {exiled_player} (第{round_number}轮)")
-        except Exception as e:
-          print(f"[WebSocket错误] 玩家放逐通知发送失败: {e}")
-        finally:
-          loop.close()
-
-      import concurrent.futures
-      executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
-      future = executor.submit(run_async)
-      try:
-        future.result(timeout=1.0)
-      except concurrent.futures.TimeoutError:
-        print(f"[WebSocket警告] 玩家放逐通知发送超时: {exiled_player}")
-      except Exception as e:
-        print(f"[WebSocket错误] 玩家放逐通知异常: {e}")
-      finally:
-        executor.shutdown(wait=True)  # 等待任务完成后再关闭
-
-    except Exception as e:
-      print(f"[WebSocket错误] 玩家放逐通知失败: {e}")
+    from src.services.game_manager.session_manager import _notify_player_exile
+
+    await self._notify(
+      "player_exile",
+      functools.partial(
+        _notify_player_exile,
+        session_id=self.state.session_id,
+        exiled_player=exiled_player,
+        round_number=round_number
+      )
+    )
 
-  def _notify_player_summary(self, player_name: str, summary: str, round_number: int):
+  async def _notify_player_summary(self, player_name: str, summary: str, round_number: int):
     """发送玩家总结 WebSocket 通知"""
-    try:
-      from src.services.game_manager.session_manager import _notify_player_summary
-      import asyncio
-
-      def run_async():
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-          loop.run_until_complete(
-            _notify_player_summary(
-              session_id=self.state.session_id,
-              player_name=player_name,
-              summary=summary,
-              round_number=round_number
-            )
-          )
-          print(f"[WebSocket] 玩家总结通知已发送: {player_name}")
-        except Exception as e:
-          print(f"[WebSocket错误] 玩家总结通知发送失败: {e}")
-        finally:
-          loop.close()
-
-      import concurrent.futures
-      executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
-      future = executor.submit(run_async)
-      try:
-        future.result(timeout=1.0)
-      except concurrent.futures.TimeoutError:
-        print(f"[WebSocket警告] 玩家总结通知发送超时: {player_name}")
-      except Exception as e:
-        print(f"[WebSocket错误] 玩家总结通知异常: {e}")
-      finally:
-        executor.shutdown(wait=True)  # 等待任务完成后再关闭
-
-    except Exception as e:
-      print(f"[WebSocket错误] 玩家总结通知失败: {e}")
+    from src.services.game_manager.session_manager import _notify_player_summary
+
+    await self._notify(
+      "player_summary",
+      functools.partial(
+        _notify_player_summary,
+        session_id=self.state.session_id,
+        player_name=player_name,
+        summary=summary,
+        round_number=round_number
+      )
+    )
 
-  def _notify_game_complete(self, winner: str, winner_name: str):
+  async def _notify_game_complete(self, winner: str, winner_name: str):
     """发送游戏结束 WebSocket 通知"""
-    try:
-      from src.services.game_manager.session_manager import _notify_game_complete
-      import asyncio
-
-      def run_async():
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-          # 收集所有玩家的信息（包括身份）
-          players_info = {}
-          for player_name, player in self.state.players.items():
-            players_info[player_name] = {
-              "role": player.role,
-              "alive": player_name in self.this_round.players
-            }
-          
-          loop.run_until_complete(
-            _notify_game_complete(
-              session_id=self.state.session_id,
-              winner=winner,
-              winner_name=winner_name,
-              players_info=players_info,
-              round_number=self.current_round_num
-            )
-          )
-          print(f"[WebSocket] 游戏结束通知已发送: {winner_name} 获胜")
-        except Exception as e:
-          print(f"[WebSocket错误] 游戏结束通知发送失败: {e}")
-        finally:
-          loop.close()
-
-      import concurrent.futures
-      executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
-      future = executor.submit(run_async)
-      try:
-        future.result(timeout=1.0)
-      except concurrent.futures.TimeoutError:
-        print(f"[WebSocket警告] 游戏结束通知发送超时")
-      except Exception as e:
-        print(f"[WebSocket错误] 游戏结束通知异常: {e}")
-      finally:
-        executor.shutdown(wait=True)  # 等待任务完成后再关闭
+    from src.services.game_manager.session_manager import _notify_game_complete
+
+    # 收集所有玩家的信息（包括身份）
+    players_info = {}
+    for player_name, player in self.state.players.items():
+      players_info[player_name] = {
+        "role": player.role,
+        "alive": player_name in self.this_round.players
+      }
 
-    except Exception as e:
-      print(f"[WebSocket错误] 游戏结束通知失败: {e}")
+    await self._notify(
+      "game_complete",
+      functools.partial(
+        _notify_game_complete,
+        session_id=self.state.session_id,
+        winner=winner,
+        winner_name=winner_name,
+        players_info=players_info,
+        round_number=self.current_round_num
+      )
+    )
 
-  def run_game(self) -> str:
-    """Run the entire Werewolf game and return the winner."""
+  async def arun_game(self) -> str:
+    """Run the entire Werewolf game on the current event loop and return the winner."""
+    self._llm_slots = asyncio.Semaphore(max(1, self.num_threads))
     while not self.state.winner and not self.should_stop:
-      tqdm.tqdm.write(f"STARTING ROUND: {self.current_round_num}")
-      self.run_round()
+      await self.run_round()
 
       # 检查是否在轮次之间收到停止信号
       if self.should_stop:
-        tqdm.tqdm.write("游戏在轮次之间被用户停止。")
+        logger.info("game.stopped", between_rounds=True)
         self.state.winner = "Game Stopped"
         break
 
@@ -1176,11 +1070,18 @@ class GameMaster:
           self.state.players[name].gamestate.round_number = (
               self.current_round_num + 1
           )
-          self.state.players[name].gamestate.clear_debate()
       self.current_round_num += 1
 
     if self.should_stop:
-      tqdm.tqdm.write("游戏被用户停止！")
+      logger.info("game.stopped", between_rounds=False)
     else:
-      tqdm.tqdm.write("游戏结束！")
+      logger.info("game.finished", winner=self.state.winner)
     return self.state.winner
+
+  def run_game(self) -> str:
+    """Run the entire Werewolf game and return the winner.
+
+    Synchronous wrapper around arun_game() for callers without an event loop
+    (CLI runner, worker threads).
+    """
+    return asyncio.run(self.arun_game())
@@ -17,9 +17,11 @@ from .player import (
     WEREWOLF,
     SEER,
     DOCTOR,
-    group_and_format_observations,
 )
 
+# 观察记录
+from .observations import Observation, ObservationStore, group_and_format_observations
+
 # 日志模型
 from .logs import LmLog, VoteLog, RoundLog
 
@@ -41,7 +43,9 @@ __all__ = [
     "WEREWOLF",
     "SEER",
     "DOCTOR",
-    # 工具函数
+    # 观察记录
+    "Observation",
+    "ObservationStore",
     "group_and_format_observations",
     # 日志
     "LmLog",
@@ -19,30 +19,109 @@ Game State Data Models
 
 import enum
 import json
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
+from src.core.models.observations import ObservationStore
+from src.services.logger.structured import get_logger
 from src.utils.helpers import Deserializable
 
+logger = get_logger(__name__)
+
 
 # JSON serializer that works for nested classes
 class JsonEncoder(json.JSONEncoder):
     def default(self, o):
         if isinstance(o, enum.Enum):
             return o.value
-        if isinstance(o, set):
+        if isinstance(o, (set, ObservationStore)):
             return list(o)
+        if isinstance(o, GameView):
+            return o.serializable()
         return o.__dict__
 
 
+def _json_key(key: Any) -> str:
+    """按 json 模块的规则把字典键转换为字符串"""
+    if isinstance(key, str):
+        return str.__str__(key)
+    if key is True:
+        return "true"
+    if key is False:
+        return "false"
+    if key is None:
+        return "null"
+    if isinstance(key, int):
+        return int.__repr__(key)
+    if isinstance(key, float):
+        return _json_float_key(key)
+    raise TypeError(
+        f"keys must be str, int, float, bool or None, not {key.__class__.__name__}"
+    )
+
+
+def _json_float_key(key: float) -> str:
+    if key != key:
+        return "NaN"
+    if key == float("inf"):
+        return "Infinity"
+    if key == float("-inf"):
+        return "-Infinity"
+    return float.__repr__(key)
+
+
+def _build(o: Any) -> Any:
+    """递归构建与 json.loads(JsonEncoder().encode(o)) 相同的结果"""
+    kind = type(o)
+    if kind is str or kind is int or kind is bool or kind is float or o is None:
+        return o
+    if kind is list or kind is tuple:
+        return [_build(item) for item in o]
+    if kind is dict:
+        return {
+            (key if type(key) is str else _json_key(key)): _build(value)
+            for key, value in o.items()
+        }
+    # 子类按 json 模块的判断顺序处理
+    if isinstance(o, str):
+        return str.__str__(o)
+    if isinstance(o, int):
+        return int.__index__(o)
+    if isinstance(o, float):
+        return float(o)
+    if isinstance(o, (list, tuple)):
+        return [_build(item) for item in o]
+    if isinstance(o, dict):
+        return {_json_key(key): _build(value) for key, value in o.items()}
+    # 与 JsonEncoder.default 相同
+    if isinstance(o, enum.Enum):
+        return _build(o.value)
+    if isinstance(o, set):
+        return [_build(item) for item in o]
+    if isinstance(o, ObservationStore):
+        return list(o)
+    if isinstance(o, GameView):
+        return _build(o.serializable())
+    return _build(o.__dict__)
+
+
 def to_dict(o: Any) -> Union[Dict[str, Any], List[Any], Any]:
-    """将对象转换为字典（用于JSON序列化）"""
-    return json.loads(JsonEncoder().encode(o))
+    """将对象转换为字典（用于JSON序列化）
+
+    直接递归构建，结果与 json.loads(JsonEncoder().encode(o)) 一致，
+    但不经过字符串编码/解码。
+    """
+    return _build(o)
 
 
 class GameView:
     """玩家视角的游戏状态
 
-    每个玩家都有自己的GameView，包含他们可见的信息。
+    每个玩家都有自己的GameView，包含他们可见的信息。本回合的辩论记录由
+    Round 持有，所有玩家的GameView引用同一份只追加的记录，并各自保存
+    可见起点（debate_start），发言公布后无需逐个玩家复制。
+
+    序列化时只保存可见起点，不复制辩论内容；加载 State 时各玩家的视图重新
+    引用对应回合的 Round.debate。
     """
 
     def __init__(
@@ -53,37 +132,71 @@ class GameView:
     ):
         self.round_number: int = round_number
         self.current_players: List[str] = current_players
-        self.debate: List[Tuple[str, str]] = []
+        self.debate_log: List[Sequence[str]] = []
+        self.debate_start: int = 0
         self.other_wolf: Optional[str] = other_wolf
 
+    @property
+    def debate(self) -> List[Sequence[str]]:
+        """该玩家可见的辩论记录（玩家名和发言内容）"""
+        if self.debate_start:
+            return self.debate_log[self.debate_start:]
+        return self.debate_log
+
+    @property
+    def debate_turns(self) -> int:
+        """该玩家可见的发言数"""
+        return len(self.debate_log) - self.debate_start
+
+    def attach_debate(self, debate_log: List[Sequence[str]], start: int = 0):
+        """引用回合共享的辩论记录，start 之前的发言对该玩家不可见"""
+        self.debate_log = debate_log
+        self.debate_start = start
+
     def update_debate(self, author: str, dialogue: str):
-        """添加一条辩论记录"""
-        self.debate.append((author, dialogue))
+        """添加一条辩论记录（追加到共享记录，所有引用它的玩家都可见）"""
+        self.debate_log.append((author, dialogue))
 
     def clear_debate(self):
-        """清空辩论记录"""
-        self.debate.clear()
+        """清空该玩家的辩论记录（不修改共享记录）"""
+        self.attach_debate([])
 
     def remove_player(self, player_to_remove: str):
         """从当前玩家列表中移除一名玩家"""
         if player_to_remove not in self.current_players:
-            print(
-                f"Player {player_to_remove} not in current players:"
-                f" {self.current_players}"
+            # 玩家已被移除（重复移除或状态不同步），记录以便调试
+            logger.debug(
+                "game.remove_missing_player",
+                player=player_to_remove,
+                current_players=self.current_players,
             )
-            # 如果玩家不在列表中，说明已经被移除或者状态不一致，不需要重复移除
-            # 但这种状态不一致应该被记录以便调试
-            print(f"[调试] remove_player调用时玩家{player_to_remove}已不在current_players中，可能是重复移除或状态不同步")
             return
         self.current_players.remove(player_to_remove)
-        print(f"[调试] 成功从current_players中移除玩家: {player_to_remove}, 剩余玩家: {self.current_players}")
+        logger.debug("game.remove_player", player=player_to_remove, current_players=self.current_players)
+
+    def serializable(self) -> Dict[str, Any]:
+        """序列化的字段（辩论内容由 Round 保存）"""
+        return {
+            "round_number": self.round_number,
+            "current_players": self.current_players,
+            "debate_start": self.debate_start,
+            "other_wolf": self.other_wolf,
+        }
 
     def to_dict(self) -> Any:
         return to_dict(self)
 
     @classmethod
     def from_json(cls, data: Dict[Any, Any]):
-        return cls(**data)
+        o = cls(data["round_number"], data["current_players"], data.get("other_wolf"))
+        # 旧格式的视图各自保存辩论记录（debate）
+        o.attach_debate(data.get("debate_log", data.get("debate", [])), data.get("debate_start", 0))
+        return o
+
+    @classmethod
+    def load(cls, data: Optional[Dict[Any, Any]]) -> Optional["GameView"]:
+        """从序列化数据加载视图，没有视图时返回 None"""
+        return cls.from_json(data) if data else None
 
 
 class Round(Deserializable):
@@ -143,6 +256,7 @@ class State(Deserializable):
         rounds: 回合列表
         error_message: 错误信息（如果游戏失败）
         winner: 获胜方（"Villagers" 或 "Werewolves"）
+        version: 状态版本号，每次状态变更后单调递增
     """
 
     def __init__(
@@ -167,6 +281,12 @@ class State(Deserializable):
         self.rounds: List[Round] = []
         self.error_message: str = ""
         self.winner: str = ""
+        self.version: int = 0
+
+    def bump_version(self) -> int:
+        """状态变更后递增版本号"""
+        self.version += 1
+        return self.version
 
     def to_dict(self):
         # 先序列化整个对象
@@ -219,6 +339,12 @@ class State(Deserializable):
             rounds.append(Round.from_json(r))
 
         o.rounds = rounds
+        # 玩家视图重新引用所在回合的共享辩论记录
+        for player in players.values():
+            view = player.gamestate
+            if isinstance(view, GameView) and 0 <= view.round_number < len(rounds):
+                view.attach_debate(rounds[view.round_number].debate, view.debate_start)
         o.error_message = data.get("error_message", "")
         o.winner = data.get("winner", "")
+        o.version = data.get("version", 0)
         return o
@@ -0,0 +1,159 @@
+"""
+玩家观察记录
+Player Observations - 按 (回合, 类型, 文本) 存储的观察记录
+
+观察记录按回合渲染成提示词中的文本块并缓存，新增记录时只重新渲染该回合。
+对外仍可按旧格式（"第X轮：..." 字符串序列）读取和序列化。
+"""
+
+import re
+from collections.abc import Sequence
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Union
+
+from src.services.logger.structured import get_logger
+
+logger = get_logger(__name__)
+
+# 观察记录类型
+NOTE = "note"
+ANNOUNCEMENT = "announcement"
+SUMMARY = "summary"
+
+# 各类型在文本前的标签
+_KIND_LABELS = {
+    NOTE: "",
+    ANNOUNCEMENT: "主持人公告：",
+    SUMMARY: "总结：",
+}
+
+_ROUND_PATTERN = re.compile(r"第(\d+)轮|^Round\s+(\d+)")
+
+
+class Observation(NamedTuple):
+    """单条观察记录"""
+    round: int
+    kind: str
+    text: str
+
+    @property
+    def content(self) -> str:
+        """带类型标签的文本"""
+        return _KIND_LABELS.get(self.kind, "") + self.text
+
+    def __str__(self) -> str:
+        return f"第{self.round}轮：{self.content}"
+
+
+def parse_observation(observation: str) -> Optional[Observation]:
+    """解析旧格式的观察记录字符串（"第X轮：..."），无法解析时返回 None"""
+    prefix, sep, content = observation.partition("：")
+    match = _ROUND_PATTERN.search(prefix) if sep else None
+    if match is None:
+        return None
+    round_number = int(match.group(1) or match.group(2))
+    for kind, label in _KIND_LABELS.items():
+        if label and content.startswith(label):
+            return Observation(round_number, kind, content[len(label):])
+    return Observation(round_number, NOTE, content)
+
+
+class ObservationStore(Sequence):
+    """
+    单个玩家的观察记录
+
+    按序列读取时返回旧格式的字符串，因此日志、序列化和 API 输出保持不变。
+    """
+
+    def __init__(self, observations: Iterable[Union[str, Observation]] = ()):
+        self._records: List[Observation] = []
+        self._lines: Dict[int, List[str]] = {}  # 回合 -> 渲染后的行
+        self._blocks: Dict[int, str] = {}  # 回合 -> 渲染后的文本块
+        self._formatted: Optional[List[str]] = None
+        for observation in observations:
+            if not isinstance(observation, Observation):
+                parsed = parse_observation(observation)
+                if parsed is None:
+                    logger.warning("player.invalid_observation", observation=observation)
+                    continue
+                observation = parsed
+            self.append(observation)
+
+    def add(self, round_number: int, text: str, kind: str = NOTE) -> Observation:
+        """添加一条观察记录"""
+        observation = Observation(round_number, kind, text)
+        self.append(observation)
+        return observation
+
+    def append(self, observation: Observation) -> None:
+        self._records.append(observation)
+        line = "   - " + observation.content.strip().replace('"', "")
+        self._lines.setdefault(observation.round, []).append(line)
+        self._blocks.pop(observation.round, None)
+        self._formatted = None
+
+    def remove_round(self, round_number: int) -> None:
+        """删除某一回合的所有观察记录（例如恢复失败的回合时）"""
+        if round_number not in self._lines:
+            return
+        self._records = [o for o in self._records if o.round != round_number]
+        del self._lines[round_number]
+        self._blocks.pop(round_number, None)
+        self._formatted = None
+
+    def clear(self) -> None:
+        self._records.clear()
+        self._lines.clear()
+        self._blocks.clear()
+        self._formatted = None
+
+    def formatted(self) -> List[str]:
+        """按回合分组并格式化的观察记录（用于提示词）"""
+        if self._formatted is None:
+            blocks = []
+            for round_number in sorted(self._lines):
+                block = self._blocks.get(round_number)
+                if block is None:
+                    block = f"第{round_number}轮：\n" + "\n".join(self._lines[round_number])
+                    self._blocks[round_number] = block
+                blocks.append(block)
+            self._formatted = blocks
+        return list(self._formatted)
+
+    @property
+    def records(self) -> List[Observation]:
+        return list(self._records)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [str(o) for o in self._records[index]]
+        return str(self._records[index])
+
+    def __iter__(self) -> Iterator[str]:
+        return (str(o) for o in self._records)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ObservationStore):
+            return self._records == other._records
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ObservationStore({list(self)!r})"
+
+
+def group_and_format_observations(observations):
+    """按回合分组并格式化观察记录
+
+    Args:
+        observations: 字符串列表，每个字符串以"第X轮："开头
+
+    Returns:
+        格式化后的观察记录列表
+    """
+    if isinstance(observations, ObservationStore):
+        return observations.formatted()
+    return ObservationStore(observations).formatted()
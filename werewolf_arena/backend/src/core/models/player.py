@@ -24,8 +24,17 @@ from src.config import MAX_DEBATE_TURNS, NUM_PLAYERS
 from src.core.game.prompts import ACTION_PROMPTS_AND_SCHEMAS
 from src.core.models.game_state import GameView, to_dict
 from src.core.models.logs import LmLog
+from src.core.models.observations import (
+    ANNOUNCEMENT,
+    NOTE,
+    SUMMARY,
+    ObservationStore,
+)
+from src.services.logger.structured import get_logger
 from src.utils.helpers import Deserializable
 
+logger = get_logger(__name__)
+
 # 角色常量
 VILLAGER = "Villager"
 WEREWOLF = "Werewolf"
@@ -33,77 +42,6 @@ SEER = "Seer"
 DOCTOR = "Doctor"
 
 
-def group_and_format_observations(observations):
-    """按回合分组并格式化观察记录
-
-    Args:
-        observations: 字符串列表，每个字符串以"第X轮："开头
-
-    Returns:
-        格式化后的观察记录列表
-    """
-    grouped = {}
-    for obs in observations:
-        try:
-            # 安全地解析观察记录
-            parts = obs.split("：", 1)  # 使用中文冒号分割
-            if len(parts) < 2:
-                print(f"[观察记录错误] 无效的观察记录格式: {obs}")
-                continue
-
-            prefix = parts[0]
-
-            # 支持多种前缀格式：
-            # "第0轮"
-            # "第0轮主持人公告"
-            # "Round 0"
-            round_num = None
-
-            # 尝试从 "第X轮" 格式中提取数字
-            if "第" in prefix and "轮" in prefix:
-                import re
-                match = re.search(r'第(\d+)轮', prefix)
-                if match:
-                    round_num = int(match.group(1))
-
-            # 回退到空格分割的方式
-            if round_num is None:
-                prefix_parts = prefix.split()
-                if len(prefix_parts) >= 1:
-                    # 检查第一个部分是否包含轮次信息
-                    first_part = prefix_parts[0]
-                    if "第" in first_part and "轮" in first_part:
-                        import re
-                        match = re.search(r'第(\d+)轮', first_part)
-                        if match:
-                            round_num = int(match.group(1))
-                    elif len(prefix_parts) >= 2:
-                        # 尝试从第二部分获取数字
-                        try:
-                            round_num = int(prefix_parts[1])
-                        except (ValueError, IndexError):
-                            pass
-
-            if round_num is None:
-                print(f"[观察记录错误] 无法解析回合数字，前缀: '{prefix}'")
-                continue
-
-            obs_text = parts[1].strip().replace('"', "")
-            grouped.setdefault(round_num, []).append(obs_text)
-
-        except Exception as e:
-            print(f"[观察记录错误] 处理观察记录时发生错误 '{obs}': {e}")
-            continue
-
-    formatted_obs = []
-    for round_num, round_obs in sorted(grouped.items()):
-        formatted_round = f"第{round_num}轮：\n"
-        formatted_round += "\n".join(f"   - {obs}" for obs in round_obs)
-        formatted_obs.append(formatted_round)
-
-    return formatted_obs
-
-
 class Player(Deserializable):
     """玩家基类"""
 
@@ -118,7 +56,7 @@ class Player(Deserializable):
         self.role = role
         self.personality = personality
         self.model = model
-        self.observations: List[str] = []
+        self.observations = ObservationStore()
         self.bidding_rationale = ""
         self.gamestate: Optional[GameView] = None
 
@@ -128,20 +66,18 @@ class Player(Deserializable):
         """初始化游戏视图"""
         self.gamestate = GameView(round_number, current_players, other_wolf)
 
-    def _add_observation(self, observation: str):
+    def _add_observation(self, observation: str, kind: str = NOTE):
         """添加观察记录"""
         if not self.gamestate:
             raise ValueError(
                 "GameView not initialized. Call initialize_game_view() first."
             )
 
-        self.observations.append(
-            f"第{self.gamestate.round_number}轮：{observation}"
-        )
+        self.observations.add(self.gamestate.round_number, observation, kind)
 
     def add_announcement(self, announcement: str):
         """添加游戏公告到观察记录"""
-        self._add_observation(f"主持人公告：{announcement}")
+        self._add_observation(announcement, kind=ANNOUNCEMENT)
 
     def _get_game_state(self) -> Dict[str, Any]:
         """获取玩家视角的游戏状态"""
@@ -162,7 +98,7 @@ class Player(Deserializable):
             for author, dialogue in self.gamestate.debate
         ]
 
-        formatted_observations = group_and_format_observations(self.observations)
+        formatted_observations = self.observations.formatted()
 
         return {
             "name": self.name,
@@ -178,15 +114,12 @@ class Player(Deserializable):
             "num_villagers": NUM_PLAYERS - 4,
         }
 
-    def _generate_action(
+    def _action_request(
         self,
         action: str,
         options: Optional[List[str]] = None,
-    ) -> Tuple[Optional[Any], LmLog]:
-        """生成玩家行动（需要LLM客户端，将在后续重构中实现依赖注入）"""
-        # 这里暂时保留原有逻辑，后续会通过依赖注入重构
-        from src.services.llm.generator import generate
-
+    ) -> Dict[str, Any]:
+        """构建LLM行动请求参数（同步与异步调用共用）"""
         game_state = self._get_game_state()
         if options:
             game_state["options"] = (", ").join(options)
@@ -201,18 +134,39 @@ class Player(Deserializable):
         # Set temperature based on allowed_values
         temperature = 0.5 if allowed_values else 1.0
 
-        return generate(
-            prompt_template,
-            response_schema,
-            game_state,
-            model=self.model,
-            temperature=temperature,
-            allowed_values=allowed_values,
-            result_key=result_key,
-        )
+        return {
+            "prompt_template": prompt_template,
+            "response_schema": response_schema,
+            "worldstate": game_state,
+            "model": self.model,
+            "temperature": temperature,
+            "allowed_values": allowed_values,
+            "result_key": result_key,
+        }
 
-    def vote(self) -> Tuple[Optional[str], LmLog]:
-        """投票"""
+    def _generate_action(
+        self,
+        action: str,
+        options: Optional[List[str]] = None,
+    ) -> Tuple[Optional[Any], LmLog]:
+        """生成玩家行动（需要LLM客户端，将在后续重构中实现依赖注入）"""
+        # 这里暂时保留原有逻辑，后续会通过依赖注入重构
+        from src.services.llm.generator import generate
+
+        return generate(**self._action_request(action, options))
+
+    async def _agenerate_action(
+        self,
+        action: str,
+        options: Optional[List[str]] = None,
+    ) -> Tuple[Optional[Any], LmLog]:
+        """异步生成玩家行动"""
+        from src.services.llm.generator import agenerate
+
+        return await agenerate(**self._action_request(action, options))
+
+    def _vote_options(self) -> List[str]:
+        """投票候选人"""
         if not self.gamestate:
             raise ValueError(
                 "GameView not initialized. Call initialize_game_view() first."
@@ -223,16 +177,30 @@ class Player(Deserializable):
             if player != self.name
         ]
         random.shuffle(options)
-        vote, log = self._generate_action("vote", options)
-        if vote is not None and len(self.gamestate.debate) == MAX_DEBATE_TURNS:
+        return options
+
+    def _record_vote(self, vote: Optional[str]) -> None:
+        if vote is not None and self.gamestate.debate_turns == MAX_DEBATE_TURNS:
             self._add_observation(
                 f"辩论结束后，我投票淘汰了{vote}。"
             )
+
+    def vote(self) -> Tuple[Optional[str], LmLog]:
+        """投票"""
+        vote, log = self._generate_action("vote", self._vote_options())
+        self._record_vote(vote)
         return vote, log
 
-    def bid(self) -> Tuple[Optional[int], LmLog]:
-        """竞价发言"""
-        bid, log = self._generate_action("bid", options=["0", "1", "2", "3", "4"])
+    async def avote(self) -> Tuple[Optional[str], LmLog]:
+        """投票（异步）"""
+        vote, log = await self._agenerate_action("vote", self._vote_options())
+        self._record_vote(vote)
+        return vote, log
+
+    _BID_OPTIONS = ["0", "1", "2", "3", "4"]
+
+    def _parse_bid(self, bid: Any, log: LmLog) -> int:
+        """校验竞价结果并记录竞价理由"""
         if bid is not None:
             # 验证 bid 是数字字符串
             try:
@@ -243,35 +211,61 @@ class Player(Deserializable):
                 else:
                     self.bidding_rationale = "无法获取推理信息"
             except (ValueError, TypeError) as e:
-                print(f"Warning: {self.name} returned invalid bid value '{bid}', using default 0")
+                logger.warning("game.default_bid", player=self.name, reason=f"invalid bid {bid!r}")
                 bid = 0
                 self.bidding_rationale = f"默认竞价：{str(e)}"
         else:
             # bid为None时的默认处理
             bid = 0
             self.bidding_rationale = "AI调用失败，使用默认竞价"
-        return bid, log
+        return bid
+
+    def bid(self) -> Tuple[Optional[int], LmLog]:
+        """竞价发言"""
+        bid, log = self._generate_action("bid", options=list(self._BID_OPTIONS))
+        return self._parse_bid(bid, log), log
+
+    async def abid(self) -> Tuple[Optional[int], LmLog]:
+        """竞价发言（异步）"""
+        bid, log = await self._agenerate_action("bid", options=list(self._BID_OPTIONS))
+        return self._parse_bid(bid, log), log
+
+    @staticmethod
+    def _extract_say(result: Any) -> Optional[str]:
+        if result is not None and isinstance(result, dict):
+            return result.get("say", None)
+        # 如果result为None或不是字典，返回None
+        return None
 
     def debate(self) -> Tuple[Optional[str], LmLog]:
         """参与辩论"""
         result, log = self._generate_action("debate", [])
-        if result is not None and isinstance(result, dict):
-            say = result.get("say", None)
-            return say, log
-        # 如果result为None或不是字典，返回None
-        return None, log
+        return self._extract_say(result), log
 
-    def summarize(self) -> Tuple[Optional[str], LmLog]:
-        """总结游戏状态"""
-        result, log = self._generate_action("summarize", [])
+    async def adebate(self) -> Tuple[Optional[str], LmLog]:
+        """参与辩论（异步）"""
+        result, log = await self._agenerate_action("debate", [])
+        return self._extract_say(result), log
+
+    def _record_summary(self, result: Any) -> Optional[str]:
         if result is not None and isinstance(result, dict):
             summary = result.get("summary", None)
             if summary is not None:
                 summary = summary.strip('"')
-                self._add_observation(f"总结：{summary}")
-            return summary, log
+                self._add_observation(summary, kind=SUMMARY)
+            return summary
         # 如果result为None或不是字典，返回None
-        return None, log
+        return None
+
+    def summarize(self) -> Tuple[Optional[str], LmLog]:
+        """总结游戏状态"""
+        result, log = self._generate_action("summarize", [])
+        return self._record_summary(result), log
+
+    async def asummarize(self) -> Tuple[Optional[str], LmLog]:
+        """总结游戏状态（异步）"""
+        result, log = await self._agenerate_action("summarize", [])
+        return self._record_summary(result), log
 
     def to_dict(self) -> Any:
         return to_dict(self)
@@ -282,9 +276,9 @@ class Player(Deserializable):
         role = data["role"]
         model = data.get("model", None)
         o = cls(name=name, role=role, model=model)
-        o.gamestate = data.get("gamestate", None)
+        o.gamestate = GameView.load(data.get("gamestate"))
         o.bidding_rationale = data.get("bidding_rationale", "")
-        o.observations = data.get("observations", [])
+        o.observations = ObservationStore(data.get("observations", []))
         return o
 
 
@@ -306,9 +300,9 @@ class Villager(Player):
         name = data["name"]
         model = data.get("model", None)
         o = cls(name=name, model=model)
-        o.gamestate = data.get("gamestate", None)
+        o.gamestate = GameView.load(data.get("gamestate"))
         o.bidding_rationale = data.get("bidding_rationale", "")
-        o.observations = data.get("observations", [])
+        o.observations = ObservationStore(data.get("observations", []))
         return o
 
 
@@ -331,8 +325,8 @@ class Werewolf(Player):
         state["werewolf_context"] = self._get_werewolf_context()
         return state
 
-    def eliminate(self) -> Tuple[Optional[str], LmLog]:
-        """选择淘汰目标"""
+    def _eliminate_options(self) -> List[str]:
+        """可淘汰的目标"""
         if not self.gamestate:
             raise ValueError(
                 "GameView not initialized. Call initialize_game_view() first."
@@ -344,42 +338,63 @@ class Werewolf(Player):
             if player != self.name and player != self.gamestate.other_wolf
         ]
         random.shuffle(options)
+        return options
+
+    def _validate_eliminate(
+        self, eliminate: Optional[str], log: LmLog, options: List[str]
+    ) -> Tuple[Optional[str], LmLog]:
+        """验证淘汰目标，无效时回退到默认目标"""
+        if eliminate is None:
+            logger.warning("game.default_target", player=self.name, action="remove", reason="empty response")
+            # 选择一个默认目标
+            default_target = options[0] if options else None
+            return default_target, LmLog(
+                prompt=f"Default target selected due to empty response",
+                raw_resp="Empty response",
+                result={"remove": default_target, "reasoning": "Default selection due to AI failure"}
+            )
+
+        # 验证返回的目标是否在有效选项中
+        if eliminate not in options:
+            logger.warning("game.default_target", player=self.name, action="remove", reason=f"invalid target {eliminate!r}")
+            default_target = options[0] if options else None
+            return default_target, LmLog(
+                prompt=f"Invalid target '{eliminate}', using default {default_target}",
+                raw_resp=f"Invalid target: {eliminate}",
+                result={"remove": default_target, "reasoning": f"Corrected invalid choice '{eliminate}' to default"}
+            )
 
+        return eliminate, log
+
+    def _eliminate_error(
+        self, e: Exception, options: List[str]
+    ) -> Tuple[Optional[str], LmLog]:
+        logger.error("game.eliminate_failed", player=self.name, error=f"{type(e).__name__}: {e}")
+        # 出现异常时返回默认目标
+        default_target = options[0] if options else None
+        return default_target, LmLog(
+            prompt=f"Error during eliminate action: {str(e)}",
+            raw_resp=f"Error: {str(e)}",
+            result={"remove": default_target, "reasoning": f"Error fallback to default target"}
+        )
+
+    def eliminate(self) -> Tuple[Optional[str], LmLog]:
+        """选择淘汰目标"""
+        options = self._eliminate_options()
         try:
             eliminate, log = self._generate_action("remove", options)
+            return self._validate_eliminate(eliminate, log, options)
+        except Exception as e:
+            return self._eliminate_error(e, options)
 
-            # 验证返回的结果
-            if eliminate is None:
-                print(f"Warning: {self.name} (Werewolf) did not return a valid eliminate target, using default")
-                # 选择一个默认目标
-                default_target = options[0] if options else None
-                return default_target, LmLog(
-                    prompt=f"Default target selected due to empty response",
-                    raw_resp="Empty response",
-                    result={"remove": default_target, "reasoning": "Default selection due to AI failure"}
-                )
-
-            # 验证返回的目标是否在有效选项中
-            if eliminate not in options:
-                print(f"Warning: {self.name} (Werewolf) chose invalid target '{eliminate}', using default")
-                default_target = options[0] if options else None
-                return default_target, LmLog(
-                    prompt=f"Invalid target '{eliminate}', using default {default_target}",
-                    raw_resp=f"Invalid target: {eliminate}",
-                    result={"remove": default_target, "reasoning": f"Corrected invalid choice '{eliminate}' to default"}
-                )
-
-            return eliminate, log
-
+    async def aeliminate(self) -> Tuple[Optional[str], LmLog]:
+        """选择淘汰目标（异步）"""
+        options = self._eliminate_options()
+        try:
+            eliminate, log = await self._agenerate_action("remove", options)
+            return self._validate_eliminate(eliminate, log, options)
         except Exception as e:
-            print(f"Error during eliminate action for {self.name}: {e}")
-            # 出现异常时返回默认目标
-            default_target = options[0] if options else None
-            return default_target, LmLog(
-                prompt=f"Error during eliminate action: {str(e)}",
-                raw_resp=f"Error: {str(e)}",
-                result={"remove": default_target, "reasoning": f"Error fallback to default target"}
-            )
+            return self._eliminate_error(e, options)
 
     def _get_werewolf_context(self):
         """获取狼人上下文信息"""
@@ -403,9 +418,9 @@ class Werewolf(Player):
         name = data["name"]
         model = data.get("model", None)
         o = cls(name=name, model=model)
-        o.gamestate = data.get("gamestate", None)
+        o.gamestate = GameView.load(data.get("gamestate"))
         o.bidding_rationale = data.get("bidding_rationale", "")
-        o.observations = data.get("observations", [])
+        o.observations = ObservationStore(data.get("observations", []))
         return o
 
 
@@ -421,8 +436,8 @@ class Seer(Player):
         super().__init__(name=name, role=SEER, model=model, personality=personality)
         self.previously_unmasked: Dict[str, str] = {}
 
-    def unmask(self) -> Tuple[Optional[str], LmLog]:
-        """调查玩家身份"""
+    def _unmask_options(self) -> List[str]:
+        """可查验的目标"""
         if not self.gamestate:
             raise ValueError(
                 "GameView not initialized. Call initialize_game_view() first."
@@ -434,7 +449,15 @@ class Seer(Player):
             if player != self.name and player not in self.previously_unmasked.keys()
         ]
         random.shuffle(options)
-        return self._generate_action("investigate", options)
+        return options
+
+    def unmask(self) -> Tuple[Optional[str], LmLog]:
+        """调查玩家身份"""
+        return self._generate_action("investigate", self._unmask_options())
+
+    async def aunmask(self) -> Tuple[Optional[str], LmLog]:
+        """调查玩家身份（异步）"""
+        return await self._agenerate_action("investigate", self._unmask_options())
 
     def reveal_and_update(self, player, role):
         """揭示并更新调查结果"""
@@ -449,9 +472,9 @@ class Seer(Player):
         model = data.get("model", None)
         o = cls(name=name, model=model)
         o.previously_unmasked = data.get("previously_unmasked", {})
-        o.gamestate = data.get("gamestate", None)
+        o.gamestate = GameView.load(data.get("gamestate"))
         o.bidding_rationale = data.get("bidding_rationale", "")
-        o.observations = data.get("observations", [])
+        o.observations = ObservationStore(data.get("observations", []))
         return o
 
 
@@ -468,8 +491,8 @@ class Doctor(Player):
             name=name, role=DOCTOR, model=model, personality=personality
         )
 
-    def save(self) -> Tuple[Optional[str], LmLog]:
-        """选择保护目标"""
+    def _protect_options(self) -> List[str]:
+        """可保护的目标"""
         if not self.gamestate:
             raise ValueError(
                 "GameView not initialized. Call initialize_game_view() first."
@@ -477,9 +500,24 @@ class Doctor(Player):
 
         options = list(self.gamestate.current_players)
         random.shuffle(options)
-        protected, log = self._generate_action("protect", options)
+        return options
+
+    def _record_protect(self, protected: Optional[str]) -> None:
         if protected is not None:
             self._add_observation(f"夜晚阶段，我选择保护{protected}")
+
+    def save(self) -> Tuple[Optional[str], LmLog]:
+        """选择保护目标"""
+        protected, log = self._generate_action("protect", self._protect_options())
+        self._record_protect(protected)
+        return protected, log
+
+    async def asave(self) -> Tuple[Optional[str], LmLog]:
+        """选择保护目标（异步）"""
+        protected, log = await self._agenerate_action(
+            "protect", self._protect_options()
+        )
+        self._record_protect(protected)
         return protected, log
 
     @classmethod
@@ -487,7 +525,7 @@ class Doctor(Player):
         name = data["name"]
         model = data.get("model", None)
         o = cls(name=name, model=model)
-        o.gamestate = data.get("gamestate", None)
+        o.gamestate = GameView.load(data.get("gamestate"))
         o.bidding_rationale = data.get("bidding_rationale", "")
-        o.observations = data.get("observations", [])
+        o.observations = ObservationStore(data.get("observations", []))
         return o
@@ -0,0 +1,364 @@
+"""
+游戏工作进程池
+Game Process Pool - 游戏引擎在独立的工作进程中运行，API 进程只负责请求和推送
+
+  - 每个工作进程在自己的事件循环上运行多局游戏；状态序列化、游戏日志写入、
+    提示词渲染和响应解析都在工作进程中完成，不与 API 进程争用 GIL
+  - 工作进程的通知总线切换为转发模式：通知事件（可序列化的发送函数和参数）经
+    事件队列回到 API 进程，由 API 进程的通知总线按原有顺序发送
+  - 每次状态变更发回一份快照，API 进程按需重建状态（查询状态时）
+  - 停止命令经各进程的命令队列发给运行该游戏的进程
+  - 工作进程异常退出时，其上的游戏以错误结束，进程自动重启
+"""
+
+import asyncio
+import itertools
+import multiprocessing
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from src.core.models.game_state import State
+from src.services.game_manager.notification_bus import NotificationEvent, notification_bus
+from src.services.llm.admission import llm_flow
+from src.services.logger.structured import get_logger
+
+logger = get_logger(__name__)
+
+# 检查工作进程是否存活的间隔（秒）
+HEALTH_CHECK_SECONDS = 1.0
+
+# 命令和事件
+START = "start"
+STOP = "stop"
+NOTIFY = "notify"
+SNAPSHOT = "snapshot"
+FINISHED = "finished"
+
+
+class ProcessGameMaster:
+    """
+    API 进程中代表工作进程里一局游戏的对象
+
+    提供会话管理器使用的 GameMaster 接口（arun_game / stop / logs / state）。
+    """
+
+    def __init__(
+        self,
+        pool: "GameProcessPool",
+        state: State,
+        log_dir: str,
+        game_mode: str = "normal",
+        num_threads: int = 1,
+        on_snapshot: Optional[Callable[[Dict[str, Any], Optional[dict], Optional[float]], None]] = None,
+    ):
+        self.pool = pool
+        self.log_dir = log_dir
+        self.game_mode = game_mode
+        self.num_threads = num_threads
+        self.on_snapshot = on_snapshot
+        self.logs: List[Any] = []  # 游戏日志由工作进程写入会话目录
+        self.worker: Optional[int] = None
+        self._state = state
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._done: Optional[asyncio.Future] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def session_id(self) -> str:
+        return self._state.session_id
+
+    @property
+    def state(self) -> State:
+        """最新快照对应的状态（按需重建）"""
+        with self._lock:
+            snapshot, self._snapshot = self._snapshot, None
+        if snapshot is not None:
+            self._state = State.from_json(snapshot)
+        return self._state
+
+    @property
+    def version(self) -> int:
+        with self._lock:
+            snapshot = self._snapshot
+        return snapshot.get("version", 0) if snapshot is not None else self._state.version
+
+    async def arun_game(self) -> str:
+        """在工作进程中运行游戏，等待结束并返回胜者"""
+        self._loop = asyncio.get_running_loop()
+        self._done = self._loop.create_future()
+        flow = llm_flow.get()
+        self.pool.submit(self, self._state, weight=flow[1] if flow else 1.0)
+        winner, error = await self._done
+        if error:
+            raise RuntimeError(error)
+        return winner
+
+    def stop(self) -> None:
+        self.pool.stop(self.session_id)
+
+    # 以下由进程池的事件线程调用
+
+    def _update(self, game_data: Dict[str, Any], final_round: Optional[dict], playback_at: Optional[float]) -> None:
+        with self._lock:
+            self._snapshot = game_data["game_state"]
+        if self.on_snapshot is not None:
+            self.on_snapshot(game_data, final_round, playback_at)
+
+    def _finish(self, winner: Optional[str], error: Optional[str]) -> None:
+        loop, done = self._loop, self._done
+        if loop is None or done is None or loop.is_closed():
+            return
+
+        def resolve():
+            if not done.done():
+                done.set_result((winner, error))
+
+        loop.call_soon_threadsafe(resolve)
+
+
+class GameProcessPool:
+    """游戏工作进程池（第一次提交游戏时启动）"""
+
+    def __init__(self, processes: int):
+        self.processes = max(1, processes)
+        self._context = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._events = None
+        self._commands: List[Any] = []
+        self._workers: List[Any] = []
+        self._games: Dict[str, ProcessGameMaster] = {}
+        self._reader: Optional[threading.Thread] = None
+        self._closed = False
+        self._stats = {"started": 0, "finished": 0, "events": 0, "restarts": 0}
+
+    # ------------------------------------------------------------------
+    # 生命周期
+    # ------------------------------------------------------------------
+
+    def _spawn_worker(self, index: int) -> None:
+        commands = self._context.Queue()
+        worker = self._context.Process(
+            target=_worker_main, args=(commands, self._events), name=f"game-worker-{index}", daemon=True
+        )
+        worker.start()
+        self._commands[index] = commands
+        self._workers[index] = worker
+
+    def _ensure_started(self) -> None:
+        if self._events is not None:
+            return
+        self._events = self._context.Queue()
+        self._commands = [None] * self.processes
+        self._workers = [None] * self.processes
+        for index in range(self.processes):
+            self._spawn_worker(index)
+        self._reader = threading.Thread(target=self._read_events, name="game-worker-events", daemon=True)
+        self._reader.start()
+        logger.info("game_processes.started", processes=self.processes)
+
+    def shutdown(self) -> None:
+        """停止所有工作进程（应用关闭时调用）"""
+        with self._lock:
+            self._closed = True
+            workers, commands = list(self._workers), list(self._commands)
+        for command_queue in commands:
+            if command_queue is not None:
+                command_queue.put(None)
+        for worker in workers:
+            if worker is not None:
+                worker.join(timeout=5)
+                if worker.is_alive():
+                    worker.terminate()
+
+    # ------------------------------------------------------------------
+    # 命令
+    # ------------------------------------------------------------------
+
+    def submit(self, master: ProcessGameMaster, state: State, weight: float = 1.0) -> None:
+        """把游戏交给当前游戏数最少的工作进程（初始状态整体序列化传给工作进程）"""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Game process pool is shut down")
+            self._ensure_started()
+            load = [0] * self.processes
+            for game in self._games.values():
+                load[game.worker] += 1
+            master.worker = min(range(self.processes), key=load.__getitem__)
+            self._games[master.session_id] = master
+            self._stats["started"] += 1
+            commands = self._commands[master.worker]
+        commands.put((START, master.session_id, {
+            "state": state,
+            "log_dir": master.log_dir,
+            "game_mode": master.game_mode,
+            "num_threads": master.num_threads,
+            "weight": weight,
+        }))
+
+    def stop(self, session_id: str) -> bool:
+        with self._lock:
+            master = self._games.get(session_id)
+            commands = self._commands[master.worker] if master is not None else None
+        if commands is None:
+            return False
+        commands.put((STOP, session_id, None))
+        return True
+
+    # ------------------------------------------------------------------
+    # 事件
+    # ------------------------------------------------------------------
+
+    def _read_events(self) -> None:
+        # 存活检查按时间进行，其他工作进程持续发送事件时也能发现退出的进程
+        checked = time.monotonic()
+        while True:
+            try:
+                message = self._events.get(timeout=HEALTH_CHECK_SECONDS)
+            except queue.Empty:
+                message = None
+            except (EOFError, OSError):
+                return
+            if message is not None:
+                try:
+                    self._handle(*message)
+                except Exception as e:
+                    logger.error("game_processes.event_failed", kind=message[0], error=f"{type(e).__name__}: {e}")
+            now = time.monotonic()
+            if now - checked >= HEALTH_CHECK_SECONDS:
+                checked = now
+                self._check_workers()
+
+    def _handle(self, kind: str, session_id: str, payload: Any) -> None:
+        self._stats["events"] += 1
+        if kind == NOTIFY:
+            event_kind, send, coalesce, playback_at = payload
+            notification_bus.publish(NotificationEvent(
+                session_id, event_kind, send, coalesce=coalesce, playback_at=playback_at
+            ))
+            return
+        with self._lock:
+            master = self._games.get(session_id)
+            if kind == FINISHED:
+                self._games.pop(session_id, None)
+                self._stats["finished"] += 1
+        if master is None:
+            return
+        if kind == SNAPSHOT:
+            master._update(*payload)
+        elif kind == FINISHED:
+            master._finish(*payload)
+
+    def _check_workers(self) -> None:
+        """工作进程异常退出时结束其上的游戏并重启该进程"""
+        with self._lock:
+            if self._closed:
+                return
+            dead = [index for index, worker in enumerate(self._workers) if not worker.is_alive()]
+            lost = [game for game in self._games.values() if game.worker in dead]
+            for game in lost:
+                self._games.pop(game.session_id, None)
+            for index in dead:
+                logger.error("game_processes.worker_died", worker=index, exitcode=self._workers[index].exitcode)
+                self._stats["restarts"] += 1
+                self._spawn_worker(index)
+        for game in lost:
+            game._finish(None, "Game worker process exited unexpectedly")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            load = [0] * self.processes
+            for game in self._games.values():
+                load[game.worker] += 1
+            stats.update({
+                "processes": self.processes,
+                "alive": sum(1 for worker in self._workers if worker is not None and worker.is_alive()),
+                "games": load,
+            })
+            return stats
+
+
+# ----------------------------------------------------------------------
+# 工作进程
+# ----------------------------------------------------------------------
+
+def _worker_main(commands, events) -> None:
+    """工作进程入口"""
+    from src.config.settings import settings
+    from src.services.llm.client import LLMClient
+    from src.services.llm.generator import set_global_llm_client
+
+    try:
+        set_global_llm_client(LLMClient.from_settings(settings))
+    except Exception as e:
+        logger.error("game_processes.llm_client_failed", error=f"{type(e).__name__}: {e}")
+
+    # 通知不在工作进程中发送，转发给 API 进程
+    notification_bus.set_relay(lambda event: events.put((
+        NOTIFY, event.session_id, (event.kind, event.send, event.coalesce, event.playback_at)
+    )))
+    asyncio.run(_serve(commands, events))
+
+
+async def _serve(commands, events) -> None:
+    games: Dict[str, Any] = {}
+    tasks = set()
+    names = itertools.count()
+    while True:
+        command = await asyncio.to_thread(commands.get)
+        if command is None:
+            break
+        kind, session_id, payload = command
+        if kind == START:
+            task = asyncio.get_running_loop().create_task(
+                _play(session_id, payload, games, events), name=f"game-{next(names)}"
+            )
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        elif kind == STOP and session_id in games:
+            games[session_id].stop()
+    for gamemaster in games.values():
+        gamemaster.stop()
+    if tasks:
+        await asyncio.wait(tasks, timeout=5)
+
+
+async def _play(session_id: str, options: Dict[str, Any], games: Dict[str, Any], events) -> None:
+    """在工作进程中运行一局游戏"""
+    from src.core.game.game_master import GameMaster
+    from src.services.game_manager.session_manager import _game_update_data
+    from src.services.logger.game_logger import save_game
+
+    log_dir = options["log_dir"]
+    state = options["state"]
+    gamemaster = None
+
+    def _progress(state: State, logs) -> None:
+        save_game(state, logs, log_dir)
+        final_round = state.rounds[-1].to_dict() if state.winner and state.rounds else None
+        events.put((SNAPSHOT, session_id, (_game_update_data(state), final_round, gamemaster.playback_at())))
+
+    winner, error = None, None
+    try:
+        llm_flow.set((session_id, options["weight"]))
+        gamemaster = GameMaster(
+            state,
+            num_threads=options["num_threads"],
+            on_progress=_progress,
+            game_mode=options["game_mode"],
+        )
+        games[session_id] = gamemaster
+        _progress(state, gamemaster.logs)
+        winner = await gamemaster.arun_game()
+    except Exception as e:
+        error = str(e) or type(e).__name__
+        state.error_message = error
+        # 写出包含错误信息的最终文件
+        save_game(state, gamemaster.logs if gamemaster else [], log_dir)
+        events.put((SNAPSHOT, session_id, (_game_update_data(state), None, None)))
+    finally:
+        games.pop(session_id, None)
+        events.put((FINISHED, session_id, (winner, error)))
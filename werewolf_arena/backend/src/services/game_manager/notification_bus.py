@@ -0,0 +1,292 @@
+"""
+WebSocket 通知总线
+Notification Bus - one long-lived dispatcher on the server event loop
+
+游戏代码（可能运行在其他线程的事件循环上）把通知放入有界队列，
+服务器主事件循环上的单个任务负责取出、分批、合并并发送。
+同一会话的通知按入队顺序发送，不同会话之间并发发送。
+
+游戏工作进程中的总线处于转发模式（set_relay），通知交给转发函数送回 API 进程。
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from src.config.settings import settings
+from src.services.logger.structured import get_logger
+
+logger = get_logger(__name__)
+
+# 正在发送的通知在游戏回放时间线上的位置（headless 模式），由发送函数写入消息
+current_playback_at: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "current_playback_at", default=None
+)
+
+
+class NotificationEvent:
+    """待发送的通知"""
+    def __init__(
+        self,
+        session_id: str,
+        kind: str,
+        send: Callable[[], Awaitable[Any]],
+        coalesce: bool = False,
+        playback_at: Optional[float] = None,
+    ):
+        self.session_id = session_id
+        self.kind = kind
+        # 在服务器事件循环上调用，返回实际发送消息的协程
+        self.send = send
+        # 同一批中同一会话、同一类型的通知只发送最新一条（如完整状态快照）
+        self.coalesce = coalesce
+        # headless 模式下事件在回放时间线上的位置（秒），客户端据此控制展示节奏
+        self.playback_at = playback_at
+        self.enqueued_at = time.monotonic()
+
+
+class NotificationBus:
+    """单例通知总线"""
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        config = settings.server
+        self.queue_size = max(1, config.notify_queue_size)
+        self.batch_window = max(0.0, config.notify_batch_window_ms) / 1000
+        self.batch_max = max(1, config.notify_batch_max)
+        self.send_timeout = config.notify_send_timeout
+        self.late_threshold = config.notify_late_ms / 1000
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._relay: Optional[Callable[[NotificationEvent], Any]] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._drainer: Optional[asyncio.Task] = None
+        self._bind_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "published": 0,
+            "delivered": 0,
+            "dropped": 0,
+            "coalesced": 0,
+            "late": 0,
+            "failed": 0,
+            "batches": 0,
+            "max_queue_depth": 0,
+        }
+        self._initialized = True
+
+    # ------------------------------------------------------------------
+    # 生命周期
+    # ------------------------------------------------------------------
+
+    def bind(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """绑定到服务器事件循环并启动分发任务（须在该事件循环上调用）"""
+        loop = loop or asyncio.get_running_loop()
+        with self._bind_lock:
+            if self._loop is loop and self._drainer is not None and not self._drainer.done():
+                return
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._drainer = loop.create_task(self._drain())
+
+    def set_relay(self, relay: Optional[Callable[[NotificationEvent], Any]]) -> None:
+        """转发模式：发布的通知交给 relay（如发回 API 进程），不在本进程发送"""
+        self._relay = relay
+
+    async def close(self) -> None:
+        """停止分发任务（应用关闭时调用）"""
+        drainer, self._drainer = self._drainer, None
+        self._loop = None
+        if drainer is not None and not drainer.done():
+            drainer.cancel()
+            try:
+                await drainer
+            except asyncio.CancelledError:
+                pass
+
+    def _target_loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        """返回分发所在的事件循环；尚未绑定时（如命令行运行）绑定到调用方的事件循环"""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            return loop
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+        self.bind(running)
+        return running
+
+    @staticmethod
+    def _on_loop(loop: asyncio.AbstractEventLoop) -> bool:
+        try:
+            return asyncio.get_running_loop() is loop
+        except RuntimeError:
+            return False
+
+    # ------------------------------------------------------------------
+    # 发布
+    # ------------------------------------------------------------------
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _record_depth(self) -> None:
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            if depth > self._stats["max_queue_depth"]:
+                self._stats["max_queue_depth"] = depth
+
+    def _put_nowait(self, event: NotificationEvent) -> bool:
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self._count("dropped")
+            return False
+        self._record_depth()
+        return True
+
+    async def _put(self, event: NotificationEvent) -> None:
+        await self._queue.put(event)
+        self._record_depth()
+
+    def _forward(self, event: NotificationEvent) -> bool:
+        try:
+            self._relay(event)
+        except Exception as e:
+            self._count("dropped")
+            logger.error("notify.relay_failed", kind=event.kind, session_id=event.session_id, error=str(e))
+            return False
+        self._count("published")
+        return True
+
+    def publish(self, event: NotificationEvent) -> bool:
+        """从任意线程发布通知，不阻塞；队列已满时丢弃"""
+        if self._relay is not None:
+            return self._forward(event)
+        loop = self._target_loop()
+        if loop is None:
+            self._count("dropped")
+            return False
+        self._count("published")
+        if self._on_loop(loop):
+            return self._put_nowait(event)
+        try:
+            loop.call_soon_threadsafe(self._put_nowait, event)
+        except RuntimeError:
+            # 服务器事件循环已关闭
+            self._count("dropped")
+            return False
+        return True
+
+    async def apublish(self, event: NotificationEvent) -> bool:
+        """发布通知；队列已满时等待（反压），等待超过发送超时则丢弃"""
+        if self._relay is not None:
+            return self._forward(event)
+        loop = self._target_loop()
+        if loop is None:
+            self._count("dropped")
+            return False
+        self._count("published")
+        try:
+            if self._on_loop(loop):
+                await asyncio.wait_for(self._put(event), self.send_timeout)
+            else:
+                future = asyncio.run_coroutine_threadsafe(self._put(event), loop)
+                await asyncio.wait_for(asyncio.wrap_future(future), self.send_timeout)
+        except (asyncio.TimeoutError, RuntimeError):
+            self._count("dropped")
+            return False
+        return True
+
+    # ------------------------------------------------------------------
+    # 分发
+    # ------------------------------------------------------------------
+
+    async def _next_batch(self) -> List[NotificationEvent]:
+        """取出一批通知：第一条到达后，再收集批处理窗口内到达的通知"""
+        queue = self._queue
+        loop = asyncio.get_running_loop()
+        batch = [await queue.get()]
+        deadline = loop.time() + self.batch_window
+        while len(batch) < self.batch_max:
+            try:
+                batch.append(queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _coalesce(self, batch: List[NotificationEvent]) -> List[NotificationEvent]:
+        """可合并的通知只保留每个会话、每种类型的最后一条"""
+        latest: Dict[tuple, int] = {}
+        for index, event in enumerate(batch):
+            if event.coalesce:
+                latest[(event.session_id, event.kind)] = index
+        kept = [
+            event for index, event in enumerate(batch)
+            if not event.coalesce or latest[(event.session_id, event.kind)] == index
+        ]
+        if len(kept) < len(batch):
+            self._count("coalesced", len(batch) - len(kept))
+        return kept
+
+    async def _deliver(self, events: List[NotificationEvent]) -> None:
+        """按顺序发送同一会话的通知"""
+        for event in events:
+            if time.monotonic() - event.enqueued_at > self.late_threshold:
+                self._count("late")
+            token = current_playback_at.set(event.playback_at)
+            try:
+                await asyncio.wait_for(event.send(), self.send_timeout)
+                self._count("delivered")
+            except asyncio.TimeoutError:
+                self._count("failed")
+                logger.warning("notify.timeout", kind=event.kind, session_id=event.session_id)
+            except Exception as e:
+                self._count("failed")
+                logger.error("notify.failed", kind=event.kind, session_id=event.session_id, error=str(e))
+            finally:
+                current_playback_at.reset(token)
+
+    async def _drain(self) -> None:
+        while True:
+            batch = self._coalesce(await self._next_batch())
+            self._count("batches")
+            by_session: Dict[str, List[NotificationEvent]] = {}
+            for event in batch:
+                by_session.setdefault(event.session_id, []).append(event)
+            await asyncio.gather(*(self._deliver(events) for events in by_session.values()))
+
+    def stats(self) -> Dict[str, Any]:
+        """通知总线统计信息"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = self._queue.qsize() if self._queue is not None else 0
+        stats["queue_size"] = self.queue_size
+        stats["running"] = self._drainer is not None and not self._drainer.done()
+        return stats
+
+
+# 全局实例
+notification_bus = NotificationBus()
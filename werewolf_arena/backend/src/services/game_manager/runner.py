@@ -14,7 +14,7 @@
 
 import random
 import traceback
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 import itertools
 import pandas as pd
 import os
@@ -28,6 +28,9 @@ from src.core.game import game_master as game
 from src.core.models.player import Doctor, Seer, Villager, Werewolf, SEER, WEREWOLF
 from src.core.models.game_state import State
 from src.config.settings import get_player_names, DEFAULT_THREADS
+from src.config.timing_loader import GAME_MODES, HEADLESS
+from src.services.game_manager.tournament import ResultStore, Tournament, parse_budgets
+from src.services.llm.response_cache import MODES as LLM_CACHE_MODES, response_cache
 
 _RUN_GAME = flags.DEFINE_boolean("run", False, "Runs a single game.")
 _RESUME = flags.DEFINE_boolean("resume", False, "Resumes games.")
@@ -45,6 +48,47 @@ _ARENA = flags.DEFINE_boolean(
     "arena", False, "Only run games using different models for villagers and werewolves"
 )
 _THREADS = flags.DEFINE_integer("threads", DEFAULT_THREADS, "Number of threads to run.")
+_WORKERS = flags.DEFINE_integer(
+    "workers", 4, "Number of worker processes that play eval games in parallel."
+)
+_MAX_IN_FLIGHT = flags.DEFINE_integer(
+    "max_in_flight", None, "Maximum number of eval games running at once. Defaults to --workers."
+)
+_PROVIDER_BUDGET = flags.DEFINE_list(
+    "provider_budget",
+    "",
+    "Per-provider limits on eval games running at once, e.g. glm=2,siliconflow=4."
+    " A game counts against the providers of both its villager and werewolf models.",
+)
+_TOURNAMENT_DIR = flags.DEFINE_string(
+    "tournament_dir",
+    None,
+    "Directory of the eval results store. Rerunning with the same directory skips"
+    " games that already finished. Defaults to logs/tournament.",
+)
+_LLM_CACHE = flags.DEFINE_enum(
+    "llm_cache",
+    None,
+    list(LLM_CACHE_MODES),
+    "LLM response cache mode: record responses, replay them (a miss is an"
+    " error) or read through. Defaults to LLM__RESPONSE_CACHE_MODE.",
+)
+_LLM_CACHE_DIR = flags.DEFINE_string(
+    "llm_cache_dir", None, "Directory of the LLM response cache."
+)
+_GAME_MODE = flags.DEFINE_enum(
+    "game_mode",
+    None,
+    list(GAME_MODES),
+    "Game pacing. headless never sleeps and only timestamps events for"
+    " playback. Defaults to headless for --eval and --resume, normal otherwise.",
+)
+_SEED = flags.DEFINE_integer(
+    "seed",
+    None,
+    "Random seed for reproducible runs; the i-th game uses seed + i. Combine"
+    " with --llm_cache=replay to rerun recorded games exactly.",
+)
 
 DEFAULT_WEREWOLF_MODELS = ["glmz1-flash", "glm45-flash"]
 DEFAULT_VILLAGER_MODELS = ["glmz1-flash", "glm45-flash"]
@@ -116,7 +160,18 @@ def initialize_players(
     return seer, doctor, villagers, werewolves
 
 
-def resume_game(directory: str) -> bool:
+def _seed_game(index: int, seed: Optional[int]) -> None:
+    """Seeds the random module for the index-th game when a seed is set."""
+    if seed is not None:
+        random.seed(seed + index)
+
+
+def _game_mode(default: str) -> str:
+    return _GAME_MODE.value or default
+
+
+def resume_game(directory: str, index: int = 0) -> bool:
+    _seed_game(index, _SEED.value)
     state, logs = logging.load_game(directory)
 
     # remove the failed round and resume from the beginning of that round.
@@ -134,7 +189,7 @@ def resume_game(directory: str) -> bool:
                 round_number=0,
                 current_players=list(state.players.keys()),
             )
-            p.observations = []
+            p.observations.clear()
 
             if p.role == WEREWOLF:
                 werewolves.append(p)
@@ -160,11 +215,7 @@ def resume_game(directory: str) -> bool:
 
                 # Remove the observation from the failed round for all active players
                 failed_round = len(state.rounds)
-                player.observations = [
-                    o
-                    for o in player.observations
-                    if not o.startswith(f"Round {failed_round}")
-                ]
+                player.observations.remove_round(failed_round)
 
                 if player.role == WEREWOLF:
                     werewolves.append(player)
@@ -185,7 +236,9 @@ def resume_game(directory: str) -> bool:
         elif len(werewolves) == 1:
             werewolves[0].gamestate.other_wolf = None
 
-    gm = game.GameMaster(state, num_threads=_THREADS.value)
+    gm = game.GameMaster(
+        state, num_threads=_THREADS.value, game_mode=_game_mode(HEADLESS)
+    )
     gm.logs = logs
     try:
         gm.run_game()
@@ -202,7 +255,7 @@ def resume_games(directories: list[str]):
     for i in tqdm.tqdm(range(len(directories)), desc="Games"):
         d = directories[i]
         try:
-            success = resume_game(d)
+            success = resume_game(d, index=i)
             if success:
                 successful_resumes.append(d)
             else:
@@ -222,11 +275,16 @@ def resume_games(directories: list[str]):
 def run_game(
     werewolf_model: str,
     villager_model: str,
+    index: int = 0,
+    game_mode: str = "normal",
+    num_threads: int = DEFAULT_THREADS,
+    seed: Optional[int] = None,
 ) -> Tuple[str, str]:
     """Runs a single game of Werewolf.
 
     Returns: (winner, log_dir)
     """
+    _seed_game(index, seed)
     seer, doctor, villagers, werewolves = initialize_players(
         villager_model, werewolf_model
     )
@@ -245,7 +303,10 @@ def run_game(
         logging.save_game(state, logs, log_directory)
 
     gamemaster = game.GameMaster(
-        state, num_threads=_THREADS.value, on_progress=_save_progress
+        state,
+        num_threads=num_threads,
+        on_progress=_save_progress,
+        game_mode=game_mode,
     )
     # Initial save so the viewer can attach immediately
     _save_progress(state, gamemaster.logs)
@@ -264,6 +325,11 @@ def run_game(
 
 
 def run() -> None:
+    if _LLM_CACHE.value is not None or _LLM_CACHE_DIR.value is not None:
+        response_cache.configure(mode=_LLM_CACHE.value, directory=_LLM_CACHE_DIR.value)
+    if response_cache.enabled:
+        print(f"LLM response cache: {response_cache.mode} ({response_cache.directory})")
+
     villager_models = _VILLAGER_MODELS.value or DEFAULT_VILLAGER_MODELS
     werewolf_models = _WEREWOLF_MODELS.value or DEFAULT_WEREWOLF_MODELS
     v_ids = [model_to_id[m] for m in villager_models]
@@ -275,23 +341,38 @@ def run() -> None:
         run_game(
             werewolf_model=werewolf_model,
             villager_model=villager_model,
+            game_mode=_game_mode("normal"),
+            num_threads=_THREADS.value,
+            seed=_SEED.value,
         )
     elif _EVAL.value:
-        results = []
-        for villager_model, werewolf_model in model_combinations:
-            # only run games using different models in the arena mode
-            if villager_model == werewolf_model and _ARENA.value:
-                continue
-            print(
-                f"Running games with Villagers: {villager_model} and"
-                f" Werewolves:{werewolf_model}"
-            )
-            for _ in tqdm.tqdm(range(_NUM_GAMES.value), desc="Games"):
-                winner, log_dir = run_game(
-                    werewolf_model=werewolf_model,
-                    villager_model=villager_model,
-                )
-                results.append([villager_model, werewolf_model, winner, log_dir])
+        # only run games using different models in the arena mode
+        if _ARENA.value:
+            model_combinations = [(v, w) for v, w in model_combinations if v != w]
+        store = ResultStore(_TOURNAMENT_DIR.value or os.path.join(os.getcwd(), "logs", "tournament"))
+        cache_dir = response_cache.directory if response_cache.enabled else None
+        if response_cache.enabled:
+            # Worker processes must not share cache files: each game gets its own subdirectory
+            response_cache.close()
+        tournament = Tournament(
+            store,
+            workers=_WORKERS.value,
+            max_in_flight=_MAX_IN_FLIGHT.value,
+            provider_budgets=parse_budgets(_PROVIDER_BUDGET.value),
+            options={
+                "game_mode": _game_mode(HEADLESS),
+                "num_threads": _THREADS.value,
+                "seed": _SEED.value,
+                "cache_mode": response_cache.mode,
+                "cache_dir": cache_dir,
+            },
+        )
+        print(f"Tournament results store: {store.path}")
+        tournament.run(Tournament.plan(model_combinations, _NUM_GAMES.value))
+        results = [
+            [row["villager_model"], row["werewolf_model"], row["winner"], row["log_dir"]]
+            for row in store.rows()
+        ]
 
         df = pd.DataFrame(
             results, columns=["VillagerModel", "WerewolfModel", "Winner", "Log"]
@@ -307,3 +388,7 @@ def run() -> None:
 
     elif _RESUME.value:
         resume_games(RESUME_DIRECTORIES)
+
+    if response_cache.enabled:
+        response_cache.close()
+        print(f"LLM response cache stats: {response_cache.stats()}")
@@ -0,0 +1,180 @@
+"""
+游戏调度器
+Game Scheduler - 限制同时运行的游戏数，按优先级排队
+
+  - 同时运行的游戏数达到上限后，新游戏进入所属优先级的队列；有游戏结束时
+    先启动 interactive（观战/交互）队列中的游戏，再启动 background（评测）队列
+  - 排队数达到上限时立即拒绝，并按最近游戏的平均时长给出重试等待时间
+  - 运行中的游戏按优先级权重分享LLM并发（见 llm.admission 中的加权公平排队）
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+from src.config.settings import settings
+from src.services.logger.structured import get_logger
+
+logger = get_logger(__name__)
+
+# 优先级（按启动顺序）
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+PRIORITIES = (INTERACTIVE, BACKGROUND)
+
+# 还没有游戏结束时假定的游戏时长（秒）
+DEFAULT_GAME_SECONDS = 120.0
+
+
+class SchedulerFull(Exception):
+    """排队已满，retry_after 秒后再试"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Game queue is full, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class GameScheduler:
+    """运行游戏数上限和按优先级排队"""
+
+    def __init__(self, max_running: Optional[int] = None, max_queued: Optional[int] = None,
+                 weights: Optional[Dict[str, float]] = None):
+        config = settings.server
+        self.max_running = max(1, max_running or config.max_running_games)
+        self.max_queued = max(0, config.max_queued_games if max_queued is None else max_queued)
+        self.weights = {**config.game_priority_weights, **(weights or {})}
+
+        self._lock = threading.Lock()
+        self._queues: Dict[str, Deque[str]] = {priority: deque() for priority in PRIORITIES}
+        self._launchers: Dict[str, Callable[[], None]] = {}
+        self._running: Dict[str, float] = {}  # 会话ID -> 开始时间
+        self._avg_seconds: Optional[float] = None
+        self._stats = {"started": 0, "enqueued": 0, "rejected": 0, "cancelled": 0}
+
+    @staticmethod
+    def priority_of(priority: Optional[str]) -> str:
+        return priority if priority in PRIORITIES else INTERACTIVE
+
+    def weight(self, priority: str) -> float:
+        return max(0.01, float(self.weights.get(priority, 1.0)))
+
+    # ------------------------------------------------------------------
+    # 提交和完成
+    # ------------------------------------------------------------------
+
+    def check(self) -> None:
+        """排队已满时抛出 SchedulerFull（创建会话前的快速检查）"""
+        with self._lock:
+            if len(self._running) >= self.max_running and self._queued_locked() >= self.max_queued:
+                self._stats["rejected"] += 1
+                raise SchedulerFull(self._retry_after_locked())
+
+    def submit(self, session_id: str, priority: str, launch: Callable[[], None]) -> str:
+        """
+        启动或排队一局游戏
+
+        Args:
+            session_id: 会话ID
+            priority: interactive 或 background
+            launch: 真正启动游戏的函数（轮到该游戏时调用，不持有锁）
+
+        Returns:
+            "running" 或 "queued"
+        """
+        priority = self.priority_of(priority)
+        with self._lock:
+            if len(self._running) < self.max_running and not self._queued_locked():
+                self._running[session_id] = time.monotonic()
+                self._stats["started"] += 1
+                start = True
+            elif self._queued_locked() < self.max_queued:
+                self._queues[priority].append(session_id)
+                self._launchers[session_id] = launch
+                self._stats["enqueued"] += 1
+                start = False
+            else:
+                self._stats["rejected"] += 1
+                raise SchedulerFull(self._retry_after_locked())
+        if start:
+            launch()
+            return "running"
+        logger.info("scheduler.queued", session_id=session_id, priority=priority, position=self.position(session_id))
+        return "queued"
+
+    def finished(self, session_id: str) -> None:
+        """游戏结束（正常、出错或被停止），启动排队的游戏"""
+        with self._lock:
+            started = self._running.pop(session_id, None)
+            if started is not None:
+                seconds = time.monotonic() - started
+                self._avg_seconds = seconds if self._avg_seconds is None else 0.8 * self._avg_seconds + 0.2 * seconds
+            launches = []
+            while len(self._running) < self.max_running:
+                next_id = self._pop_next_locked()
+                if next_id is None:
+                    break
+                self._running[next_id] = time.monotonic()
+                self._stats["started"] += 1
+                launches.append((next_id, self._launchers.pop(next_id)))
+        for next_id, launch in launches:
+            try:
+                launch()
+            except Exception as e:
+                logger.error("scheduler.launch_failed", session_id=next_id, error=f"{type(e).__name__}: {e}")
+                self.finished(next_id)
+
+    def cancel(self, session_id: str) -> bool:
+        """从队列中移除尚未启动的游戏"""
+        with self._lock:
+            for queue in self._queues.values():
+                if session_id in queue:
+                    queue.remove(session_id)
+                    self._launchers.pop(session_id, None)
+                    self._stats["cancelled"] += 1
+                    return True
+        return False
+
+    def position(self, session_id: str) -> Optional[int]:
+        """排队位置（从 1 开始，按启动顺序），未排队时返回 None"""
+        with self._lock:
+            ahead = 0
+            for priority in PRIORITIES:
+                queue = self._queues[priority]
+                if session_id in queue:
+                    return ahead + queue.index(session_id) + 1
+                ahead += len(queue)
+        return None
+
+    def is_queued(self, session_id: str) -> bool:
+        return self.position(session_id) is not None
+
+    # ------------------------------------------------------------------
+
+    def _queued_locked(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _pop_next_locked(self) -> Optional[str]:
+        for priority in PRIORITIES:
+            if self._queues[priority]:
+                return self._queues[priority].popleft()
+        return None
+
+    def _retry_after_locked(self) -> float:
+        """预计多久后有游戏结束、队列腾出位置"""
+        seconds = self._avg_seconds if self._avg_seconds is not None else DEFAULT_GAME_SECONDS
+        return float(max(1, math.ceil(seconds / self.max_running)))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                "max_running": self.max_running,
+                "max_queued": self.max_queued,
+                "running": len(self._running),
+                "queued": {priority: len(queue) for priority, queue in self._queues.items()},
+                "weights": {priority: self.weight(priority) for priority in PRIORITIES},
+                "avg_game_seconds": round(self._avg_seconds, 1) if self._avg_seconds is not None else None,
+            })
+            return stats
@@ -1,6 +1,8 @@
 """
 动作序列号管理器
 Action Sequence Manager for ensuring ordered game events
+
+计数器保存在共享后端中，多 worker 部署时同一会话的序列号在所有 worker 间递增。
 """
 
 import threading
@@ -9,6 +11,8 @@ from typing import Dict, Optional, Any
 from datetime import datetime
 from enum import Enum
 
+from src.services.game_manager.shared_backend import SharedBackend, shared_backend
+
 
 class ActionType(str, Enum):
     """动作类型枚举"""
@@ -76,25 +80,18 @@ class SequenceManager:
                     cls._instance._initialized = False
         return cls._instance
 
-    def __init__(self):
+    def __init__(self, backend: Optional[SharedBackend] = None):
         if self._initialized:
             return
 
-        # 每个会话的序列号计数器: {session_id: counter}
-        self._counters: Dict[str, int] = {}
-        # 全局锁
-        self._lock = threading.Lock()
+        # 每个会话的序列号计数器（共享后端）
+        self._backend = backend or shared_backend
         self._initialized = True
         print("📊 Sequence Manager initialized")
 
     def get_next_sequence(self, session_id: str) -> int:
         """获取下一个序列号"""
-        with self._lock:
-            if session_id not in self._counters:
-                self._counters[session_id] = 0
-
-            self._counters[session_id] += 1
-            return self._counters[session_id]
+        return self._backend.next_sequence(session_id)
 
     def create_action_event(
         self,
@@ -120,39 +117,36 @@ class SequenceManager:
 
     def reset_session(self, session_id: str):
         """重置会话的序列号"""
-        with self._lock:
-            if session_id in self._counters:
-                del self._counters[session_id]
-            print(f"📊 Reset sequence counter for session {session_id}")
+        self._backend.reset_sequence(session_id)
+        print(f"📊 Reset sequence counter for session {session_id}")
 
     def get_current_sequence(self, session_id: str) -> int:
         """获取当前序列号"""
-        with self._lock:
-            return self._counters.get(session_id, 0)
+        return self._backend.current_sequence(session_id)
 
     def get_session_stats(self, session_id: str) -> Dict[str, Any]:
         """获取会话统计信息"""
-        with self._lock:
-            return {
-                "session_id": session_id,
-                "current_sequence": self._counters.get(session_id, 0),
-                "total_actions": self._counters.get(session_id, 0),
-            }
+        current = self._backend.current_sequence(session_id)
+        return {
+            "session_id": session_id,
+            "current_sequence": current,
+            "total_actions": current,
+        }
 
     def get_all_stats(self) -> Dict[str, Any]:
         """获取所有会话的统计信息"""
-        with self._lock:
-            return {
-                "active_sessions": list(self._counters.keys()),
-                "session_stats": {
-                    session_id: {
-                        "current_sequence": counter,
-                        "total_actions": counter,
-                    }
-                    for session_id, counter in self._counters.items()
-                },
-                "total_sessions": len(self._counters),
-            }
+        counters = self._backend.sequences()
+        return {
+            "active_sessions": list(counters.keys()),
+            "session_stats": {
+                session_id: {
+                    "current_sequence": counter,
+                    "total_actions": counter,
+                }
+                for session_id, counter in counters.items()
+            },
+            "total_sessions": len(counters),
+        }
 
 
 # 全局实例
@@ -1,33 +1,182 @@
 """
 游戏会话管理器
 Game Session Manager for managing running games
+
+内存中的会话数量有界：已结束的会话超过保留时间，或常驻会话总大小超过上限时
+（按最久未访问的顺序），会话被换出，只保留一份摘要；完整状态已由游戏日志
+（快照 + 增量日志）保存在会话目录中，再次访问时从磁盘重新加载。
+
+多 worker 部署时会话摘要写入共享后端：其他 worker 的会话出现在列表中，
+访问时从会话目录读取当前状态，停止和删除请求转发给运行该游戏的 worker。
+
+配置了游戏工作进程（SERVER__GAME_PROCESSES）时，游戏在工作进程池中运行，
+会话的游戏主控是 ProcessGameMaster，状态由工作进程发回的快照按需重建。
 """
 
+import functools
+import gc
+import sys
 import threading
 import asyncio
-from typing import Dict, Optional, Any
+import time
+import types
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Union
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
 
 from src.core.game.game_master import GameMaster
 from src.core.models.game_state import State
 from src.core.models.player import Seer, Doctor, Villager, Werewolf
-from src.services.logger.game_logger import log_directory, save_game
-from src.config.settings import get_player_names, DEFAULT_THREADS
+from src.services.game_manager.game_processes import GameProcessPool, ProcessGameMaster
+from src.services.game_manager.notification_bus import NotificationEvent, notification_bus
+from src.services.game_manager.scheduler import INTERACTIVE, GameScheduler
+from src.services.game_manager.shared_backend import WORKER_ID, shared_backend
+from src.services.llm.admission import llm_flow
+from src.services.logger.game_journal import close_journal
+from src.services.logger.game_logger import load_game, log_directory, save_game
+from src.services.logger.structured import get_logger
+from src.config.settings import get_player_names, settings, DEFAULT_THREADS
 from src.config.loader import model_registry
 from src.config.player_models import get_model_for_player
 
+logger = get_logger(__name__)
+
+# 运行中会话两次估算常驻大小之间的最短间隔（秒）
+MEASURE_INTERVAL = 5.0
+
+# 估算常驻大小时不深入的对象（类型、模块、函数等共享对象）
+_SIZE_SKIP = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+def _deep_sizeof(*roots: Any) -> int:
+    """对象图的近似常驻大小（字节）"""
+    seen = set()
+    stack = list(roots)
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _SIZE_SKIP):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+    return total
+
 
 class GameSession:
     """游戏会话"""
-    def __init__(self, session_id: str, state: State, gamemaster: GameMaster, log_dir: str):
+    def __init__(
+        self,
+        session_id: str,
+        state: State,
+        gamemaster: Optional[Union[GameMaster, ProcessGameMaster]],
+        log_dir: str,
+    ):
         self.session_id = session_id
-        self.state = state
+        self._state = state
+        # 从磁盘重新加载的会话没有游戏主控（日志从磁盘读取）
         self.gamemaster = gamemaster
         self.log_dir = log_dir
         self.started_at = datetime.now()
         self.thread: Optional[threading.Thread] = None
+        self.task: Optional[asyncio.Task] = None
         self.is_running = False
+        self.queued = False  # 等待调度器启动
+        self.has_run = False  # 游戏是否已经启动过
+        self.priority = INTERACTIVE
+        self.worker: Optional[str] = None  # 由其他 worker 运行时为该 worker 的标识
+        self.last_access = time.monotonic()
+        self.resident_bytes = 0
+        self._measured_version: Optional[int] = None
+        self._measured_at = 0.0
+
+    @property
+    def state(self) -> State:
+        # 在工作进程中运行的游戏使用最新快照重建的状态
+        if isinstance(self.gamemaster, ProcessGameMaster):
+            return self.gamemaster.state
+        return self._state
+
+    @state.setter
+    def state(self, state: State) -> None:
+        self._state = state
+
+    @property
+    def in_process(self) -> bool:
+        """游戏引擎是否在本进程中运行（游戏日志由本进程写入）"""
+        return isinstance(self.gamemaster, GameMaster)
+
+    @property
+    def evictable(self) -> bool:
+        """只换出已结束的游戏；创建后尚未启动的会话换出后无法再启动"""
+        if self.is_running or self.queued:
+            return False
+        if self.gamemaster is None or self.has_run:
+            return True
+        state = self.state
+        return bool(state.winner or state.error_message)
+
+    @property
+    def status(self) -> str:
+        if self.is_running:
+            return "running"
+        if self.queued:
+            return "queued"
+        return "completed" if self.state.winner else "stopped"
+
+    def measure(self) -> int:
+        """
+        估算会话的常驻大小（状态和LLM日志）
+
+        状态未变化时使用上次的结果；运行中的游戏每次行动都会变化，
+        最多每 MEASURE_INTERVAL 秒重新估算一次。
+        """
+        if isinstance(self.gamemaster, ProcessGameMaster):
+            version = self.gamemaster.version
+        else:
+            version = self.state.version
+        if self._measured_version == version:
+            return self.resident_bytes
+        now = time.monotonic()
+        if self.is_running and self._measured_version is not None and now - self._measured_at < MEASURE_INTERVAL:
+            return self.resident_bytes
+        logs = self.gamemaster.logs if self.gamemaster is not None else None
+        self.resident_bytes = _deep_sizeof(self.state, logs)
+        self._measured_version = version
+        self._measured_at = now
+        return self.resident_bytes
+
+
+class SessionSummary:
+    """会话摘要：换出的会话只保留列表和统计需要的字段"""
+    def __init__(self, session: GameSession, evicted: bool = False):
+        state = session.state
+        self.session_id = session.session_id
+        self.log_dir = session.log_dir
+        self.started_at = session.started_at
+        self.status = session.status
+        self.is_running = session.is_running
+        self.current_round = len(state.rounds)
+        self.winner = state.winner
+        self.error_message = state.error_message
+        self.models: List[str] = [player.model for player in state.players.values()]
+        self.resident_bytes = session.resident_bytes
+        self.evicted = evicted
+        self.worker: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """写入共享后端的字段"""
+        data = {key: value for key, value in self.__dict__.items() if key != "worker"}
+        data["started_at"] = self.started_at.isoformat()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SessionSummary":
+        """从共享后端读取的其他 worker 的会话摘要"""
+        summary = cls.__new__(cls)
+        summary.__dict__.update(data)
+        summary.started_at = datetime.fromisoformat(data["started_at"])
+        return summary
 
 
 class GameSessionManager:
@@ -46,8 +195,22 @@ class GameSessionManager:
     def __init__(self):
         if self._initialized:
             return
-        self._sessions: Dict[str, GameSession] = {}
+        # 常驻会话（按最近访问排序）和已换出会话的摘要
+        self._sessions: "OrderedDict[str, GameSession]" = OrderedDict()
+        self._evicted: Dict[str, SessionSummary] = {}
         self._lock = threading.Lock()
+        config = settings.server
+        self.ttl = config.session_ttl
+        self.memory_budget = int(config.session_memory_budget_mb * 1024 * 1024)
+        self.sweep_interval = config.session_sweep_interval
+        self._last_sweep = 0.0
+        self._stats = {"evictions": 0, "rehydrations": 0, "rehydrate_failures": 0}
+        self.scheduler = GameScheduler()
+        self.shared = shared_backend
+        self.shared.subscribe("control", self._on_control)
+        # 游戏工作进程池（0 表示游戏在服务器事件循环上运行）
+        processes = config.game_processes
+        self.processes = GameProcessPool(processes) if processes > 0 else None
         self._initialized = True
 
     def create_game(
@@ -55,9 +218,11 @@ class GameSessionManager:
         villager_model: str,
         werewolf_model: str,
         num_players: int = 6,
-        max_debate_turns: int = 2
+        max_debate_turns: int = 2,
+        game_mode: str = "normal",
+        priority: str = INTERACTIVE,
     ) -> GameSession:
-        """创建新游戏会话"""
+        """创建新游戏会话（priority 决定排队顺序和分享LLM并发的权重）"""
         import random
 
         print("创建新游戏：6个玩家，每个玩家使用不同的模型")
@@ -121,90 +286,180 @@ class GameSessionManager:
             session_id=session_id,
         )
 
-        # 创建进度保存回调
-        def _save_progress(state: State, logs):
-            save_game(state, logs, log_dir)
-            # 发送WebSocket通知 - 使用线程池执行器避免事件循环冲突
-            try:
-                import concurrent.futures
-
-                def run_async_in_thread():
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    try:
-                        loop.run_until_complete(_notify_game_update(session_id, state))
-                    finally:
-                        loop.close()
-
-                executor = ThreadPoolExecutor(max_workers=1)
-                executor.submit(run_async_in_thread)
-                executor.shutdown(wait=False)
-
-            except Exception as e:
-                print(f"WebSocket notification error: {e}")
-
-        # 创建游戏主控
-        gamemaster = GameMaster(
-            state,
-            num_threads=DEFAULT_THREADS,
-            on_progress=_save_progress
-        )
+        if self.processes is not None:
+            # 游戏在工作进程中运行，由工作进程保存游戏日志并发回快照
+            gamemaster = ProcessGameMaster(
+                self.processes,
+                state,
+                log_dir,
+                game_mode=game_mode,
+                num_threads=DEFAULT_THREADS,
+                on_snapshot=functools.partial(_publish_game_update, session_id),
+            )
+        else:
+            # 创建进度保存回调
+            def _save_progress(state: State, logs):
+                save_game(state, logs, log_dir)
+                self._share(session_id)
+                # 在游戏线程中生成快照，由通知总线在服务器事件循环上发送
+                final_round = state.rounds[-1].to_dict() if state.winner and state.rounds else None
+                _publish_game_update(session_id, _game_update_data(state), final_round, gamemaster.playback_at())
+
+            # 创建游戏主控
+            gamemaster = GameMaster(
+                state,
+                num_threads=DEFAULT_THREADS,
+                on_progress=_save_progress,
+                game_mode=game_mode,
+            )
 
-        # 初始保存
-        _save_progress(state, gamemaster.logs)
+            # 初始保存
+            _save_progress(state, gamemaster.logs)
 
         # 创建会话
         session = GameSession(session_id, state, gamemaster, log_dir)
+        session.priority = self.scheduler.priority_of(priority)
 
         with self._lock:
             self._sessions[session_id] = session
 
+        self._share(session_id)
         return session
 
-    def start_game(self, session_id: str) -> bool:
-        """启动游戏（后台线程运行）"""
+    def start_game(self, session_id: str) -> Optional[str]:
+        """
+        通过调度器启动游戏（在当前事件循环上以任务运行，没有事件循环时使用后台线程）
+
+        Returns:
+            "running"、"queued"，无法启动时返回 None
+
+        Raises:
+            SchedulerFull: 排队已满
+        """
         with self._lock:
             session = self._sessions.get(session_id)
-            if not session:
-                return False
+            if not session or session.gamemaster is None:
+                return None
 
-            if session.is_running:
-                return False
+            if session.is_running or session.queued:
+                return None
+            session.queued = True
 
-            def run_game_thread():
-                try:
-                    session.is_running = True
-                    session.gamemaster.run_game()
-                except Exception as e:
-                    session.state.error_message = str(e)
-                    print(f"Game error in session {session_id}: {e}")
-                finally:
-                    session.is_running = False
-
-            session.thread = threading.Thread(target=run_game_thread, daemon=True)
-            session.thread.start()
-            return True
+        weight = self.scheduler.weight(session.priority)
+
+        async def run_game_task():
+            # 该游戏的LLM请求按优先级权重参与公平排队
+            llm_flow.set((session_id, weight))
+            try:
+                session.is_running = True
+                await session.gamemaster.arun_game()
+            except Exception as e:
+                session.state.error_message = str(e)
+                print(f"Game error in session {session_id}: {e}")
+                # 写出包含错误信息的最终文件（工作进程中的游戏由工作进程写出）
+                if session.in_process:
+                    save_game(session.state, session.gamemaster.logs, session.log_dir)
+            finally:
+                session.is_running = False
+                session.last_access = time.monotonic()
+                self.scheduler.finished(session_id)
+                self._share(session_id)
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        def launch():
+            session.queued = False
+            session.is_running = True
+            session.has_run = True
+            try:
+                if loop is None:
+                    session.thread = threading.Thread(
+                        target=asyncio.run, args=(run_game_task(),), daemon=True
+                    )
+                    session.thread.start()
+                elif _in_loop(loop):
+                    session.task = _spawn(loop, run_game_task())
+                else:
+                    # 由其他线程中结束的游戏启动
+                    loop.call_soon_threadsafe(lambda: setattr(session, "task", _spawn(loop, run_game_task())))
+            except Exception:
+                session.is_running = False
+                raise
+
+        try:
+            scheduled = self.scheduler.submit(session_id, session.priority, launch)
+        except Exception:
+            session.queued = False
+            raise
+        self._share(session_id)
+        # 新游戏已启动或排队，不会被换出
+        self._maybe_sweep()
+        return scheduled
 
     def stop_game(self, session_id: str) -> bool:
-        """停止游戏"""
+        """停止游戏（排队中的游戏直接移出队列）"""
         with self._lock:
             session = self._sessions.get(session_id)
-            if not session or not session.is_running:
+        if not session:
+            return self._forward(session_id, "stop")
+        with self._lock:
+            if session.queued and self.scheduler.cancel(session_id):
+                session.queued = False
+                return True
+            if not session.is_running:
                 return False
 
             session.gamemaster.stop()
             return True
 
     def get_session(self, session_id: str) -> Optional[GameSession]:
-        """获取会话"""
+        """获取会话（已换出的会话从磁盘重新加载）"""
         with self._lock:
-            return self._sessions.get(session_id)
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_access = time.monotonic()
+                self._sessions.move_to_end(session_id)
+            summary = self._evicted.get(session_id) if session is None else None
+        if session is None and summary is not None:
+            session = self._rehydrate(summary)
+        elif session is None:
+            session = self._remote_session(session_id)
+        self._maybe_sweep()
+        return session
 
     def get_all_sessions(self) -> Dict[str, GameSession]:
-        """获取所有会话"""
+        """获取所有常驻内存的会话"""
         with self._lock:
             return self._sessions.copy()
 
+    def get_session_summaries(self) -> Dict[str, SessionSummary]:
+        """所有会话（包括已换出的）的摘要，不会重新加载会话"""
+        with self._lock:
+            resident = list(self._sessions.values())
+            summaries = dict(self._evicted)
+        for session in resident:
+            summaries[session.session_id] = SessionSummary(session)
+        if self.shared.distributed:
+            for session_id, meta in self._shared_sessions().items():
+                if session_id not in summaries and meta.get("worker") != WORKER_ID:
+                    summaries[session_id] = SessionSummary.from_dict(meta)
+        return summaries
+
+    def remove_session(self, session_id: str) -> bool:
+        """从注册表中删除会话（不删除日志）"""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            summary = self._evicted.pop(session_id, None)
+        if session is not None:
+            close_journal(session.log_dir)
+        if session is None and summary is None:
+            return self._forward(session_id, "remove")
+        self._unshare(session_id)
+        return True
+
     def get_session_status(self, session_id: str) -> Optional[Dict[str, Any]]:
         """获取会话状态"""
         session = self.get_session(session_id)
@@ -213,36 +468,246 @@ class GameSessionManager:
 
         return {
             "session_id": session.session_id,
-            "status": "running" if session.is_running else (
-                "completed" if session.state.winner else "stopped"
-            ),
+            "status": session.status,
             "current_round": len(session.state.rounds),
             "winner": session.state.winner,
             "error_message": session.state.error_message,
             "started_at": session.started_at.isoformat(),
             "log_directory": session.log_dir,
+            "priority": session.priority,
+            "queue_position": self.scheduler.position(session_id),
+            "resident_bytes": session.measure(),
         }
 
+    # ------------------------------------------------------------------
+    # 多 worker 共享
+    # ------------------------------------------------------------------
+
+    def _share(self, session_id: str) -> None:
+        """把会话摘要写入共享后端"""
+        if not self.shared.distributed:
+            return
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session is None:
+            return
+        try:
+            self.shared.put_session(session_id, SessionSummary(session).to_dict())
+        except Exception as e:
+            logger.warning("session.share_failed", session_id=session_id, error=f"{type(e).__name__}: {e}")
+
+    def _unshare(self, session_id: str) -> None:
+        if self.shared.distributed:
+            try:
+                self.shared.delete_session(session_id)
+            except Exception as e:
+                logger.warning("session.share_failed", session_id=session_id, error=f"{type(e).__name__}: {e}")
+
+    def _shared_sessions(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            return self.shared.list_sessions()
+        except Exception as e:
+            logger.warning("session.shared_list_failed", error=f"{type(e).__name__}: {e}")
+            return {}
+
+    def _remote_meta(self, session_id: str) -> Optional[Dict[str, Any]]:
+        if not self.shared.distributed:
+            return None
+        try:
+            meta = self.shared.get_session(session_id)
+        except Exception as e:
+            logger.warning("session.shared_get_failed", session_id=session_id, error=f"{type(e).__name__}: {e}")
+            return None
+        return meta if meta is not None and meta.get("worker") != WORKER_ID else None
+
+    def _remote_session(self, session_id: str) -> Optional[GameSession]:
+        """由其他 worker 运行的会话：从会话目录读取当前状态（不缓存）"""
+        meta = self._remote_meta(session_id)
+        if meta is None:
+            return None
+        try:
+            state, _ = load_game(meta["log_dir"])
+        except Exception as e:
+            logger.warning("session.remote_load_failed", session_id=session_id, error=f"{type(e).__name__}: {e}")
+            return None
+        session = GameSession(session_id, state, None, meta["log_dir"])
+        session.started_at = datetime.fromisoformat(meta["started_at"])
+        session.is_running = meta.get("status") == "running"
+        session.queued = meta.get("status") == "queued"
+        session.worker = meta["worker"]
+        return session
+
+    def _forward(self, session_id: str, action: str) -> bool:
+        """把停止或删除请求转发给运行该会话的 worker"""
+        meta = self._remote_meta(session_id)
+        if meta is None:
+            return False
+        if action == "remove":
+            self._unshare(session_id)
+        return self.shared.publish("control", {"action": action, "session_id": session_id}, worker=meta["worker"])
+
+    def _on_control(self, payload: Dict[str, Any]) -> None:
+        """其他 worker 转发来的请求"""
+        session_id = payload.get("session_id")
+        action = payload.get("action")
+        with self._lock:
+            local = session_id in self._sessions or session_id in self._evicted
+        if not local:
+            return
+        if action == "stop":
+            self.stop_game(session_id)
+        elif action == "remove":
+            self.remove_session(session_id)
+
+    # ------------------------------------------------------------------
+    # 换出与重新加载
+    # ------------------------------------------------------------------
+
+    def _rehydrate(self, summary: SessionSummary) -> Optional[GameSession]:
+        """从会话目录重新加载换出的会话"""
+        try:
+            state, _ = load_game(summary.log_dir)
+        except Exception as e:
+            self._stats["rehydrate_failures"] += 1
+            logger.warning("session.rehydrate_failed", session_id=summary.session_id, error=f"{type(e).__name__}: {e}")
+            return None
+        session = GameSession(summary.session_id, state, None, summary.log_dir)
+        session.started_at = summary.started_at
+        session.measure()
+        with self._lock:
+            existing = self._sessions.get(summary.session_id)
+            if existing is not None:
+                return existing  # 其他调用方已经重新加载
+            if self._evicted.pop(summary.session_id, None) is None:
+                return None  # 期间被删除
+            self._sessions[summary.session_id] = session
+            self._stats["rehydrations"] += 1
+        logger.info("session.rehydrated", session_id=summary.session_id, resident_bytes=session.resident_bytes)
+        return session
+
+    def _evict(self, session: GameSession) -> None:
+        """把会话换出到磁盘，只保留摘要"""
+        if session.in_process:
+            try:
+                # 确保磁盘上的快照和增量日志包含最新状态
+                save_game(session.state, session.gamemaster.logs, session.log_dir)
+            except Exception as e:
+                logger.warning("session.evict_failed", session_id=session.session_id, error=f"{type(e).__name__}: {e}")
+                return
+        close_journal(session.log_dir)
+        with self._lock:
+            if self._sessions.get(session.session_id) is not session or not session.evictable:
+                return
+            del self._sessions[session.session_id]
+            self._evicted[session.session_id] = SessionSummary(session, evicted=True)
+            self._stats["evictions"] += 1
+        logger.info("session.evicted", session_id=session.session_id, resident_bytes=session.resident_bytes)
+
+    def _maybe_sweep(self) -> None:
+        if time.monotonic() - self._last_sweep >= self.sweep_interval:
+            self.sweep()
+
+    def sweep(self) -> int:
+        """
+        换出超过保留时间的已结束会话；常驻总大小仍超过上限时，按最久未访问的
+        顺序继续换出已结束的会话。返回换出的会话数。
+        """
+        now = time.monotonic()
+        self._last_sweep = now
+        with self._lock:
+            sessions = list(self._sessions.values())  # 最久未访问的在前
+        total = sum(session.measure() for session in sessions)
+
+        victims = []
+        for session in sessions:
+            if not session.evictable:
+                continue
+            if now - session.last_access > self.ttl or total > self.memory_budget:
+                victims.append(session)
+                total -= session.resident_bytes
+
+        for session in victims:
+            self._evict(session)
+        return len(victims)
+
+    def stats(self) -> Dict[str, Any]:
+        """会话注册表统计（含每个常驻会话的大小）"""
+        with self._lock:
+            resident = list(self._sessions.values())
+            stats = dict(self._stats)
+            stats["evicted"] = len(self._evicted)
+        stats.update({
+            "worker": WORKER_ID,
+            "resident": len(resident),
+            "resident_bytes": sum(session.resident_bytes for session in resident),
+            "memory_budget_bytes": self.memory_budget,
+            "game_processes": self.processes.stats() if self.processes is not None else None,
+            "ttl_seconds": self.ttl,
+            "sessions": {
+                session.session_id: {"status": session.status, "resident_bytes": session.resident_bytes}
+                for session in resident
+            },
+        })
+        return stats
+
+
+# 持有后台任务的强引用，避免任务在完成前被垃圾回收
+_background_tasks = set()
+
+
+def _in_loop(loop: asyncio.AbstractEventLoop) -> bool:
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
+
+
+def _spawn(loop: asyncio.AbstractEventLoop, coro) -> asyncio.Task:
+    """在给定事件循环上创建后台任务"""
+    task = loop.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
 
 # WebSocket通知函数
-async def _notify_game_update(session_id: str, state: State):
-    """发送游戏状态更新通知"""
+def _game_update_data(state: State) -> Dict[str, Any]:
+    """游戏状态更新消息的数据"""
+    return {
+        "game_state": state.to_dict(),
+        "status": "running" if not state.winner else "completed",
+        "version": state.version,
+    }
+
+def _publish_game_update(
+    session_id: str,
+    game_data: Dict[str, Any],
+    final_round: Optional[dict] = None,
+    playback_at: Optional[float] = None,
+) -> None:
+    """把状态更新交给通知总线（可从任意线程调用）"""
+    notification_bus.publish(NotificationEvent(
+        session_id,
+        "game_update",
+        functools.partial(_notify_game_update, session_id, game_data, final_round),
+        coalesce=final_round is None,
+        playback_at=playback_at,
+    ))
+
+
+async def _notify_game_update(session_id: str, game_data: Dict[str, Any], final_round: Optional[dict] = None):
+    """发送游戏状态更新通知（游戏结束时 final_round 为最后一轮）"""
     try:
         # 延迟导入避免循环依赖
         from src.api.v1.routes.websocket import notify_game_update
 
-        game_data = {
-            "game_state": state.to_dict(),
-            "status": "running" if not state.winner else "completed"
-        }
-
         await notify_game_update(session_id, game_data)
 
         # 如果游戏结束，发送游戏完成通知
-        if state.winner and state.rounds:
-            final_round = state.rounds[-1].to_dict() if state.rounds else None
+        if final_round is not None:
+            game_state = game_data["game_state"]
             from src.api.v1.routes.websocket import notify_game_complete
-            await notify_game_complete(session_id, state.winner, final_round, state.to_dict())
+            await notify_game_complete(session_id, game_state["winner"], final_round, game_state)
 
     except Exception as e:
         print(f"Failed to send WebSocket notification: {e}")
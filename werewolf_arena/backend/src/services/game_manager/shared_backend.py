@@ -0,0 +1,400 @@
+"""
+多 worker 共享后端
+Shared Backend - 会话元数据、动作序列号和跨进程事件发布订阅
+
+  - memory：单进程部署（默认），所有数据在进程内，不做跨进程分发
+  - sqlite：会话元数据和序列号存放在共享目录下的 SQLite 数据库（WAL 模式），
+    事件经 Unix 套接字分发：每个 worker 在共享目录的 peers/ 下监听一个套接字，
+    发布时把长度前缀的 JSON 帧写给其他 worker。同一 worker 发出的帧由单个发送
+    任务按顺序写出，因此同一会话的事件在接收端保持顺序。不依赖外部服务。
+
+发布是非阻塞的（放入发送队列，队列满时丢弃），可以从任意线程调用；
+接收到的事件在服务器事件循环上交给按频道注册的处理函数。
+"""
+
+import asyncio
+import inspect
+import json
+import os
+import sqlite3
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Union
+
+from src.config.settings import settings
+from src.services.logger.structured import get_logger
+
+logger = get_logger(__name__)
+
+# 当前 worker 的标识
+WORKER_ID = f"{os.uname().nodename}-{os.getpid()}"
+
+# 帧头：4 字节大端长度
+_HEADER = struct.Struct(">I")
+
+# 其他 worker 的套接字列表缓存时间（秒）
+PEER_REFRESH_SECONDS = 1.0
+
+Handler = Callable[[Dict[str, Any]], Union[None, Awaitable[None]]]
+
+
+class SharedBackend:
+    """共享后端接口（同时是单进程的内存实现）"""
+
+    kind = "memory"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        self._sequences: Dict[str, int] = {}
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._stats = {"published": 0, "received": 0, "dropped": 0, "failed": 0}
+
+    @property
+    def distributed(self) -> bool:
+        """是否有其他进程共享数据"""
+        return False
+
+    # ------------------------------------------------------------------
+    # 会话元数据
+    # ------------------------------------------------------------------
+
+    def put_session(self, session_id: str, meta: Dict[str, Any]) -> None:
+        with self._lock:
+            self._sessions[session_id] = {**meta, "worker": WORKER_ID}
+
+    def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            meta = self._sessions.get(session_id)
+            return dict(meta) if meta is not None else None
+
+    def list_sessions(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {session_id: dict(meta) for session_id, meta in self._sessions.items()}
+
+    def delete_session(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    # ------------------------------------------------------------------
+    # 序列号
+    # ------------------------------------------------------------------
+
+    def next_sequence(self, session_id: str) -> int:
+        with self._lock:
+            value = self._sequences.get(session_id, 0) + 1
+            self._sequences[session_id] = value
+            return value
+
+    def current_sequence(self, session_id: str) -> int:
+        with self._lock:
+            return self._sequences.get(session_id, 0)
+
+    def reset_sequence(self, session_id: str) -> None:
+        with self._lock:
+            self._sequences.pop(session_id, None)
+
+    def sequences(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._sequences)
+
+    # ------------------------------------------------------------------
+    # 发布订阅
+    # ------------------------------------------------------------------
+
+    def subscribe(self, channel: str, handler: Handler) -> None:
+        """注册频道处理函数（可以是协程函数），在服务器事件循环上调用"""
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def has_peers(self) -> bool:
+        return False
+
+    def publish(self, channel: str, payload: Dict[str, Any], worker: Optional[str] = None) -> bool:
+        """把事件发给其他 worker（worker 指定时只发给该 worker）；单进程时无事可做"""
+        return False
+
+    async def _dispatch(self, channel: str, payload: Dict[str, Any]) -> None:
+        self._stats["received"] += 1
+        for handler in self._handlers.get(channel, ()):
+            try:
+                result = handler(payload)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                self._stats["failed"] += 1
+                logger.error("shared.handler_failed", channel=channel, error=f"{type(e).__name__}: {e}")
+
+    async def start(self) -> None:
+        """在服务器事件循环上启动（应用启动时调用）"""
+
+    async def close(self) -> None:
+        """停止接收和发送（应用关闭时调用）"""
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.kind, "worker": WORKER_ID, **self._stats}
+
+
+class SqliteBackend(SharedBackend):
+    """SQLite + Unix 套接字共享后端"""
+
+    kind = "sqlite"
+
+    def __init__(self, directory: Union[str, Path], outbox_size: int = 10000):
+        super().__init__()
+        self.directory = Path(directory)
+        self.peers_dir = self.directory / "peers"
+        self.peers_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.directory / "shared.db"
+        self.socket_path = self.peers_dir / f"{WORKER_ID}.sock"
+        self.outbox_size = max(1, outbox_size)
+
+        self._local = threading.local()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._outbox: Optional[asyncio.Queue] = None
+        self._sender: Optional[asyncio.Task] = None
+        self._writers: Dict[str, asyncio.StreamWriter] = {}  # 发往其他 worker 的连接
+        self._readers: Set[asyncio.StreamWriter] = set()  # 其他 worker 连入的连接
+        self._peers: List[str] = []
+        self._peers_at = 0.0
+
+        with self._db() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, worker TEXT NOT NULL, meta TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS sequences (session_id TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+
+    @property
+    def distributed(self) -> bool:
+        return True
+
+    def _db(self) -> sqlite3.Connection:
+        """每个线程一个连接（自动提交模式）"""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=10.0, isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    # ------------------------------------------------------------------
+    # 会话元数据
+    # ------------------------------------------------------------------
+
+    def put_session(self, session_id: str, meta: Dict[str, Any]) -> None:
+        self._db().execute(
+            "INSERT INTO sessions (session_id, worker, meta, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET "
+            "worker = excluded.worker, meta = excluded.meta, updated_at = excluded.updated_at",
+            (session_id, WORKER_ID, json.dumps(meta, ensure_ascii=False, default=str), time.time()),
+        )
+
+    @staticmethod
+    def _row(worker: str, meta: str) -> Dict[str, Any]:
+        return {**json.loads(meta), "worker": worker}
+
+    def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        row = self._db().execute(
+            "SELECT worker, meta FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return self._row(*row) if row else None
+
+    def list_sessions(self) -> Dict[str, Dict[str, Any]]:
+        rows = self._db().execute("SELECT session_id, worker, meta FROM sessions").fetchall()
+        return {session_id: self._row(worker, meta) for session_id, worker, meta in rows}
+
+    def delete_session(self, session_id: str) -> None:
+        self._db().execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    # ------------------------------------------------------------------
+    # 序列号
+    # ------------------------------------------------------------------
+
+    def next_sequence(self, session_id: str) -> int:
+        row = self._db().execute(
+            "INSERT INTO sequences (session_id, value) VALUES (?, 1) "
+            "ON CONFLICT(session_id) DO UPDATE SET value = value + 1 RETURNING value",
+            (session_id,),
+        ).fetchone()
+        return row[0]
+
+    def current_sequence(self, session_id: str) -> int:
+        row = self._db().execute(
+            "SELECT value FROM sequences WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def reset_sequence(self, session_id: str) -> None:
+        self._db().execute("DELETE FROM sequences WHERE session_id = ?", (session_id,))
+
+    def sequences(self) -> Dict[str, int]:
+        return dict(self._db().execute("SELECT session_id, value FROM sequences").fetchall())
+
+    # ------------------------------------------------------------------
+    # 发布订阅
+    # ------------------------------------------------------------------
+
+    def _peer_paths(self) -> List[str]:
+        now = time.monotonic()
+        if now - self._peers_at > PEER_REFRESH_SECONDS:
+            own = self.socket_path.name
+            try:
+                names = os.listdir(self.peers_dir)
+            except OSError:
+                names = []
+            self._peers = [
+                str(self.peers_dir / name) for name in names if name.endswith(".sock") and name != own
+            ]
+            self._peers_at = now
+        return self._peers
+
+    def has_peers(self) -> bool:
+        return self._outbox is not None and bool(self._peer_paths())
+
+    def publish(self, channel: str, payload: Dict[str, Any], worker: Optional[str] = None) -> bool:
+        loop = self._loop
+        if loop is None or loop.is_closed() or not self._peer_paths():
+            return False
+        body = json.dumps({"channel": channel, "payload": payload}, ensure_ascii=False, default=str).encode("utf-8")
+        frame = (_HEADER.pack(len(body)) + body, worker)
+        try:
+            if _on_loop(loop):
+                self._enqueue(frame)
+            else:
+                loop.call_soon_threadsafe(self._enqueue, frame)
+        except RuntimeError:
+            self._stats["dropped"] += 1
+            return False
+        return True
+
+    def _enqueue(self, frame) -> None:
+        try:
+            self._outbox.put_nowait(frame)
+            self._stats["published"] += 1
+        except asyncio.QueueFull:
+            self._stats["dropped"] += 1
+
+    async def _writer(self, path: str) -> Optional[asyncio.StreamWriter]:
+        writer = self._writers.get(path)
+        if writer is not None and not writer.is_closing():
+            return writer
+        try:
+            _, writer = await asyncio.open_unix_connection(path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            # 对应的 worker 已经退出，清理遗留的套接字文件
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            self._peers_at = 0.0
+            return None
+        except OSError:
+            return None
+        self._writers[path] = writer
+        return writer
+
+    async def _send_loop(self) -> None:
+        while True:
+            data, worker = await self._outbox.get()
+            targets = self._peer_paths()
+            if worker is not None:
+                targets = [path for path in targets if Path(path).stem == worker]
+            for path in targets:
+                writer = await self._writer(path)
+                if writer is None:
+                    continue
+                try:
+                    writer.write(data)
+                    await writer.drain()
+                except (ConnectionError, OSError):
+                    self._stats["failed"] += 1
+                    self._writers.pop(path, None)
+                    writer.close()
+
+    async def _handle_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._readers.add(writer)
+        try:
+            while True:
+                header = await reader.readexactly(_HEADER.size)
+                body = await reader.readexactly(_HEADER.unpack(header)[0])
+                message = json.loads(body)
+                await self._dispatch(message["channel"], message["payload"])
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            # 对方关闭连接，或本 worker 正在关闭
+            pass
+        except Exception as e:
+            self._stats["failed"] += 1
+            logger.error("shared.receive_failed", error=f"{type(e).__name__}: {e}")
+        finally:
+            self._readers.discard(writer)
+            writer.close()
+
+    async def start(self) -> None:
+        if self._server is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._outbox = asyncio.Queue(maxsize=self.outbox_size)
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+        self._server = await asyncio.start_unix_server(self._handle_peer, path=str(self.socket_path))
+        self._sender = self._loop.create_task(self._send_loop())
+        logger.info("shared.started", worker=WORKER_ID, directory=str(self.directory))
+
+    async def close(self) -> None:
+        sender, self._sender = self._sender, None
+        if sender is not None:
+            sender.cancel()
+            try:
+                await sender
+            except asyncio.CancelledError:
+                pass
+        for writer in [*self._writers.values(), *self._readers]:
+            writer.close()
+        self._writers.clear()
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        try:
+            self.socket_path.unlink()
+        except OSError:
+            pass
+        self._loop = None
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats.update({
+            "directory": str(self.directory),
+            "peers": len(self._peer_paths()),
+            "outbox_depth": self._outbox.qsize() if self._outbox is not None else 0,
+        })
+        return stats
+
+
+def _on_loop(loop: asyncio.AbstractEventLoop) -> bool:
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
+
+
+def create_backend(server_settings=None) -> SharedBackend:
+    """按配置创建共享后端"""
+    config = server_settings or settings.server
+    if config.shared_backend == "sqlite":
+        directory = config.shared_dir or settings.paths.logs_dir / ".shared"
+        return SqliteBackend(directory, outbox_size=config.notify_queue_size)
+    if config.shared_backend != "memory":
+        raise ValueError(f"Unknown shared backend {config.shared_backend!r}, expected memory or sqlite")
+    if config.workers > 1:
+        logger.warning("shared.memory_backend_with_workers", workers=config.workers)
+    return SharedBackend()
+
+
+# 全局实例
+shared_backend = create_backend()
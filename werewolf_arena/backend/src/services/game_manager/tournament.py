@@ -0,0 +1,214 @@
+"""
+锦标赛执行器
+Tournament Executor - 在进程池中并行运行评测对局
+
+  - 全局和按提供商的同时进行对局数上限（一局使用村民和狼人两个模型的提供商）
+  - 每局结束立即追加到结果文件（results.jsonl），进程崩溃也不会丢失已完成的对局
+  - 重新运行时跳过已成功完成的 (村民模型, 狼人模型, 对局序号)
+  - 启用LLM响应缓存时，每局使用独立的缓存子目录，录制和回放与调度到哪个进程无关
+"""
+
+import collections
+import concurrent.futures
+import json
+import os
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import tqdm
+
+RESULTS_FILE = "results.jsonl"
+
+GameKey = Tuple[str, str, int]
+
+
+class GameSpec(NamedTuple):
+    """一局评测对局"""
+    villager_model: str
+    werewolf_model: str
+    index: int  # 该模型组合下的对局序号
+    ordinal: int  # 在整个锦标赛中的序号（用于随机种子）
+
+    @property
+    def key(self) -> GameKey:
+        return (self.villager_model, self.werewolf_model, self.index)
+
+    @property
+    def name(self) -> str:
+        return f"{self.villager_model}__vs__{self.werewolf_model}__{self.index}".replace("/", "_")
+
+
+def provider_of(model: str) -> str:
+    """模型的提供商前缀（如 glm/glm-4-flash -> glm），没有前缀时为模型本身"""
+    return model.split("/", 1)[0] if "/" in model else model
+
+
+def parse_budgets(values: Iterable[str]) -> Dict[str, int]:
+    """解析 provider=N 形式的提供商上限"""
+    budgets = {}
+    for value in values:
+        provider, sep, limit = value.partition("=")
+        if not sep or not limit.strip().isdigit():
+            raise ValueError(f"Invalid provider budget {value!r}, expected provider=N")
+        budgets[provider.strip()] = max(1, int(limit))
+    return budgets
+
+
+class ResultStore:
+    """追加写入的对局结果文件"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, RESULTS_FILE)
+        self._lock = threading.Lock()
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """读取所有结果（同一对局多次出现时保留最后一条）"""
+        if not os.path.exists(self.path):
+            return []
+        latest: Dict[GameKey, Dict[str, Any]] = {}
+        with open(self.path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    row = json.loads(line)
+                    key = (row["villager_model"], row["werewolf_model"], row["index"])
+                except (ValueError, KeyError, TypeError):
+                    continue  # 写了一半的最后一行
+                latest[key] = row
+        return list(latest.values())
+
+    def completed(self) -> Set[GameKey]:
+        """已成功完成的对局"""
+        return {
+            (row["villager_model"], row["werewolf_model"], row["index"])
+            for row in self.rows()
+            if not row.get("error")
+        }
+
+    def append(self, row: Dict[str, Any]) -> None:
+        line = json.dumps(row, ensure_ascii=False) + "\n"
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(line)
+                file.flush()
+                os.fsync(file.fileno())
+
+
+def play_game(spec: GameSpec, options: Dict[str, Any]) -> Dict[str, Any]:
+    """在工作进程中运行一局（进程池的任务函数）"""
+    # 延迟导入：子进程只在第一次执行任务时加载游戏代码
+    from src.services.game_manager import runner
+    from src.services.llm.response_cache import response_cache
+
+    cache_dir = options.get("cache_dir")
+    if cache_dir:
+        response_cache.configure(mode=options["cache_mode"], directory=os.path.join(cache_dir, spec.name))
+
+    started = time.time()
+    row = spec._asdict()
+    try:
+        winner, log_dir = runner.run_game(
+            werewolf_model=spec.werewolf_model,
+            villager_model=spec.villager_model,
+            index=spec.ordinal,
+            game_mode=options["game_mode"],
+            num_threads=options["num_threads"],
+            seed=options.get("seed"),
+        )
+        row.update(winner=winner, log_dir=log_dir, error=None if winner else "game did not finish")
+    except Exception:
+        row.update(winner=None, log_dir=None, error=traceback.format_exc())
+    finally:
+        if cache_dir:
+            response_cache.close()
+    row["seconds"] = round(time.time() - started, 1)
+    return row
+
+
+class Tournament:
+    """按预算把对局调度到进程池"""
+
+    def __init__(
+        self,
+        store: ResultStore,
+        workers: int = 4,
+        max_in_flight: Optional[int] = None,
+        provider_budgets: Optional[Dict[str, int]] = None,
+        options: Optional[Dict[str, Any]] = None,
+        executor_factory: Optional[Callable[[int], concurrent.futures.Executor]] = None,
+    ):
+        self.store = store
+        self.workers = max(1, workers)
+        self.max_in_flight = max(1, max_in_flight or self.workers)
+        self.provider_budgets = provider_budgets or {}
+        self.options = options or {}
+        self.executor_factory = executor_factory or (
+            lambda workers: concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        )
+
+    @staticmethod
+    def plan(model_combinations: Iterable[Tuple[str, str]], num_games: int) -> List[GameSpec]:
+        specs = []
+        for villager_model, werewolf_model in model_combinations:
+            for index in range(num_games):
+                specs.append(GameSpec(villager_model, werewolf_model, index, len(specs)))
+        return specs
+
+    @staticmethod
+    def _providers(spec: GameSpec) -> Set[str]:
+        return {provider_of(spec.villager_model), provider_of(spec.werewolf_model)}
+
+    def _fits(self, spec: GameSpec, in_flight: Dict[str, int]) -> bool:
+        return all(
+            in_flight[provider] < self.provider_budgets[provider]
+            for provider in self._providers(spec)
+            if provider in self.provider_budgets
+        )
+
+    def run(self, specs: List[GameSpec]) -> List[Dict[str, Any]]:
+        """运行尚未完成的对局，返回本次运行的结果"""
+        done = self.store.completed()
+        pending = collections.deque(spec for spec in specs if spec.key not in done)
+        skipped = len(specs) - len(pending)
+        if skipped:
+            tqdm.tqdm.write(f"Skipping {skipped} completed games from {self.store.path}")
+
+        results = []
+        running: Dict[concurrent.futures.Future, GameSpec] = {}
+        in_flight: Dict[str, int] = collections.Counter()
+        progress = tqdm.tqdm(total=len(pending), desc="Games")
+        with self.executor_factory(min(self.workers, max(1, len(pending)))) as executor:
+            while pending or running:
+                # 按全局和提供商上限提交对局；排在前面的对局受限时先提交后面的
+                for spec in list(pending):
+                    if len(running) >= self.max_in_flight:
+                        break
+                    if self._fits(spec, in_flight):
+                        pending.remove(spec)
+                        running[executor.submit(play_game, spec, self.options)] = spec
+                        for provider in self._providers(spec):
+                            in_flight[provider] += 1
+
+                finished, _ = concurrent.futures.wait(
+                    running, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in finished:
+                    spec = running.pop(future)
+                    for provider in self._providers(spec):
+                        in_flight[provider] -= 1
+                    try:
+                        row = future.result()
+                    except Exception as e:
+                        # 工作进程异常退出等
+                        row = {**spec._asdict(), "winner": None, "log_dir": None,
+                               "error": f"{type(e).__name__}: {e}", "seconds": None}
+                    self.store.append(row)
+                    results.append(row)
+                    progress.update()
+                    if row["error"]:
+                        tqdm.tqdm.write(f"Game {spec.name} failed: {row['error'].strip().splitlines()[-1]}")
+        progress.close()
+        return results
@@ -6,7 +6,12 @@ LLM Service Module
 from .base import LLMProvider
 from .factory import LLMFactory
 from .client import LLMClient
-from .generator import generate, format_prompt, set_global_llm_client, get_global_llm_client
+from .generator import generate, agenerate, format_prompt, set_global_llm_client, get_global_llm_client
+from .template_cache import TemplateCache, template_cache
+from .http_pool import HttpPool, http_pool
+from .admission import AdaptiveLimiter, AdmissionController, admission_controller, llm_flow
+from .response_cache import ResponseCache, ResponseCacheMiss, response_cache
+from .resilience import CircuitBreaker, Resilience, resilience
 from .providers import OpenAIProvider, GLMProvider, OpenRouterProvider
 
 __all__ = [
@@ -17,9 +22,29 @@ __all__ = [
     "LLMClient",
     # 生成器
     "generate",
+    "agenerate",
     "format_prompt",
     "set_global_llm_client",
     "get_global_llm_client",
+    # 模板缓存
+    "TemplateCache",
+    "template_cache",
+    # 连接池
+    "HttpPool",
+    "http_pool",
+    # 准入控制
+    "AdaptiveLimiter",
+    "AdmissionController",
+    "admission_controller",
+    "llm_flow",
+    # 响应缓存
+    "ResponseCache",
+    "ResponseCacheMiss",
+    "response_cache",
+    # 对冲与故障转移
+    "CircuitBreaker",
+    "Resilience",
+    "resilience",
     # 提供商
     "OpenAIProvider",
     "GLMProvider",
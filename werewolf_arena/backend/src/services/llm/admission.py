@@ -0,0 +1,363 @@
+"""
+LLM 请求准入控制
+Adaptive Admission Control - 每个 (提供商, 模型) 一个 AIMD 并发窗口
+
+请求成功且延迟正常、并且窗口已被用满时，并发上限加性增长（约每个窗口 +1）；
+遇到 429 / 5xx / 超时时乘性减小，并遵守 Retry-After 暂停发送。
+同步（线程）和异步调用方共用同一个窗口。
+
+排队的请求按所属流量（游戏会话）加权公平分配空位（start-time fair queuing）：
+每个流量的请求按 1/权重 推进其虚拟时间，虚拟开始时间最小的请求先获得空位，
+因此并发跑满时各游戏按权重比例分享窗口，而不是先到先得。
+"""
+
+import asyncio
+import bisect
+import contextlib
+import contextvars
+import email.utils
+import itertools
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.config.settings import settings
+
+# Retry-After 暂停的上限（秒）
+MAX_RETRY_AFTER = 60.0
+
+# 当前上下文的LLM流量 (流量ID, 权重)，由游戏调度器为每局游戏设置；
+# asyncio.to_thread 会复制上下文，同步客户端在线程中排队时同样生效
+llm_flow: contextvars.ContextVar[Optional[Tuple[str, float]]] = contextvars.ContextVar(
+    "llm_flow", default=None
+)
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_overload(error: Optional[BaseException]) -> bool:
+    """429、5xx 和请求超时视为提供商过载"""
+    if error is None:
+        return False
+    status = _status_code(error)
+    if status is not None:
+        return status == 429 or status >= 500
+    return "Timeout" in type(error).__name__
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """从错误响应头解析 Retry-After（秒数或 HTTP 日期）"""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return parsed.timestamp() - time.time()
+
+
+class _Waiter:
+    """排队等待的调用方（线程或协程）"""
+    __slots__ = ("loop", "event", "future", "flow", "tag")
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop
+        self.event = threading.Event() if loop is None else None
+        self.future = loop.create_future() if loop is not None else None
+        self.flow: Optional[str] = None
+        self.tag: Tuple[float, int] = (0.0, 0)  # (虚拟开始时间, 到达序号)
+
+    def wake(self) -> None:
+        if self.loop is None:
+            self.event.set()
+        elif not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self) -> None:
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class AdaptiveLimiter:
+    """AIMD 自适应并发窗口"""
+
+    def __init__(
+        self,
+        initial_limit: float = 4,
+        min_limit: float = 1,
+        max_limit: float = 64,
+        backoff: float = 0.5,
+        latency_tolerance: float = 3.0,
+        default_cooldown: float = 1.0,
+    ):
+        self.min_limit = max(1.0, float(min_limit))
+        self.max_limit = max(self.min_limit, float(max_limit))
+        self.limit = min(self.max_limit, max(self.min_limit, float(initial_limit)))
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.default_cooldown = default_cooldown
+
+        self._lock = threading.Lock()
+        self._waiters: List[_Waiter] = []  # 按虚拟开始时间排序
+        self._virtual = 0.0  # 最近获得空位的请求的虚拟开始时间
+        self._flow_finish: Dict[Optional[str], float] = {}  # 流量 -> 下一个请求的虚拟开始时间
+        self._arrivals = itertools.count()
+        self._in_flight = 0
+        self._blocked_until = 0.0
+        self._last_decrease = 0.0
+        self._latency: Optional[float] = None  # 成功请求延迟的滑动平均
+        self._stats = {
+            "admitted": 0,
+            "queued": 0,
+            "wait_seconds": 0.0,
+            "succeeded": 0,
+            "overloaded": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "increases": 0,
+            "decreases": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # 准入
+    # ------------------------------------------------------------------
+
+    def _try_acquire_locked(self, now: float, waiter: Optional[_Waiter] = None) -> bool:
+        free = int(self.limit) - self._in_flight
+        if now < self._blocked_until or free <= 0:
+            return False
+        if waiter is not None and waiter not in self._waiters[:free]:
+            return False  # 排在前面的流量优先
+        self._in_flight += 1
+        self._stats["admitted"] += 1
+        return True
+
+    def _wait_timeout_locked(self, now: float) -> Optional[float]:
+        return self._blocked_until - now if now < self._blocked_until else None
+
+    def _wake_locked(self) -> None:
+        """唤醒可以获得空位的排队者"""
+        free = int(self.limit) - self._in_flight
+        for waiter in list(self._waiters)[:max(0, free)]:
+            waiter.wake()
+
+    def _enqueue_locked(self, waiter: _Waiter) -> None:
+        flow, weight = llm_flow.get() or (None, 1.0)
+        start = max(self._virtual, self._flow_finish.get(flow, 0.0))
+        self._flow_finish[flow] = start + 1.0 / max(weight, 0.01)
+        waiter.flow = flow
+        waiter.tag = (start, next(self._arrivals))
+        bisect.insort(self._waiters, waiter, key=lambda w: w.tag)
+        self._stats["queued"] += 1
+
+    def _dequeue_locked(self, waiter: _Waiter, since: float, admitted: bool = False) -> None:
+        self._waiters.remove(waiter)
+        self._stats["wait_seconds"] += time.monotonic() - since
+        if admitted:
+            self._virtual = max(self._virtual, waiter.tag[0])
+            if len(self._flow_finish) > 2 * len(self._waiters) + 16:
+                # 已经落后于虚拟时间的流量不再需要记录
+                self._flow_finish = {
+                    flow: finish for flow, finish in self._flow_finish.items() if finish > self._virtual
+                }
+
+    def acquire(self) -> float:
+        """阻塞直到获得发送许可，返回开始时间"""
+        with self._lock:
+            now = time.monotonic()
+            if not self._waiters and self._try_acquire_locked(now):
+                return now
+            waiter = _Waiter()
+            self._enqueue_locked(waiter)
+        since = now
+        try:
+            while True:
+                with self._lock:
+                    now = time.monotonic()
+                    if self._try_acquire_locked(now, waiter):
+                        self._dequeue_locked(waiter, since, admitted=True)
+                        waiter = None
+                        return now
+                    timeout = self._wait_timeout_locked(now)
+                    waiter.event.clear()
+                waiter.event.wait(timeout)
+        finally:
+            if waiter is not None:
+                with self._lock:
+                    self._dequeue_locked(waiter, since)
+                    self._wake_locked()
+
+    async def aacquire(self) -> float:
+        """异步等待发送许可，返回开始时间"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            now = time.monotonic()
+            if not self._waiters and self._try_acquire_locked(now):
+                return now
+            waiter = _Waiter(loop)
+            self._enqueue_locked(waiter)
+        since = now
+        try:
+            while True:
+                with self._lock:
+                    now = time.monotonic()
+                    if self._try_acquire_locked(now, waiter):
+                        self._dequeue_locked(waiter, since, admitted=True)
+                        waiter = None
+                        return now
+                    timeout = self._wait_timeout_locked(now)
+                    if waiter.future.done():
+                        waiter.future = loop.create_future()
+                    future = waiter.future
+                await asyncio.wait({future}, timeout=timeout)
+        finally:
+            if waiter is not None:
+                with self._lock:
+                    self._dequeue_locked(waiter, since)
+                    # 放弃等待的排队者把空位让给下一个
+                    self._wake_locked()
+
+    def release(self, started_at: float, error: Optional[BaseException] = None) -> None:
+        """请求结束，根据结果调整窗口"""
+        with self._lock:
+            now = time.monotonic()
+            saturated = self._in_flight >= int(self.limit)
+            self._in_flight -= 1
+
+            if is_overload(error):
+                self._stats["overloaded"] += 1
+                # 每个窗口只减小一次：只对上次减小之后发出的请求做出反应
+                if started_at >= self._last_decrease:
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                    self._last_decrease = now
+                    self._stats["decreases"] += 1
+                delay = retry_after(error)
+                if delay is None and _status_code(error) == 429:
+                    delay = self.default_cooldown
+                if delay is not None and delay > 0:
+                    self._blocked_until = max(self._blocked_until, now + min(delay, MAX_RETRY_AFTER))
+            elif isinstance(error, (GeneratorExit, asyncio.CancelledError)):
+                # 调用方提前停止（如流式响应已得到结果），不影响窗口
+                self._stats["cancelled"] += 1
+            elif error is None:
+                self._stats["succeeded"] += 1
+                latency = now - started_at
+                healthy = self._latency is None or latency <= self._latency * self.latency_tolerance
+                self._latency = latency if self._latency is None else 0.9 * self._latency + 0.1 * latency
+                if healthy and saturated and self.limit < self.max_limit:
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                    self._stats["increases"] += 1
+            else:
+                # 其他错误（如参数错误）不影响窗口
+                self._stats["failed"] += 1
+
+            self._wake_locked()
+
+    @contextlib.contextmanager
+    def slot(self):
+        """同步调用的准入上下文"""
+        started = self.acquire()
+        try:
+            yield
+        except BaseException as e:
+            self.release(started, e)
+            raise
+        self.release(started)
+
+    @contextlib.asynccontextmanager
+    async def aslot(self):
+        """异步调用的准入上下文"""
+        started = await self.aacquire()
+        try:
+            yield
+        except BaseException as e:
+            self.release(started, e)
+            raise
+        self.release(started)
+
+    def stats(self) -> Dict[str, Any]:
+        """窗口与队列统计"""
+        with self._lock:
+            now = time.monotonic()
+            stats = dict(self._stats)
+            stats["wait_seconds"] = round(stats["wait_seconds"], 3)
+            stats.update({
+                "limit": round(self.limit, 2),
+                "in_flight": self._in_flight,
+                "queue_depth": len(self._waiters),
+                "queued_flows": len({waiter.flow for waiter in self._waiters}),
+                "latency_ms": round(self._latency * 1000, 1) if self._latency is not None else None,
+                "blocked_for": round(max(0.0, self._blocked_until - now), 3),
+            })
+            return stats
+
+
+class AdmissionController:
+    """按 (提供商, 模型) 管理自适应并发窗口"""
+
+    def __init__(self, llm_settings=None):
+        llm_settings = llm_settings or settings.llm
+        self.enabled = llm_settings.admission_enabled
+        self.settings = llm_settings
+        self._limiters: Dict[Tuple[str, str], AdaptiveLimiter] = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, provider: str, model: str) -> AdaptiveLimiter:
+        key = (provider, model)
+        with self._lock:
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                config = self.settings
+                limiter = AdaptiveLimiter(
+                    initial_limit=config.admission_limits.get(provider, config.admission_initial_limit),
+                    min_limit=config.admission_min_limit,
+                    max_limit=config.admission_max_limit,
+                    backoff=config.admission_backoff,
+                    latency_tolerance=config.admission_latency_tolerance,
+                )
+                self._limiters[key] = limiter
+            return limiter
+
+    def slot(self, provider: str, model: str):
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self.limiter(provider, model).slot()
+
+    def aslot(self, provider: str, model: str):
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self.limiter(provider, model).aslot()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {
+            "enabled": self.enabled,
+            "limiters": {
+                f"{provider}/{model}": limiter.stats()
+                for (provider, model), limiter in limiters.items()
+            },
+        }
+
+
+# 全局实例
+admission_controller = AdmissionController()
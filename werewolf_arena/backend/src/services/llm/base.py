@@ -3,8 +3,14 @@ LLM提供商抽象基类
 LLM Provider Abstract Base Class
 """
 
+import asyncio
+import weakref
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any
+from typing import AsyncIterator, Optional, Dict, Any
+
+from openai import AsyncOpenAI
+
+from .http_pool import http_pool
 
 
 class LLMProvider(ABC):
@@ -23,6 +29,8 @@ class LLMProvider(ABC):
         self.config = config
         self.api_key = config.get("api_key")
         self.base_url = config.get("base_url")
+        # 每个共享 HTTP 客户端对应一个异步 SDK 客户端
+        self._async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
 
     @abstractmethod
     def generate(
@@ -50,6 +58,88 @@ class LLMProvider(ABC):
         """
         pass
 
+    async def agenerate(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        json_mode: bool = True,
+        response_schema: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> str:
+        """
+        异步生成文本，参数与返回值同 generate()
+
+        默认在线程中调用 generate()；支持异步接口的提供商应覆盖此方法。
+        """
+        return await asyncio.to_thread(
+            self.generate,
+            model=model,
+            prompt=prompt,
+            temperature=temperature,
+            json_mode=json_mode,
+            response_schema=response_schema,
+            **kwargs
+        )
+
+    async def astream(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        json_mode: bool = True,
+        response_schema: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        流式生成文本，逐段返回增量内容
+
+        默认一次性返回 agenerate() 的完整结果；支持流式接口的提供商应覆盖此方法。
+        """
+        yield await self.agenerate(
+            model=model,
+            prompt=prompt,
+            temperature=temperature,
+            json_mode=json_mode,
+            response_schema=response_schema,
+            **kwargs
+        )
+
+    @staticmethod
+    async def _stream_chat_completion(client: AsyncOpenAI, **request) -> AsyncIterator[str]:
+        """以流式方式调用 chat.completions，停止读取时释放连接"""
+        stream = await client.chat.completions.create(stream=True, **request)
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.response.aclose()
+
+    def _async_openai(
+        self,
+        base_url: str,
+        default_headers: Optional[Dict[str, str]] = None,
+    ) -> AsyncOpenAI:
+        """
+        获取使用共享连接池的异步 OpenAI 兼容客户端（须在事件循环中调用）
+
+        Args:
+            base_url: API地址，同一地址的请求复用连接
+            default_headers: 额外的请求头
+        """
+        http_client = http_pool.get_client(base_url)
+        client = self._async_clients.get(http_client)
+        if client is None:
+            client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=base_url,
+                default_headers=default_headers,
+                http_client=http_client,
+            )
+            self._async_clients[http_client] = client
+        return client
+
     @abstractmethod
     def health_check(self) -> bool:
         """
@@ -3,10 +3,15 @@ LLM统一客户端
 Unified LLM Client
 """
 
-from typing import Dict, Optional, Any
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple
 
+from src.config.loader import model_registry
+from .admission import AdmissionController, admission_controller
 from .base import LLMProvider
 from .factory import LLMFactory
+from .resilience import Resilience, resilience as default_resilience
+from .response_cache import ResponseCache, response_cache
 
 
 class LLMClient:
@@ -15,14 +20,29 @@ class LLMClient:
     管理多个LLM提供商，根据模型名称自动路由到对应的提供商
     """
 
-    def __init__(self, providers: Dict[str, LLMProvider]):
+    def __init__(
+        self,
+        providers: Dict[str, LLMProvider],
+        admission: Optional[AdmissionController] = None,
+        cache: Optional[ResponseCache] = None,
+        resilience: Optional[Resilience] = None,
+        failover: Optional[Dict[str, List[str]]] = None,
+    ):
         """
         初始化LLM客户端
 
         Args:
             providers: 提供商字典 {provider_name: provider_instance}
+            admission: 按 (提供商, 模型) 限制并发的准入控制，默认使用全局实例
+            cache: 响应录制/回放缓存，默认使用全局实例
+            resilience: 请求对冲与熔断状态，默认使用全局实例
+            failover: 模型ID到备用模型ID列表的映射，默认读取 models.yaml
         """
         self.providers = providers
+        self.admission = admission or admission_controller
+        self.cache = cache or response_cache
+        self.resilience = resilience or default_resilience
+        self.failover = model_registry.failover if failover is None else failover
 
     def call(
         self,
@@ -49,21 +69,167 @@ class LLMClient:
 
         Raises:
             ValueError: 找不到对应的提供商
+            ResponseCacheMiss: 回放模式下请求未被录制
         """
+        cache_key, cached = self.cache.begin(
+            model, prompt, temperature, response_schema, kwargs.get("system_message")
+        )
+        if cached is not None:
+            return cached
+
+        name, provider, model_name = self._resolve(model)
+
+        with self.admission.slot(name, model_name):
+            with self.resilience.track(name, f"{name}/{model_name}"):
+                response = provider.generate(
+                    model=model_name,
+                    prompt=prompt,
+                    temperature=temperature,
+                    json_mode=json_mode,
+                    response_schema=response_schema,
+                    **kwargs
+                )
+
+        self.cache.finish(cache_key, response, model, temperature)
+        return response
+
+    async def acall(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        json_mode: bool = True,
+        response_schema: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> str:
+        """
+        异步调用LLM生成文本，参数与返回值同 call()
+
+        请求通过提供商的异步接口和共享连接池发出，不占用线程。启用对冲时，
+        超过该模型延迟分位数仍未返回的请求会再发送一次，取先完成的结果。
+        """
+        cache_key, cached = self.cache.begin(
+            model, prompt, temperature, response_schema, kwargs.get("system_message")
+        )
+        if cached is not None:
+            return cached
+
+        name, provider, model_name = self._resolve(model)
+        routed = f"{name}/{model_name}"
+
+        async def send(started: asyncio.Event) -> str:
+            async with self.admission.aslot(name, model_name):
+                started.set()
+                with self.resilience.track(name, routed):
+                    return await provider.agenerate(
+                        model=model_name,
+                        prompt=prompt,
+                        temperature=temperature,
+                        json_mode=json_mode,
+                        response_schema=response_schema,
+                        **kwargs
+                    )
+
+        response = await self.resilience.hedged(routed, send)
+
+        self.cache.finish(cache_key, response, model, temperature)
+        return response
+
+    async def astream(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        json_mode: bool = True,
+        response_schema: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        流式调用LLM，逐段返回增量内容，参数同 call()
+
+        调用方可以在得到所需内容后提前关闭（aclose）；此时录制缓存保存
+        已收到的部分，回放时得到相同的结果。启用对冲时，第一段内容超过该模型
+        延迟分位数仍未到达的流会再打开一个，取先返回内容的流。
+        """
+        cache_key, cached = self.cache.begin(
+            model, prompt, temperature, response_schema, kwargs.get("system_message")
+        )
+        if cached is not None:
+            yield cached
+            return
+
+        name, provider, model_name = self._resolve(model)
+        routed = f"{name}/{model_name}"
+
+        async def open_stream(started: asyncio.Event) -> AsyncIterator[str]:
+            async with self.admission.aslot(name, model_name):
+                started.set()
+                with self.resilience.track(name, routed):
+                    stream = provider.astream(
+                        model=model_name,
+                        prompt=prompt,
+                        temperature=temperature,
+                        json_mode=json_mode,
+                        response_schema=response_schema,
+                        **kwargs
+                    )
+                    try:
+                        async for chunk in stream:
+                            yield chunk
+                    finally:
+                        await stream.aclose()
+
+        chunks = []
+        stream = self.resilience.hedged_stream(routed, open_stream)
+        try:
+            async for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+        except GeneratorExit:
+            self.cache.finish(cache_key, "".join(chunks), model, temperature)
+            raise
+        finally:
+            await stream.aclose()
+
+        self.cache.finish(cache_key, "".join(chunks), model, temperature)
+
+    def _resolve(self, model: str) -> Tuple[str, LLMProvider, str]:
+        """
+        返回实际使用的提供商名称、提供商和去掉提供商前缀后的模型名
+
+        主提供商熔断时按故障转移列表改用第一个未熔断的备用模型；
+        没有可用的备用模型时仍发送到主提供商。
+        """
+        primary = self._route(model)
+        if self.resilience.allow(primary[0]):
+            return primary
+        for backup in self._backups(model):
+            try:
+                route = self._route(backup)
+            except ValueError:
+                continue  # 备用模型的提供商未配置
+            if self.resilience.allow(route[0]):
+                self.resilience.record_failover(model, backup)
+                return route
+        return primary
+
+    def _backups(self, model: str) -> List[str]:
+        """模型的备用模型列表（故障转移表按完整模型ID索引，别名和短ID先转换）"""
+        backups = self.failover.get(model)
+        if backups is None:
+            backups = self.failover.get(model_registry.get_full_model_id(model), [])
+        return backups
+
+    def _route(self, model: str) -> Tuple[str, LLMProvider, str]:
+        """返回模型对应的提供商名称、提供商和去掉提供商前缀后的模型名"""
         provider = self._get_provider_for_model(model)
+        name = next(name for name, candidate in self.providers.items() if candidate is provider)
 
         # 如果model包含提供商前缀（如 glm/），去掉前缀
         if "/" in model:
             model = model.split("/", 1)[1]
 
-        return provider.generate(
-            model=model,
-            prompt=prompt,
-            temperature=temperature,
-            json_mode=json_mode,
-            response_schema=response_schema,
-            **kwargs
-        )
+        return name, provider, model
 
     def _get_provider_for_model(self, model: str) -> LLMProvider:
         """
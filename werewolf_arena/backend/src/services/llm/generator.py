@@ -17,13 +17,34 @@ LLM生成器
 LLM Generator - 处理提示词模板和LLM调用
 """
 
+import asyncio
+import contextlib
+import contextvars
+import inspect
 from typing import Any, Dict, List, Optional, Tuple
 
-import jinja2
-
 from src.config import RETRIES
+from src.config.settings import settings
+from src.core.game.prompts import ACTION_PROMPTS_AND_SCHEMAS
 from src.core.models.logs import LmLog
-from src.utils.helpers import parse_json
+from src.services.llm.response_cache import ResponseCacheMiss
+from src.services.llm.template_cache import template_cache
+from src.services.logger.structured import get_logger
+from src.utils.helpers import IncrementalJsonScanner, parse_json, validate_json
+
+logger = get_logger(__name__)
+
+# 预编译所有行动提示词模板
+template_cache.precompile(
+    prompt_template for prompt_template, _ in ACTION_PROMPTS_AND_SCHEMAS.values()
+)
+
+
+# 当前上下文中限制LLM并发的信号量（由游戏主控设置），只包住LLM请求本身，
+# 提示词渲染（包括其中的随机选项顺序）不受排队先后影响
+llm_slots: contextvars.ContextVar[Optional[asyncio.Semaphore]] = contextvars.ContextVar(
+    "llm_slots", default=None
+)
 
 
 # 全局LLM客户端（将通过依赖注入设置）
@@ -48,7 +69,7 @@ def get_global_llm_client():
 
 def format_prompt(prompt_template: str, worldstate: Dict[str, Any]) -> str:
     """
-    使用Jinja2渲染提示词模板
+    使用Jinja2渲染提示词模板（编译结果由 template_cache 缓存）
 
     Args:
         prompt_template: Jinja2模板字符串
@@ -57,7 +78,164 @@ def format_prompt(prompt_template: str, worldstate: Dict[str, Any]) -> str:
     Returns:
         渲染后的提示词
     """
-    return jinja2.Template(prompt_template).render(worldstate)
+    return template_cache.render(prompt_template, worldstate)
+
+
+# 强制中文系统消息
+SYSTEM_MESSAGE = "你必须使用纯中文回答所有问题。你是狼人杀游戏的AI玩家，所有发言、推理和互动都必须使用中文。返回的JSON格式响应中，所有字段值都必须是中文内容，不允许使用任何英文单词。请确保你的回答完全是中文格式，包括JSON中的所有字符串值。"
+
+
+def _handle_response(
+    raw_resp: Optional[str],
+    prompt: str,
+    allowed_values: Optional[List[Any]],
+    result_key: Optional[str],
+    response_schema: Optional[Dict[str, Any]] = None,
+) -> Tuple[bool, Any, Optional[LmLog]]:
+    """
+    解析单次LLM响应并按响应schema和允许值校验结果（同步与异步生成共用）
+
+    Returns:
+        (accepted, result, log) 元组；accepted为False时需要重试
+    """
+    if raw_resp:
+        # 完整的原始响应只在DEBUG级别按采样输出
+        logger.debug("llm.raw_response", chars=len(raw_resp), raw=raw_resp)
+    else:
+        logger.warning("llm.empty_response")
+
+    # 解析JSON响应
+    result = parse_json(raw_resp, response_schema)
+
+    # 某些模型可能返回数组，转换为字典
+    if isinstance(result, list):
+        first_dict = next((it for it in result if isinstance(it, dict)), None)
+        result = first_dict if first_dict is not None else {"value": result}
+
+    # 创建日志
+    log = LmLog(prompt=prompt, raw_resp=raw_resp, result=result)
+
+    error = validate_json(result, response_schema)
+    if error:
+        logger.warning("llm.schema_mismatch", error=error)
+        return False, None, log
+
+    # 提取特定键
+    if result_key:
+        if isinstance(result, dict):
+            result = result.get(result_key)
+        else:
+            # 非字典结果无法提取键，触发重试
+            logger.warning("llm.result_not_object", key=result_key)
+            result = None
+
+    # 验证结果
+    if allowed_values is None or result in allowed_values:
+        logger.debug("llm.accepted", key=result_key, result=result)
+        return True, result, log
+
+    # 结果不在允许值中，记录并重试
+    logger.warning("llm.result_not_allowed", key=result_key, result=result, allowed=allowed_values)
+    return False, result, log
+
+
+# 在后台读完流式响应的任务（保持强引用直到完成）
+_stream_tasks = set()
+
+
+def _streams(llm_client, result_key: Optional[str]) -> bool:
+    """是否以流式方式生成该行动"""
+    return (
+        settings.llm.stream_actions
+        and result_key is not None
+        and inspect.isasyncgenfunction(getattr(llm_client, "astream", None))
+    )
+
+
+async def _finish_stream(stream, scanner: IncrementalJsonScanner, log: LmLog) -> None:
+    """读完剩余的流式响应，补全日志中的原始响应和其他字段"""
+    try:
+        async for chunk in stream:
+            scanner.feed(chunk)
+            log.raw_resp = scanner.text
+    except Exception as e:
+        logger.warning("llm.stream_remainder_failed", error=f"{type(e).__name__}: {e}")
+    finally:
+        await stream.aclose()
+
+
+async def _astream_action(
+    llm_client,
+    request: Dict[str, Any],
+    prompt: str,
+    allowed_values: Optional[List[Any]],
+    result_key: str,
+) -> Tuple[bool, Any, Optional[LmLog]]:
+    """
+    流式读取响应，result_key 的值一旦完整就校验并返回
+
+    Returns:
+        同 _handle_response()
+    """
+    scanner = IncrementalJsonScanner()
+    stream = llm_client.astream(**request)
+    try:
+        async for chunk in stream:
+            if result_key in scanner.feed(chunk):
+                break
+        else:
+            # 流结束仍未得到结果字段（例如响应不是标准JSON），按完整响应解析
+            return _handle_response(
+                scanner.text, prompt, allowed_values, result_key, request["response_schema"]
+            )
+    except BaseException:
+        await stream.aclose()
+        raise
+
+    result = scanner.values[result_key]
+    # 日志中的 result 与扫描器共享，后台读取时继续补全
+    log = LmLog(prompt=prompt, raw_resp=scanner.text, result=scanner.values)
+    schema = (request["response_schema"] or {}).get("properties", {}).get(result_key)
+    error = validate_json(result, schema)
+    if error:
+        await stream.aclose()
+        logger.warning("llm.schema_mismatch", key=result_key, error=error)
+        return False, None, log
+    if allowed_values is not None and result not in allowed_values:
+        await stream.aclose()
+        logger.warning("llm.result_not_allowed", key=result_key, result=result, allowed=allowed_values)
+        return False, result, log
+
+    logger.debug("llm.stream_early_result", key=result_key, result=result, chars=len(scanner.text))
+    if settings.llm.stream_remainder == "background" and not scanner.done:
+        task = asyncio.ensure_future(_finish_stream(stream, scanner, log))
+        _stream_tasks.add(task)
+        task.add_done_callback(_stream_tasks.discard)
+    else:
+        await stream.aclose()
+    return True, result, log
+
+
+def _handle_error(e: Exception, raw_resp: Optional[str], attempt: int) -> None:
+    """记录单次LLM调用失败"""
+    logger.warning(
+        "llm.call_failed",
+        attempt=attempt + 1,
+        retries=RETRIES,
+        error=f"{type(e).__name__}: {e}",
+        # 响应开头用于定位问题，完整响应见DEBUG级别的 llm.raw_response
+        snippet=str(raw_resp)[:200] if raw_resp else None,
+    )
+
+
+def _failed(prompt: str, raw_responses: List[str]) -> Tuple[Any, LmLog]:
+    """所有重试都失败时的返回值"""
+    logger.error("llm.retries_exhausted", retries=RETRIES)
+    return None, LmLog(
+        prompt=prompt,
+        raw_resp="-------".join(raw_responses),
+        result=None
+    )
 
 
 def generate(
@@ -98,11 +276,8 @@ def generate(
     for attempt in range(RETRIES):
         raw_resp = None
         try:
-            # 添加强制中文系统消息
-            system_message = "你必须使用纯中文回答所有问题。你是狼人杀游戏的AI玩家，所有发言、推理和互动都必须使用中文。返回的JSON格式响应中，所有字段值都必须是中文内容，不允许使用任何英文单词。请确保你的回答完全是中文格式，包括JSON中的所有字符串值。"
-
             # 详细的调试日志
-            print(f"[LLM调用] 第{attempt + 1}/{RETRIES}次尝试 | 模型: {model} | 温度: {temperature:.2f}")
+            logger.debug("llm.call", attempt=attempt + 1, retries=RETRIES, model=model, temperature=temperature)
 
             # 调用LLM
             raw_resp = llm_client.call(
@@ -111,63 +286,20 @@ def generate(
                 temperature=temperature,
                 json_mode=True,
                 response_schema=response_schema,
-                system_message=system_message,
+                system_message=SYSTEM_MESSAGE,
             )
 
-            print(f"[LLM响应] 成功获取响应，长度: {len(raw_resp) if raw_resp else 0} 字符")
-
-            # 完整输出LLM原始响应用于调试
-            if raw_resp:
-                print(f"[LLM原始响应开始]")
-                print(raw_resp)
-                print(f"[LLM原始响应结束]")
-            else:
-                print(f"[LLM警告] 原始响应为空")
-
-            print(f"[JSON解析] 开始解析响应...")
-            # 解析JSON响应
-            result = parse_json(raw_resp)
-            print(f"[JSON解析] 解析完成，结果类型: {type(result)}, 内容: {result}")
-
-            # 某些模型可能返回数组，转换为字典
-            if isinstance(result, list):
-                first_dict = next((it for it in result if isinstance(it, dict)), None)
-                result = first_dict if first_dict is not None else {"value": result}
-
-            # 创建日志
-            log = LmLog(prompt=prompt, raw_resp=raw_resp, result=result)
-
-            # 提取特定键
-            if result_key:
-                if isinstance(result, dict):
-                    result = result.get(result_key)
-                    print(f"[LLM结果] 提取键 '{result_key}': {result}")
-                else:
-                    # 非字典结果无法提取键，触发重试
-                    print(f"[LLM警告] 结果不是字典类型，无法提取键 '{result_key}'，将重试")
-                    result = None
-
-            # 验证结果
-            if allowed_values is None or result in allowed_values:
-                print(f"[LLM成功] 返回有效结果: {result}")
+            accepted, result, log = _handle_response(
+                raw_resp, prompt, allowed_values, result_key, response_schema
+            )
+            if accepted:
                 return result, log
 
-            # 结果不在允许值中，记录并重试
-            print(f"[LLM警告] 结果 '{result}' 不在允许值 {allowed_values} 中，将重试...")
-
+        except ResponseCacheMiss:
+            # 回放模式下未录制的请求是错误，不重试
+            raise
         except Exception as e:
-            print(f"[LLM调用错误] 第{attempt + 1}/{RETRIES}次失败: {type(e).__name__}: {e}")
-            print(f"[错误详情] 这是一个LLM调用异常，不是JSON解析异常")
-
-            if raw_resp:
-                print(f"[LLM错误时的完整响应开始]")
-                print(raw_resp)
-                print(f"[LLM错误时的完整响应结束]")
-                # 截取响应的前200个字符用于调试
-                resp_snippet = str(raw_resp)[:200].replace('\n', ' ')
-                print(f"[LLM响应片段] {resp_snippet}")
-            else:
-                print(f"[LLM错误] 没有获取到任何响应内容")
+            _handle_error(e, raw_resp, attempt)
 
             # 增加温度以获得更多样化的输出
             temperature = min(1.0, temperature + 0.2)
@@ -176,9 +308,67 @@ def generate(
             raw_responses.append(raw_resp if isinstance(raw_resp, str) else "")
 
     # 所有重试都失败
-    print(f"[LLM失败] 所有{RETRIES}次重试均失败，返回None")
-    return None, LmLog(
-        prompt=prompt,
-        raw_resp="-------".join(raw_responses),
-        result=None
-    )
+    return _failed(prompt, raw_responses)
+
+
+async def agenerate(
+    prompt_template: str,
+    response_schema: Dict[str, Any],
+    worldstate: Dict[str, Any],
+    model: str,
+    temperature: float = 1.0,
+    allowed_values: Optional[List[Any]] = None,
+    result_key: Optional[str] = None,
+    llm_client=None,
+) -> Tuple[Any, LmLog]:
+    """
+    generate() 的异步版本，在调用方的事件循环上等待LLM响应
+
+    参数与返回值同 generate()。
+    """
+    if llm_client is None:
+        llm_client = get_global_llm_client()
+
+    prompt = format_prompt(prompt_template, worldstate)
+    raw_responses = []
+
+    for attempt in range(RETRIES):
+        raw_resp = None
+        try:
+            logger.debug("llm.call", attempt=attempt + 1, retries=RETRIES, model=model, temperature=temperature)
+
+            request = dict(
+                model=model,
+                prompt=prompt,
+                temperature=temperature,
+                json_mode=True,
+                response_schema=response_schema,
+                system_message=SYSTEM_MESSAGE,
+            )
+            slots = llm_slots.get()
+            async with slots if slots is not None else contextlib.nullcontext():
+                if _streams(llm_client, result_key):
+                    accepted, result, log = await _astream_action(
+                        llm_client, request, prompt, allowed_values, result_key
+                    )
+                    raw_resp = log.raw_resp if log else None
+                else:
+                    if inspect.iscoroutinefunction(getattr(llm_client, "acall", None)):
+                        raw_resp = await llm_client.acall(**request)
+                    else:
+                        # 只有同步接口的客户端放到线程中执行，避免阻塞事件循环
+                        raw_resp = await asyncio.to_thread(llm_client.call, **request)
+                    accepted, result, log = _handle_response(
+                        raw_resp, prompt, allowed_values, result_key, response_schema
+                    )
+            if accepted:
+                return result, log
+
+        except ResponseCacheMiss:
+            raise
+        except Exception as e:
+            _handle_error(e, raw_resp, attempt)
+            temperature = min(1.0, temperature + 0.2)
+            raw_responses.append(raw_resp if isinstance(raw_resp, str) else "")
+
+    return _failed(prompt, raw_responses)
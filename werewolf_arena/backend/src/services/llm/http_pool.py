@@ -0,0 +1,110 @@
+"""
+共享 HTTP 连接池
+Shared HTTP Connection Pool - 每个 base URL 一个长连接的 httpx.AsyncClient
+
+异步客户端的连接绑定在创建它的事件循环上，因此按 (事件循环, base URL)
+缓存；事件循环关闭后对应的客户端会被丢弃。
+"""
+
+import asyncio
+import threading
+from typing import Any, Dict, Tuple
+
+import httpx
+
+from src.config.settings import settings
+
+try:
+    import h2  # noqa: F401  HTTP/2 需要 httpx[http2]
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class HttpPool:
+    """按 base URL 共享的异步 HTTP 客户端"""
+
+    def __init__(
+        self,
+        max_connections: int = 200,
+        max_keepalive_connections: int = 50,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+        timeout: float = 120.0,
+        connect_timeout: float = 10.0,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        # 服务端不支持 HTTP/2 时通过 ALPN 自动回退到 HTTP/1.1
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self._clients: Dict[Tuple[asyncio.AbstractEventLoop, str], httpx.AsyncClient] = {}
+        self._lock = threading.Lock()
+        self._created = 0
+
+    @classmethod
+    def from_settings(cls, llm_settings) -> "HttpPool":
+        return cls(
+            max_connections=llm_settings.http_max_connections,
+            max_keepalive_connections=llm_settings.http_max_keepalive_connections,
+            keepalive_expiry=llm_settings.http_keepalive_expiry,
+            http2=llm_settings.http2,
+            timeout=llm_settings.http_timeout,
+            connect_timeout=llm_settings.http_connect_timeout,
+        )
+
+    def get_client(self, base_url: str) -> httpx.AsyncClient:
+        """获取当前事件循环上 base_url 对应的客户端（须在事件循环中调用）"""
+        loop = asyncio.get_running_loop()
+        key = (loop, str(base_url).rstrip("/"))
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None or client.is_closed:
+                self._prune()
+                client = httpx.AsyncClient(
+                    limits=self.limits,
+                    http2=self.http2,
+                    timeout=self.timeout,
+                )
+                self._clients[key] = client
+                self._created += 1
+            return client
+
+    def _prune(self) -> None:
+        """丢弃已关闭事件循环上的客户端"""
+        for key in [key for key in self._clients if key[0].is_closed()]:
+            del self._clients[key]
+
+    async def aclose(self) -> None:
+        """关闭当前事件循环上的所有客户端（应用关闭时调用）"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = [client for key, client in self._clients.items() if key[0] is loop]
+            for key in [key for key in self._clients if key[0] is loop]:
+                del self._clients[key]
+        for client in clients:
+            await client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        """连接池统计信息"""
+        with self._lock:
+            self._prune()
+            base_urls: Dict[str, int] = {}
+            for _, base_url in self._clients:
+                base_urls[base_url] = base_urls.get(base_url, 0) + 1
+            return {
+                "clients": len(self._clients),
+                "created": self._created,
+                "base_urls": base_urls,
+                "http2": self.http2,
+                "max_connections": self.limits.max_connections,
+                "max_keepalive_connections": self.limits.max_keepalive_connections,
+                "keepalive_expiry": self.limits.keepalive_expiry,
+            }
+
+
+# 全局实例
+http_pool = HttpPool.from_settings(settings.llm)
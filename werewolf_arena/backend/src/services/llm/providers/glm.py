@@ -3,11 +3,14 @@ GLM (智谱AI) LLM提供商
 GLM (ZhipuAI) LLM Provider
 """
 
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, Optional
 from openai import OpenAI
 
+from src.services.logger.structured import get_logger
 from ..base import LLMProvider
 
+logger = get_logger(__name__)
+
 
 class GLMProvider(LLMProvider):
     """GLM API提供商（使用OpenAI兼容接口）"""
@@ -20,17 +23,16 @@ class GLMProvider(LLMProvider):
             base_url=self.base_url or "https://open.bigmodel.cn/api/paas/v4"
         )
 
-    def generate(
+    def _completion_args(
         self,
         model: str,
         prompt: str,
-        temperature: float = 0.7,
-        json_mode: bool = True,
-        response_schema: Optional[Dict[str, Any]] = None,
-        system_message: Optional[str] = None,
+        temperature: float,
+        json_mode: bool,
+        system_message: Optional[str],
         **kwargs
-    ) -> str:
-        """使用GLM API生成文本"""
+    ) -> Dict[str, Any]:
+        """构建 chat.completions.create 的参数"""
         response_format = {"type": "text"}
         if json_mode:
             response_format = {"type": "json_object"}
@@ -41,7 +43,7 @@ class GLMProvider(LLMProvider):
             messages.append({"role": "system", "content": system_message})
         messages.append({"role": "user", "content": prompt})
 
-        response = self.client.chat.completions.create(
+        return dict(
             messages=messages,
             response_format=response_format,
             model=model,
@@ -49,8 +51,58 @@ class GLMProvider(LLMProvider):
             **kwargs
         )
 
+    def generate(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        json_mode: bool = True,
+        response_schema: Optional[Dict[str, Any]] = None,
+        system_message: Optional[str] = None,
+        **kwargs
+    ) -> str:
+        """使用GLM API生成文本"""
+        response = self.client.chat.completions.create(
+            **self._completion_args(model, prompt, temperature, json_mode, system_message, **kwargs)
+        )
+
         return response.choices[0].message.content
 
+    async def agenerate(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        json_mode: bool = True,
+        response_schema: Optional[Dict[str, Any]] = None,
+        system_message: Optional[str] = None,
+        **kwargs
+    ) -> str:
+        """使用GLM API生成文本（异步，使用共享连接池）"""
+        client = self._async_openai(str(self.client.base_url))
+        response = await client.chat.completions.create(
+            **self._completion_args(model, prompt, temperature, json_mode, system_message, **kwargs)
+        )
+
+        return response.choices[0].message.content
+
+    def astream(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        json_mode: bool = True,
+        response_schema: Optional[Dict[str, Any]] = None,
+        system_message: Optional[str] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """使用GLM API生成文本（流式，逐段返回增量内容）"""
+        client = self._async_openai(str(self.client.base_url))
+        return self._stream_chat_completion(
+            client,
+            **self._completion_args(model, prompt, temperature, json_mode, system_message, **kwargs)
+        )
+
     def health_check(self) -> bool:
         """健康检查"""
         try:
@@ -58,5 +110,5 @@ class GLMProvider(LLMProvider):
             # GLM可能没有models.list接口，所以只检查配置
             return self.validate_config()
         except Exception as e:
-            print(f"GLM health check failed: {e}")
+            logger.warning("llm.health_check_failed", provider="glm", error=str(e))
             return False
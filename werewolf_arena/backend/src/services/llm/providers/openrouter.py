@@ -3,11 +3,14 @@ OpenRouter LLM提供商
 OpenRouter LLM Provider
 """
 
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, Optional
 from openai import OpenAI
 
+from src.services.logger.structured import get_logger
 from ..base import LLMProvider
 
+logger = get_logger(__name__)
+
 
 class OpenRouterProvider(LLMProvider):
     """OpenRouter API提供商（使用OpenAI兼容接口）"""
@@ -31,36 +34,97 @@ class OpenRouterProvider(LLMProvider):
             base_url=self.base_url or "https://openrouter.ai/api/v1",
             default_headers=default_headers or None
         )
+        self.default_headers = default_headers or None
 
-    def generate(
+    def _completion_args(
         self,
         model: str,
         prompt: str,
-        temperature: float = 0.7,
-        json_mode: bool = True,
-        response_schema: Optional[Dict[str, Any]] = None,
+        temperature: float,
+        json_mode: bool,
+        system_message: Optional[str],
         **kwargs
-    ) -> str:
-        """使用OpenRouter API生成文本"""
+    ) -> Dict[str, Any]:
+        """构建 chat.completions.create 的参数"""
+        messages = []
+
+        # 添加系统消息（如果有）
+        if system_message:
+            messages.append({"role": "system", "content": system_message})
+
+        # 添加用户消息
+        messages.append({"role": "user", "content": prompt})
+
+        # 设置响应格式
         response_format = {"type": "text"}
         if json_mode:
             response_format = {"type": "json_object"}
 
-        response = self.client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
+        return dict(
+            messages=messages,
             response_format=response_format,
             model=model,
             temperature=temperature,
             **kwargs
         )
 
+    def generate(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        json_mode: bool = True,
+        response_schema: Optional[Dict[str, Any]] = None,
+        system_message: Optional[str] = None,
+        **kwargs
+    ) -> str:
+        """使用OpenRouter API生成文本"""
+        response = self.client.chat.completions.create(
+            **self._completion_args(model, prompt, temperature, json_mode, system_message, **kwargs)
+        )
+
+        return response.choices[0].message.content
+
+    async def agenerate(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        json_mode: bool = True,
+        response_schema: Optional[Dict[str, Any]] = None,
+        system_message: Optional[str] = None,
+        **kwargs
+    ) -> str:
+        """使用OpenRouter API生成文本（异步，使用共享连接池）"""
+        client = self._async_openai(str(self.client.base_url), self.default_headers)
+        response = await client.chat.completions.create(
+            **self._completion_args(model, prompt, temperature, json_mode, system_message, **kwargs)
+        )
+
         return response.choices[0].message.content
 
+    def astream(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        json_mode: bool = True,
+        response_schema: Optional[Dict[str, Any]] = None,
+        system_message: Optional[str] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """使用OpenRouter API生成文本（流式，逐段返回增量内容）"""
+        client = self._async_openai(str(self.client.base_url), self.default_headers)
+        return self._stream_chat_completion(
+            client,
+            **self._completion_args(model, prompt, temperature, json_mode, system_message, **kwargs)
+        )
+
     def health_check(self) -> bool:
         """健康检查"""
         try:
             # 检查配置是否有效
             return self.validate_config()
         except Exception as e:
-            print(f"OpenRouter health check failed: {e}")
+            logger.warning("llm.health_check_failed", provider="openrouter", error=str(e))
             return False
@@ -3,11 +3,14 @@
 SiliconFlow API Provider
 """
 
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, Optional
 from openai import OpenAI
 
+from src.services.logger.structured import get_logger
 from ..base import LLMProvider
 
+logger = get_logger(__name__)
+
 
 class SiliconFlowProvider(LLMProvider):
     """硅基流动API提供商"""
@@ -20,18 +23,16 @@ class SiliconFlowProvider(LLMProvider):
             base_url="https://api.siliconflow.cn/v1"
         )
 
-    def generate(
+    def _completion_args(
         self,
         model: str,
         prompt: str,
-        temperature: float = 0.7,
-        json_mode: bool = True,
-        response_schema: Optional[Dict[str, Any]] = None,
-        system_message: Optional[str] = None,
+        temperature: float,
+        json_mode: bool,
+        system_message: Optional[str],
         **kwargs
-    ) -> str:
-        """使用硅基流动API生成文本"""
-
+    ) -> Dict[str, Any]:
+        """构建 chat.completions.create 的参数"""
         messages = []
 
         # 添加系统消息（如果有）
@@ -46,7 +47,7 @@ class SiliconFlowProvider(LLMProvider):
         if json_mode:
             response_format = {"type": "json_object"}
 
-        response = self.client.chat.completions.create(
+        return dict(
             messages=messages,
             response_format=response_format,
             model=model,
@@ -54,8 +55,58 @@ class SiliconFlowProvider(LLMProvider):
             **kwargs
         )
 
+    def generate(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        json_mode: bool = True,
+        response_schema: Optional[Dict[str, Any]] = None,
+        system_message: Optional[str] = None,
+        **kwargs
+    ) -> str:
+        """使用硅基流动API生成文本"""
+        response = self.client.chat.completions.create(
+            **self._completion_args(model, prompt, temperature, json_mode, system_message, **kwargs)
+        )
+
         return response.choices[0].message.content
 
+    async def agenerate(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        json_mode: bool = True,
+        response_schema: Optional[Dict[str, Any]] = None,
+        system_message: Optional[str] = None,
+        **kwargs
+    ) -> str:
+        """使用硅基流动API生成文本（异步，使用共享连接池）"""
+        client = self._async_openai(str(self.client.base_url))
+        response = await client.chat.completions.create(
+            **self._completion_args(model, prompt, temperature, json_mode, system_message, **kwargs)
+        )
+
+        return response.choices[0].message.content
+
+    def astream(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        json_mode: bool = True,
+        response_schema: Optional[Dict[str, Any]] = None,
+        system_message: Optional[str] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """使用硅基流动API生成文本（流式，逐段返回增量内容）"""
+        client = self._async_openai(str(self.client.base_url))
+        return self._stream_chat_completion(
+            client,
+            **self._completion_args(model, prompt, temperature, json_mode, system_message, **kwargs)
+        )
+
     def health_check(self) -> bool:
         """健康检查"""
         try:
@@ -63,5 +114,5 @@ class SiliconFlowProvider(LLMProvider):
             self.client.models.list()
             return True
         except Exception as e:
-            print(f"SiliconFlow health check failed: {e}")
+            logger.warning("llm.health_check_failed", provider="siliconflow", error=str(e))
             return False
\ No newline at end of file
@@ -0,0 +1,346 @@
+"""
+LLM 请求对冲与故障转移
+Request Hedging and Failover - 按模型学习延迟分位数，按提供商熔断
+
+  - 对冲：异步请求超过该模型在线学习的延迟分位数仍未返回时，再发送一个相同的
+    请求，取先完成的结果并取消另一个。流式请求在收到第一段内容前对冲，先返回
+    内容的流胜出。对冲次数受预算比例限制。
+  - 熔断：提供商连续过载（429 / 5xx / 超时 / 连接失败）达到阈值后熔断，冷却期内
+    请求转发到 models.yaml 中配置的备用模型；冷却结束后放行一个探测请求。
+"""
+
+import asyncio
+import contextlib
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional
+
+from src.config.settings import settings
+from src.services.logger.structured import get_logger
+from .admission import is_overload
+
+logger = get_logger(__name__)
+
+# 熔断器状态
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def is_failure(error: Optional[BaseException]) -> bool:
+    """计入熔断的错误：过载和连接失败"""
+    return is_overload(error) or "Connection" in type(error).__name__
+
+
+class LatencyTracker:
+    """单个模型最近成功请求的延迟分布"""
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def record(self, latency: float) -> None:
+        self._samples.append(latency)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(fraction * len(ordered)))
+        return ordered[index]
+
+    @property
+    def samples(self) -> int:
+        return len(self._samples)
+
+
+class CircuitBreaker:
+    """单个提供商的熔断器"""
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self._probing = False
+
+    def allow(self, now: float) -> bool:
+        """是否可以向该提供商发送请求（半开状态只放行一个探测请求）"""
+        if self.state == OPEN and now >= self.opened_at + self.cooldown:
+            self.state = HALF_OPEN
+            self._probing = False
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record(self, error: Optional[BaseException], now: float) -> None:
+        if error is None:
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+        elif is_failure(error):
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.opens += 1
+                self.state = OPEN
+                self.opened_at = now
+            self._probing = False
+        else:
+            # 参数错误、调用方取消等不说明提供商是否健康
+            self._probing = False
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "opens": self.opens,
+            "retry_in": round(max(0.0, self.opened_at + self.cooldown - now), 3)
+            if self.state == OPEN else 0.0,
+        }
+
+
+class Resilience:
+    """对冲与熔断的状态和统计"""
+
+    def __init__(self, llm_settings=None):
+        config = llm_settings or settings.llm
+        self.hedge_enabled = config.hedge_enabled
+        self.hedge_percentile = config.hedge_percentile
+        self.hedge_min_samples = config.hedge_min_samples
+        self.hedge_min_delay = config.hedge_min_delay
+        self.hedge_budget = config.hedge_budget
+        self.failure_threshold = config.circuit_failure_threshold
+        self.cooldown = config.circuit_cooldown
+
+        self._lock = threading.Lock()
+        self._latency: Dict[str, LatencyTracker] = {}
+        self._circuits: Dict[str, CircuitBreaker] = {}
+        self._failovers: Dict[str, int] = {}
+
+    def _tracker(self, model: str) -> LatencyTracker:
+        tracker = self._latency.get(model)
+        if tracker is None:
+            tracker = self._latency[model] = LatencyTracker()
+        return tracker
+
+    def _circuit(self, provider: str) -> CircuitBreaker:
+        circuit = self._circuits.get(provider)
+        if circuit is None:
+            circuit = self._circuits[provider] = CircuitBreaker(self.failure_threshold, self.cooldown)
+        return circuit
+
+    # ------------------------------------------------------------------
+    # 熔断
+    # ------------------------------------------------------------------
+
+    def allow(self, provider: str) -> bool:
+        with self._lock:
+            return self._circuit(provider).allow(time.monotonic())
+
+    def record_failover(self, model: str, backup: str) -> None:
+        key = f"{model} -> {backup}"
+        with self._lock:
+            self._failovers[key] = self._failovers.get(key, 0) + 1
+        logger.warning("llm.failover", model=model, backup=backup)
+
+    @contextlib.contextmanager
+    def track(self, provider: str, model: str):
+        """记录一次请求的结果（熔断）和成功请求的延迟（对冲）"""
+        started = time.monotonic()
+        try:
+            yield
+        except BaseException as e:
+            with self._lock:
+                self._circuit(provider).record(e, time.monotonic())
+            raise
+        now = time.monotonic()
+        with self._lock:
+            self._circuit(provider).record(None, now)
+            self._tracker(model).record(now - started)
+
+    # ------------------------------------------------------------------
+    # 对冲
+    # ------------------------------------------------------------------
+
+    def hedge_delay(self, model: str) -> Optional[float]:
+        """
+        发送对冲请求前的等待时间；样本不足或未启用时返回 None
+
+        同时记录该模型的请求数，用于计算对冲预算。
+        """
+        if not self.hedge_enabled:
+            return None
+        with self._lock:
+            tracker = self._tracker(model)
+            tracker.requests += 1
+            if tracker.samples < self.hedge_min_samples:
+                return None
+            return max(self.hedge_min_delay, tracker.percentile(self.hedge_percentile))
+
+    def try_hedge(self, model: str) -> bool:
+        """对冲预算内则记录一次对冲并返回 True"""
+        with self._lock:
+            tracker = self._tracker(model)
+            if tracker.hedges + 1 > self.hedge_budget * tracker.requests:
+                return False
+            tracker.hedges += 1
+            return True
+
+    def record_hedge_win(self, model: str) -> None:
+        with self._lock:
+            self._tracker(model).hedge_wins += 1
+
+    async def hedged(self, model: str, send):
+        """
+        执行 send() 返回的请求协程；超过延迟分位数仍未完成时发送对冲请求
+
+        Args:
+            model: 用于学习延迟的模型键
+            send: 接收一个 asyncio.Event 的函数，每次调用返回一个新的请求协程；
+                请求获得准入许可、真正发出时设置该事件，对冲计时从此开始
+        """
+        delay = self.hedge_delay(model)
+        started = asyncio.Event()
+        if delay is None:
+            return await send(started)
+
+        primary = asyncio.ensure_future(send(started))
+        tasks = {primary}
+        admitted = asyncio.ensure_future(started.wait())
+        try:
+            await asyncio.wait({primary, admitted}, return_when=asyncio.FIRST_COMPLETED)
+            if not primary.done():
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done and self.try_hedge(model):
+                    logger.info("llm.hedge", model=model, delay=round(delay, 3))
+                    tasks.add(asyncio.ensure_future(send(asyncio.Event())))
+
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.record_hedge_win(model)
+                        return task.result()
+                    if error is None or task is primary:
+                        error = task.exception()
+            raise error
+        finally:
+            admitted.cancel()
+            for task in tasks:
+                task.cancel()
+
+    async def hedged_stream(
+        self, model: str, open_stream: Callable[[asyncio.Event], AsyncIterator[str]]
+    ) -> AsyncIterator[str]:
+        """
+        流式版本的 hedged()：第一段内容超过延迟分位数仍未到达时打开对冲流，
+        先返回内容的流胜出，另一个流被取消
+
+        Args:
+            model: 用于学习延迟的模型键
+            open_stream: 接收一个 asyncio.Event 的函数，每次调用返回一个新的异步
+                生成器；请求获得准入许可时设置该事件，对冲计时从此开始
+        """
+        delay = self.hedge_delay(model)
+        started = asyncio.Event()
+        primary = open_stream(started)
+        if delay is None:
+            try:
+                async for chunk in primary:
+                    yield chunk
+            finally:
+                await primary.aclose()
+            return
+
+        # 每个流的第一段内容 -> 流
+        firsts = {asyncio.ensure_future(primary.__anext__()): primary}
+        admitted = asyncio.ensure_future(started.wait())
+        winner = None
+        try:
+            await asyncio.wait({*firsts, admitted}, return_when=asyncio.FIRST_COMPLETED)
+            if not any(task.done() for task in firsts):
+                done, _ = await asyncio.wait(set(firsts), timeout=delay)
+                if not done and self.try_hedge(model):
+                    logger.info("llm.hedge", model=model, delay=round(delay, 3), stream=True)
+                    hedge = open_stream(asyncio.Event())
+                    firsts[asyncio.ensure_future(hedge.__anext__())] = hedge
+
+            error = None
+            first = None
+            pending = set(firsts)
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    exception = task.exception()
+                    if exception is None or isinstance(exception, StopAsyncIteration):
+                        winner = firsts.pop(task)
+                        first = task.result() if exception is None else None
+                        if winner is not primary:
+                            self.record_hedge_win(model)
+                        break
+                    if error is None or firsts[task] is primary:
+                        error = exception
+            await _close_streams(firsts)
+            if winner is None:
+                raise error
+
+            if first is not None:
+                yield first
+                async for chunk in winner:
+                    yield chunk
+        finally:
+            admitted.cancel()
+            await _close_streams(firsts)
+            if winner is not None:
+                await winner.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        """对冲与熔断统计"""
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "hedge_enabled": self.hedge_enabled,
+                "models": {
+                    model: {
+                        "samples": tracker.samples,
+                        "requests": tracker.requests,
+                        "hedges": tracker.hedges,
+                        "hedge_wins": tracker.hedge_wins,
+                        "p50_ms": _ms(tracker.percentile(0.5)),
+                        "hedge_percentile_ms": _ms(tracker.percentile(self.hedge_percentile)),
+                    }
+                    for model, tracker in self._latency.items()
+                },
+                "circuits": {
+                    provider: circuit.stats(now) for provider, circuit in self._circuits.items()
+                },
+                "failovers": dict(self._failovers),
+            }
+
+
+async def _close_streams(firsts: Dict[asyncio.Future, Any]) -> None:
+    """取消落败的流（先取消等待中的第一段内容，再关闭生成器）"""
+    for task, stream in list(firsts.items()):
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await stream.aclose()
+    firsts.clear()
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+# 全局实例
+resilience = Resilience()
@@ -0,0 +1,337 @@
+"""
+LLM 响应录制/回放缓存
+LLM Response Cache - content-addressed record/replay store behind LLMClient
+
+按 (模型, 渲染后的提示词, 系统消息, 温度, schema) 的哈希寻址，同一请求第 n 次
+出现对应第 n 条录制的响应，因此重试和重复的提示词也能按原顺序回放。
+
+模式：
+  - off: 不使用缓存
+  - record: 总是调用LLM并保存响应（覆盖已有记录）
+  - replay: 只从缓存读取，未命中时抛出 ResponseCacheMiss
+  - read_through: 命中时直接返回，未命中时调用LLM并保存
+
+存储为目录下追加写入的段文件（segment-*.jsonl）和索引文件（index.json）。
+总大小超过上限时按最近最少使用淘汰，段内记录全部淘汰后删除该段文件。
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from src.config.settings import settings
+
+MODES = ("off", "record", "replay", "read_through")
+INDEX_FILE = "index.json"
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+
+# 每保存多少条响应写一次索引
+_INDEX_SAVE_INTERVAL = 64
+
+
+class ResponseCacheMiss(RuntimeError):
+    """回放模式下请求不在缓存中"""
+
+
+def _default_directory() -> str:
+    return str(settings.paths.project_root / "shared" / "llm_cache")
+
+
+class ResponseCache:
+    """按内容寻址的LLM响应存储"""
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        mode: str = "off",
+        max_bytes: int = 1024 * 1024 * 1024,
+        segment_bytes: int = 64 * 1024 * 1024,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown response cache mode: {mode}. Available modes: {', '.join(MODES)}")
+        self.mode = mode
+        self.directory = directory or _default_directory()
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._opened = False
+        # key -> (段文件名, 偏移, 长度)，按最近使用排序
+        self._index: "OrderedDict[str, Tuple[str, int, int]]" = OrderedDict()
+        self._live_bytes: Dict[str, int] = {}
+        self._scanned: Dict[str, int] = {}
+        self._occurrences: Dict[str, int] = {}
+        self._active = None
+        self._active_name: Optional[str] = None
+        self._unsaved = 0
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    @classmethod
+    def from_settings(cls, llm_settings) -> "ResponseCache":
+        return cls(
+            directory=llm_settings.response_cache_dir,
+            mode=llm_settings.response_cache_mode,
+            max_bytes=llm_settings.response_cache_max_mb * 1024 * 1024,
+            segment_bytes=llm_settings.response_cache_segment_mb * 1024 * 1024,
+        )
+
+    def configure(self, mode: Optional[str] = None, directory: Optional[str] = None) -> None:
+        """切换模式或目录（例如由命令行参数设置）"""
+        if mode is not None and mode not in MODES:
+            raise ValueError(f"Unknown response cache mode: {mode}. Available modes: {', '.join(MODES)}")
+        self.close()
+        with self._lock:
+            if mode is not None:
+                self.mode = mode
+            if directory is not None:
+                self.directory = directory
+            self._reset()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    # ------------------------------------------------------------------
+    # 请求接口（由 LLMClient 调用）
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def request_key(
+        model: str,
+        prompt: str,
+        system_message: Optional[str],
+        temperature: float,
+        response_schema: Optional[Dict[str, Any]],
+    ) -> str:
+        """请求内容的哈希"""
+        payload = json.dumps(
+            [model, prompt, system_message, round(float(temperature), 6), response_schema],
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def begin(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float,
+        response_schema: Optional[Dict[str, Any]] = None,
+        system_message: Optional[str] = None,
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        开始一次请求
+
+        Returns:
+            (key, cached_response)：未启用时 key 为 None；命中时返回缓存的响应
+
+        Raises:
+            ResponseCacheMiss: 回放模式下未命中
+        """
+        if not self.enabled:
+            return None, None
+        base = self.request_key(model, prompt, system_message, temperature, response_schema)
+        with self._lock:
+            occurrence = self._occurrences.get(base, 0)
+            self._occurrences[base] = occurrence + 1
+        key = f"{base}:{occurrence}"
+
+        if self.mode == "record":
+            return key, None
+        cached = self.get(key)
+        if cached is None and self.mode == "replay":
+            raise ResponseCacheMiss(
+                f"No recorded response for model {model} (key {key}) in {self.directory}"
+            )
+        return key, cached
+
+    def finish(self, key: Optional[str], response: Any, model: str, temperature: float) -> None:
+        """保存LLM响应（record 和 read_through 模式）"""
+        if key is None or self.mode not in ("record", "read_through") or not isinstance(response, str):
+            return
+        self.put(key, {"model": model, "temperature": temperature, "response": response})
+
+    # ------------------------------------------------------------------
+    # 存储
+    # ------------------------------------------------------------------
+
+    def _segment_path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _open_locked(self) -> None:
+        if self._opened:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        if os.path.exists(index_path):
+            try:
+                with open(index_path, "r", encoding="utf-8") as file:
+                    saved = json.load(file)
+                self._scanned = dict(saved.get("segments", {}))
+                for key, segment, offset, length in saved.get("entries", []):
+                    self._index[key] = (segment, offset, length)
+            except (OSError, ValueError):
+                # 索引损坏时从段文件重建
+                self._index.clear()
+                self._scanned = {}
+
+        segments = sorted(
+            name for name in os.listdir(self.directory)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+        )
+        for name in list(self._scanned):
+            if name not in segments:
+                del self._scanned[name]
+        for key in [key for key, loc in self._index.items() if loc[0] not in segments]:
+            del self._index[key]
+
+        # 索引之后追加的记录（例如进程崩溃前未保存索引）
+        for name in segments:
+            self._scan_locked(name, self._scanned.get(name, 0))
+
+        self._live_bytes = {name: 0 for name in segments}
+        for segment, _, length in self._index.values():
+            self._live_bytes[segment] += length
+        if segments:
+            self._active_name = segments[-1]
+        self._opened = True
+
+    def _scan_locked(self, name: str, start: int) -> None:
+        path = self._segment_path(name)
+        with open(path, "rb") as file:
+            file.seek(start)
+            offset = start
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break  # 写了一半的最后一行
+                try:
+                    key = json.loads(line)["key"]
+                except (ValueError, KeyError):
+                    offset += len(line)
+                    continue
+                self._index[key] = (name, offset, len(line))
+                self._index.move_to_end(key)
+                offset += len(line)
+        self._scanned[name] = offset
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存的响应"""
+        with self._lock:
+            self._open_locked()
+            location = self._index.get(key)
+            if location is None:
+                self._stats["misses"] += 1
+                return None
+            self._index.move_to_end(key)
+            self._stats["hits"] += 1
+            segment, offset, length = location
+            with open(self._segment_path(segment), "rb") as file:
+                file.seek(offset)
+                record = json.loads(file.read(length))
+            return record["response"]
+
+    def put(self, key: str, record: Dict[str, Any]) -> None:
+        """追加保存一条响应"""
+        line = (json.dumps(
+            {"key": key, "stored_at": time.time(), **record}, ensure_ascii=False
+        ) + "\n").encode("utf-8")
+        with self._lock:
+            self._open_locked()
+            if self._active is None or self._active.tell() + len(line) > self.segment_bytes:
+                self._roll_locked(len(line))
+            offset = self._active.tell()
+            self._active.write(line)
+            self._active.flush()
+            self._scanned[self._active_name] = offset + len(line)
+
+            previous = self._index.pop(key, None)
+            if previous is not None:
+                self._live_bytes[previous[0]] -= previous[2]
+            self._index[key] = (self._active_name, offset, len(line))
+            self._live_bytes[self._active_name] += len(line)
+            self._stats["stores"] += 1
+
+            self._evict_locked()
+            self._unsaved += 1
+            if self._unsaved >= _INDEX_SAVE_INTERVAL:
+                self._save_index_locked()
+
+    def _roll_locked(self, incoming: int) -> None:
+        """打开可写入的段文件，当前段已满时新建"""
+        if self._active is not None:
+            self._active.close()
+            self._active = None
+        name = self._active_name
+        if name is None or self._scanned.get(name, 0) + incoming > self.segment_bytes:
+            number = int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]) + 1 if name else 1
+            name = f"{SEGMENT_PREFIX}{number:06d}{SEGMENT_SUFFIX}"
+            self._live_bytes.setdefault(name, 0)
+        self._active_name = name
+        self._active = open(self._segment_path(name), "ab")
+
+    def _evict_locked(self) -> None:
+        """超过大小上限时淘汰最近最少使用的记录"""
+        total = sum(self._live_bytes.values())
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        while total > target and self._index:
+            _, (segment, _, length) = self._index.popitem(last=False)
+            self._live_bytes[segment] -= length
+            total -= length
+            self._stats["evictions"] += 1
+        for segment, live in list(self._live_bytes.items()):
+            if live <= 0 and segment != self._active_name:
+                os.remove(self._segment_path(segment))
+                del self._live_bytes[segment]
+                self._scanned.pop(segment, None)
+
+    def _save_index_locked(self) -> None:
+        index = {
+            "segments": self._scanned,
+            "entries": [[key, *location] for key, location in self._index.items()],
+        }
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        tmp_path = index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(index, file)
+        os.replace(tmp_path, index_path)
+        self._unsaved = 0
+
+    def close(self) -> None:
+        """保存索引并关闭段文件"""
+        with self._lock:
+            if not self._opened:
+                return
+            if self._unsaved:
+                self._save_index_locked()
+            if self._active is not None:
+                self._active.close()
+                self._active = None
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计信息"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                "mode": self.mode,
+                "directory": self.directory,
+                "entries": len(self._index),
+                "bytes": sum(self._live_bytes.values()),
+                "max_bytes": self.max_bytes,
+                "segments": len(self._live_bytes),
+            })
+            return stats
+
+
+# 全局实例
+response_cache = ResponseCache.from_settings(settings.llm)
+atexit.register(response_cache.close)
@@ -0,0 +1,88 @@
+"""
+编译后提示词模板缓存
+Compiled Prompt Template Cache - 共享 jinja2.Environment 与有界 LRU 缓存
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable
+
+import jinja2
+
+
+class TemplateCache:
+    """按模板源码缓存编译后的 jinja2 模板（线程安全，LRU 淘汰）"""
+
+    def __init__(self, max_size: int = 128):
+        self.max_size = max_size
+        # 与 jinja2.Template(source) 使用相同的默认配置
+        self.environment = jinja2.Environment()
+        self._templates: "OrderedDict[str, jinja2.Template]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._renders = 0
+        self._compile_seconds = 0.0
+        self._render_seconds = 0.0
+
+    def get(self, source: str) -> jinja2.Template:
+        """获取编译后的模板，不存在时编译并缓存"""
+        with self._lock:
+            template = self._templates.get(source)
+            if template is not None:
+                self._templates.move_to_end(source)
+                self._hits += 1
+                return template
+
+        # 在锁外编译，避免阻塞其他线程；重复编译只会浪费一次，不影响正确性
+        started = time.perf_counter()
+        template = self.environment.from_string(source)
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self._misses += 1
+            self._compile_seconds += elapsed
+            self._templates[source] = template
+            self._templates.move_to_end(source)
+            while len(self._templates) > self.max_size:
+                self._templates.popitem(last=False)
+                self._evictions += 1
+        return template
+
+    def render(self, source: str, context: Dict[str, Any]) -> str:
+        """渲染模板"""
+        template = self.get(source)
+        started = time.perf_counter()
+        rendered = template.render(context)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._renders += 1
+            self._render_seconds += elapsed
+        return rendered
+
+    def precompile(self, sources: Iterable[str]) -> None:
+        """预编译模板（启动时调用）"""
+        for source in sources:
+            self.get(source)
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计信息"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._templates),
+                "max_size": self.max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "compile_time_ms": round(self._compile_seconds * 1000, 3),
+                "renders": self._renders,
+                "render_time_ms": round(self._render_seconds * 1000, 3),
+            }
+
+
+# 全局实例
+template_cache = TemplateCache()
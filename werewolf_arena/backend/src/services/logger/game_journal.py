@@ -0,0 +1,398 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+追加写入的游戏日志
+Append-only game journal with periodic compacted snapshots
+
+每个会话目录包含：
+  - game_snapshot.json: 压缩后的完整快照（原子替换写入）
+  - game_journal.jsonl: 快照之后的增量记录，每行一条，带递增的 seq
+
+每次保存只追加自上次保存以来变化的部分（新增的日志条目、观察记录、
+变化的回合、玩家字段和元数据）。日志大小超过快照大小时重新压缩。
+
+回合和玩家先比较浅层标记（单值字段和列表/字典的长度），标记变化时才序列化
+并比较字段；游戏代码对这些列表和字典只追加或删除元素、整体替换单值字段。
+"""
+
+import enum
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.core.models.game_state import GameView, State, to_dict
+from src.core.models.logs import RoundLog
+
+SNAPSHOT_FILE = "game_snapshot.json"
+JOURNAL_FILE = "game_journal.jsonl"
+
+# RoundLog 中只追加的列表字段与整体替换的单值字段
+_LOG_LIST_FIELDS = ("bid", "debate", "votes", "summaries")
+_LOG_VALUE_FIELDS = ("eliminate", "investigate", "protect")
+_META_FIELDS = ("session_id", "error_message", "winner", "version")
+
+# 日志小于该大小时不压缩
+_MIN_COMPACT_BYTES = 256 * 1024
+
+
+def _dumps(record: Any) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+
+def _player_fields(player: Any) -> Dict[str, Any]:
+    """玩家除观察记录外的字段（观察记录按增量单独记录）"""
+    return to_dict({k: v for k, v in vars(player).items() if k != "observations"})
+
+
+def _shallow(value: Any) -> Any:
+    """字段的浅层标记：单值字段本身，容器的长度"""
+    if value is None or isinstance(value, (str, int, float, enum.Enum)):
+        return value
+    if isinstance(value, (list, tuple, dict, set)):
+        return len(value)
+    if isinstance(value, GameView):
+        return tuple(_shallow(field) for field in value.serializable().values())
+    return id(value)
+
+
+def _round_marker(round_: Any) -> Tuple[Any, ...]:
+    return tuple(_shallow(value) for value in vars(round_).values())
+
+
+def _player_marker(player: Any) -> Tuple[Any, ...]:
+    return tuple(_shallow(value) for key, value in vars(player).items() if key != "observations")
+
+
+class GameJournal:
+    """单个会话目录的增量持久化"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        self.journal_path = os.path.join(directory, JOURNAL_FILE)
+        self._lock = threading.Lock()
+        self._file = None
+        self._seq = 0
+        self._journal_bytes = 0
+        self._snapshot_bytes = 0
+        self._started = False
+        self._finalized_seq: Optional[int] = None
+        self._reset_cursors()
+
+    def _reset_cursors(self) -> None:
+        self._meta: Dict[str, Any] = {}
+        self._rounds: List[Dict[str, Any]] = []
+        self._round_markers: List[Tuple[Any, ...]] = []
+        self._players: Dict[str, Dict[str, Any]] = {}
+        self._player_markers: Dict[str, Tuple[Any, ...]] = {}
+        self._observations: Dict[str, int] = {}
+        self._logs: List[Dict[str, Any]] = []
+
+    # ------------------------------------------------------------------
+    # 差异计算：更新游标并返回需要追加的记录
+    # ------------------------------------------------------------------
+
+    def _diff_meta(self, state: State) -> List[Dict[str, Any]]:
+        changed = {
+            field: getattr(state, field)
+            for field in _META_FIELDS
+            if self._meta.get(field) != getattr(state, field)
+        }
+        if not changed:
+            return []
+        self._meta.update(changed)
+        return [{"type": "meta", "fields": changed}]
+
+    def _diff_rounds(self, state: State) -> List[Dict[str, Any]]:
+        # 只有最后一个已记录的回合和新回合可能变化
+        records = []
+        if len(state.rounds) < len(self._rounds):
+            # 回合被移除（例如恢复时移除失败的回合）
+            del self._rounds[len(state.rounds):]
+            del self._round_markers[len(state.rounds):]
+            records.append({"type": "round_truncate", "length": len(state.rounds)})
+        for i in range(max(0, len(self._rounds) - 1), len(state.rounds)):
+            marker = _round_marker(state.rounds[i])
+            if i < len(self._rounds) and self._round_markers[i] == marker:
+                continue
+            data = state.rounds[i].to_dict()
+            if i < len(self._rounds):
+                self._round_markers[i] = marker
+                if self._rounds[i] == data:
+                    continue
+                self._rounds[i] = data
+            else:
+                self._rounds.append(data)
+                self._round_markers.append(marker)
+            records.append({"type": "round", "index": i, "data": data})
+        return records
+
+    def _diff_players(self, state: State) -> List[Dict[str, Any]]:
+        records = []
+        for name, player in state.players.items():
+            marker = _player_marker(player)
+            if self._player_markers.get(name) != marker:
+                self._player_markers[name] = marker
+                fields = _player_fields(player)
+                previous = self._players.get(name, {})
+                changed = {k: v for k, v in fields.items() if previous.get(k) != v}
+                if changed:
+                    self._players[name] = fields
+                    records.append({"type": "player", "name": name, "fields": changed})
+
+            observations = player.observations
+            start = self._observations.get(name, 0)
+            if len(observations) < start:
+                start = 0  # 观察记录被重置
+            if len(observations) != start or name not in self._observations:
+                records.append({
+                    "type": "observations",
+                    "name": name,
+                    "start": start,
+                    "items": list(observations[start:]),
+                })
+                self._observations[name] = len(observations)
+        return records
+
+    def _diff_logs(self, logs: List[RoundLog]) -> List[Dict[str, Any]]:
+        records = []
+        if len(logs) < len(self._logs):
+            # 日志被截断（例如恢复时移除失败的回合）
+            del self._logs[len(logs):]
+            records.append({"type": "log_truncate", "length": len(logs)})
+        for i in range(max(0, len(self._logs) - 1), len(logs)):
+            if i == len(self._logs):
+                self._logs.append({field: 0 for field in _LOG_LIST_FIELDS})
+                records.append({"type": "log_round", "index": i})
+            cursor = self._logs[i]
+            round_log = logs[i]
+            for field in _LOG_VALUE_FIELDS:
+                value = getattr(round_log, field)
+                data = to_dict(value) if value is not None else None
+                if cursor.get(field) != data:
+                    cursor[field] = data
+                    records.append({
+                        "type": "log_value", "index": i, "field": field, "value": data,
+                    })
+            for field in _LOG_LIST_FIELDS:
+                items = getattr(round_log, field)
+                start = cursor[field]
+                if len(items) > start:
+                    records.append({
+                        "type": "log_items",
+                        "index": i,
+                        "field": field,
+                        "start": start,
+                        "items": to_dict(items[start:]),
+                    })
+                    cursor[field] = len(items)
+        return records
+
+    def _diff(self, state: State, logs: List[RoundLog]) -> List[Dict[str, Any]]:
+        return (
+            self._diff_meta(state)
+            + self._diff_rounds(state)
+            + self._diff_players(state)
+            + self._diff_logs(logs)
+        )
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+
+    def _append(self, records: List[Dict[str, Any]]) -> None:
+        if self._file is None:
+            self._file = open(self.journal_path, "a", encoding="utf-8")
+        lines = []
+        for record in records:
+            self._seq += 1
+            record["seq"] = self._seq
+            lines.append(_dumps(record))
+        payload = "\n".join(lines) + "\n"
+        self._file.write(payload)
+        self._file.flush()
+        self._journal_bytes += len(payload.encode("utf-8"))
+
+    def _compact(self, state: State, logs: List[RoundLog]) -> None:
+        """写入完整快照（原子替换），然后清空增量日志"""
+        snapshot = _dumps({
+            "seq": self._seq,
+            "state": state.to_dict(),
+            "logs": to_dict(logs),
+        })
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(snapshot)
+        os.replace(tmp_path, self.snapshot_path)
+        self._snapshot_bytes = len(snapshot.encode("utf-8"))
+
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.journal_path, "w", encoding="utf-8")
+        self._journal_bytes = 0
+
+    def _write_legacy(self, state: State, logs: List[RoundLog]) -> None:
+        """游戏结束时写出与旧版兼容的完整文件"""
+        partial_game_state_file = f"{self.directory}/game_partial.json"
+        if state.error_message:
+            game_file = partial_game_state_file
+        else:
+            game_file = f"{self.directory}/game_complete.json"
+            # Remove the partial game file if it exists
+            if os.path.exists(partial_game_state_file):
+                os.remove(partial_game_state_file)
+
+        with open(game_file, "w") as file:
+            json.dump(state.to_dict(), file, indent=4)
+
+        with open(f"{self.directory}/game_logs.json", "w") as file:
+            json.dump(to_dict(logs), file, indent=4)
+
+    def record(self, state: State, logs: List[RoundLog]) -> None:
+        """追加自上次调用以来的变化；游戏结束时压缩并写出完整文件"""
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            if not self._started:
+                # 新建日志：以当前状态为起点写入快照
+                self._diff(state, logs)
+                self._compact(state, logs)
+                self._started = True
+            else:
+                records = self._diff(state, logs)
+                if records:
+                    self._append(records)
+
+            finished = bool(state.winner or state.error_message)
+            if finished:
+                if self._finalized_seq != self._seq:
+                    self._compact(state, logs)
+                    self._write_legacy(state, logs)
+                    self._finalized_seq = self._seq
+            elif self._journal_bytes >= max(_MIN_COMPACT_BYTES, self._snapshot_bytes):
+                self._compact(state, logs)
+
+    @property
+    def finalized(self) -> bool:
+        """游戏已结束且最终快照包含全部记录"""
+        return self._finalized_seq is not None and self._finalized_seq == self._seq
+
+    def close(self) -> None:
+        """关闭文件并释放差异游标"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._reset_cursors()
+
+
+# ----------------------------------------------------------------------
+# 读取与回放
+# ----------------------------------------------------------------------
+
+def _apply(state: Dict[str, Any], logs: List[Dict[str, Any]], record: Dict[str, Any]) -> None:
+    kind = record["type"]
+    if kind == "meta":
+        state.update(record["fields"])
+    elif kind == "round_truncate":
+        del state.setdefault("rounds", [])[record["length"]:]
+    elif kind == "round":
+        rounds = state.setdefault("rounds", [])
+        index = record["index"]
+        if index < len(rounds):
+            rounds[index] = record["data"]
+        else:
+            rounds.append(record["data"])
+    elif kind == "player":
+        state.setdefault("players", {}).setdefault(record["name"], {}).update(record["fields"])
+    elif kind == "observations":
+        player = state.setdefault("players", {}).setdefault(record["name"], {})
+        observations = player.setdefault("observations", [])
+        del observations[record["start"]:]
+        observations.extend(record["items"])
+    elif kind == "log_truncate":
+        del logs[record["length"]:]
+    elif kind == "log_round":
+        if record["index"] == len(logs):
+            logs.append(to_dict(RoundLog()))
+    elif kind == "log_value":
+        logs[record["index"]][record["field"]] = record["value"]
+    elif kind == "log_items":
+        items = logs[record["index"]].setdefault(record["field"], [])
+        del items[record["start"]:]
+        items.extend(record["items"])
+
+
+def _relink_roles(state: Dict[str, Any]) -> None:
+    """回放只更新 players 字典，这里同步到按角色组织的字段"""
+    players = state.get("players", {})
+    for role_field in ("seer", "doctor"):
+        entry = state.get(role_field)
+        if entry and entry.get("name") in players:
+            state[role_field] = players[entry["name"]]
+    for group_field in ("villagers", "werewolves"):
+        state[group_field] = [
+            players.get(entry.get("name"), entry) for entry in state.get(group_field, [])
+        ]
+
+
+def has_journal(directory: str) -> bool:
+    return os.path.exists(os.path.join(directory, SNAPSHOT_FILE))
+
+
+def replay(directory: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """从快照和增量日志重建状态与日志（JSON 字典形式）"""
+    with open(os.path.join(directory, SNAPSHOT_FILE), "r", encoding="utf-8") as file:
+        snapshot = json.load(file)
+    state, logs, seq = snapshot["state"], snapshot["logs"], snapshot["seq"]
+
+    journal_path = os.path.join(directory, JOURNAL_FILE)
+    if os.path.exists(journal_path):
+        with open(journal_path, "r", encoding="utf-8") as file:
+            for line in file:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # 崩溃时写了一半的最后一行
+                if record.get("seq", 0) <= seq:
+                    continue
+                _apply(state, logs, record)
+
+    _relink_roles(state)
+    return state, logs
+
+
+# 每个会话目录一个日志实例（游戏结束写出最终快照后移除）
+_journals: Dict[str, GameJournal] = {}
+_journals_lock = threading.Lock()
+
+
+def get_journal(directory: str) -> GameJournal:
+    with _journals_lock:
+        journal = _journals.get(directory)
+        if journal is None:
+            journal = GameJournal(directory)
+            _journals[directory] = journal
+        return journal
+
+
+def close_journal(directory: str) -> None:
+    with _journals_lock:
+        journal = _journals.pop(directory, None)
+    if journal is not None:
+        journal.close()
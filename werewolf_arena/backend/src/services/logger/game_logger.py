@@ -17,21 +17,34 @@ import json
 import os
 from typing import List, Tuple
 
-from src.core.models.game_state import State, to_dict
+from src.core.models.game_state import State
 from src.core.models.logs import RoundLog
+from src.services.logger.game_journal import close_journal, get_journal, has_journal, replay
 
 
 def log_directory() -> str:
     pacific_timezone = datetime.timezone(datetime.timedelta(hours=-8))
     timestamp = datetime.datetime.now(pacific_timezone).strftime("%Y%m%d_%H%M%S")
     session_id = f"session_{timestamp}"
-    directory = f"{os.getcwd()}/logs/{session_id}"
-    return directory
+    base = f"{os.getcwd()}/logs/{session_id}"
+    # Reserve the directory: games started in the same second (e.g. parallel
+    # eval workers) get numbered suffixes instead of sharing one directory.
+    directory, suffix = base, 1
+    while True:
+        try:
+            os.makedirs(directory)
+            return directory
+        except FileExistsError:
+            suffix += 1
+            directory = f"{base}_{suffix}"
 
 
 def load_game(directory: str) -> Tuple[State, List[RoundLog]]:
     """Load a game from a file and convert its data to game objects.
 
+    The compacted snapshot plus the append-only journal are used when present;
+    otherwise the legacy game_partial/complete.json and game_logs.json files.
+
     Args:
       directory: where the game log is stored
 
@@ -39,54 +52,45 @@ def load_game(directory: str) -> Tuple[State, List[RoundLog]]:
       State: An instance of the State class populated with the game data.
     """
 
-    partial_game_state_file = f"{directory}/game_partial.json"
-    complete_game_state_file = f"{directory}/game_complete.json"
-    log_file = f"{directory}/game_logs.json"
+    if has_journal(directory):
+        partial_game_data, logs = replay(directory)
+    else:
+        partial_game_state_file = f"{directory}/game_partial.json"
+        complete_game_state_file = f"{directory}/game_complete.json"
+        log_file = f"{directory}/game_logs.json"
 
-    game_state_file = partial_game_state_file
-    if not os.path.exists(partial_game_state_file):
-        game_state_file = complete_game_state_file
+        game_state_file = partial_game_state_file
+        if not os.path.exists(partial_game_state_file):
+            game_state_file = complete_game_state_file
 
-    with open(game_state_file, "r") as file:
-        partial_game_data = json.load(file)
+        with open(game_state_file, "r") as file:
+            partial_game_data = json.load(file)
 
-    state = State.from_json(partial_game_data)
-
-    with open(log_file, "r") as file:
-        logs = json.load(file)
+        with open(log_file, "r") as file:
+            logs = json.load(file)
 
+    state = State.from_json(partial_game_data)
     logs = [RoundLog.from_json(log) for log in logs]
 
     return (state, logs)
 
 
 def save_game(state: State, logs: List[RoundLog], directory: str):
-    """Save the current game state to a specified file.
+    """Save the current game state to a specified directory.
 
-    This function serializes the game state to JSON and writes it to the
-    specified file. If an error message is provided, it adds the error
-    message to the current round of the game state before saving.
+    Only what changed since the previous call for the same directory is
+    appended to the session journal, with periodic compacted snapshots. Once
+    the game has a winner or an error message, the full game_complete.json
+    (or game_partial.json on error) and game_logs.json files are written too,
+    and the journal is closed so finished games hold no file handle or diff
+    cursors (a later save of the same directory starts from a fresh snapshot).
 
     Args:
       state: Instance of the `State` class.
       logs: Logs of the  game.
       directory: where to save the game.
     """
-    os.makedirs(directory, exist_ok=True)
-
-    partial_game_state_file = f"{directory}/game_partial.json"
-    if state.error_message:
-        game_file = partial_game_state_file
-    else:
-        game_file = f"{directory}/game_complete.json"
-        # Remove the partial game file if it exists
-        if os.path.exists(partial_game_state_file):
-            os.remove(partial_game_state_file)
-
-    log_file = f"{directory}/game_logs.json"
-
-    with open(game_file, "w") as file:
-        json.dump(state.to_dict(), file, indent=4)
-
-    with open(log_file, "w") as file:
-        json.dump(to_dict(logs), file, indent=4)
+    journal = get_journal(directory)
+    journal.record(state, logs)
+    if journal.finalized:
+        close_journal(directory)
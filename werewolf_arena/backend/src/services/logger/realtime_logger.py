@@ -171,9 +171,9 @@ class RealtimeGameLogger:
         level_filter: Optional[List[LogLevel]] = None,
         player_filter: Optional[int] = None,
     ) -> List[Dict[str, Any]]:
-        """获取内存日志"""
+        """获取内存日志（其他 worker 上的会话从其日志文件读取）"""
         if session_id not in self._logs:
-            return []
+            return self._get_shared_logs(session_id, limit, level_filter, player_filter)
 
         logs = self._logs[session_id]
 
@@ -190,6 +190,47 @@ class RealtimeGameLogger:
 
         return [log.to_dict() for log in logs]
 
+    def _get_shared_logs(
+        self,
+        session_id: str,
+        limit: Optional[int] = None,
+        level_filter: Optional[List[LogLevel]] = None,
+        player_filter: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """多 worker 部署时读取其他 worker 写入的会话日志文件"""
+        from src.services.game_manager.shared_backend import shared_backend
+
+        if not shared_backend.distributed:
+            return []
+        meta = shared_backend.get_session(session_id)
+        if not meta or not meta.get("log_dir"):
+            return []
+        logs = self._read_log_file(Path(meta["log_dir"]) / "realtime_logs.jsonl")
+
+        if level_filter:
+            levels = {level.value for level in level_filter}
+            logs = [log for log in logs if log.get("level") in levels]
+        if player_filter is not None:
+            logs = [log for log in logs if log.get("player_id") == player_filter]
+        return logs[-limit:] if limit else logs[-self._max_memory_logs:]
+
+    def _read_log_file(self, log_file: Path) -> List[Dict[str, Any]]:
+        logs = []
+        if not log_file.exists():
+            return logs
+        try:
+            with open(log_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        try:
+                            logs.append(json.loads(line))
+                        except ValueError:
+                            continue  # 正在写入的最后一行
+        except Exception as e:
+            print(f"[RealtimeLogger] Error reading logs from file: {e}")
+        return logs
+
     def get_logs_from_file(self, session_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """从文件读取日志"""
         if session_id not in self._log_files:
@@ -0,0 +1,167 @@
+"""
+结构化日志
+Structured Logging - structlog 事件经有界队列由后台线程写出
+
+  - 按模块设置级别（标准库 logging 的 logger 层级，名称即模块名）
+  - 调用方只负责渲染，写出 stdout 在后台线程中完成；队列满时丢弃
+  - 超长字段截断，高频事件（如原始响应）按 1/N 采样
+  - 生产环境输出紧凑的 JSON 行，开发时可切换为 console 格式
+"""
+
+import atexit
+import itertools
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from typing import Any, Dict, Optional
+
+import structlog
+
+from src.config.settings import settings
+
+# 项目内所有 logger 的公共前缀（模块名）
+ROOT_LOGGER = "src"
+
+_lock = threading.Lock()
+_configured = False
+_listener: Optional[logging.handlers.QueueListener] = None
+_handler: Optional["_QueueHandler"] = None
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """队列满时丢弃记录，不阻塞调用方"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Sampler:
+    """按事件名每 N 条保留一条"""
+
+    def __init__(self, every: Dict[str, int]):
+        self.every = {event: n for event, n in every.items() if n > 1}
+        self._counters: Dict[str, Any] = {}
+
+    def __call__(self, logger, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        event = event_dict.get("event")
+        every = self.every.get(event)
+        if every:
+            counter = self._counters.get(event)
+            if counter is None:
+                counter = self._counters.setdefault(event, itertools.count())
+            if next(counter) % every:
+                raise structlog.DropEvent
+            event_dict["sampled"] = f"1/{every}"
+        return event_dict
+
+
+class _Truncator:
+    """截断超长的字符串字段"""
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+
+    def __call__(self, logger, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        limit = self.max_chars
+        for key, value in event_dict.items():
+            if isinstance(value, str) and len(value) > limit:
+                event_dict[key] = f"{value[:limit]}...(+{len(value) - limit} chars)"
+        return event_dict
+
+
+def configure_logging(
+    level: Optional[str] = None,
+    fmt: Optional[str] = None,
+    log_settings=None,
+) -> None:
+    """
+    配置日志（可重复调用；命令行入口可在输出第一条日志前覆盖级别和格式）
+
+    Args:
+        level: 覆盖默认级别
+        fmt: 覆盖输出格式（json 或 console）
+        log_settings: LogSettings，默认使用全局配置
+    """
+    global _configured, _listener, _handler
+    config = log_settings or settings.log
+    fmt = fmt or config.format
+
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+        log_queue: queue.Queue = queue.Queue(maxsize=max(1, config.queue_size))
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(logging.Formatter("%(message)s"))
+        _handler = _QueueHandler(log_queue)
+        _listener = logging.handlers.QueueListener(log_queue, stream)
+        _listener.start()
+
+        root = logging.getLogger(ROOT_LOGGER)
+        root.handlers = [_handler]
+        root.propagate = False
+        root.setLevel((level or config.level).upper())
+        for name, module_level in config.module_levels.items():
+            logging.getLogger(name).setLevel(module_level.upper())
+
+        renderer = (
+            structlog.dev.ConsoleRenderer(colors=False)
+            if fmt == "console"
+            else structlog.processors.JSONRenderer(ensure_ascii=False, default=str)
+        )
+        structlog.configure(
+            processors=[
+                structlog.stdlib.filter_by_level,
+                _Sampler(config.sample_every),
+                structlog.stdlib.add_logger_name,
+                structlog.stdlib.add_log_level,
+                structlog.processors.TimeStamper(fmt="iso"),
+                structlog.processors.format_exc_info,
+                _Truncator(config.max_field_chars),
+                renderer,
+            ],
+            logger_factory=structlog.stdlib.LoggerFactory(),
+            wrapper_class=structlog.stdlib.BoundLogger,
+            cache_logger_on_first_use=True,
+        )
+        _configured = True
+
+
+def get_logger(name: str) -> structlog.stdlib.BoundLogger:
+    """获取模块的结构化 logger（一般传入 __name__）"""
+    if not _configured:
+        configure_logging()
+    return structlog.get_logger(name)
+
+
+def shutdown() -> None:
+    """写出队列中剩余的日志"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def stats() -> Dict[str, Any]:
+    """日志队列统计"""
+    handler = _handler
+    if handler is None:
+        return {"configured": False}
+    return {
+        "configured": True,
+        "level": logging.getLevelName(logging.getLogger(ROOT_LOGGER).level),
+        "queue_depth": handler.queue.qsize(),
+        "dropped": handler.dropped,
+    }
+
+
+atexit.register(shutdown)
@@ -14,7 +14,8 @@
 
 """utility functions."""
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
+import json
 import yaml
 from abc import ABC
 from abc import abstractmethod
@@ -32,198 +33,285 @@ def clean_mixed_language_response(text: str) -> str:
     Returns:
         清理后的文本
     """
-    print(f"[语言清理] 开始清理混合语言响应...")
-
     if not text:
         return text
 
-    # 尝试多种策略提取JSON内容
-
     # 策略1: 查找被```json和```包围的内容
     json_pattern = r'```(?:json)?\s*(\{.*?\})\s*```'
     match = re.search(json_pattern, text, re.DOTALL | re.IGNORECASE)
     if match:
-        json_content = match.group(1).strip()
-        print(f"[语言清理] 策略1成功：提取到JSON代码块内容")
+        return match.group(1).strip()
+
+    # 策略2: 查找第一个完整的JSON对象
+    json_content = extract_json_object(text)
+    if json_content is not None:
         return json_content
 
-    # 策略2: 查找第一个完整的JSON对象（从{到最后一个}）
-    brace_count = 0
-    start_idx = None
-    for i, char in enumerate(text):
-        if char == '{':
-            if brace_count == 0:
-                start_idx = i
-            brace_count += 1
-        elif char == '}':
-            brace_count -= 1
-            if brace_count == 0 and start_idx is not None:
-                json_content = text[start_idx:i+1].strip()
-                # 验证是否看起来像有效的JSON
-                if json_content.count('{') == json_content.count('}'):
-                    print(f"[语言清理] 策略2成功：提取到完整JSON对象")
-                    return json_content
-
-    # 策略3: 如果没有找到JSON，返回原文本但清理明显的非JSON前缀/后缀
-    lines = text.split('\n')
+    # 策略3: 去掉明显的非JSON行，保留从第一行JSON结构开始的内容
     json_lines = []
     in_json = False
-
-    for line in lines:
+    for line in text.split('\n'):
         line = line.strip()
         # 跳过明显的非JSON行
-        if line.startswith(('我认为', '我认为', 'I think', 'As an AI', '作为一个', '以下是', '以下是', 'Here is')):
+        if line.startswith(('我认为', 'I think', 'As an AI', '作为一个', '以下是', 'Here is')):
             continue
-        # 检查是否包含JSON结构
         if ('{' in line and '}' in line) or in_json:
             in_json = True
             json_lines.append(line)
-        # 如果看起来已经结束了JSON，继续收集后续行以防换行
 
     if json_lines:
-        cleaned = '\n'.join(json_lines)
-        print(f"[语言清理] 策略3：提取到可能的JSON内容")
-        return cleaned
-
-    print(f"[语言清理] 所有清理策略都失败，返回原文本")
+        return '\n'.join(json_lines)
     return text
 
 
-def parse_json(text: str) -> Optional[Any]:
-    print(f"[JSON解析] 开始解析，输入文本长度: {len(text)} 字符")
-    print(f"[JSON解析] 输入文本预览: {text[:100]}..." if len(text) > 100 else f"[JSON解析] 输入文本: {text}")
+def extract_json_object(text: str) -> Optional[str]:
+    """
+    单遍扫描提取第一个括号匹配的顶层JSON对象（忽略字符串中的括号）
 
-    # 预处理：清理混合中英文内容，尝试提取纯JSON部分
-    cleaned_text = clean_mixed_language_response(text)
-    if cleaned_text != text:
-        print(f"[JSON解析] 检测到混合语言内容，已清理")
-        print(f"[JSON解析] 清理后文本预览: {cleaned_text[:100]}..." if len(cleaned_text) > 100 else f"[JSON解析] 清理后文本: {cleaned_text}")
+    Returns:
+        对象文本；没有完整的对象时返回 None
+    """
+    start = text.find("{")
+    if start < 0:
+        return None
+    depth = 0
+    in_string = False
+    escape = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
 
-    # 首先尝试解析markdown中的JSON
-    print(f"[JSON解析] 尝试从markdown中解析JSON...")
-    result_json = parse_json_markdown(cleaned_text)
-    print(f"[JSON解析] markdown解析结果: {result_json}")
 
-    if not result_json:
-        print(f"[JSON解析] markdown解析失败，尝试直接解析JSON字符串...")
-        result_json = parse_json_str(cleaned_text)
-        print(f"[JSON解析] 直接解析结果: {result_json}")
+def _schema_type_ok(value: Any, expected: str) -> bool:
+    if expected == "object":
+        return isinstance(value, dict)
+    if expected == "array":
+        return isinstance(value, list)
+    if expected == "string":
+        return isinstance(value, str)
+    if expected == "boolean":
+        return isinstance(value, bool)
+    if expected == "integer":
+        return isinstance(value, int) and not isinstance(value, bool)
+    if expected == "number":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    return True
 
-    print(f"[JSON解析] 最终结果: {result_json}")
-    return result_json
 
+def validate_json(value: Any, schema: Optional[Dict[str, Any]]) -> Optional[str]:
+    """
+    按响应schema校验解析结果（支持 type、properties、required、items）
 
-def parse_json_markdown(text: str) -> Optional[Any]:
-    print(f"[Markdown解析] 开始解析markdown文本...")
+    Returns:
+        第一个不符合的原因；符合时返回 None
+    """
+    if not schema:
+        return None
+    expected = schema.get("type")
+    if expected and not _schema_type_ok(value, expected):
+        return f"expected {expected}, got {type(value).__name__}"
+    if isinstance(value, dict):
+        for key in schema.get("required", []):
+            if key not in value:
+                return f"missing required field '{key}'"
+        for key, subschema in schema.get("properties", {}).items():
+            if key in value:
+                error = validate_json(value[key], subschema)
+                if error:
+                    return f"field '{key}': {error}"
+    elif isinstance(value, list) and "items" in schema:
+        for index, item in enumerate(value):
+            error = validate_json(item, schema["items"])
+            if error:
+                return f"item {index}: {error}"
+    return None
 
-    try:
-        ast = marko.parse(text)
-        print(f"[Markdown解析] AST解析成功，子元素数量: {len(ast.children) if ast.children else 0}")
-    except Exception as e:
-        print(f"[Markdown解析] AST解析失败: {e}")
+
+def parse_json(text: str, schema: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+    """
+    从LLM响应中解析JSON，按代价从低到高依次尝试：
+
+      1. 直接 json.loads（json_object 模式下的大多数响应）
+      2. 单遍括号匹配提取第一个JSON对象（前后有说明文字或 ```json 代码块）
+      3. 解析markdown中的JSON代码块，最后按清理后的文本用yaml宽松解析
+
+    提供 schema 时，不符合 schema 的结果会继续尝试下一层；
+    都不符合时返回第一个解析成功的结果，由调用方决定是否重试。
+    """
+    if not text:
         return None
+    fallback = None
+
+    def accept(result: Any) -> bool:
+        nonlocal fallback
+        if result is None:
+            return False
+        if fallback is None:
+            fallback = result
+        return validate_json(result, schema) is None
+
+    stripped = text.strip()
+    try:
+        result = json.loads(stripped)
+    except ValueError:
+        pass
+    else:
+        if accept(result):
+            return result
+
+    candidate = extract_json_object(stripped)
+    if candidate is not None:
+        try:
+            result = json.loads(candidate)
+        except ValueError:
+            # yaml 能处理缺少引号的字段名
+            result = parse_json_str(candidate)
+        if accept(result):
+            return result
+
+    for parse in (parse_json_markdown, lambda t: parse_json_str(clean_mixed_language_response(t))):
+        result = parse(stripped)
+        if accept(result):
+            return result
+    return fallback
+
 
-    # 检查AST结构
-    if not ast.children:
-        print(f"[Markdown解析] AST没有子元素")
+def parse_json_markdown(text: str) -> Optional[Any]:
+    """解析markdown中第一个JSON代码块"""
+    try:
+        ast = marko.parse(text)
+    except Exception:
         return None
 
-    print(f"[Markdown解析] 开始遍历AST子元素...")
-    for i, c in enumerate(ast.children):
-        print(f"[Markdown解析] 处理第{i}个子元素，类型: {type(c)}")
-
-        # 检查是否是代码块
-        if hasattr(c, "lang"):
-            print(f"[Markdown解析] 找到代码块，语言: {c.lang}")
-            if c.lang.lower() == "json":
-                print(f"[Markdown解析] 找到JSON代码块")
-
-                # 详细调试c.children的状态
-                print(f"[Markdown调试] c.children 类型: {type(c.children)}")
-                print(f"[Markdown调试] c.children 值: {c.children}")
-
-                # 安全检查c.children
-                try:
-                    children_list = list(c.children) if c.children is not None else []
-                    print(f"[Markdown调试] 转换为列表成功，长度: {len(children_list)}")
-                except Exception as e:
-                    print(f"[Markdown调试] 转换c.children为列表失败: {e}")
-                    print(f"[Markdown调试] c.children详细属性: {dir(c)}")
-                    continue
-
-                # Check if c.children exists and has at least one element
-                if children_list and len(children_list) > 0:
-                    print(f"[Markdown解析] JSON代码块有 {len(children_list)} 个子元素")
-
-                    # 安全访问第一个子元素
-                    try:
-                        first_child = children_list[0]
-                        print(f"[Markdown解析] 第一个子元素类型: {type(first_child)}")
-                        print(f"[Markdown调试] 第一个子元素: {first_child}")
-                    except Exception as e:
-                        print(f"[Markdown错误] 访问第一个子元素失败: {e}")
-                        continue
-
-                    if hasattr(first_child, "children") and first_child.children:
-                        try:
-                            json_str = first_child.children
-                            print(f"[Markdown解析] 提取到JSON字符串: {json_str}")
-                            result = parse_json_str(json_str)
-                            print(f"[Markdown解析] JSON字符串解析结果: {result}")
-                            return result
-                        except Exception as e:
-                            print(f"[Markdown错误] 处理first_child.children失败: {e}")
-                    else:
-                        print(f"[Markdown解析] 第一个子元素没有children属性或children为空")
-                        # 尝试直接使用子元素作为字符串
-                        if hasattr(first_child, '__str__'):
-                            try:
-                                json_str = str(first_child)
-                                print(f"[Markdown解析] 尝试将第一个子元素转换为字符串: {json_str}")
-                                result = parse_json_str(json_str)
-                                print(f"[Markdown解析] 转换后JSON解析结果: {result}")
-                                return result
-                            except Exception as e:
-                                print(f"[Markdown错误] 转换first_child为字符串失败: {e}")
-                        else:
-                            print(f"[Markdown错误] 第一个子元素没有__str__方法")
-                else:
-                    print(f"[Markdown解析] JSON代码块没有子元素")
-            else:
-                print(f"[Markdown解析] 代码块语言不是JSON: {c.lang}")
-        else:
-            print(f"[Markdown解析] 子元素不是代码块，类型: {type(c)}")
-            print(f"[Markdown调试] 子元素属性: {dir(c)}")
-
-    print(f"[Markdown解析] 没有找到有效的JSON代码块")
+    for child in ast.children or []:
+        if getattr(child, "lang", None) is None or child.lang.lower() != "json":
+            continue
+        children = list(child.children) if child.children is not None else []
+        if not children:
+            continue
+        first_child = children[0]
+        if hasattr(first_child, "children") and first_child.children:
+            return parse_json_str(first_child.children)
+        return parse_json_str(str(first_child))
     return None
 
 
 def parse_json_str(text: str) -> Optional[Any]:
-    print(f"[JSON字符串解析] 开始解析，输入文本: '{text}'")
-    print(f"[JSON字符串解析] 文本长度: {len(text)} 字符")
-
     if not text:
-        print(f"[JSON字符串解析] 输入文本为空")
         return None
-
     try:
-        print(f"[JSON字符串解析] 使用yaml.safe_load解析...")
         # use yaml.safe_load which handles missing quotes around field names.
-        result_json = yaml.safe_load(text)
-        print(f"[JSON字符串解析] yaml.safe_load成功，结果类型: {type(result_json)}, 内容: {result_json}")
-    except yaml.parser.ParserError as e:
-        print(f"[JSON字符串解析] YAML解析器错误: {e}")
-        print(f"[JSON字符串解析] 详细错误位置信息 - 这通常是因为JSON格式不正确")
-        return None
-    except Exception as e:
-        # Log any other parsing errors
-        print(f"[JSON字符串解析] 其他解析错误: {type(e).__name__}: {e}")
-        print(f"[JSON字符串解析] 错误详情，这可能是由于JSON格式问题或内容不符合预期")
+        return yaml.safe_load(text)
+    except Exception:
         return None
 
-    print(f"[JSON字符串解析] 解析完成，返回: {result_json}")
-    return result_json
+
+class IncrementalJsonScanner:
+    """增量扫描流式输出的JSON对象
+
+    每次 feed() 追加一段文本，返回这段文本中新完成的顶层字段名；
+    已完成字段的值保存在 values 中。对象之前的非JSON前缀（如 ```json）会被跳过，
+    嵌套的对象和数组整体作为一个值。
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.values: Dict[str, Any] = {}
+        self.done = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect = "key"  # key, colon, value, primitive, comma
+        self._key: Optional[str] = None
+        self._token_start = 0
+
+    def _complete(self, raw: str, completed: List[str]) -> None:
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            value = raw.strip()
+        if self._key is not None:
+            self.values[self._key] = value
+            completed.append(self._key)
+        self._key = None
+        self._expect = "comma"
+
+    def feed(self, chunk: str) -> List[str]:
+        """追加文本，返回新完成的顶层字段名"""
+        self.text += chunk
+        text = self.text
+        completed: List[str] = []
+        i = self._pos
+        while i < len(text) and not self.done:
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        token = text[self._token_start:i + 1]
+                        if self._expect == "key":
+                            try:
+                                self._key = json.loads(token)
+                            except ValueError:
+                                self._key = token.strip('"')
+                            self._expect = "colon"
+                        else:
+                            self._complete(token, completed)
+            elif self._depth == 0:
+                if ch == "{":
+                    self._depth = 1
+                    self._expect = "key"
+            elif ch == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    self._token_start = i
+            elif self._depth > 1:
+                if ch in "{[":
+                    self._depth += 1
+                elif ch in "}]":
+                    self._depth -= 1
+                    if self._depth == 1:
+                        self._complete(text[self._token_start:i + 1], completed)
+            elif self._expect == "primitive" and (ch in ",}" or ch.isspace()):
+                self._complete(text[self._token_start:i], completed)
+                continue  # 重新处理分隔符
+            elif self._expect == "colon":
+                if ch == ":":
+                    self._expect = "value"
+            elif self._expect == "value":
+                if ch in "{[":
+                    self._depth += 1
+                    self._token_start = i
+                elif not ch.isspace():
+                    self._token_start = i
+                    self._expect = "primitive"
+            elif ch == ",":
+                self._expect = "key"
+            elif ch == "}":
+                self.done = True
+            i += 1
+        self._pos = i
+        return completed
 
 
 class Deserializable(ABC):
@@ -0,0 +1,100 @@
+"""
+JSON Patch 工具
+Minimal RFC 6902 style diff/apply for JSON-compatible documents
+
+只生成 add / remove / replace 三种操作。列表末尾追加使用 "/-"，
+长度相同的列表逐项比较，其余情况整体替换。
+"""
+
+from typing import Any, Dict, List
+
+Patch = List[Dict[str, Any]]
+
+
+def _escape(token: Any) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def _diff(old: Any, new: Any, path: str, patch: Patch) -> None:
+    if type(old) is not type(new):
+        patch.append({"op": "replace", "path": path, "value": new})
+        return
+
+    if isinstance(old, dict):
+        for key in old:
+            if key not in new:
+                patch.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in old:
+                patch.append({"op": "add", "path": child, "value": value})
+            elif old[key] != value:
+                _diff(old[key], value, child, patch)
+        return
+
+    if isinstance(old, list):
+        if len(new) >= len(old) and new[:len(old)] == old:
+            # 只在末尾追加
+            for value in new[len(old):]:
+                patch.append({"op": "add", "path": f"{path}/-", "value": value})
+        elif len(new) == len(old):
+            for index, (before, after) in enumerate(zip(old, new)):
+                if before != after:
+                    _diff(before, after, f"{path}/{index}", patch)
+        else:
+            patch.append({"op": "replace", "path": path, "value": new})
+        return
+
+    if old != new:
+        patch.append({"op": "replace", "path": path, "value": new})
+
+
+def make_patch(old: Any, new: Any) -> Patch:
+    """生成把 old 变为 new 的补丁"""
+    patch: Patch = []
+    if old != new:
+        _diff(old, new, "", patch)
+    return patch
+
+
+def apply_patch(doc: Any, patch: Patch) -> Any:
+    """把补丁应用到 doc（原地修改容器并返回结果文档）"""
+    for operation in patch:
+        op, path = operation["op"], operation["path"]
+        if path == "":
+            if op == "remove":
+                doc = None
+            else:
+                doc = operation["value"]
+            continue
+
+        tokens = [_unescape(token) for token in path.split("/")[1:]]
+        parent = doc
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        last = tokens[-1]
+
+        if isinstance(parent, list):
+            if op == "add":
+                if last == "-":
+                    parent.append(operation["value"])
+                else:
+                    parent.insert(int(last), operation["value"])
+            elif op == "remove":
+                del parent[int(last)]
+            elif op == "replace":
+                parent[int(last)] = operation["value"]
+            else:
+                raise ValueError(f"Unsupported patch operation: {op}")
+        else:
+            if op in ("add", "replace"):
+                parent[last] = operation["value"]
+            elif op == "remove":
+                del parent[last]
+            else:
+                raise ValueError(f"Unsupported patch operation: {op}")
+    return doc
@@ -22,6 +22,26 @@ def event_loop():
     loop.close()
 
 
+@pytest.fixture
+def make_state():
+    """六人局初始状态的工厂：预言家 Alice、医生 Bob、狼人 Cara，其余为村民"""
+    from src.core.models.game_state import State
+    from src.core.models.player import Doctor, Seer, Villager, Werewolf
+
+    names = ["Alice", "Bob", "Cara", "Dan", "Eve", "Finn"]
+
+    def build(session_id: str = "test_session_123", model: str = "m") -> State:
+        seer = Seer(names[0], model)
+        doctor = Doctor(names[1], model)
+        wolf = Werewolf(names[2], model)
+        villagers = [Villager(name, model) for name in names[3:]]
+        for player in [seer, doctor, wolf] + villagers:
+            player.initialize_game_view(0, list(names), None)
+        return State(session_id=session_id, seer=seer, doctor=doctor, villagers=villagers, werewolves=[wolf])
+
+    return build
+
+
 @pytest.fixture
 def mock_llm_client():
     """模拟LLM客户端"""
@@ -0,0 +1,102 @@
+"""
+LLM准入控制测试
+Tests for the AIMD admission window and weighted fair queuing
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.services.llm.admission import AdaptiveLimiter, llm_flow
+
+
+class ProviderError(Exception):
+    """带 HTTP 状态码和响应头的提供商错误"""
+
+    def __init__(self, status_code: int, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+class TestAdaptiveLimiter:
+    """AIMD 窗口测试"""
+
+    def test_window_grows_on_saturated_successes(self):
+        """测试窗口用满且请求成功时加性增长"""
+        limiter = AdaptiveLimiter(initial_limit=2, max_limit=8)
+        for _ in range(4):
+            started = [limiter.acquire() for _ in range(int(limiter.limit))]
+            for at in started:
+                limiter.release(at)
+        assert limiter.limit > 2
+        assert limiter.stats()["increases"] > 0
+
+    def test_window_does_not_grow_when_not_saturated(self):
+        """测试窗口没有用满时不增长"""
+        limiter = AdaptiveLimiter(initial_limit=4)
+        for _ in range(10):
+            limiter.release(limiter.acquire())
+        assert limiter.limit == 4
+
+    def test_overload_halves_once_per_window(self):
+        """测试同一窗口内的多个 5xx 只减小一次"""
+        limiter = AdaptiveLimiter(initial_limit=8, backoff=0.5)
+        started = [limiter.acquire() for _ in range(8)]
+        for at in started:
+            limiter.release(at, ProviderError(503))
+        assert limiter.limit == 4
+        assert limiter.stats()["decreases"] == 1
+
+        # 减小之后发出的请求再次过载时继续减小
+        limiter.release(limiter.acquire(), ProviderError(500))
+        assert limiter.limit == 2
+
+    def test_other_errors_do_not_change_window(self):
+        """测试参数错误等非过载错误不影响窗口"""
+        limiter = AdaptiveLimiter(initial_limit=4)
+        limiter.release(limiter.acquire(), ValueError("bad request"))
+        assert limiter.limit == 4
+        assert limiter.stats()["failed"] == 1
+
+
+@pytest.mark.asyncio
+class TestAdmissionQueue:
+    """排队与公平分配测试"""
+
+    async def test_retry_after_pauses_admission(self):
+        """测试 429 的 Retry-After 期间暂停发送"""
+        limiter = AdaptiveLimiter(initial_limit=4)
+        limiter.release(await limiter.aacquire(), ProviderError(429, {"retry-after": "0.2"}))
+        assert limiter.stats()["blocked_for"] > 0
+
+        started = time.monotonic()
+        limiter.release(await limiter.aacquire())
+        assert time.monotonic() - started >= 0.15
+
+    async def test_weighted_fair_queuing_follows_flow_weights(self):
+        """测试排队的请求按流量权重分享空位"""
+        limiter = AdaptiveLimiter(initial_limit=1)
+        holder = await limiter.aacquire()
+        order = []
+
+        async def request(flow: str, weight: float):
+            llm_flow.set((flow, weight))
+            started = await limiter.aacquire()
+            order.append(flow)
+            await asyncio.sleep(0)
+            limiter.release(started)
+
+        tasks = []
+        for flow, weight, count in (("A", 4.0, 8), ("B", 1.0, 2)):
+            for _ in range(count):
+                tasks.append(asyncio.ensure_future(request(flow, weight)))
+                await asyncio.sleep(0)  # 按创建顺序排队
+        assert limiter.stats()["queued_flows"] == 2
+
+        limiter.release(holder)
+        await asyncio.gather(*tasks)
+        # A 的每个请求推进 1/4，B 推进 1：每 4 个 A 请求之间插入一个 B 请求
+        assert "".join(order) == "ABAAAABAAA"
@@ -58,6 +58,21 @@ class TestStatusAPI:
         assert "environment" in data
         assert "uptime_seconds" in data
 
+    def test_status_llm(self):
+        """测试LLM统计（模板缓存已预编译）"""
+        response = client.get("/api/v1/status/llm")
+        assert response.status_code == 200
+        cache = response.json()["template_cache"]
+        assert cache["size"] >= 7
+        assert cache["misses"] >= 7
+        assert "hits" in cache
+        assert "compile_time_ms" in cache
+        admission = response.json()["admission"]
+        assert "enabled" in admission
+        assert "limiters" in admission
+        assert response.json()["response_cache"]["mode"] in ("off", "record", "replay", "read_through")
+        assert "circuits" in response.json()["resilience"]
+
     @patch('src.services.game_manager.session_manager.game_manager.get_all_sessions')
     def test_status_stats(self, mock_get_sessions):
         """测试统计信息"""
@@ -233,6 +248,37 @@ class TestGamesAPI:
             response = client.delete("/api/v1/games/nonexistent_session")
             assert response.status_code == 404
 
+    def test_start_game_queue_full(self):
+        """测试排队已满时返回 429 和 Retry-After，且不创建会话"""
+        from src.services.game_manager.scheduler import GameScheduler, SchedulerFull
+
+        scheduler = GameScheduler(max_running=4, max_queued=0)
+        for i in range(4):
+            scheduler.submit(f"running{i}", "interactive", lambda: None)
+        with patch.object(game_manager, "scheduler", scheduler), \
+                patch.object(game_manager, "create_game") as mock_create_game:
+            response = client.post(
+                "/api/v1/games/start",
+                json={"villager_model": "glm4", "werewolf_model": "glm4"}
+            )
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "30"  # 120 秒 / 4 局
+        mock_create_game.assert_not_called()
+
+        # 检查之后队列被占满：删除刚创建的会话
+        mock_session = Mock()
+        mock_session.session_id = "test_session_123"
+        with patch.object(game_manager, "create_game", return_value=mock_session), \
+                patch.object(game_manager, "start_game", side_effect=SchedulerFull(7)), \
+                patch.object(game_manager, "remove_session") as mock_remove_session:
+            response = client.post(
+                "/api/v1/games/start",
+                json={"villager_model": "glm4", "werewolf_model": "glm4"}
+            )
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "7"
+        mock_remove_session.assert_called_once_with("test_session_123")
+
 
 class TestWebSocketAPI:
     """WebSocket API测试"""
@@ -290,6 +336,99 @@ class TestWebSocketIntegration:
             assert message_data["type"] == "game_update"
             assert message_data["data"]["game_state"]["status"] == "running"
 
+    async def test_game_delta_after_ack(self):
+        """测试客户端确认版本后收到增量更新"""
+        from src.api.v1.routes.websocket import ConnectionManager
+        from src.utils.json_patch import apply_patch
+
+        manager = ConnectionManager()
+        websocket = AsyncMock()
+        manager.active_connections["delta_session"] = [websocket]
+
+        first = {"game_state": {"rounds": [{"debate": []}]}, "status": "running", "version": 1}
+        await manager.broadcast_game_update("delta_session", first)
+        assert json.loads(websocket.send_text.call_args[0][0])["type"] == "game_update"
+
+        manager.acknowledge(websocket, 1)
+        second = {"game_state": {"rounds": [{"debate": [["P1", "hi"]]}]}, "status": "running", "version": 2}
+        await manager.broadcast_game_update("delta_session", second)
+        message = json.loads(websocket.send_text.call_args[0][0])
+        assert message["type"] == "game_delta"
+        assert message["data"]["base_version"] == 1
+        assert apply_patch(json.loads(json.dumps(first)), message["data"]["patch"]) == second
+
+    async def test_event_replay_since_seq(self):
+        """测试重连客户端按序列号补发缺失事件，超出缓冲区时无法补齐"""
+        from src.api.v1.routes.websocket import ConnectionManager
+
+        manager = ConnectionManager(event_log_size=3)
+        for seq in range(1, 6):
+            await manager.broadcast_vote_cast("replay_session", f"P{seq}", "P0", seq)
+
+        replayed = [json.loads(text)["data"]["sequence_number"] for text in manager.events_since("replay_session", 3)]
+        assert replayed == [4, 5]
+        assert manager.events_since("replay_session", 5) == []
+        assert manager.events_since("replay_session", 1) is None
+
+    async def test_state_delta_since_version(self):
+        """测试唯一的观众断线期间的状态被记录，重连时按 since_version 只发送增量"""
+        from src.api.v1.routes.websocket import manager as ws_manager
+        from src.utils.json_patch import apply_patch
+
+        states = [{"rounds": [{"debate": [["P1", "第一句"]] * (i + 1)}], "winner": None} for i in range(3)]
+        session = Mock(is_running=True)
+        session.state.version = 1
+        session.state.to_dict.side_effect = lambda: states[session.state.version - 1]
+
+        def snapshot(version):
+            return {"game_state": states[version - 1], "status": "running", "version": version}
+
+        with patch.object(game_manager, "get_session", return_value=session):
+            with client.websocket_connect("/ws/delta_reconnect") as websocket:
+                assert websocket.receive_json()["type"] == "connection_established"
+                assert websocket.receive_json()["data"]["version"] == 1
+                websocket.send_json({"type": "ack", "version": 1})
+            assert ws_manager.get_connection_count("delta_reconnect") == 0
+
+            # 没有连接时的状态更新
+            await ws_manager.broadcast_game_update("delta_reconnect", snapshot(2))
+            session.state.version = 3
+
+            for since_version in (1, 2):
+                with client.websocket_connect(
+                    f"/ws/delta_reconnect?since_seq=0&since_version={since_version}"
+                ) as websocket:
+                    assert websocket.receive_json()["type"] == "connection_established"
+                    assert websocket.receive_json()["data"]["complete"]
+                    message = websocket.receive_json()
+                    assert message["type"] == "game_delta"
+                    assert message["data"]["base_version"] == since_version
+                    assert message["data"]["version"] == 3
+                    base = json.loads(json.dumps(snapshot(since_version)))
+                    assert apply_patch(base, message["data"]["patch"]) == snapshot(3)
+
+    async def test_notification_bus_orders_and_coalesces(self):
+        """测试通知总线按顺序发送并合并状态快照"""
+        from src.services.game_manager.notification_bus import NotificationBus, NotificationEvent
+
+        bus = NotificationBus()
+        bus.bind()
+        sent = []
+
+        def sender(tag):
+            async def send():
+                sent.append(tag)
+            return send
+
+        for i in range(3):
+            await bus.apublish(NotificationEvent("bus_session", "debate_turn", sender(i)))
+            bus.publish(NotificationEvent("bus_session", "game_update", sender(f"update{i}"), coalesce=True))
+        await asyncio.sleep(0.1)
+
+        assert sent == [0, 1, 2, "update2"]
+        assert bus.stats()["coalesced"] >= 2
+        await bus.close()
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""
+游戏日志持久化测试
+Tests for the append-only game journal (save_game / load_game round trip)
+"""
+
+import os
+
+import pytest
+
+from src.core.models.game_state import Round, State, to_dict
+from src.core.models.logs import LmLog, RoundLog, VoteLog
+from src.services.logger import game_journal
+from src.services.logger.game_logger import load_game, save_game
+
+
+def _lm(text: str) -> LmLog:
+    return LmLog(prompt=f"prompt {text}", raw_resp=f"resp {text}", result={"say": text})
+
+
+def _start_round(state: State, logs: list) -> Round:
+    round_ = Round()
+    round_.players = list(state.rounds[-1].players if state.rounds else state.players)
+    state.rounds.append(round_)
+    logs.append(RoundLog())
+    for name in round_.players:
+        state.players[name].gamestate.round_number = len(state.rounds) - 1
+        state.players[name].gamestate.attach_debate(round_.debate)
+    return round_
+
+
+def _speak(state: State, logs: list, speaker: str, text: str) -> None:
+    state.rounds[-1].debate.append([speaker, text])
+    logs[-1].debate.append((speaker, _lm(text)))
+    for player in state.players.values():
+        player.observations.add(len(state.rounds) - 1, f"{speaker}说：{text}")
+
+
+def _save(state: State, logs: list, directory: str) -> None:
+    state.bump_version()
+    save_game(state, logs, directory)
+
+
+def _assert_round_trip(state: State, logs: list, directory: str) -> None:
+    loaded_state, loaded_logs = load_game(directory)
+    assert loaded_state.to_dict() == state.to_dict()
+    assert to_dict(loaded_logs) == to_dict(logs)
+
+
+@pytest.fixture
+def directory(tmp_path):
+    path = str(tmp_path / "session")
+    yield path
+    game_journal.close_journal(path)
+
+
+class TestGameJournal:
+    """增量日志回放测试"""
+
+    def test_round_trip_after_mixed_records(self, make_state, directory):
+        """测试追加、日志截断和观察记录重置后回放得到相同的状态和日志"""
+        state, logs = make_state("journal"), []
+        _save(state, logs, directory)
+
+        _start_round(state, logs)
+        state.rounds[-1].eliminated = "Dan"
+        logs[-1].eliminate = _lm("Dan")
+        _speak(state, logs, "Alice", "我是预言家")
+        _save(state, logs, directory)
+        _assert_round_trip(state, logs, directory)
+
+        # 投票、玩家离场和新回合
+        state.rounds[-1].votes.append({"Alice": "Cara", "Eve": "Cara"})
+        logs[-1].votes.append([VoteLog("Alice", "Cara", _lm("Cara"))])
+        state.rounds[-1].players.remove("Dan")
+        _save(state, logs, directory)
+        _start_round(state, logs)
+        _speak(state, logs, "Eve", "同意")
+        _save(state, logs, directory)
+        _assert_round_trip(state, logs, directory)
+
+        # 恢复失败的回合：截断日志并重置观察记录
+        state.rounds.pop()
+        del logs[1:]
+        for player in state.players.values():
+            player.observations.clear()
+            player.observations.add(0, "重新开始")
+        _save(state, logs, directory)
+        _assert_round_trip(state, logs, directory)
+
+    def test_compaction_mid_game(self, make_state, directory, monkeypatch):
+        """测试游戏中途压缩快照后回放只使用压缩之后的记录"""
+        monkeypatch.setattr(game_journal, "_MIN_COMPACT_BYTES", 0)
+        state, logs = make_state("journal"), []
+        names = list(state.players)
+        _save(state, logs, directory)
+        _start_round(state, logs)
+        for i in range(20):
+            _speak(state, logs, names[i % len(names)], f"发言{i}")
+            _save(state, logs, directory)
+            _assert_round_trip(state, logs, directory)
+
+        snapshot_size = os.path.getsize(os.path.join(directory, game_journal.SNAPSHOT_FILE))
+        journal_size = os.path.getsize(os.path.join(directory, game_journal.JOURNAL_FILE))
+        assert journal_size < snapshot_size
+
+    def test_torn_last_line_is_ignored(self, make_state, directory):
+        """测试崩溃时写了一半的最后一行被忽略"""
+        state, logs = make_state("journal"), []
+        _save(state, logs, directory)
+        _start_round(state, logs)
+        _speak(state, logs, "Bob", "我是医生")
+        _save(state, logs, directory)
+        expected_state, expected_logs = state.to_dict(), to_dict(logs)
+        game_journal.close_journal(directory)
+
+        with open(os.path.join(directory, game_journal.JOURNAL_FILE), "a", encoding="utf-8") as file:
+            file.write('{"type":"round","index":0,"data":{"players"')
+
+        loaded_state, loaded_logs = load_game(directory)
+        assert loaded_state.to_dict() == expected_state
+        assert to_dict(loaded_logs) == expected_logs
+
+    def test_finished_game_closes_journal(self, make_state, directory):
+        """测试游戏结束写出完整文件后释放日志实例"""
+        state, logs = make_state("journal"), []
+        _save(state, logs, directory)
+        assert directory in game_journal._journals
+
+        state.winner = "Villagers"
+        _save(state, logs, directory)
+        assert directory not in game_journal._journals
+        assert os.path.exists(os.path.join(directory, "game_complete.json"))
+        _assert_round_trip(state, logs, directory)
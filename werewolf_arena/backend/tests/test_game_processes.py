@@ -0,0 +1,163 @@
+"""
+游戏工作进程池测试
+Tests for event routing and dead-worker handling in GameProcessPool
+"""
+
+import asyncio
+import queue
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from src.services.game_manager import game_processes
+from src.services.game_manager.game_processes import (
+    FINISHED,
+    NOTIFY,
+    SNAPSHOT,
+    START,
+    STOP,
+    GameProcessPool,
+    ProcessGameMaster,
+)
+
+class FakeWorker:
+    """代替工作进程，只提供存活检查"""
+
+    def __init__(self, alive: bool = True, exitcode=None):
+        self.alive = alive
+        self.exitcode = exitcode
+
+    def is_alive(self) -> bool:
+        return self.alive
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """不启动真实进程的进程池：命令写入本地队列，重启只替换为新的假进程"""
+    pool = GameProcessPool(2)
+    pool._events = queue.Queue()
+    pool._commands = [queue.Queue(), queue.Queue()]
+    pool._workers = [FakeWorker(), FakeWorker()]
+    pool.respawned = []
+
+    def spawn_worker(index: int) -> None:
+        pool.respawned.append(index)
+        pool._workers[index] = FakeWorker()
+
+    monkeypatch.setattr(pool, "_spawn_worker", spawn_worker)
+    return pool
+
+
+@pytest.fixture
+def start(pool, make_state):
+    async def start(session_id: str, **kwargs) -> tuple:
+        """提交一局游戏，返回代理对象和等待结果的任务"""
+        master = ProcessGameMaster(pool, make_state(session_id), f"/tmp/{session_id}", **kwargs)
+        task = asyncio.ensure_future(master.arun_game())
+        await asyncio.sleep(0)
+        return master, task
+
+    return start
+
+
+def _from_thread(function, *args) -> None:
+    """在其他线程中调用（与事件读取线程相同）"""
+    thread = threading.Thread(target=function, args=args)
+    thread.start()
+    thread.join()
+
+
+async def _cancel(*tasks) -> None:
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+class TestGameProcessPool:
+    """进程池事件处理测试"""
+
+    async def test_submit_and_stop_route_to_least_loaded_worker(self, pool, start):
+        """测试游戏分配到游戏数最少的进程，停止命令发给运行该游戏的进程"""
+        first, first_task = await start("s1")
+        second, second_task = await start("s2")
+        assert (first.worker, second.worker) == (0, 1)
+
+        for index, session_id in enumerate(("s1", "s2")):
+            kind, sent_id, options = pool._commands[index].get_nowait()
+            assert (kind, sent_id) == (START, session_id)
+            assert options["state"].session_id == session_id
+
+        first.stop()
+        assert pool._commands[0].get_nowait() == (STOP, "s1", None)
+        assert not pool.stop("unknown")
+        assert pool.stats()["games"] == [1, 1]
+
+        await _cancel(first_task, second_task)
+
+    async def test_handle_routes_snapshot_finished_and_notify(self, pool, start, make_state, monkeypatch):
+        """测试快照更新代理的状态、结束事件唤醒等待的协程、通知交给 API 进程的通知总线"""
+        published = []
+        monkeypatch.setattr(game_processes, "notification_bus", SimpleNamespace(publish=published.append))
+        updates = []
+        master, task = await start("s1", on_snapshot=lambda *args: updates.append(args))
+
+        state = make_state("s1")
+        state.bump_version()
+        state.bump_version()
+        game_data = {"game_state": state.to_dict(), "status": "running", "version": state.version}
+        _from_thread(pool._handle, SNAPSHOT, "s1", (game_data, None, 1.5))
+        assert updates == [(game_data, None, 1.5)]
+        assert master.version == state.version
+        assert master.state.to_dict() == state.to_dict()
+
+        async def send():
+            pass
+
+        _from_thread(pool._handle, NOTIFY, "s1", ("game_event", send, True, 2.0))
+        (event,) = published
+        assert (event.session_id, event.kind, event.send, event.coalesce, event.playback_at) == (
+            "s1", "game_event", send, True, 2.0
+        )
+
+        _from_thread(pool._handle, FINISHED, "s1", ("Villagers", None))
+        assert await asyncio.wait_for(task, 1) == "Villagers"
+        assert pool.stats()["finished"] == 1
+        assert pool.stats()["games"] == [0, 0]
+
+        # 已结束的游戏的迟到事件被忽略
+        _from_thread(pool._handle, SNAPSHOT, "s1", (game_data, None, None))
+        assert len(updates) == 1
+
+    async def test_finished_with_error_raises(self, pool, start):
+        """测试工作进程中的游戏出错时 arun_game 抛出异常"""
+        _, task = await start("s1")
+        _from_thread(pool._handle, FINISHED, "s1", (None, "LLM unavailable"))
+        with pytest.raises(RuntimeError, match="LLM unavailable"):
+            await asyncio.wait_for(task, 1)
+
+    async def test_dead_worker_fails_its_games_and_restarts(self, pool, start):
+        """测试工作进程退出后其上的游戏以错误结束、进程被重启，其他进程上的游戏不受影响"""
+        lost, lost_task = await start("s1")
+        kept, kept_task = await start("s2")
+        assert (lost.worker, kept.worker) == (0, 1)
+
+        pool._workers[0] = FakeWorker(alive=False, exitcode=-9)
+        _from_thread(pool._check_workers)
+
+        with pytest.raises(RuntimeError, match="exited unexpectedly"):
+            await asyncio.wait_for(lost_task, 1)
+        assert pool.respawned == [0]
+        assert pool.stats()["restarts"] == 1
+        assert pool.stats()["alive"] == 2
+        assert not kept_task.done()
+        assert pool.stats()["games"] == [0, 1]
+
+        # 关闭后不再检查和重启
+        pool._closed = True
+        pool._workers[1] = FakeWorker(alive=False, exitcode=1)
+        pool._check_workers()
+        assert pool.respawned == [0]
+        assert not kept_task.done()
+        await _cancel(kept_task)
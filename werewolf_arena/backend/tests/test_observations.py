@@ -0,0 +1,126 @@
+"""
+提示词回归测试
+Regression tests: observations and debate render byte-identically to the pre-store formatting
+"""
+
+import re
+
+from src.config import MAX_DEBATE_TURNS
+from src.core.models.observations import ObservationStore, group_and_format_observations
+
+
+def _baseline_format_observations(observations):
+    """改为 ObservationStore 之前的 group_and_format_observations（去掉了错误输出）"""
+    grouped = {}
+    for obs in observations:
+        parts = obs.split("：", 1)
+        if len(parts) < 2:
+            continue
+        prefix = parts[0]
+        round_num = None
+        if "第" in prefix and "轮" in prefix:
+            match = re.search(r'第(\d+)轮', prefix)
+            if match:
+                round_num = int(match.group(1))
+        if round_num is None:
+            prefix_parts = prefix.split()
+            if len(prefix_parts) >= 2:
+                try:
+                    round_num = int(prefix_parts[1])
+                except (ValueError, IndexError):
+                    pass
+        if round_num is None:
+            continue
+        obs_text = parts[1].strip().replace('"', "")
+        grouped.setdefault(round_num, []).append(obs_text)
+
+    formatted_obs = []
+    for round_num, round_obs in sorted(grouped.items()):
+        formatted_round = f"第{round_num}轮：\n"
+        formatted_round += "\n".join(f"   - {obs}" for obs in round_obs)
+        formatted_obs.append(formatted_round)
+    return formatted_obs
+
+
+def _baseline_format_debate(name, debate):
+    """共享辩论记录之前 _get_game_state 中的辩论格式"""
+    return [
+        f"{author} (You): {dialogue}" if author == name else f"{author}: {dialogue}"
+        for author, dialogue in debate
+    ]
+
+
+class TestObservationPrompt:
+    """观察记录渲染测试"""
+
+    def test_multi_round_history_matches_baseline(self, make_state):
+        """测试多回合的观察记录（含反复渲染的当前回合）与原来的格式逐字节相同"""
+        seer = make_state("observations").players["Alice"]
+        legacy = []
+
+        def note(text):
+            seer._add_observation(text)
+            legacy.append(f"第{seer.gamestate.round_number}轮：{text}")
+
+        def announce(text):
+            seer.add_announcement(text)
+            legacy.append(f"第{seer.gamestate.round_number}轮：主持人公告：{text}")
+
+        def summarize(text):
+            seer._record_summary({"summary": f'"{text}"'})
+            legacy.append(f"第{seer.gamestate.round_number}轮：总结：{text}")
+
+        def assert_prompt_matches():
+            expected = _baseline_format_observations(legacy)
+            assert seer._get_game_state()["observations"] == expected
+            assert group_and_format_observations(legacy) == expected
+            assert list(seer.observations) == legacy
+
+        for round_number in range(3):
+            seer.gamestate.round_number = round_number
+            note(f"夜晚阶段，我查验了Cara，结果是狼人（第{round_number}次）")
+            announce("昨晚没有人被淘汰。 ")
+            note('  Bob说："我是医生"，值得信任  ')
+            summarize("Cara 很可疑：她在辩论中前后矛盾")
+            assert_prompt_matches()
+
+        # 当前回合：每条新记录后重新渲染
+        seer.gamestate.round_number = 3
+        announce("Dan 被投票放逐。")
+        assert_prompt_matches()
+        note("白天：Eve 支持我的判断")
+        assert_prompt_matches()
+        summarize("继续关注 Finn")
+        assert_prompt_matches()
+
+        # 从旧格式的字符串（序列化结果）加载后也相同
+        assert ObservationStore(legacy).formatted() == _baseline_format_observations(legacy)
+        seer.observations.remove_round(3)
+        assert seer.observations.formatted() == _baseline_format_observations(legacy)[:3]
+
+    def test_shared_debate_matches_per_player_copies(self, make_state):
+        """测试引用回合共享辩论记录时，每名玩家看到的辩论与各自复制一份时逐字节相同"""
+        state = make_state("debate")
+        players = list(state.players.values())
+        turns = [
+            ("Alice", "我昨晚查验了 Cara，她是狼人。"),
+            ("Cara", '别信她，"预言家"是假的'),
+            ("Dan", "我先听听 Bob 怎么说。"),
+            ("Alice", "我可以用下一次查验证明自己。"),
+        ]
+
+        for round_number in range(2):
+            shared = []  # 与 Round.debate 相同：所有玩家引用的只追加记录
+            legacy = {player.name: [] for player in players}
+            for player in players:
+                player.gamestate.round_number = round_number
+                player.gamestate.attach_debate(shared)
+            for author, dialogue in turns[: 2 + round_number * 2]:
+                shared.append([author, dialogue])
+                for player in players:
+                    legacy[player.name].append((author, dialogue))
+                for player in players:
+                    game_state = player._get_game_state()
+                    expected = _baseline_format_debate(player.name, legacy[player.name])
+                    assert game_state["debate"] == expected
+                    assert game_state["debate_turns_left"] == MAX_DEBATE_TURNS - len(expected)
@@ -0,0 +1,95 @@
+"""
+LLM响应JSON解析测试
+Tests for the tiered parse_json fast path and response schema validation
+"""
+
+import pytest
+
+from src.utils import helpers
+from src.utils.helpers import parse_json, validate_json
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "reasoning": {"type": "string"},
+        "vote": {"type": "string"},
+        "scores": {"type": "array", "items": {"type": "integer"}},
+    },
+    "required": ["vote"],
+}
+
+
+@pytest.fixture
+def slow_paths(monkeypatch):
+    """统计markdown解析和yaml宽松解析的调用次数"""
+    calls = {"markdown": 0, "yaml": 0}
+    markdown, yaml_str = helpers.parse_json_markdown, helpers.parse_json_str
+
+    def parse_json_markdown(text):
+        calls["markdown"] += 1
+        return markdown(text)
+
+    def parse_json_str(text):
+        calls["yaml"] += 1
+        return yaml_str(text)
+
+    monkeypatch.setattr(helpers, "parse_json_markdown", parse_json_markdown)
+    monkeypatch.setattr(helpers, "parse_json_str", parse_json_str)
+    return calls
+
+
+class TestParseJson:
+    """分层解析测试"""
+
+    def test_raw_json_uses_fast_path(self, slow_paths):
+        """测试标准JSON直接解析，不进入markdown和yaml解析"""
+        assert parse_json('  {"vote": "Bob", "scores": [1, 2]}\n', SCHEMA) == {"vote": "Bob", "scores": [1, 2]}
+        assert slow_paths == {"markdown": 0, "yaml": 0}
+
+    def test_fenced_markdown_uses_bracket_scan(self, slow_paths):
+        """测试 ```json 代码块由括号匹配提取，字符串中的括号不影响匹配"""
+        text = '```json\n{"reasoning": "他说 {不对} }", "vote": "Cara"}\n```'
+        assert parse_json(text, SCHEMA) == {"reasoning": "他说 {不对} }", "vote": "Cara"}
+        assert slow_paths == {"markdown": 0, "yaml": 0}
+
+    def test_mixed_language_prefix(self, slow_paths):
+        """测试JSON前后带中文说明文字"""
+        text = '我认为应该投给Dan。\n{"reasoning": "他很可疑", "vote": "Dan"}\n以上是我的回答。'
+        assert parse_json(text, SCHEMA) == {"reasoning": "他很可疑", "vote": "Dan"}
+        assert slow_paths == {"markdown": 0, "yaml": 0}
+
+    def test_unquoted_keys_fall_back_to_yaml(self, slow_paths):
+        """测试字段名缺少引号时用yaml宽松解析"""
+        assert parse_json('回答：{vote: "Eve"}', SCHEMA) == {"vote": "Eve"}
+        assert slow_paths["yaml"] >= 1
+
+    def test_schema_mismatch_tries_next_tier(self):
+        """测试前一层结果不符合schema时继续尝试，都不符合时返回第一个解析结果"""
+        text = '{"note": "示例"}\n```json\n{"vote": "Finn"}\n```'
+        assert parse_json(text, SCHEMA) == {"vote": "Finn"}
+        assert parse_json('{"note": "示例"}', SCHEMA) == {"note": "示例"}
+
+    def test_empty_response_returns_none(self):
+        """测试空响应返回 None"""
+        assert parse_json("", SCHEMA) is None
+        assert parse_json(None) is None
+
+
+class TestValidateJson:
+    """响应schema校验测试"""
+
+    def test_accepts_matching_value(self):
+        """测试符合schema的结果"""
+        assert validate_json({"vote": "Bob", "scores": [1, 2]}, SCHEMA) is None
+        assert validate_json({"anything": 1}, None) is None
+
+    @pytest.mark.parametrize("value, error", [
+        (["Bob"], "expected object, got list"),
+        ({"reasoning": "..."}, "missing required field 'vote'"),
+        ({"vote": 3}, "field 'vote': expected string, got int"),
+        ({"vote": "Bob", "scores": [1, "2"]}, "field 'scores': item 1: expected integer, got str"),
+        ({"vote": "Bob", "scores": [True]}, "field 'scores': item 0: expected integer, got bool"),
+    ])
+    def test_rejects_mismatch(self, value, error):
+        """测试不符合schema时返回第一个原因"""
+        assert validate_json(value, SCHEMA) == error
@@ -0,0 +1,190 @@
+"""
+LLM请求对冲与熔断测试
+Tests for request hedging, circuit breaking and failover routing
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.services.llm.admission import AdmissionController
+from src.services.llm.client import LLMClient
+from src.services.llm.resilience import CLOSED, HALF_OPEN, OPEN, Resilience
+from src.services.llm.response_cache import ResponseCache
+
+
+def _settings(**overrides):
+    config = dict(
+        hedge_enabled=True,
+        hedge_percentile=0.9,
+        hedge_min_samples=3,
+        hedge_min_delay=0.01,
+        hedge_budget=1.0,
+        circuit_failure_threshold=3,
+        circuit_cooldown=0.05,
+    )
+    config.update(overrides)
+    return SimpleNamespace(**config)
+
+
+class Overloaded(Exception):
+    status_code = 503
+
+
+def _learn(resilience: Resilience, model: str, samples: int = 3) -> None:
+    """记录若干次快速成功请求的延迟"""
+    for _ in range(samples):
+        with resilience.track("glm", model):
+            pass
+
+
+class FakeProvider:
+    """第 slow 次调用很慢，其余立即返回"""
+
+    def __init__(self, slow: int = -1):
+        self.slow = slow
+        self.calls = 0
+        self.cancelled = []
+
+    async def _wait(self, n: int) -> None:
+        try:
+            await asyncio.sleep(1.0 if n == self.slow else 0.001)
+        except asyncio.CancelledError:
+            self.cancelled.append(n)
+            raise
+
+    async def agenerate(self, model, **kwargs):
+        n = self.calls
+        self.calls += 1
+        await self._wait(n)
+        return f"response {n}"
+
+    async def astream(self, model, **kwargs):
+        n = self.calls
+        self.calls += 1
+        await self._wait(n)
+        for part in ("a", "b"):
+            yield f"{n}{part}"
+
+
+def _client(resilience: Resilience, providers, failover=None) -> LLMClient:
+    return LLMClient(
+        providers,
+        admission=AdmissionController(SimpleNamespace(admission_enabled=False)),
+        cache=ResponseCache(mode="off"),
+        resilience=resilience,
+        failover=failover or {},
+    )
+
+
+class TestCircuitBreaker:
+    """熔断测试"""
+
+    def test_opens_after_threshold_and_probes_after_cooldown(self):
+        """测试连续失败达到阈值后熔断，冷却后只放行一个探测请求"""
+        resilience = Resilience(_settings())
+        for _ in range(3):
+            assert resilience.allow("glm")
+            with pytest.raises(Overloaded):
+                with resilience.track("glm", "glm/x"):
+                    raise Overloaded()
+        assert resilience.stats()["circuits"]["glm"]["state"] == OPEN
+        assert not resilience.allow("glm")
+
+        time.sleep(0.06)
+        assert resilience.allow("glm")  # 探测请求
+        assert resilience.stats()["circuits"]["glm"]["state"] == HALF_OPEN
+        assert not resilience.allow("glm")
+
+        with resilience.track("glm", "glm/x"):
+            pass
+        assert resilience.stats()["circuits"]["glm"]["state"] == CLOSED
+        assert resilience.allow("glm")
+
+    def test_non_overload_errors_do_not_open(self):
+        """测试参数错误不计入熔断"""
+        resilience = Resilience(_settings())
+        for _ in range(5):
+            with pytest.raises(ValueError):
+                with resilience.track("glm", "glm/x"):
+                    raise ValueError("bad request")
+        assert resilience.allow("glm")
+
+    def test_resolve_picks_first_closed_backup(self):
+        """测试主提供商熔断时改用第一个未熔断的备用模型"""
+        resilience = Resilience(_settings(circuit_failure_threshold=1, circuit_cooldown=60))
+        providers = {"glm": object(), "siliconflow": object(), "openrouter": object()}
+        client = _client(resilience, providers, failover={
+            "glm/x": ["minimax/unconfigured", "siliconflow/y", "openrouter/z"],
+        })
+        assert client._resolve("glm/x")[0] == "glm"
+
+        for provider in ("glm", "siliconflow"):
+            with pytest.raises(Overloaded):
+                with resilience.track(provider, f"{provider}/m"):
+                    raise Overloaded()
+        name, _, model_name = client._resolve("glm/x")
+        assert (name, model_name) == ("openrouter", "z")
+        assert resilience.stats()["failovers"] == {"glm/x -> openrouter/z": 1}
+
+
+@pytest.mark.asyncio
+class TestHedging:
+    """对冲测试"""
+
+    async def test_hedge_fires_after_percentile_and_cancels_loser(self):
+        """测试超过延迟分位数后发送对冲请求，先完成者胜出，另一个被取消"""
+        resilience = Resilience(_settings())
+        provider = FakeProvider(slow=3)
+        client = _client(resilience, {"glm": provider})
+        for _ in range(3):
+            await client.acall("glm/x", "prompt")
+
+        assert await client.acall("glm/x", "prompt") == "response 4"
+        await asyncio.sleep(0)
+        assert provider.cancelled == [3]
+        stats = resilience.stats()["models"]["glm/x"]
+        assert stats["hedges"] == 1 and stats["hedge_wins"] == 1
+
+    async def test_hedge_streams_until_first_chunk(self):
+        """测试流式请求在第一段内容前对冲，落败的流被取消"""
+        resilience = Resilience(_settings())
+        provider = FakeProvider(slow=3)
+        client = _client(resilience, {"glm": provider})
+        for n in range(3):
+            assert [chunk async for chunk in client.astream("glm/x", "prompt")] == [f"{n}a", f"{n}b"]
+
+        assert [chunk async for chunk in client.astream("glm/x", "prompt")] == ["4a", "4b"]
+        assert provider.cancelled == [3]
+        assert resilience.stats()["models"]["glm/x"]["hedge_wins"] == 1
+
+    async def test_hedge_budget_caps_duplicates(self):
+        """测试对冲次数不超过请求数的预算比例"""
+        resilience = Resilience(_settings(hedge_budget=0.25))
+        _learn(resilience, "glm/x")
+
+        async def send(started: asyncio.Event):
+            started.set()
+            await asyncio.sleep(0.03)
+            return "ok"
+
+        for _ in range(8):
+            await resilience.hedged("glm/x", send)
+        stats = resilience.stats()["models"]["glm/x"]
+        assert stats["requests"] == 8
+        assert stats["hedges"] == 2
+
+    async def test_no_hedge_without_enough_samples(self):
+        """测试延迟样本不足时不对冲"""
+        resilience = Resilience(_settings(hedge_min_samples=10))
+        _learn(resilience, "glm/x")
+
+        async def send(started: asyncio.Event):
+            started.set()
+            await asyncio.sleep(0.03)
+            return "ok"
+
+        assert await resilience.hedged("glm/x", send) == "ok"
+        assert resilience.stats()["models"]["glm/x"]["hedges"] == 0
@@ -0,0 +1,103 @@
+"""
+LLM响应缓存测试
+Tests for the record/replay LLM response cache
+"""
+
+import os
+
+import pytest
+
+from src.services.llm.response_cache import (
+    INDEX_FILE,
+    SEGMENT_PREFIX,
+    ResponseCache,
+    ResponseCacheMiss,
+)
+
+
+def _record(cache: ResponseCache, prompt: str, response: str) -> None:
+    key, cached = cache.begin("glm/test", prompt, 0.7)
+    assert cached is None
+    cache.finish(key, response, "glm/test", 0.7)
+
+
+def _segments(directory) -> list:
+    return sorted(name for name in os.listdir(directory) if name.startswith(SEGMENT_PREFIX))
+
+
+class TestResponseCache:
+    """录制/回放缓存测试"""
+
+    def test_replay_returns_recorded_responses_in_order(self, tmp_path):
+        """测试同一提示词多次出现时按出现顺序回放"""
+        recorder = ResponseCache(str(tmp_path), mode="record")
+        _record(recorder, "你好", "第一次")
+        _record(recorder, "你好", "第二次")
+        _record(recorder, "再见", "另一个")
+        recorder.close()
+
+        replayer = ResponseCache(str(tmp_path), mode="replay")
+        assert replayer.begin("glm/test", "你好", 0.7)[1] == "第一次"
+        assert replayer.begin("glm/test", "再见", 0.7)[1] == "另一个"
+        assert replayer.begin("glm/test", "你好", 0.7)[1] == "第二次"
+
+    def test_replay_miss_raises(self, tmp_path):
+        """测试回放模式下未录制的请求抛出 ResponseCacheMiss"""
+        recorder = ResponseCache(str(tmp_path), mode="record")
+        _record(recorder, "你好", "响应")
+        recorder.close()
+
+        replayer = ResponseCache(str(tmp_path), mode="replay")
+        with pytest.raises(ResponseCacheMiss):
+            replayer.begin("glm/test", "没有录制", 0.7)
+        # 同一提示词第二次出现也没有录制
+        replayer.begin("glm/test", "你好", 0.7)
+        with pytest.raises(ResponseCacheMiss):
+            replayer.begin("glm/test", "你好", 0.7)
+
+    def test_lru_eviction_deletes_dead_segments(self, tmp_path):
+        """测试超过上限时淘汰最近最少使用的记录并删除全部失效的段文件"""
+        cache = ResponseCache(str(tmp_path), mode="read_through", max_bytes=1500, segment_bytes=400)
+        cache.put("first", {"response": "x" * 100})
+        for i in range(6):
+            cache.put(f"old{i}", {"response": "x" * 100})
+            assert cache.get("first") is not None  # 保持最近使用
+        for i in range(10):
+            cache.put(f"new{i}", {"response": "x" * 100})
+            cache.get("first")
+
+        assert cache.get("first") is not None
+        assert cache.get("old0") is None
+        stats = cache.stats()
+        assert stats["evictions"] > 0
+        assert stats["bytes"] <= 1500
+        assert len(_segments(tmp_path)) == stats["segments"]
+        assert f"{SEGMENT_PREFIX}000001.jsonl" in _segments(tmp_path)  # "first" 仍在第一个段中
+        assert f"{SEGMENT_PREFIX}000002.jsonl" not in _segments(tmp_path)
+        cache.close()
+
+    def test_index_rebuilt_from_segments_after_crash(self, tmp_path):
+        """测试进程崩溃（未保存索引、最后一行写了一半）后从段文件重建索引"""
+        recorder = ResponseCache(str(tmp_path), mode="record")
+        _record(recorder, "a", "响应a")
+        _record(recorder, "b", "响应b")
+        # 不调用 close()：索引没有保存
+        recorder._active.close()
+        assert not os.path.exists(tmp_path / INDEX_FILE)
+        with open(tmp_path / _segments(tmp_path)[-1], "ab") as file:
+            file.write(b'{"key": "torn", "response": "')
+
+        replayer = ResponseCache(str(tmp_path), mode="replay")
+        assert replayer.begin("glm/test", "a", 0.7)[1] == "响应a"
+        assert replayer.begin("glm/test", "b", 0.7)[1] == "响应b"
+        assert replayer.stats()["entries"] == 2
+
+    def test_corrupt_index_is_rebuilt(self, tmp_path):
+        """测试索引文件损坏时从段文件重建"""
+        recorder = ResponseCache(str(tmp_path), mode="record")
+        _record(recorder, "a", "响应a")
+        recorder.close()
+        (tmp_path / INDEX_FILE).write_text("{not json", encoding="utf-8")
+
+        replayer = ResponseCache(str(tmp_path), mode="replay")
+        assert replayer.begin("glm/test", "a", 0.7)[1] == "响应a"
@@ -0,0 +1,117 @@
+"""
+游戏调度器测试
+Tests for the running-game cap and priority queues of GameScheduler
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from src.services.game_manager import scheduler as scheduler_module
+from src.services.game_manager.scheduler import (
+    BACKGROUND,
+    DEFAULT_GAME_SECONDS,
+    INTERACTIVE,
+    GameScheduler,
+    SchedulerFull,
+)
+
+
+class Launches(list):
+    """按启动顺序记录会话ID"""
+
+    def submit(self, scheduler: GameScheduler, session_id: str, priority: str = INTERACTIVE) -> str:
+        return scheduler.submit(session_id, priority, lambda: self.append(session_id))
+
+
+class TestGameScheduler:
+    """调度器测试"""
+
+    def test_running_cap(self):
+        """测试运行数达到上限后排队"""
+        scheduler, started = GameScheduler(max_running=2, max_queued=4), Launches()
+        assert started.submit(scheduler, "a") == "running"
+        assert started.submit(scheduler, "b") == "running"
+        assert started.submit(scheduler, "c") == "queued"
+        assert started == ["a", "b"]
+        assert scheduler.stats()["running"] == 2
+        assert scheduler.position("c") == 1
+
+    def test_interactive_starts_before_background(self):
+        """测试有游戏结束时先启动 interactive 队列，同一队列按提交顺序"""
+        scheduler, started = GameScheduler(max_running=1, max_queued=4), Launches()
+        started.submit(scheduler, "a")
+        started.submit(scheduler, "bg1", BACKGROUND)
+        started.submit(scheduler, "bg2", BACKGROUND)
+        started.submit(scheduler, "i1", INTERACTIVE)
+        assert [scheduler.position(s) for s in ("i1", "bg1", "bg2")] == [1, 2, 3]
+
+        for finished, expected in (("a", "i1"), ("i1", "bg1"), ("bg1", "bg2")):
+            scheduler.finished(finished)
+            assert started[-1] == expected
+        scheduler.finished("bg2")
+        assert scheduler.stats()["running"] == 0
+
+    def test_failed_launch_starts_next(self):
+        """测试排队游戏启动失败时继续启动下一局"""
+        scheduler, started = GameScheduler(max_running=1, max_queued=4), Launches()
+        started.submit(scheduler, "a")
+
+        def broken():
+            raise RuntimeError("launch failed")
+
+        scheduler.submit("broken", INTERACTIVE, broken)
+        started.submit(scheduler, "b")
+        scheduler.finished("a")
+        assert started == ["a", "b"]
+        assert scheduler.stats()["running"] == 1
+
+    def test_full_queue_raises_retry_after(self):
+        """测试排队已满时拒绝，还没有游戏结束时按默认时长和运行上限估计重试时间"""
+        scheduler, started = GameScheduler(max_running=2, max_queued=1), Launches()
+        for session_id in ("a", "b", "c"):
+            started.submit(scheduler, session_id)
+
+        with pytest.raises(SchedulerFull) as excinfo:
+            scheduler.check()
+        assert excinfo.value.retry_after == DEFAULT_GAME_SECONDS / 2
+        with pytest.raises(SchedulerFull):
+            started.submit(scheduler, "d")
+        assert scheduler.stats()["rejected"] == 2
+        assert scheduler.position("d") is None
+
+    def test_retry_after_uses_average_game_time(self, monkeypatch):
+        """测试有游戏结束后按最近游戏时长的滑动平均估计重试时间"""
+        now = [1000.0]
+        monkeypatch.setattr(scheduler_module, "time", SimpleNamespace(monotonic=lambda: now[0]))
+        scheduler, started = GameScheduler(max_running=2, max_queued=0), Launches()
+        started.submit(scheduler, "a")
+        started.submit(scheduler, "b")
+        now[0] += 9.0
+        scheduler.finished("a")
+        started.submit(scheduler, "c")
+        with pytest.raises(SchedulerFull) as excinfo:
+            scheduler.check()
+        assert excinfo.value.retry_after == 5.0  # ceil(9 / 2)
+
+        now[0] += 21.0
+        scheduler.finished("b")
+        started.submit(scheduler, "d")
+        with pytest.raises(SchedulerFull) as excinfo:
+            scheduler.check()
+        assert excinfo.value.retry_after == 7.0  # ceil((0.8 * 9 + 0.2 * 30) / 2)
+
+    def test_cancel_queued_game(self):
+        """测试取消排队中的游戏后不会被启动，位置前移"""
+        scheduler, started = GameScheduler(max_running=1, max_queued=4), Launches()
+        for session_id in ("a", "b", "c"):
+            started.submit(scheduler, session_id)
+        assert scheduler.cancel("b")
+        assert not scheduler.cancel("b")
+        assert not scheduler.cancel("a")  # 已在运行
+        assert scheduler.position("b") is None
+        assert scheduler.position("c") == 1
+
+        scheduler.finished("a")
+        assert started == ["a", "c"]
+        assert scheduler.stats()["cancelled"] == 1
@@ -0,0 +1,120 @@
+"""
+会话换出与重新加载测试
+Tests for session eviction, rehydration and the TTL / memory budget sweep
+"""
+
+import itertools
+import time
+
+import pytest
+
+from src.core.game.game_master import GameMaster
+from src.services.game_manager import session_manager
+from src.services.game_manager.scheduler import GameScheduler
+from src.services.game_manager.session_manager import GameSession, GameSessionManager
+from src.services.game_manager.shared_backend import SharedBackend
+from src.services.logger.game_logger import save_game
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    """独立于全局单例的会话管理器，会话目录在临时目录下"""
+    counter = itertools.count()
+
+    def log_directory() -> str:
+        directory = tmp_path / f"session_{next(counter)}"
+        directory.mkdir()
+        return str(directory)
+
+    monkeypatch.setattr(session_manager, "log_directory", log_directory)
+    monkeypatch.setattr(session_manager, "shared_backend", SharedBackend())
+    manager = object.__new__(GameSessionManager)
+    manager._initialized = False
+    manager.__init__()
+    manager.ttl = 3600.0
+    manager.memory_budget = 1 << 40
+    manager.sweep_interval = 3600.0
+    return manager
+
+
+def _finished(manager: GameSessionManager, make_state, session_id: str) -> GameSession:
+    """注册一局已结束的游戏（最终文件已写入会话目录）"""
+    state = make_state(session_id)
+    state.winner = "Villagers"
+    log_dir = session_manager.log_directory()
+    gamemaster = GameMaster(state)
+    save_game(state, gamemaster.logs, log_dir)
+    session = GameSession(session_id, state, gamemaster, log_dir)
+    session.has_run = True
+    with manager._lock:
+        manager._sessions[session_id] = session
+    return session
+
+
+class TestSessionEviction:
+    """会话换出测试"""
+
+    def test_evicted_session_rehydrates_on_access(self, manager, make_state):
+        """测试换出的会话只保留摘要，再次访问时从会话目录重新加载"""
+        session = _finished(manager, make_state, "s1")
+        expected = session.state.to_dict()
+        manager.ttl = 0.0
+        assert manager.sweep() == 1
+
+        assert "s1" not in manager.get_all_sessions()
+        summary = manager.get_session_summaries()["s1"]
+        assert summary.evicted and summary.winner == "Villagers"
+        assert summary.resident_bytes > 0
+
+        rehydrated = manager.get_session("s1")
+        assert rehydrated is not session
+        assert rehydrated.gamemaster is None
+        assert rehydrated.state.to_dict() == expected
+        assert rehydrated.resident_bytes > 0
+        assert manager.get_session("s1") is rehydrated
+        assert manager.stats()["rehydrations"] == 1
+
+        # 重新加载的会话可以再次换出
+        assert manager.sweep() == 1
+        assert manager.stats()["evictions"] == 2
+
+    def test_budget_evicts_least_recently_used_then_ttl(self, manager, make_state):
+        """测试超过内存上限时按最久未访问的顺序换出，超过保留时间的会话无论大小都换出"""
+        a, b, c = (_finished(manager, make_state, session_id) for session_id in ("a", "b", "c"))
+        manager.get_session("a")  # 访问顺序变为 b, c, a
+        sizes = {session.session_id: session.measure() for session in (a, b, c)}
+
+        manager.memory_budget = sizes["c"] + sizes["a"]
+        assert manager.sweep() == 1
+        assert list(manager.get_all_sessions()) == ["c", "a"]
+        assert manager.stats()["resident_bytes"] <= manager.memory_budget
+
+        manager.memory_budget = 1 << 40
+        c.last_access = time.monotonic() - manager.ttl - 1
+        assert manager.sweep() == 1
+        assert list(manager.get_all_sessions()) == ["a"]
+        assert set(manager.get_session_summaries()) == {"a", "b", "c"}
+
+    def test_created_session_is_never_evicted(self, manager, make_state):
+        """测试创建后尚未启动（或排队中）的会话不会被换出，之后仍能启动"""
+        manager.ttl = 0.0
+        manager.memory_budget = 1
+        manager.sweep_interval = 0.0
+        # 唯一的运行位置已被占用：启动的游戏进入队列，不会真正运行
+        manager.scheduler = GameScheduler(max_running=1, max_queued=4)
+        manager.scheduler.submit("other", "interactive", lambda: None)
+
+        session = manager.create_game("glm/a", "glm/b")
+        finished = _finished(manager, make_state, "done")
+        assert manager.sweep() == 1
+        assert session.session_id in manager.get_all_sessions()
+        assert finished.session_id not in manager.get_all_sessions()
+
+        assert manager.start_game(session.session_id) == "queued"
+        assert manager.sweep() == 0
+
+        # 取消排队后仍是未启动的会话
+        assert manager.stop_game(session.session_id)
+        assert manager.sweep() == 0
+        assert manager.get_session(session.session_id) is session
+        assert manager.start_game(session.session_id) == "queued"
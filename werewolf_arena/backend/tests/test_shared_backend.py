@@ -0,0 +1,135 @@
+"""
+多 worker 共享后端测试
+Tests for the SQLite + Unix socket shared backend
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from src.services.game_manager import shared_backend
+from src.services.game_manager.shared_backend import SqliteBackend
+
+
+def _backend(directory, worker: str, monkeypatch) -> SqliteBackend:
+    """以指定的 worker 标识创建后端（同一进程中模拟多个 worker）"""
+    monkeypatch.setattr(shared_backend, "WORKER_ID", worker)
+    return SqliteBackend(directory)
+
+
+async def _wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+class TestSqliteStore:
+    """会话元数据和序列号测试"""
+
+    def test_next_sequence_is_atomic_across_connections(self, tmp_path, monkeypatch):
+        """测试两个后端的多个线程（各自的连接）同时取序列号时不重复、不跳号"""
+        backends = [_backend(tmp_path, worker, monkeypatch) for worker in ("worker-a", "worker-b")]
+        values = []
+        lock = threading.Lock()
+
+        def take(backend: SqliteBackend) -> None:
+            taken = [backend.next_sequence("s1") for _ in range(50)]
+            with lock:
+                values.extend(taken)
+
+        threads = [threading.Thread(target=take, args=(backend,)) for backend in backends for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(values) == list(range(1, 401))
+        assert backends[1].current_sequence("s1") == 400
+        assert backends[0].next_sequence("s2") == 1
+        backends[1].reset_sequence("s1")
+        assert backends[0].sequences() == {"s2": 1}
+
+    def test_sessions_put_get_list_delete(self, tmp_path, monkeypatch):
+        """测试会话元数据对所有 worker 可见，并记录所属 worker"""
+        a = _backend(tmp_path, "worker-a", monkeypatch)
+        a.put_session("s1", {"status": "running", "players": ["Alice"]})
+        b = _backend(tmp_path, "worker-b", monkeypatch)
+        b.put_session("s2", {"status": "queued"})
+
+        assert a.get_session("s2") == {"status": "queued", "worker": "worker-b"}
+        assert b.get_session("s1") == {"status": "running", "players": ["Alice"], "worker": "worker-a"}
+        assert set(b.list_sessions()) == {"s1", "s2"}
+
+        # 由其他 worker 更新后归属改变
+        b.put_session("s1", {"status": "finished"})
+        assert a.get_session("s1") == {"status": "finished", "worker": "worker-b"}
+
+        a.delete_session("s1")
+        assert b.get_session("s1") is None
+        assert set(a.list_sessions()) == {"s2"}
+
+
+@pytest.mark.asyncio
+class TestSqlitePubSub:
+    """跨 worker 事件发布订阅测试"""
+
+    async def test_publish_reaches_subscriber_in_order(self, tmp_path, monkeypatch):
+        """测试一个 worker 发布的事件按顺序交给另一个 worker 的处理函数"""
+        publisher = _backend(tmp_path, "worker-a", monkeypatch)
+        subscriber = _backend(tmp_path, "worker-b", monkeypatch)
+        received, notified, echoed = [], [], []
+        subscriber.subscribe("game_update", lambda payload: received.append(payload["seq"]))
+
+        async def on_notify(payload):
+            notified.append(payload)
+
+        subscriber.subscribe("notify", on_notify)
+        publisher.subscribe("game_update", echoed.append)
+
+        assert not publisher.publish("game_update", {"seq": 0})  # 尚未启动
+        await subscriber.start()
+        await publisher.start()
+        try:
+            assert publisher.has_peers()
+            for seq in range(1, 51):
+                assert publisher.publish("game_update", {"seq": seq})
+            # 从其他线程发布
+            thread = threading.Thread(target=publisher.publish, args=("notify", {"text": "完成"}))
+            thread.start()
+            thread.join()
+
+            await _wait_for(lambda: len(received) == 50 and notified)
+            assert received == list(range(1, 51))
+            assert notified == [{"text": "完成"}]
+            assert echoed == []  # 不发给自己
+            assert publisher.stats()["published"] == 51
+            assert subscriber.stats()["received"] == 51
+        finally:
+            await publisher.close()
+            await subscriber.close()
+        assert not (tmp_path / "peers" / "worker-a.sock").exists()
+
+    async def test_publish_to_one_worker_and_stale_peer(self, tmp_path, monkeypatch):
+        """测试指定 worker 的发布只发给该 worker，已退出 worker 的套接字文件被清理"""
+        a = _backend(tmp_path, "worker-a", monkeypatch)
+        b = _backend(tmp_path, "worker-b", monkeypatch)
+        c = _backend(tmp_path, "worker-c", monkeypatch)
+        got_b, got_c = [], []
+        b.subscribe("notify", got_b.append)
+        c.subscribe("notify", got_c.append)
+        (tmp_path / "peers" / "worker-gone.sock").touch()
+
+        for backend in (a, b, c):
+            await backend.start()
+        try:
+            assert a.publish("notify", {"to": "c"}, worker="worker-c")
+            assert a.publish("notify", {"to": "all"})
+            await _wait_for(lambda: len(got_c) == 2 and got_b)
+            assert got_b == [{"to": "all"}]
+            assert got_c == [{"to": "c"}, {"to": "all"}]
+            assert not (tmp_path / "peers" / "worker-gone.sock").exists()
+        finally:
+            for backend in (a, b, c):
+                await backend.close()
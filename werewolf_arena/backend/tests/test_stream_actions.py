@@ -0,0 +1,170 @@
+"""
+流式行动响应测试
+Tests for the incremental JSON scanner and early-returning streamed actions
+"""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from src.config.settings import settings
+from src.services.llm import generator
+from src.services.llm.admission import AdmissionController
+from src.services.llm.client import LLMClient
+from src.services.llm.resilience import Resilience
+from src.services.llm.response_cache import ResponseCache
+from src.utils.helpers import IncrementalJsonScanner
+
+SCHEMA = {
+    "type": "object",
+    "properties": {"reasoning": {"type": "string"}, "vote": {"type": "string"}},
+    "required": ["reasoning", "vote"],
+}
+
+
+def _feed(chunks) -> tuple:
+    """逐段喂给扫描器，返回每段新完成的字段名"""
+    scanner = IncrementalJsonScanner()
+    return scanner, [scanner.feed(chunk) for chunk in chunks]
+
+
+class TestIncrementalJsonScanner:
+    """增量JSON扫描测试"""
+
+    def test_key_split_across_chunks(self):
+        """测试字段名和值被拆到多段时在值结束的那一段完成"""
+        scanner, completed = _feed(['```json\n{"rea', 'soning": "想', '一想", "vo', 'te": "Bo', 'b"', "}\n```"])
+        assert completed == [[], [], ["reasoning"], [], ["vote"], []]
+        assert scanner.values == {"reasoning": "想一想", "vote": "Bob"}
+        assert scanner.done
+
+    def test_escaped_quotes_and_unicode_in_reasoning(self):
+        """测试字符串中的转义引号、\\u 转义和括号不会提前结束字段"""
+        text = json.dumps(
+            {"reasoning": '他说"我是预言家" {不可信} [\\]', "vote": "Cara"}, ensure_ascii=True
+        )
+        scanner, completed = _feed(list(text))  # 每次一个字符
+        assert [keys for keys in completed if keys] == [["reasoning"], ["vote"]]
+        assert scanner.values == json.loads(text)
+
+    def test_result_key_before_reasoning(self):
+        """测试结果字段在前时不必等待推理内容"""
+        scanner = IncrementalJsonScanner()
+        assert scanner.feed('{"vote": "Dan",') == ["vote"]
+        assert scanner.feed(' "reasoning": "很长的') == []
+        assert scanner.values == {"vote": "Dan"}
+        assert not scanner.done
+        assert scanner.feed('推理"}') == ["reasoning"]
+        assert scanner.done
+
+    def test_result_key_after_reasoning_and_nested_values(self):
+        """测试嵌套对象、数组和数字作为一个整体值"""
+        scanner, completed = _feed(['{"notes": {"a": [1, {"b": "}"}]}, "score": 3', ', "vote": "Eve"}'])
+        assert completed == [["notes"], ["score", "vote"]]
+        assert scanner.values == {"notes": {"a": [1, {"b": "}"}]}, "score": 3, "vote": "Eve"}
+        assert scanner.done
+
+
+class FakeStreamClient:
+    """按给定分段流式返回的客户端，记录是否被提前关闭"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.sent = 0
+        self.closed = False
+
+    async def astream(self, **kwargs):
+        try:
+            for chunk in self.chunks:
+                self.sent += 1
+                yield chunk
+        finally:
+            self.closed = True
+
+
+class FakeProvider:
+    """流式返回固定分段的提供商"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.sent = 0
+
+    async def astream(self, model, **kwargs):
+        for chunk in self.chunks:
+            self.sent += 1
+            yield chunk
+
+
+def _client(provider, cache: ResponseCache) -> LLMClient:
+    return LLMClient(
+        {"glm": provider},
+        admission=AdmissionController(SimpleNamespace(admission_enabled=False)),
+        cache=cache,
+        resilience=Resilience(SimpleNamespace(
+            hedge_enabled=False,
+            hedge_percentile=0.95,
+            hedge_min_samples=20,
+            hedge_min_delay=0.05,
+            hedge_budget=0.1,
+            circuit_failure_threshold=5,
+            circuit_cooldown=30.0,
+        )),
+        failover={},
+    )
+
+
+def _request(model: str = "glm/x") -> dict:
+    return dict(
+        model=model,
+        prompt="投票",
+        temperature=0.7,
+        json_mode=True,
+        response_schema=SCHEMA,
+        system_message=generator.SYSTEM_MESSAGE,
+    )
+
+
+@pytest.fixture
+def cancel_remainder(monkeypatch):
+    monkeypatch.setattr(settings.llm, "stream_remainder", "cancel")
+
+
+@pytest.mark.asyncio
+class TestStreamAction:
+    """流式行动提前返回测试"""
+
+    async def test_value_outside_allowed_values_is_rejected(self, cancel_remainder):
+        """测试结果字段不在允许值中时关闭流并要求重试"""
+        client = FakeStreamClient(['{"vote": "Zed"', ', "reasoning": "', "剩余内容", '"}'])
+        accepted, result, log = await generator._astream_action(
+            client, _request(), "投票", ["Alice", "Bob"], "vote"
+        )
+        assert (accepted, result) == (False, "Zed")
+        assert log.raw_resp == '{"vote": "Zed"'
+        assert client.closed and client.sent == 1
+
+    async def test_early_close_caches_partial_text_for_replay(self, tmp_path, cancel_remainder):
+        """测试提前关闭时录制已收到的部分文本，回放得到相同的结果"""
+        chunks = ['{"vote": "Bob"', ', "reasoning": "', "不会被读到", '"}']
+        provider = FakeProvider(chunks)
+        recorder = ResponseCache(str(tmp_path), mode="record")
+        accepted, result, log = await generator._astream_action(
+            _client(provider, recorder), _request(), "投票", ["Alice", "Bob"], "vote"
+        )
+        assert (accepted, result) == (True, "Bob")
+        assert provider.sent == 1
+        recorder.close()
+
+        replay_provider = FakeProvider([])
+        replayer = ResponseCache(str(tmp_path), mode="replay")
+        replay_client = _client(replay_provider, replayer)
+        assert [chunk async for chunk in replay_client.astream(**_request())] == ['{"vote": "Bob"']
+
+        accepted, result, replayed = await generator._astream_action(
+            _client(replay_provider, ResponseCache(str(tmp_path), mode="replay")),
+            _request(), "投票", ["Alice", "Bob"], "vote",
+        )
+        assert (accepted, result) == (True, "Bob")
+        assert replayed.raw_resp == log.raw_resp
+        assert replay_provider.sent == 0
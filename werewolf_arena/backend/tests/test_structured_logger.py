@@ -0,0 +1,95 @@
+"""
+结构化日志测试
+Tests for the queued structlog pipeline: drop counting, truncation, sampling and per-module levels
+"""
+
+import json
+import logging
+
+import pytest
+
+from src.config.settings import LogSettings
+from src.services.logger import structured
+
+
+@pytest.fixture
+def configure(capsys):
+    """按给定配置重新配置日志，输出写到 capsys；结束后恢复默认配置"""
+    module_names = []
+
+    def configure(**kwargs) -> None:
+        log_settings = LogSettings(**kwargs)
+        module_names.extend(log_settings.module_levels)
+        structured.configure_logging(log_settings=log_settings)
+
+    yield configure
+    for name in module_names:
+        logging.getLogger(name).setLevel(logging.NOTSET)
+    structured.configure_logging()
+
+
+def _lines(capsys) -> list:
+    """写出队列中的日志并解析输出的 JSON 行"""
+    structured.shutdown()
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines() if line]
+
+
+class TestStructuredLogger:
+    """结构化日志测试"""
+
+    def test_full_queue_drops_and_counts(self, configure, capsys):
+        """测试队列满时丢弃记录并计数，不阻塞调用方"""
+        configure(queue_size=2)
+        structured.shutdown()  # 停止后台线程，队列不再被取走
+        logger = structured.get_logger("src.tests.structured.drop")
+        for index in range(5):
+            logger.info("test.event", index=index)
+
+        stats = structured.stats()
+        assert stats["configured"] and stats["level"] == "INFO"
+        assert stats["queue_depth"] == 2
+        assert stats["dropped"] == 3
+
+    def test_long_fields_are_truncated(self, configure, capsys):
+        """测试超长的字符串字段被截断并注明省略的长度，其他字段不变"""
+        configure(max_field_chars=40)
+        structured.get_logger("src.tests.structured.truncate").info(
+            "test.event", text="x" * 55, short="ok", count=12345678901234
+        )
+
+        (line,) = _lines(capsys)
+        assert line["text"] == "x" * 40 + "...(+15 chars)"
+        assert line["short"] == "ok"
+        assert line["count"] == 12345678901234
+        assert line["logger"] == "src.tests.structured.truncate"
+
+    def test_sampled_event_keeps_one_in_n(self, configure, capsys):
+        """测试配置了采样的事件每 N 条保留一条并标注采样率，其他事件全部保留"""
+        configure(sample_every={"llm.raw_response": 3, "test.disabled": 1})
+        logger = structured.get_logger("src.tests.structured.sample")
+        for index in range(7):
+            logger.info("llm.raw_response", index=index)
+            logger.info("test.disabled", index=index)
+
+        lines = _lines(capsys)
+        sampled = [line for line in lines if line["event"] == "llm.raw_response"]
+        assert [line["index"] for line in sampled] == [0, 3, 6]
+        assert all(line["sampled"] == "1/3" for line in sampled)
+        kept = [line for line in lines if line["event"] == "test.disabled"]
+        assert [line["index"] for line in kept] == list(range(7))
+        assert all("sampled" not in line for line in kept)
+
+    def test_module_levels_override_root_level(self, configure, capsys):
+        """测试按模块设置的级别覆盖默认级别，并作用于子模块"""
+        configure(level="WARNING", module_levels={"src.tests.structured.verbose": "debug"})
+        quiet = structured.get_logger("src.tests.structured.quiet")
+        verbose = structured.get_logger("src.tests.structured.verbose.child")
+        quiet.info("test.quiet_info")
+        quiet.warning("test.quiet_warning")
+        verbose.debug("test.verbose_debug")
+
+        lines = _lines(capsys)
+        assert [(line["event"], line["level"]) for line in lines] == [
+            ("test.quiet_warning", "warning"),
+            ("test.verbose_debug", "debug"),
+        ]
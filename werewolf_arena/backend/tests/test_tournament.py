@@ -0,0 +1,140 @@
+"""
+锦标赛执行器测试
+Tests for tournament scheduling budgets and the append-only result store
+"""
+
+import collections
+import concurrent.futures
+import json
+import threading
+import time
+
+import pytest
+
+from src.services.game_manager import tournament
+from src.services.game_manager.tournament import GameSpec, ResultStore, Tournament, parse_budgets
+
+
+def _thread_pool(workers: int) -> concurrent.futures.Executor:
+    return concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+
+
+class FakeGames:
+    """代替 play_game：记录每个提供商同时进行的对局数，可以让指定对局出错"""
+
+    def __init__(self, fail=(), raise_for=(), seconds: float = 0.05):
+        self.fail = set(fail)
+        self.raise_for = set(raise_for)
+        self.seconds = seconds
+        self.played = []
+        self.peak = collections.Counter()
+        self.peak_total = 0
+        self._running = collections.Counter()
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, spec: GameSpec, options):
+        providers = Tournament._providers(spec)
+        with self._lock:
+            self.played.append(spec.key)
+            self._total += 1
+            self.peak_total = max(self.peak_total, self._total)
+            for provider in providers:
+                self._running[provider] += 1
+                self.peak[provider] = max(self.peak[provider], self._running[provider])
+        try:
+            time.sleep(self.seconds)
+            if spec.key in self.raise_for:
+                raise RuntimeError("worker crashed")
+        finally:
+            with self._lock:
+                self._total -= 1
+                for provider in providers:
+                    self._running[provider] -= 1
+        error = "game did not finish" if spec.key in self.fail else None
+        return {**spec._asdict(), "winner": None if error else "Villagers", "log_dir": None,
+                "error": error, "seconds": self.seconds}
+
+
+@pytest.fixture
+def games(monkeypatch):
+    def install(**kwargs) -> FakeGames:
+        fake = FakeGames(**kwargs)
+        monkeypatch.setattr(tournament, "play_game", fake)
+        return fake
+    return install
+
+
+def _tournament(directory, **kwargs) -> Tournament:
+    return Tournament(ResultStore(str(directory)), executor_factory=_thread_pool, **kwargs)
+
+
+class TestTournament:
+    """对局调度测试"""
+
+    def test_provider_budgets_limit_concurrent_games(self, tmp_path, games):
+        """测试按提供商的上限和全局上限，受限的对局不阻塞其他提供商的对局"""
+        fake = games()
+        specs = Tournament.plan(
+            [("glm/a", "glm/b"), ("glm/a", "openrouter/c"), ("siliconflow/d", "siliconflow/e")], 3
+        )
+        results = _tournament(
+            tmp_path, workers=4, max_in_flight=3, provider_budgets=parse_budgets(["glm=1", "siliconflow=2"])
+        ).run(specs)
+
+        assert len(results) == 9
+        assert sorted(fake.played) == sorted(spec.key for spec in specs)
+        assert fake.peak["glm"] == 1
+        assert fake.peak["siliconflow"] == 2
+        assert fake.peak_total == 3
+
+    def test_rerun_skips_completed_games(self, tmp_path, games):
+        """测试重新运行时只运行失败和新增的对局"""
+        specs = Tournament.plan([("glm/a", "glm/b")], 3)
+        games(fail=[("glm/a", "glm/b", 1)])
+        _tournament(tmp_path).run(specs)
+
+        fake = games()
+        more = Tournament.plan([("glm/a", "glm/b")], 4)
+        results = _tournament(tmp_path).run(more)
+        assert sorted(fake.played) == [("glm/a", "glm/b", 1), ("glm/a", "glm/b", 3)]
+        assert all(row["error"] is None for row in results)
+        assert ResultStore(str(tmp_path)).completed() == {spec.key for spec in more}
+
+    def test_worker_exception_is_recorded(self, tmp_path, games):
+        """测试任务函数抛出异常（如工作进程退出）时记录失败的结果，其他对局照常完成"""
+        crashed = ("glm/a", "glm/b", 0)
+        games(raise_for=[crashed])
+        results = _tournament(tmp_path, workers=2).run(Tournament.plan([("glm/a", "glm/b")], 2))
+
+        by_key = {(row["villager_model"], row["werewolf_model"], row["index"]): row for row in results}
+        assert by_key[crashed]["error"] == "RuntimeError: worker crashed"
+        assert by_key[crashed]["winner"] is None
+        assert by_key[("glm/a", "glm/b", 1)]["winner"] == "Villagers"
+        assert ResultStore(str(tmp_path)).completed() == {("glm/a", "glm/b", 1)}
+
+
+class TestResultStore:
+    """结果文件测试"""
+
+    def test_torn_last_line_is_ignored(self, tmp_path):
+        """测试崩溃时写了一半的最后一行被忽略，同一对局保留最后一条结果"""
+        store = ResultStore(str(tmp_path))
+        row = {"villager_model": "glm/a", "werewolf_model": "glm/b", "winner": None}
+        store.append({**row, "index": 0, "error": "timeout"})
+        store.append({**row, "index": 0, "error": None, "winner": "Werewolves"})
+        store.append({**row, "index": 1, "error": None})
+        with open(store.path, "a", encoding="utf-8") as file:
+            file.write(json.dumps({**row, "index": 2, "error": None})[:30])
+
+        rows = sorted(store.rows(), key=lambda row: row["index"])
+        assert [(row["index"], row["winner"]) for row in rows] == [(0, "Werewolves"), (1, None)]
+        assert store.completed() == {("glm/a", "glm/b", 0), ("glm/a", "glm/b", 1)}
+
+    def test_parse_budgets_rejects_invalid_values(self):
+        """测试 provider=N 格式的提供商上限"""
+        assert parse_budgets(["glm=2", " openrouter = 0"]) == {"glm": 2, "openrouter": 1}
+        with pytest.raises(ValueError):
+            parse_budgets(["glm"])
+        with pytest.raises(ValueError):
+            parse_budgets(["glm=two"])